@@ -126,7 +126,7 @@ export class Client {
 		return fetch(input, { ...init, headers });
 	}
 
-	stream(url: URL): EventSource {
+	stream(url: URL, binary = false): EventSource {
 		const headers = new Headers();
 		if (this && this.cookies) {
 			headers.append("Cookie", this.cookies);
@@ -144,11 +144,15 @@ export class Client {
 
 		this.abort_controller = new AbortController();
 
-		this.stream_instance = readable_stream(url.toString(), {
-			credentials: this.options.credentials ?? "same-origin",
-			headers: headers,
-			signal: this.abort_controller.signal
-		});
+		this.stream_instance = readable_stream(
+			url.toString(),
+			{
+				credentials: this.options.credentials ?? "same-origin",
+				headers: headers,
+				signal: this.abort_controller.signal
+			},
+			binary
+		);
 
 		return this.stream_instance;
 	}
@@ -22,6 +22,9 @@ export const SPACE_FETCHER_URL =
 	"https://gradio-space-api-fetcher-v2.hf.space/api";
 export const SPACE_URL = "https://hf.space/{}";
 
+// media types
+export const MSGPACK_STREAM_MEDIA_TYPE = "application/vnd.gradio.msgpack-stream";
+
 // messages
 export const QUEUE_FULL_MSG =
 	"This application is currently busy. Please try again. ";
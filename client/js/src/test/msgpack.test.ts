@@ -0,0 +1,48 @@
+import { describe, it, expect } from "vitest";
+import { decode_msgpack, msgpack_frames } from "../utils/msgpack";
+
+// msgpack.packb({"msg": "estimation", "rank": 300, "eta": 1.5,
+//                "data": [None, True, -40, b"\x01\x02"]})
+const payload = new Uint8Array([
+	132, 163, 109, 115, 103, 170, 101, 115, 116, 105, 109, 97, 116, 105, 111, 110,
+	164, 114, 97, 110, 107, 205, 1, 44, 163, 101, 116, 97, 203, 63, 248, 0, 0, 0,
+	0, 0, 0, 164, 100, 97, 116, 97, 148, 192, 195, 208, 216, 196, 2, 1, 2
+]);
+const expected = {
+	msg: "estimation",
+	rank: 300,
+	eta: 1.5,
+	data: [null, true, -40, new Uint8Array([1, 2])]
+};
+
+describe("decode_msgpack", () => {
+	it("decodes maps, strings, numbers, nil, booleans and binary", () => {
+		expect(decode_msgpack(payload)).toEqual(expected);
+	});
+
+	it("rejects trailing bytes", () => {
+		const padded = new Uint8Array([...payload, 0]);
+		expect(() => decode_msgpack(padded)).toThrow();
+	});
+});
+
+describe("msgpack_frames", () => {
+	it("yields length-prefixed frames split across chunks", async () => {
+		const frame = new Uint8Array([0, 0, 0, payload.byteLength, ...payload]);
+		const stream = new Uint8Array([...frame, ...frame]);
+		const body = new ReadableStream<Uint8Array>({
+			start(controller) {
+				for (let i = 0; i < stream.byteLength; i += 7) {
+					controller.enqueue(stream.slice(i, i + 7));
+				}
+				controller.close();
+			}
+		});
+
+		const messages = [];
+		for await (const message of msgpack_frames(body)) {
+			messages.push(message);
+		}
+		expect(messages).toEqual([expected, expected]);
+	});
+});
@@ -361,6 +361,13 @@ export interface ClientOptions {
 	 * with `run_history=False` on `launch()`, which takes precedence over this.
 	 */
 	record_history?: boolean;
+	/**
+	 * Whether to ask the server to send the queue stream as length-prefixed
+	 * msgpack frames instead of server-sent events, which are smaller and
+	 * cheaper to decode for large numeric payloads. Servers without msgpack
+	 * installed answer with server-sent events as before. Defaults to false.
+	 */
+	binary_stream?: boolean;
 }
 
 export interface FileData {
@@ -1,6 +1,11 @@
-import { BROKEN_CONNECTION_MSG, SSE_URL } from "../constants";
+import {
+	BROKEN_CONNECTION_MSG,
+	MSGPACK_STREAM_MEDIA_TYPE,
+	SSE_URL
+} from "../constants";
 import type { Client } from "../client";
-import { stream } from "fetch-event-stream";
+import { events, stream } from "fetch-event-stream";
+import { msgpack_frames } from "./msgpack";
 
 export async function open_stream(this: Client): Promise<void> {
 	let {
@@ -31,7 +36,7 @@ export async function open_stream(this: Client): Promise<void> {
 		url.searchParams.set("__sign", jwt);
 	}
 
-	stream = this.stream(url);
+	stream = this.stream(url, this.options.binary_stream ?? false);
 
 	if (!stream) {
 		console.warn("Cannot connect to SSE endpoint: " + url.toString());
@@ -39,7 +44,9 @@ export async function open_stream(this: Client): Promise<void> {
 	}
 
 	stream.onmessage = async function (event: MessageEvent) {
-		let _data = JSON.parse(event.data);
+		// Messages decoded from msgpack frames are already objects
+		let _data =
+			typeof event.data === "string" ? JSON.parse(event.data) : event.data;
 		if (_data.msg === "close_stream") {
 			close_stream(stream_status, that.abort_controller);
 			return;
@@ -190,9 +197,34 @@ function apply_edit(
 	return target;
 }
 
+/**
+ * Opens the queue stream asking for msgpack frames, and falls back to
+ * server-sent events if the server answers with those instead.
+ */
+async function negotiated_stream(
+	input: RequestInfo | URL,
+	init: RequestInit
+): Promise<AsyncIterable<{ data?: any }>> {
+	const headers = new Headers(init.headers);
+	headers.set("Accept", `${MSGPACK_STREAM_MEDIA_TYPE}, text/event-stream`);
+	const res = await fetch(input, { ...init, headers });
+	if (!res.ok) throw res;
+	const content_type = res.headers.get("content-type") ?? "";
+	if (res.body && content_type.startsWith(MSGPACK_STREAM_MEDIA_TYPE)) {
+		const body = res.body;
+		return (async function* () {
+			for await (const data of msgpack_frames(body)) {
+				yield { data };
+			}
+		})();
+	}
+	return events(res, init.signal);
+}
+
 export function readable_stream(
 	input: RequestInfo | URL,
-	init: RequestInit = {}
+	init: RequestInit = {},
+	binary = false
 ): EventSource {
 	const instance: EventSource & { readyState: number } = {
 		close: () => {
@@ -218,7 +250,7 @@ export function readable_stream(
 		}
 	};
 
-	stream(input, init)
+	(binary ? negotiated_stream(input, init) : stream(input, init))
 		.then(async (res) => {
 			instance.readyState = instance.OPEN;
 			try {
@@ -4,6 +4,7 @@ from __future__ import annotations
 
 import asyncio
 import concurrent.futures
+import contextlib
 import hashlib
 import json
 import math
@@ -91,6 +92,7 @@ class Client:
         _skip_components: bool = True,  # internal parameter to skip values certain components (e.g. State) that do not need to be displayed to users.
         analytics_enabled: bool = True,
         oauth_token: str | None = None,
+        binary_stream: bool = False,
     ):
         """
         Parameters:
@@ -104,10 +106,16 @@ class Client:
             httpx_kwargs: additional keyword arguments to pass to `httpx.Client`, `httpx.stream`, `httpx.get` and `httpx.post`. This can be used to set timeouts, proxies, http auth, etc.
             analytics_enabled: Whether to allow basic telemetry. If None, will use GRADIO_ANALYTICS_ENABLED environment variable or default to True.
             oauth_token: optional Hugging Face token for the app to act on your behalf, for endpoints whose function takes a `gr.OAuthToken`. Unlike `token`, which only authenticates you to the app, this is passed to the app's code, so it is sent only to endpoints that declare they need it — `view_api()` marks those. It is never sent anywhere else, and is not inferred from your locally saved token.
+            binary_stream: if True, asks the app to send the queue stream as length-prefixed msgpack frames instead of server-sent events, which are smaller and cheaper to decode for large numeric payloads. Requires the `msgpack` package. Apps without msgpack installed answer with server-sent events as before.
         """
         self.verbose = verbose
         self.token = token
         self.oauth_token = oauth_token
+        if binary_stream and not utils.msgpack_available():
+            raise ImportError(
+                "binary_stream=True requires the msgpack package. Install it with `pip install msgpack`."
+            )
+        self.binary_stream = binary_stream
         self.download_files = download_files
         self._skip_components = _skip_components
         self.headers = build_hf_headers(
@@ -188,6 +196,7 @@ class Client:
             self.src_prefixed.replace("http", "ws", 1), utils.WS_URL
         )
         self.upload_url = urllib.parse.urljoin(self.src_prefixed, utils.UPLOAD_URL)
+        self._chunked_uploads_supported: bool | None = None
         self.reset_url = urllib.parse.urljoin(self.src_prefixed, utils.RESET_URL)
         self.app_version = version.parse(self.config.get("version", "2.0"))
         self._info = self._get_api_info()
@@ -262,6 +271,12 @@ class Client:
         protocol: Literal["sse_v1", "sse_v2", "sse_v2.1", "sse_v3"],
         session_hash: str,
     ) -> None:
+        headers = self.headers
+        if self.binary_stream:
+            headers = {
+                **headers,
+                "Accept": f"{utils.MSGPACK_STREAM_MEDIA_TYPE}, text/event-stream",
+            }
         try:
             httpx_kwargs = self.httpx_kwargs.copy()
             httpx_kwargs.setdefault("timeout", httpx.Timeout(timeout=None))
@@ -273,58 +288,44 @@ class Client:
                     "GET",
                     self.sse_url,
                     params={"session_hash": session_hash},
-                    headers=self.headers,
+                    headers=headers,
                     cookies=self.cookies,
                 ) as response:
-                    buffer = b""
-                    for chunk in response.iter_bytes():
-                        buffer += chunk
-                        while b"\n\n" in buffer:
-                            line, buffer = buffer.split(b"\n\n", 1)
-                            line = line.decode("utf-8").rstrip("\n")
-                            if not len(line):
-                                continue
-                            if line.startswith("data:"):
-                                resp = json.loads(line[5:])
-                                if resp["msg"] == ServerMessage.heartbeat:
-                                    continue
-                                elif (
-                                    resp.get("message", "")
-                                    == ServerMessage.server_stopped
-                                ):
-                                    with self.pending_lock:
-                                        pending = list(
-                                            self.pending_messages_per_event.values()
-                                        )
-                                    for pending_messages in pending:
-                                        pending_messages.append(resp)
-                                    return
-                                elif resp["msg"] == ServerMessage.close_stream:
-                                    with self.pending_lock:
-                                        self.stream_open = False
-                                    return
-                                event_id = resp["event_id"]
-                                with self.pending_lock:
-                                    if event_id not in self.pending_messages_per_event:
-                                        self.pending_messages_per_event[event_id] = (
-                                            deque()
-                                        )
-                                    self.pending_messages_per_event[event_id].append(
-                                        resp
-                                    )
-                                    if resp["msg"] == ServerMessage.process_completed:
-                                        # The submitting thread may not have got here yet.
-                                        self.pending_event_ids.discard(event_id)
-                                    close = (
-                                        len(self.pending_event_ids) == 0
-                                        and protocol != "sse_v3"
-                                    )
-                                    if close:
-                                        self.stream_open = False
-                                if close:
-                                    return
-                            else:
-                                raise ValueError(f"Unexpected SSE line: '{line}'")
+                    if response.headers.get("content-type", "").startswith(
+                        utils.MSGPACK_STREAM_MEDIA_TYPE
+                    ):
+                        messages = utils.iter_msgpack_messages(response.iter_bytes())
+                    else:
+                        messages = utils.iter_sse_messages(response.iter_bytes())
+                    for resp in messages:
+                        if resp["msg"] == ServerMessage.heartbeat:
+                            continue
+                        elif resp.get("message", "") == ServerMessage.server_stopped:
+                            with self.pending_lock:
+                                pending = list(self.pending_messages_per_event.values())
+                            for pending_messages in pending:
+                                pending_messages.append(resp)
+                            return
+                        elif resp["msg"] == ServerMessage.close_stream:
+                            with self.pending_lock:
+                                self.stream_open = False
+                            return
+                        event_id = resp["event_id"]
+                        with self.pending_lock:
+                            if event_id not in self.pending_messages_per_event:
+                                self.pending_messages_per_event[event_id] = deque()
+                            self.pending_messages_per_event[event_id].append(resp)
+                            if resp["msg"] == ServerMessage.process_completed:
+                                # The submitting thread may not have got here yet.
+                                self.pending_event_ids.discard(event_id)
+                            close = (
+                                len(self.pending_event_ids) == 0
+                                and protocol != "sse_v3"
+                            )
+                            if close:
+                                self.stream_open = False
+                        if close:
+                            return
         except BaseException as e:
             # If the job is cancelled the stream will close so we
             # should not raise this httpx exception that comes from the
@@ -1384,19 +1385,23 @@ class Endpoint:
                     f"File {file_path} exceeds the maximum file size of {max_file_size} bytes "
                     f"set in {component_config.get('label', '') + ''} component."
                 )
-            with open(file_path, "rb") as f_:
-                files = [("files", (orig_name.name, f_))]
-                r = httpx.post(
-                    self.client.upload_url,
-                    headers=self.client.headers,
-                    cookies=self.client.cookies,
-                    verify=self.client.ssl_verify,
-                    files=files,
-                    **self.client.httpx_kwargs,
-                )
-            r.raise_for_status()
-            result = r.json()
-            file_path = result[0]
+            uploaded_path = None
+            if os.path.getsize(file_path) > utils.UPLOAD_CHUNK_SIZE:
+                uploaded_path = self._upload_file_in_chunks(file_path)
+            if uploaded_path is None:
+                with open(file_path, "rb") as f_:
+                    files = [("files", (orig_name.name, f_))]
+                    r = httpx.post(
+                        self.client.upload_url,
+                        headers=self.client.headers,
+                        cookies=self.client.cookies,
+                        verify=self.client.ssl_verify,
+                        files=files,
+                        **self.client.httpx_kwargs,
+                    )
+                r.raise_for_status()
+                uploaded_path = r.json()[0]
+            file_path = uploaded_path
         # Only return orig_name if has a suffix because components
         # use the suffix of the original name to determine format to save it to in cache.
         return {
@@ -1405,6 +1410,71 @@ class Endpoint:
             "meta": {"_type": "gradio.FileData"},
         }
 
+    def _upload_file_in_chunks(self, file_path: str | Path) -> str | None:
+        """
+        Uploads a file with the resumable upload protocol, resuming from the offset
+        the server has received if sending a chunk fails. Returns None if the server
+        does not support it (i.e. it runs an older version of Gradio), or if it has
+        too many uploads in progress to start another one, so that the file is sent
+        in a single request instead.
+        """
+        if self.client._chunked_uploads_supported is False:
+            return None
+        request_kwargs = {
+            "headers": self.client.headers,
+            "cookies": self.client.cookies,
+            "verify": self.client.ssl_verify,
+            **self.client.httpx_kwargs,
+        }
+        r = httpx.post(
+            f"{self.client.upload_url}/init",
+            params={
+                "filename": Path(file_path).name,
+                "size": os.path.getsize(file_path),
+            },
+            **request_kwargs,
+        )
+        if r.status_code in (404, 405):
+            self.client._chunked_uploads_supported = False
+            return None
+        if r.status_code == 429:
+            return None
+        r.raise_for_status()
+        self.client._chunked_uploads_supported = True
+        upload_url = f"{self.client.upload_url}/{r.json()['upload_token']}"
+        offset = 0
+        try:
+            with open(file_path, "rb") as f:
+                while chunk := f.read(utils.UPLOAD_CHUNK_SIZE):
+                    start = offset
+                    for attempt in range(utils.UPLOAD_CHUNK_RETRIES + 1):
+                        try:
+                            if attempt:
+                                # Resume the chunk from whatever the server has received
+                                r = httpx.get(upload_url, **request_kwargs)
+                                r.raise_for_status()
+                                start = r.json()["offset"]
+                            r = httpx.put(
+                                upload_url,
+                                params={"offset": start},
+                                content=chunk[start - offset :],
+                                **request_kwargs,
+                            )
+                            if r.status_code != 409 and r.status_code < 500:
+                                break
+                        except httpx.TransportError:
+                            if attempt == utils.UPLOAD_CHUNK_RETRIES:
+                                raise
+                    r.raise_for_status()
+                    offset = r.json()["offset"]
+        except Exception:
+            with contextlib.suppress(httpx.HTTPError):
+                httpx.delete(upload_url, **request_kwargs)
+            raise
+        r = httpx.post(f"{upload_url}/finalize", **request_kwargs)
+        r.raise_for_status()
+        return r.json()[0]
+
     def _download_file(self, x: dict) -> str:
         # For streams, use the URL directly if available, as streams are located at different paths
         if x.get("is_stream", False) and "url" in x:
@@ -4,6 +4,7 @@ import asyncio
 import base64
 import concurrent.futures
 import copy
+import importlib.util
 import inspect
 import json
 import mimetypes
@@ -16,7 +17,7 @@ import tempfile
 import time
 import warnings
 from collections import deque
-from collections.abc import Callable, Coroutine
+from collections.abc import Callable, Coroutine, Iterable, Iterator
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
@@ -49,7 +50,12 @@ SSE_URL = "queue/data"
 SSE_DATA_URL = "queue/join"
 WS_URL = "queue/join"
 UPLOAD_URL = "upload"
+# Files larger than this are uploaded in chunks, each of which is retried on failure
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+UPLOAD_CHUNK_RETRIES = 3
 LOGIN_URL = "login"
+# Media type of the queue stream when it is sent as length-prefixed msgpack frames
+MSGPACK_STREAM_MEDIA_TYPE = "application/vnd.gradio.msgpack-stream"
 CONFIG_URL = "config"
 API_INFO_URL = "info?all_endpoints=True"
 RAW_API_INFO_URL = "info?serialize=False"
@@ -441,6 +447,42 @@ def check_for_cancel(
     raise concurrent.futures.CancelledError()
 
 
+def msgpack_available() -> bool:
+    """Whether msgpack is installed, so that the queue stream can be requested as msgpack."""
+    return importlib.util.find_spec("msgpack") is not None
+
+
+def iter_sse_messages(chunks: Iterable[bytes]) -> Iterator[dict]:
+    """Yields the JSON messages of a server-sent event stream."""
+    buffer = bytearray()
+    for chunk in chunks:
+        buffer += chunk
+        while (end := buffer.find(b"\n\n")) != -1:
+            line = buffer[:end].decode("utf-8").rstrip("\n")
+            del buffer[: end + 2]
+            if not len(line):
+                continue
+            if line.startswith("data:"):
+                yield json.loads(line[5:])
+            else:
+                raise ValueError(f"Unexpected SSE line: '{line}'")
+
+
+def iter_msgpack_messages(chunks: Iterable[bytes]) -> Iterator[dict]:
+    """Yields the messages of a stream of msgpack payloads, each prefixed with its length as a 4-byte big-endian integer."""
+    import msgpack
+
+    buffer = bytearray()
+    for chunk in chunks:
+        buffer += chunk
+        while len(buffer) >= 4:
+            end = 4 + int.from_bytes(buffer[:4], "big")
+            if len(buffer) < end:
+                break
+            yield msgpack.unpackb(buffer[4:end], raw=False, strict_map_key=False)
+            del buffer[:end]
+
+
 def stream_sse_v0(
     client: httpx.Client,
     data: dict,
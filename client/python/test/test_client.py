@@ -17,7 +17,7 @@ import huggingface_hub
 import pytest
 from huggingface_hub.utils import RepositoryNotFoundError
 
-from gradio_client import Client, handle_file
+from gradio_client import Client, handle_file, utils
 from gradio_client.client import DEFAULT_TEMP_DIR
 from gradio_client.exceptions import AuthenticationError
 from gradio_client.utils import (
@@ -335,6 +335,24 @@ class TestClientPredictions:
         with open(output) as f:
             assert f.read() == "Hello file!"
 
+    @pytest.mark.parametrize("binary_stream", [False, True])
+    def test_msgpack_stream_is_opt_in(self, binary_stream):
+        pytest.importorskip("msgpack")
+
+        def greet(x):
+            return f"Hello, {x}!"
+
+        demo = gr.Interface(greet, "text", "text", api_name="predict")
+        with (
+            connect(demo, client_kwargs={"binary_stream": binary_stream}) as client,
+            patch(
+                "gradio_client.utils.iter_msgpack_messages",
+                wraps=utils.iter_msgpack_messages,
+            ) as iter_msgpack_messages,
+        ):
+            assert client.predict("x", api_name="/predict") == "Hello, x!"
+        assert iter_msgpack_messages.called == binary_stream
+
     def test_upload_preserves_orig_name(self):
         demo = gr.Interface(lambda x: x, "image", "text", api_name="predict")
         with connect(demo) as client:
@@ -356,6 +374,45 @@ class TestClientPredictions:
             )
             assert output["orig_name"] == "bus.png"
 
+    def test_upload_large_file_in_chunks(self, tmp_path):
+        demo = gr.Interface(lambda x: x, "file", "file", api_name="predict")
+        test_file = tmp_path / "large.bin"
+        test_file.write_bytes(bytes(range(256)) * 40)
+        with connect(demo) as client:
+            with (
+                patch("gradio_client.utils.UPLOAD_CHUNK_SIZE", 4096),
+                patch("httpx.put", wraps=httpx.put) as put,
+            ):
+                output = client.endpoints[0]._upload_file(
+                    {"path": str(test_file)}, data_index=0
+                )
+            assert put.call_count == 3
+            assert output["orig_name"] == "large.bin"
+            assert Path(output["path"]).read_bytes() == test_file.read_bytes()
+
+            with patch("gradio_client.utils.UPLOAD_CHUNK_SIZE", 4096):
+                output = client.predict(handle_file(test_file), api_name="/predict")
+            assert Path(output).read_bytes() == test_file.read_bytes()
+
+    def test_upload_falls_back_to_one_request_when_uploads_are_limited(self, tmp_path):
+        from gradio.routes import chunked_uploads
+
+        demo = gr.Interface(lambda x: x, "file", "file", api_name="predict")
+        test_file = tmp_path / "large.bin"
+        test_file.write_bytes(bytes(range(256)) * 40)
+        with connect(demo) as client:
+            with (
+                patch("gradio_client.utils.UPLOAD_CHUNK_SIZE", 4096),
+                patch.object(chunked_uploads, "max_uploads_per_client", 0),
+                patch("httpx.put", wraps=httpx.put) as put,
+            ):
+                output = client.endpoints[0]._upload_file(
+                    {"path": str(test_file)}, data_index=0
+                )
+            assert put.call_count == 0
+            assert Path(output["path"]).read_bytes() == test_file.read_bytes()
+            assert client._chunked_uploads_supported is not False
+
     @pytest.mark.flaky(reruns=5)
     def test_cancel_from_client_queued(self, cancel_from_client_demo):
         with connect(cancel_from_client_demo) as client:
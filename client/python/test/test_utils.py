@@ -361,3 +361,28 @@ class TestConstructArgs:
             TypeError, match="No value provided for required argument: a"
         ):
             utils.construct_args(parameters_info, (), {})
+
+
+def test_iter_sse_messages_across_chunk_boundaries():
+    stream = b'data: {"msg": "estimation"}\n\ndata: {"msg": "process_completed", "output": {}}\n\n'
+    chunks = [stream[i : i + 7] for i in range(0, len(stream), 7)]
+    assert [m["msg"] for m in utils.iter_sse_messages(chunks)] == [
+        "estimation",
+        "process_completed",
+    ]
+    with pytest.raises(ValueError, match="Unexpected SSE line"):
+        list(utils.iter_sse_messages([b"event: foo\n\n"]))
+
+
+def test_iter_msgpack_messages_across_chunk_boundaries():
+    msgpack = pytest.importorskip("msgpack")
+    messages = [
+        {"msg": "process_generating", "output": {"data": [b"\x00\x01"]}},
+        {"msg": "process_completed", "output": {"data": [1.5, None]}},
+    ]
+    stream = b"".join(
+        len(payload).to_bytes(4, "big") + payload
+        for payload in map(msgpack.packb, messages)
+    )
+    chunks = [stream[i : i + 3] for i in range(0, len(stream), 3)]
+    assert list(utils.iter_msgpack_messages(chunks)) == messages
@@ -32,6 +32,8 @@ class BlockFunction:
         _id: int,
         batch: bool = False,
         max_batch_size: int = 4,
+        batch_wait_ms: float = 0,
+        queue_priority: int = 0,
         concurrency_limit: int | None | Literal["default"] = "default",
         concurrency_id: str | None = None,
         tracks_progress: bool = False,
@@ -74,6 +76,8 @@ class BlockFunction:
         self.concurrency_id = concurrency_id or str(id(fn))
         self.batch = batch
         self.max_batch_size = max_batch_size
+        self.batch_wait_ms = batch_wait_ms
+        self.queue_priority = queue_priority
         self.total_runtime = 0
         self.total_runs = 0
         self.inputs_as_dict = inputs_as_dict
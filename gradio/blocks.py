@@ -1,7 +1,9 @@
 from __future__ import annotations
 
+import asyncio
 import copy
 import dataclasses
+import functools
 import hashlib
 import inspect
 import json
@@ -42,7 +44,11 @@ from gradio import (
 )
 from gradio.block_function import BlockFunction
 from gradio.blocks_events import BLOCKS_EVENTS, BlocksEvents, BlocksMeta
-from gradio.caching import TrackManualCacheUsage, used_manual_cache
+from gradio.caching import (
+    TrackManualCacheUsage,
+    state_fingerprint,
+    used_manual_cache,
+)
 from gradio.context import (
     Context,
     LocalContext,
@@ -80,7 +86,7 @@ from gradio.i18n import I18n, I18nData
 from gradio.node_server import start_node_server
 from gradio.route_utils import API_PREFIX, MediaStream, slugify
 from gradio.routes import INTERNAL_ROUTES, VERSION, App, Request
-from gradio.state_holder import SessionState, StateHolder
+from gradio.state_holder import SessionState, SessionStore, StateHolder
 from gradio.themes import ThemeClass as Theme
 from gradio.tunneling import (
     BINARY_FILENAME,
@@ -112,6 +118,14 @@ if TYPE_CHECKING:  # Only import for type checking (is False at runtime).
 
 
 class Block:
+    # The props that the constructor stores as attributes as they are, without
+    # deriving anything else from them. A gr.update() that only changes these props
+    # is applied to a copy of the block in the session instead of a new instance.
+    # Only the props declared by the class of the block itself are patched, so that
+    # a subclass (e.g. a custom component) whose constructor or get_config() uses
+    # them differently is always rebuilt, unless it declares them again.
+    PATCHABLE_PROPS: frozenset[str] = frozenset()
+
     def __init__(
         self,
         *,
@@ -149,7 +163,7 @@ class Block:
         self.is_rendered: bool = False
         self._constructor_args: list[dict]
         self.state_session_capacity = 10000
-        self.temp_files: set[str] = set()
+        self.temp_files: processing_utils.TempFileSet = processing_utils.TempFileSet()
         self.GRADIO_CACHE = get_upload_folder()
         self.key = key
         self.preserved_by_key = (
@@ -359,7 +373,7 @@ class Block:
             url_or_file_path = str(utils.abspath(url_or_file_path))
             if not utils.is_in_or_equal(url_or_file_path, self.GRADIO_CACHE):
                 try:
-                    temp_file_path = processing_utils.save_file_to_cache(
+                    temp_file_path = await processing_utils.async_save_file_to_cache(
                         url_or_file_path, cache_dir=self.GRADIO_CACHE
                     )
                 except FileNotFoundError:
@@ -652,14 +666,79 @@ def _port_is_free(host: str, port: int) -> bool:
     return True
 
 
+class BlockFunctions(dict[int, BlockFunction]):
+    """
+    The event listeners of a BlocksConfig, keyed by function id. Counts the
+    changes made to it, so that lookups derived from the listeners can be cached.
+    """
+
+    version = 0
+
+    def __setitem__(self, key: int, value: BlockFunction):
+        super().__setitem__(key, value)
+        self.version += 1
+
+    def __delitem__(self, key: int):
+        super().__delitem__(key)
+        self.version += 1
+
+    def pop(self, *args):
+        self.version += 1
+        return super().pop(*args)
+
+    def popitem(self):
+        self.version += 1
+        return super().popitem()
+
+    def setdefault(self, key: int, default: BlockFunction):  # type: ignore
+        self.version += 1
+        return super().setdefault(key, default)
+
+    def update(self, *args, **kwargs):
+        super().update(*args, **kwargs)
+        self.version += 1
+
+    def clear(self):
+        super().clear()
+        self.version += 1
+
+
 class BlocksConfig:
     def __init__(self, root_block: Blocks):
         self._id: int = 0
         self.root_block = root_block
         self.blocks: dict[int, Component | Block] = {}
-        self.fns: dict[int, BlockFunction] = {}
+        self.fns = BlockFunctions()
         self.fn_id: int = 0
         self.renderables: list[Renderable] = root_block.renderables
+        self._shared_configs: dict[int, tuple[Block, dict]] = {}
+
+    @property
+    def fns(self) -> BlockFunctions:
+        return self._fns
+
+    @fns.setter
+    def fns(self, value: dict[int, BlockFunction]):
+        self._fns = (
+            value if isinstance(value, BlockFunctions) else BlockFunctions(value)
+        )
+        self._change_listened_ids: tuple[int, frozenset[int]] | None = None
+
+    @property
+    def change_listened_ids(self) -> frozenset[int]:
+        """The ids of the blocks that are the target of a .change() listener."""
+        if (
+            self._change_listened_ids is None
+            or self._change_listened_ids[0] != self._fns.version
+        ):
+            ids = frozenset(
+                block_id
+                for fn in self._fns.values()
+                for block_id, event in fn.targets
+                if event == "change" and block_id is not None
+            )
+            self._change_listened_ids = (self._fns.version, ids)
+        return self._change_listened_ids[1]
 
     def set_event_trigger(
         self,
@@ -691,6 +770,8 @@ class BlocksConfig:
         queue: bool = True,
         batch: bool = False,
         max_batch_size: int = 4,
+        batch_wait_ms: float = 0,
+        queue_priority: int = 0,
         cancels: list[int] | None = None,
         collects_event_data: bool | None = None,
         trigger_after: int | None = None,
@@ -730,6 +811,8 @@ class BlocksConfig:
             queue: If True, will place the request on the queue, if the queue has been enabled. If False, will not put this event on the queue, even if the queue has been enabled. If None, will use the queue setting of the gradio app.
             batch: whether this function takes in a batch of inputs
             max_batch_size: the maximum batch size to send to the function
+            batch_wait_ms: the maximum time (in milliseconds) to hold the first event of a batch while waiting for more events
+            queue_priority: events with a higher priority are dispatched from the queue before events with a lower priority
             cancels: a list of other events to cancel when this event is triggered. For example, setting cancels=[click_event] will cancel the click_event, where click_event is the return value of another components .click method.
             collects_event_data: whether to collect event data for this event
             trigger_after: if set, this event will be triggered after 'trigger_after' function index
@@ -862,6 +945,8 @@ class BlocksConfig:
             targets=_targets,
             batch=batch,
             max_batch_size=max_batch_size,
+            batch_wait_ms=batch_wait_ms,
+            queue_priority=queue_priority,
             concurrency_limit=concurrency_limit,
             concurrency_id=concurrency_id,
             tracks_progress=progress_index is not None,
@@ -947,7 +1032,22 @@ class BlocksConfig:
 
         return block_config
 
+    def shared_config_for_block(self, _id: int) -> dict:
+        """
+        Returns the config of the block with id `_id`, computed on first use and
+        shared by every session created from this config, so it must not be mutated.
+        """
+        block = self.blocks[_id]
+        cached = self._shared_configs.get(_id)
+        if cached is None or cached[0] is not block:
+            cached = (block, self.config_for_block(_id, [], block))
+            self._shared_configs[_id] = cached
+        return cached[1]
+
     def get_config(self, renderable: Renderable | None = None):
+        if renderable is None:
+            # The app config is being regenerated, so blocks may have changed
+            self._shared_configs = {}
         config = {
             "page": {},
             "components": [],
@@ -1093,7 +1193,7 @@ class Blocks(BlockContext, BlocksEvents, metaclass=BlocksMeta):
         title: str | I18nData = "Gradio",
         fill_height: bool = False,
         fill_width: bool = False,
-        delete_cache: tuple[int, int] | None = None,
+        delete_cache: tuple[int, int] | tuple[int, int, int | str] | None = None,
         **kwargs,
     ):
         """
@@ -1103,7 +1203,7 @@ class Blocks(BlockContext, BlocksEvents, metaclass=BlocksMeta):
             title: The tab title to display when this is opened in a browser window.
             fill_height: Whether to vertically expand top-level child components to the height of the window. If True, expansion occurs when the scale value of the child components >= 1.
             fill_width: Whether to horizontally expand to fill container fully. If False, centers and constrains app to a maximum width. Only applies if this is the outermost `Blocks` in your Gradio app.
-            delete_cache: A tuple corresponding [frequency, age] both expressed in number of seconds. Every `frequency` seconds, the temporary files created by this Blocks instance will be deleted if more than `age` seconds have passed since the file was created. For example, setting this to (86400, 86400) will delete temporary files every day. The cache will be deleted entirely when the server restarts. If None, no cache deletion will occur.
+            delete_cache: A tuple corresponding [frequency, age] both expressed in number of seconds. Every `frequency` seconds, the temporary files created by this Blocks instance will be deleted if more than `age` seconds have passed since the file was created. For example, setting this to (86400, 86400) will delete temporary files every day. An optional third element, [frequency, age, max_size], limits the total size of the temporary files: whenever it is exceeded, the least recently used files are deleted. It can be a number of bytes or a string of the form "<value><unit>", e.g. "10gb". The cache will be deleted entirely when the server restarts. If None, no cache deletion will occur.
         """
 
         self.limiter = None
@@ -1118,10 +1218,16 @@ class Blocks(BlockContext, BlocksEvents, metaclass=BlocksMeta):
         self.show_error = True
         self.fill_height = fill_height
         self.fill_width = fill_width
-        self.delete_cache = delete_cache
+        self.delete_cache: tuple[int, int] | tuple[int, int, int | None] | None
+        if delete_cache is not None and len(delete_cache) == 3:
+            frequency, age, max_size = delete_cache
+            self.delete_cache = (frequency, age, utils._parse_file_size(max_size))
+        else:
+            self.delete_cache = delete_cache
         self.extra_startup_events: list[Callable[..., Coroutine[Any, Any, Any]]] = []
         self.renderables: list[Renderable] = []
         self.state_holder: StateHolder
+        self.session_store: SessionStore | str | Path | None = None
         self.custom_mount_path: str | None = None
         self.pwa = False
         self.mcp_server = False
@@ -1174,8 +1280,13 @@ class Blocks(BlockContext, BlocksEvents, metaclass=BlocksMeta):
         self.auth = None
         self.dev_mode = bool(os.getenv("GRADIO_WATCH_DIRS", ""))
         self.vibe_mode = bool(os.getenv("GRADIO_VIBE_MODE", ""))
+        # If True, the components of an event (and the samples of a batch) are
+        # preprocessed and postprocessed concurrently instead of one by one
+        self.concurrent_processing = (
+            os.getenv("GRADIO_CONCURRENT_PROCESSING", "False").lower() == "true"
+        )
         self.app_id = random.getrandbits(64)
-        self.upload_file_set = set()
+        self.upload_file_set = processing_utils.TempFileSet()
         self.temp_file_sets = [self.upload_file_set]
         self.title = title
 
@@ -1849,86 +1960,162 @@ Received inputs:
             f"Original error: {type(original_error).__name__}: {original_error}"
         )
 
+    async def run_in_order(
+        self, steps: Sequence[Callable[[], Awaitable[Any]]]
+    ) -> list[Any]:
+        """
+        Runs the independent async `steps` one after another or, if
+        `self.concurrent_processing` is set, concurrently (the thread-bound work of
+        each step is still bounded by `self.limiter`). Either way, the results are
+        returned in the order of the steps and, if several steps fail, the error of
+        the first failing step is raised.
+        """
+        if not self.concurrent_processing or len(steps) < 2:
+            return [await step() for step in steps]
+        results = await asyncio.gather(
+            *(step() for step in steps), return_exceptions=True
+        )
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        return results
+
+    async def process_samples_in_order(
+        self, process: Callable[..., Awaitable[Any]], samples: list[list[Any]]
+    ) -> list[Any]:
+        """
+        Calls `process` (`preprocess_data` or `postprocess_data`) on each sample of
+        a batch, via `run_in_order`. The updates to the session state are applied
+        in the order of the samples, even if the samples are processed concurrently.
+        """
+        if not self.concurrent_processing:
+            return [await process(sample) for sample in samples]
+        sample_state_updates: list[list[Callable[[], None]]] = [[] for _ in samples]
+        try:
+            return await self.run_in_order(
+                [
+                    functools.partial(process, sample, state_updates=updates)
+                    for sample, updates in zip(
+                        samples, sample_state_updates, strict=True
+                    )
+                ]
+            )
+        finally:
+            for updates in sample_state_updates:
+                for update in updates:
+                    update()
+
     async def preprocess_data(
         self,
         block_fn: BlockFunction,
         inputs: list[Any],
         state: SessionState | None,
         explicit_call: bool = False,
+        *,
+        state_updates: list[Callable[[], None]] | None = None,
     ):
+        """
+        Preprocesses the `inputs` of `block_fn`. The session state is updated as
+        each input is processed or, if `self.concurrent_processing` is set, in the
+        order of the inputs once all inputs are processed (if `state_updates` is
+        provided, the updates are appended to it for the caller to apply instead).
+        """
+        from gradio.profiling import trace_phase
+
         state = state or SessionState(self)
 
         self.validate_inputs(block_fn, inputs)
 
-        processed_input = []
-        for i, block in enumerate(block_fn.inputs):
-            if not isinstance(block, components.Component):
-                raise InvalidComponentError(
-                    f"{block.__class__} Component not a valid input component."
-                )
-            if block.stateful:
-                processed_input.append(state[block._id])
-            else:
-                if block._id in state:
-                    block = state[block._id]
+        processed_input: list[Any] = [None] * len(block_fn.inputs)
+        updates: list[Callable[[], None] | None] = [None] * len(block_fn.inputs)
 
-                is_prop_input = i in block_fn.component_prop_inputs
-                if is_prop_input:
-                    processing_utils.check_all_files_in_cache(inputs[i])
-                value_to_process = (
-                    inputs[i].get("value", None) if is_prop_input else inputs[i]
+        async def process(i: int, block: Component, value_to_process: Any):
+            is_prop_input = i in block_fn.component_prop_inputs
+            async with trace_phase("preprocess_move_to_cache"):
+                inputs_cached = await processing_utils.async_move_files_to_cache(
+                    value_to_process,
+                    block,
+                    check_in_upload_folder=not explicit_call,
                 )
+            if getattr(block, "data_model", None) and inputs_cached is not None:
+                data_model = cast(Union[GradioModel, GradioRootModel], block.data_model)
+                inputs_cached = data_model.model_validate(
+                    inputs_cached, context={"validate_meta": True}
+                )
+            if isinstance(inputs_cached, (GradioModel, GradioRootModel)):
+                inputs_serialized = inputs_cached.model_dump()
+            else:
+                inputs_serialized = inputs_cached
 
-                from gradio.profiling import trace_phase
-
-                async with trace_phase("preprocess_move_to_cache"):
-                    inputs_cached = await processing_utils.async_move_files_to_cache(
-                        value_to_process,
-                        block,
-                        check_in_upload_folder=not explicit_call,
-                    )
-                if getattr(block, "data_model", None) and inputs_cached is not None:
-                    data_model = cast(
-                        Union[GradioModel, GradioRootModel], block.data_model
-                    )
-                    inputs_cached = data_model.model_validate(
-                        inputs_cached, context={"validate_meta": True}
-                    )
-                if isinstance(inputs_cached, (GradioModel, GradioRootModel)):
-                    inputs_serialized = inputs_cached.model_dump()
-                else:
-                    inputs_serialized = inputs_cached
-
+            def update_state():
                 if block._id not in state:
                     state[block._id] = block
                 state._update_value_in_config(block._id, inputs_serialized)
 
-                if block_fn.preprocess:
-                    try:
-                        processed_value = await anyio.to_thread.run_sync(
-                            block.preprocess, inputs_cached, limiter=self.limiter
+            if self.concurrent_processing:
+                updates[i] = update_state
+            else:
+                update_state()
+
+            if block_fn.preprocess:
+                try:
+                    processed_value = await anyio.to_thread.run_sync(
+                        block.preprocess, inputs_cached, limiter=self.limiter
+                    )
+                except Error:
+                    raise
+                except Exception as err:
+                    raise ComponentProcessingError(
+                        self._format_processing_error(
+                            block_fn,
+                            i,
+                            block,
+                            value_to_process,
+                            is_input=True,
+                            original_error=err,
                         )
-                    except Error:
-                        raise
-                    except Exception as err:
-                        raise ComponentProcessingError(
-                            self._format_processing_error(
-                                block_fn,
-                                i,
-                                block,
-                                value_to_process,
-                                is_input=True,
-                                original_error=err,
-                            )
-                        ) from err
-                else:
-                    processed_value = inputs_serialized
+                    ) from err
+            else:
+                processed_value = inputs_serialized
 
-                if is_prop_input:
-                    inputs[i]["value"] = processed_value
-                    processed_input.append(inputs[i])
-                else:
-                    processed_input.append(processed_value)
+            if is_prop_input:
+                inputs[i]["value"] = processed_value
+                processed_input[i] = inputs[i]
+            else:
+                processed_input[i] = processed_value
+
+        steps = []
+        for i, block in enumerate(block_fn.inputs):
+            if not isinstance(block, components.Component):
+                raise InvalidComponentError(
+                    f"{block.__class__} Component not a valid input component."
+                )
+            if block.stateful:
+                processed_input[i] = state[block._id]
+                continue
+            if block._id in state:
+                block = state[block._id]
+            is_prop_input = i in block_fn.component_prop_inputs
+            if is_prop_input:
+                processing_utils.check_all_files_in_cache(inputs[i])
+            value_to_process = (
+                inputs[i].get("value", None) if is_prop_input else inputs[i]
+            )
+            step = functools.partial(process, i, block, value_to_process)
+            if self.concurrent_processing:
+                steps.append(step)
+            else:
+                await step()
+
+        try:
+            await self.run_in_order(steps)
+        finally:
+            ordered_updates = [update for update in updates if update is not None]
+            if state_updates is not None:
+                state_updates.extend(ordered_updates)
+            else:
+                for update in ordered_updates:
+                    update()
         return processed_input
 
     def validate_outputs(self, block_fn: BlockFunction, predictions: Any | list[Any]):
@@ -1981,7 +2168,16 @@ Received inputs:
         block_fn: BlockFunction,
         predictions: list | dict,
         state: SessionState | None,
+        *,
+        state_updates: list[Callable[[], None]] | None = None,
     ) -> list[Any]:
+        """
+        Postprocesses the `predictions` of `block_fn`. The values of the
+        components in the session config are updated as each output is processed
+        or, if `self.concurrent_processing` is set, in the order of the outputs once
+        all outputs are processed (if `state_updates` is provided, the updates are
+        appended to it for the caller to apply instead).
+        """
         from gradio.profiling import trace_phase
 
         state = state or SessionState(self)
@@ -2005,11 +2201,76 @@ Received inputs:
 
         self.validate_outputs(block_fn, predictions)  # type: ignore
 
-        output = []
+        output: list[Any] = [None] * len(block_fn.outputs)
+        updates: list[Callable[[], None] | None] = [None] * len(block_fn.outputs)
+        steps: list[Callable[[], Awaitable[None]]] = []
+
+        def add_update(i: int, update: Callable[[], None]):
+            if self.concurrent_processing:
+                updates[i] = update
+            else:
+                update()
+
+        async def add_step(step: Callable[[], Awaitable[None]]):
+            if self.concurrent_processing:
+                steps.append(step)
+            else:
+                await step()
+
+        def update_value_in_config(block: Block, value: Any):
+            def update_state():
+                if block._id not in state:
+                    state[block._id] = block
+                state._update_value_in_config(block._id, value)
+
+            return update_state
+
+        async def move_to_cache(i: int, block: Block, prediction_value: Any):
+            async with trace_phase("postprocess_move_to_cache"):
+                output[i] = await processing_utils.async_move_files_to_cache(
+                    prediction_value,
+                    block,
+                    postprocess=True,
+                )
+
+        async def postprocess(i: int, block: Component, prediction_value: Any):
+            try:
+                prediction_value = await anyio.to_thread.run_sync(
+                    block.postprocess, prediction_value, limiter=self.limiter
+                )
+            except Error:
+                raise
+            except Exception as err:
+                raise ComponentProcessingError(
+                    self._format_processing_error(
+                        block_fn,
+                        i,
+                        block,
+                        predictions[i],
+                        is_input=False,
+                        original_error=err,
+                    )
+                ) from err
+            if isinstance(prediction_value, (GradioModel, GradioRootModel)):
+                prediction_value_serialized = prediction_value.model_dump()
+            else:
+                prediction_value_serialized = prediction_value
+            async with trace_phase("postprocess_update_state_in_config"):
+                prediction_value_serialized = (
+                    await processing_utils.async_move_files_to_cache(
+                        prediction_value_serialized,
+                        block,
+                        postprocess=True,
+                    )
+                )
+                add_update(
+                    i, update_value_in_config(block, prediction_value_serialized)
+                )
+            await move_to_cache(i, block, prediction_value)
+
         for i, block in enumerate(block_fn.outputs):
             try:
                 if predictions[i] is components._Keywords.FINISHED_ITERATING:
-                    output.append(None)
                     continue
             except (IndexError, KeyError) as err:
                 raise ValueError(
@@ -2025,102 +2286,93 @@ Received inputs:
                         state[block._id] = prediction_value["value"]
                 else:
                     state[block._id] = prediction_value
-                output.append(None)
-            else:
-                prediction_value = predictions[i]
-                if utils.is_prop_update(
-                    prediction_value
-                ):  # if update is passed directly (deprecated), remove Nones
-                    prediction_value = utils.delete_none(
-                        prediction_value, skip_value=True
-                    )
+                continue
 
-                if isinstance(prediction_value, Block):
-                    prediction_value = prediction_value.constructor_args.copy()
-                    prediction_value["__type__"] = "update"
-                elif isinstance(prediction_value, SimpleNamespace) and getattr(
-                    prediction_value, "_is_component_update", False
-                ):
-                    prediction_value = vars(prediction_value).copy()
-                    keys = inspect.signature(block.__class__.__init__).parameters.keys()
-                    prediction_value = {
-                        k: v for k, v in prediction_value.items() if k in keys
-                    }
-                    prediction_value["__type__"] = "update"
-                if utils.is_prop_update(prediction_value):
-                    # The output block may be absent from the session config if
-                    # the app was hot-reloaded mid-run and this component was
-                    # added by the reload; fall back to the block's own args.
-                    base_block = state.get(block._id, block)
+            prediction_value = predictions[i]
+            if utils.is_prop_update(
+                prediction_value
+            ):  # if update is passed directly (deprecated), remove Nones
+                prediction_value = utils.delete_none(prediction_value, skip_value=True)
+
+            if isinstance(prediction_value, Block):
+                prediction_value = prediction_value.constructor_args.copy()
+                prediction_value["__type__"] = "update"
+            elif isinstance(prediction_value, SimpleNamespace) and getattr(
+                prediction_value, "_is_component_update", False
+            ):
+                prediction_value = vars(prediction_value).copy()
+                keys = inspect.signature(block.__class__.__init__).parameters.keys()
+                prediction_value = {
+                    k: v for k, v in prediction_value.items() if k in keys
+                }
+                prediction_value["__type__"] = "update"
+            if utils.is_prop_update(prediction_value):
+                # The output block may be absent from the session config if
+                # the app was hot-reloaded mid-run and this component was
+                # added by the reload; fall back to the block's own args.
+                base_block = state.get(block._id, block)
+                props = {
+                    k: v
+                    for k, v in prediction_value.items()
+                    if k not in ("value", "__type__")
+                }
+                patchable = vars(type(base_block)).get("PATCHABLE_PROPS", frozenset())
+                if props.keys() <= patchable:
+                    patched_block = copy.copy(base_block)
+                    for prop, prop_value in props.items():
+                        setattr(patched_block, prop, prop_value)
+                    patched_block._constructor_args = [
+                        {**base_block.constructor_args, **props}
+                    ]
+                    state._patch_props(block._id, patched_block, props)
+                else:
                     kwargs = base_block.constructor_args.copy()
-                    kwargs.update(prediction_value)
-                    kwargs.pop("value", None)
-                    kwargs.pop("__type__")
+                    kwargs.update(props)
                     kwargs["render"] = False
-
                     state[block._id] = block.__class__(**kwargs)
                     state._update_config(block._id)
-                    prediction_value = postprocess_update_dict(
-                        block=state[block._id],
-                        update_dict=prediction_value,
-                        postprocess=block_fn.postprocess,
+                prediction_value = postprocess_update_dict(
+                    block=state[block._id],
+                    update_dict=prediction_value,
+                    postprocess=block_fn.postprocess,
+                )
+                if "value" in prediction_value:
+                    add_update(
+                        i,
+                        functools.partial(
+                            state._update_value_in_config,
+                            block._id,
+                            prediction_value.get("value"),
+                        ),
                     )
-                    if "value" in prediction_value:
-                        state._update_value_in_config(
-                            block._id, prediction_value.get("value")
-                        )
-                elif block_fn.postprocess:
-                    if not isinstance(block, components.Component):
-                        raise InvalidComponentError(
-                            f"{block.__class__} Component not a valid output component."
-                        )
-                    if block._id in state:
-                        block = state[block._id]
-                    try:
-                        prediction_value = await anyio.to_thread.run_sync(
-                            block.postprocess, prediction_value, limiter=self.limiter
-                        )
-                    except Error:
-                        raise
-                    except Exception as err:
-                        raise ComponentProcessingError(
-                            self._format_processing_error(
-                                block_fn,
-                                i,
-                                block,
-                                predictions[i],
-                                is_input=False,
-                                original_error=err,
-                            )
-                        ) from err
-                    if isinstance(prediction_value, (GradioModel, GradioRootModel)):
-                        prediction_value_serialized = prediction_value.model_dump()
-                    else:
-                        prediction_value_serialized = prediction_value
-                    async with trace_phase("postprocess_update_state_in_config"):
-                        prediction_value_serialized = (
-                            await processing_utils.async_move_files_to_cache(
-                                prediction_value_serialized,
-                                block,
-                                postprocess=True,
-                            )
-                        )
-                        if block._id not in state:
-                            state[block._id] = block
-                        state._update_value_in_config(
-                            block._id, prediction_value_serialized
-                        )
-                elif not block_fn.postprocess:
-                    if block._id not in state:
-                        state[block._id] = block
-                    state._update_value_in_config(block._id, prediction_value)
-                async with trace_phase("postprocess_move_to_cache"):
-                    outputs_cached = await processing_utils.async_move_files_to_cache(
-                        prediction_value,
-                        block,
-                        postprocess=True,
+                await add_step(
+                    functools.partial(move_to_cache, i, block, prediction_value)
+                )
+            elif block_fn.postprocess:
+                if not isinstance(block, components.Component):
+                    raise InvalidComponentError(
+                        f"{block.__class__} Component not a valid output component."
                     )
-                output.append(outputs_cached)
+                if block._id in state:
+                    block = state[block._id]
+                await add_step(
+                    functools.partial(postprocess, i, block, prediction_value)
+                )
+            else:
+                add_update(i, update_value_in_config(block, prediction_value))
+                await add_step(
+                    functools.partial(move_to_cache, i, block, prediction_value)
+                )
+
+        try:
+            await self.run_in_order(steps)
+        finally:
+            ordered_updates = [update for update in updates if update is not None]
+            if state_updates is not None:
+                state_updates.extend(ordered_updates)
+            else:
+                for update in ordered_updates:
+                    update()
 
         return output
 
@@ -2215,7 +2467,12 @@ Received inputs:
                 prev_chunk = last_diffs[i]
                 last_diffs[i] = data[i]
                 if not simple_format:
-                    data[i] = utils.diff(prev_chunk, data[i])
+                    block = block_fn.outputs[i]
+                    data[i] = (
+                        block.stream_diff(prev_chunk, data[i])
+                        if isinstance(block, components.Component)
+                        else utils.diff(prev_chunk, data[i])
+                    )
 
         if final:
             del self.pending_diff_streams[session_hash][run]
@@ -2265,7 +2522,7 @@ Received inputs:
         if isinstance(block_fn, int):
             block_fn = self.fns[block_fn]
         batch = block_fn.batch
-        state_ids_to_track, hashed_values = self.get_state_ids_to_track(block_fn, state)
+        state_ids_to_track, fingerprints = self.get_state_ids_to_track(block_fn, state)
         changed_state_ids = []
         LocalContext.blocks.set(self)
 
@@ -2286,10 +2543,15 @@ Received inputs:
                 raise ValueError(
                     f"Batch size ({batch_size}) exceeds the max_batch_size for this function ({max_batch_size})"
                 )
-            inputs = [
-                await self.preprocess_data(block_fn, list(i), state, explicit_call)
-                for i in zip(*inputs, strict=False)
-            ]
+            inputs = await self.process_samples_in_order(
+                functools.partial(
+                    self.preprocess_data,
+                    block_fn,
+                    state=state,
+                    explicit_call=explicit_call,
+                ),
+                [list(i) for i in zip(*inputs, strict=False)],
+            )
             with TrackManualCacheUsage():
                 result = await self.call_function(
                     block_fn,
@@ -2304,10 +2566,10 @@ Received inputs:
                 )
                 manual_cache_used = used_manual_cache()
             preds = result["prediction"]
-            data = [
-                await self.postprocess_data(block_fn, list(o), state)
-                for o in zip(*preds, strict=False)
-            ]
+            data = await self.process_samples_in_order(
+                functools.partial(self.postprocess_data, block_fn, state=state),
+                [list(o) for o in zip(*preds, strict=False)],
+            )
             if root_path is not None:
                 data = processing_utils.add_root_url(data, root_path, None)  # type: ignore
             data = list(zip(*data, strict=False))
@@ -2347,10 +2609,10 @@ Received inputs:
             if state:
                 changed_state_ids = [
                     state_id
-                    for hash_value, state_id in zip(
-                        hashed_values, state_ids_to_track, strict=False
+                    for fingerprint, state_id in zip(
+                        fingerprints, state_ids_to_track, strict=False
                     )
-                    if hash_value != utils.deep_hash(state[state_id])
+                    if fingerprint != state_fingerprint(state[state_id])
                 ]
 
             if root_path is not None:
@@ -2407,20 +2669,16 @@ Received inputs:
 
     def get_state_ids_to_track(
         self, block_fn: BlockFunction, state: SessionState | None
-    ) -> tuple[list[int], list]:
+    ) -> tuple[list[int], list[bytes]]:
         if state is None:
             return [], []
         state_ids_to_track = []
-        hashed_values = []
+        fingerprints = []
         for block in block_fn.outputs:
-            if block.stateful and any(
-                (block._id, "change") in fn.targets
-                for fn in state.blocks_config.fns.values()
-            ):
-                value = state[block._id]
+            if block.stateful and block._id in state.blocks_config.change_listened_ids:
                 state_ids_to_track.append(block._id)
-                hashed_values.append(utils.deep_hash(value))
-        return state_ids_to_track, hashed_values
+                fingerprints.append(state_fingerprint(state[block._id]))
+        return state_ids_to_track, fingerprints
 
     def create_limiter(self):
         self.limiter = (
@@ -2560,6 +2818,10 @@ Received inputs:
         max_size: int | None = None,
         *,
         default_concurrency_limit: int | None | Literal["not_set"] = "not_set",
+        scheduling: Literal["fifo", "fair"] = "fifo",
+        fair_share_key: Literal["session", "username"] = "session",
+        fair_share_weights: dict[str, float] | None = None,
+        max_in_flight_per_user: int | None = None,
     ):
         """
         By enabling the queue you can control when users know their position in the queue, and set a limit on maximum number of events allowed.
@@ -2568,6 +2830,10 @@ Received inputs:
             api_open: If True, the REST routes of the backend will be open, allowing requests made directly to those endpoints to skip the queue.
             max_size: The maximum number of events the queue will store at any given moment. If the queue is full, new events will not be added and a user will receive a message saying that the queue is full. If None, the queue size will be unlimited.
             default_concurrency_limit: The default value of `concurrency_limit` to use for event listeners that don't specify a value. Can be set by environment variable GRADIO_DEFAULT_CONCURRENCY_LIMIT. Defaults to 1 if not set otherwise.
+            scheduling: How queued events that wait for the same concurrency group are ordered. If "fifo" (default), events are processed in the order they were submitted. If "fair", every session (or user, see `fair_share_key`) is served in turn, so that a single user submitting many events cannot starve everyone else. In both cases, events with a higher `queue_priority` (set in the event listener) are processed first.
+            fair_share_key: Whether "fair" scheduling and `max_in_flight_per_user` apply per browser session ("session") or per logged-in user ("username"). Events without a username fall back to their session.
+            fair_share_weights: A dictionary mapping session hashes or usernames (depending on `fair_share_key`) to their share of the queue when `scheduling` is "fair". Sessions or users that are not listed have a weight of 1, so a weight of 2 means being served twice as often.
+            max_in_flight_per_user: If set, the maximum number of events from the same session or user (depending on `fair_share_key`) that can be processed at the same time. Additional events wait in the queue, letting events from other users go first.
         Example: (Blocks)
             with gr.Blocks() as demo:
                 button = gr.Button(label="Generate Image")
@@ -2590,6 +2856,10 @@ Received inputs:
             max_size=max_size,
             blocks=self,
             default_concurrency_limit=default_concurrency_limit,
+            scheduling=scheduling,
+            fair_share_key=fair_share_key,
+            fair_share_weights=fair_share_weights,
+            max_in_flight_per_user=max_in_flight_per_user,
         )
         self.app = App.create_app(self, mcp_server=False)
         return self
@@ -2688,6 +2958,7 @@ Received inputs:
         root_path: str | None = None,
         app_kwargs: dict[str, Any] | None = None,
         state_session_capacity: int = 10000,
+        session_store: SessionStore | str | Path | None = None,
         share_server_address: str | None = None,
         share_server_protocol: Literal["http", "https"] | None = None,
         share_server_tls_certificate: str | None = None,
@@ -2742,6 +3013,7 @@ Received inputs:
             root_path: The root path (or "mount point") of the application, if it's not served from the root ("/") of the domain. Often used when the application is behind a reverse proxy that forwards requests to the application. For example, if the application is served at "https://example.com/myapp", the `root_path` should be set to "/myapp". A full URL beginning with http:// or https:// can be provided, which will be used as the root path in its entirety. Can be set by environment variable GRADIO_ROOT_PATH. Defaults to "".
             app_kwargs: Additional keyword arguments to pass to the underlying FastAPI app as a dictionary of parameter keys and argument values. For example, `{"docs_url": "/docs"}`
             state_session_capacity: The maximum number of sessions whose information to store in memory. If the number of sessions exceeds this number, the oldest sessions will be removed. Reduce capacity to reduce memory usage when using gradio.State or returning updated components from functions. Defaults to 10000.
+            session_store: Where to also keep the values of gradio.State for each session, so that they survive restarts of the server and are shared between the processes serving the app (e.g. several uvicorn workers). Can be the path to a SQLite database file, or a `gradio.state_holder.SessionStore` instance (e.g. a subclass that keeps sessions in Redis). Values are pickled. Can be set by environment variable GRADIO_SESSION_STORE. If None, sessions are only kept in the memory of the process.
             share_server_address: Use this to specify a custom FRP server and port for sharing Gradio apps (only applies if share=True). If not provided, will use the default FRP server at https://gradio.live. See https://github.com/huggingface/frp for more information.
             share_server_protocol: Use this to specify the protocol to use for the share links. Defaults to "https", unless a custom share_server_address is provided, in which case it defaults to "http". If you are using a custom share_server_address and want to use https, you must set this to "https".
             share_server_tls_certificate: The path to a TLS certificate file to use when connecting to a custom share server. This parameter is not used with the default FRP server at https://gradio.live. Otherwise, you must provide a valid TLS certificate file (e.g. a "cert.pem") relative to the current working directory, or the connection will not use TLS encryption, which is insecure.
@@ -2836,6 +3108,7 @@ Received inputs:
         self.favicon_path = favicon_path
         self.ssl_verify = ssl_verify
         self.state_session_capacity = state_session_capacity
+        self.session_store = session_store
         if root_path is None:
             self.root_path = os.environ.get("GRADIO_ROOT_PATH", "")
         else:
@@ -73,6 +73,9 @@ class BrotliMiddleware:
         ):
             return await self.app(scope, receive, send)
         headers = Headers(scope=scope)
+        if "range" in headers:
+            # The byte ranges of a partial response refer to the uncompressed file
+            return await self.app(scope, receive, send)
         if "br" in headers.get("Accept-Encoding", ""):
             br_responder = BrotliResponder(
                 self.app,
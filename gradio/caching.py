@@ -2,88 +2,227 @@
 
 from __future__ import annotations
 
+import asyncio
 import copy
 import functools
 import hashlib
 import inspect
+import os
+import pickle
+import sqlite3
 import sys
 import threading
+import time
 import weakref
-from collections import OrderedDict
+from collections import OrderedDict, defaultdict
 from collections.abc import Callable
 from contextvars import ContextVar
+from pathlib import Path
 from typing import Any
 
 import numpy as np
+import orjson
 import pandas as pd
 from gradio_client.documentation import document
 from PIL import Image
 from pydantic import BaseModel
 
 
+@functools.cache
+def _hash_constructor() -> Callable[[], Any]:
+    algorithm = os.getenv("GRADIO_CACHE_HASH_ALGORITHM", "sha256").lower()
+    if algorithm == "sha256":
+        return functools.partial(hashlib.sha256, usedforsecurity=False)
+    if algorithm == "xxh3":
+        try:
+            import xxhash  # ty: ignore[unresolved-import]
+        except ImportError as e:
+            raise ImportError(
+                "The `xxhash` package is required to use GRADIO_CACHE_HASH_ALGORITHM=xxh3. "
+                "Please install it with `pip install xxhash`."
+            ) from e
+        return xxhash.xxh3_128
+    raise ValueError(
+        f"Invalid GRADIO_CACHE_HASH_ALGORITHM: {algorithm!r}. "
+        "Must be one of 'sha256' or 'xxh3'."
+    )
+
+
 def cache_hash(obj: Any) -> str:
-    hasher = hashlib.sha256()
-    hasher.update(_hash_repr(obj).encode("utf-8"))
+    """
+    Computes the cache key of `obj`. The objects are streamed into the hasher, and
+    the buffers of numpy arrays, PIL images and pandas objects are hashed without
+    being copied. SHA-256 is used by default; set GRADIO_CACHE_HASH_ALGORITHM=xxh3
+    to use the (much faster, but not collision resistant) xxh3 digest instead.
+    """
+    hasher = _hash_constructor()()
+    _update_hash(hasher, obj)
     return hasher.hexdigest()
 
 
-def _hash_repr(obj: Any) -> str:
-    if obj is None:
-        return "None"
-    if isinstance(obj, (bool, int, float, str)):
-        return repr(obj)
-    if isinstance(obj, bytes):
-        return hashlib.sha256(obj).hexdigest()
-    if isinstance(obj, (list, tuple)):
-        inner = ",".join(_hash_repr(x) for x in obj)
-        tag = "L" if isinstance(obj, list) else "T"
-        return f"{tag}[{inner}]"
-    if isinstance(obj, dict):
-        pairs = sorted(
-            ((repr(k), _hash_repr(v)) for k, v in obj.items()),
-            key=lambda x: x[0],
-        )
-        inner = ",".join(f"{k}:{v}" for k, v in pairs)
-        return f"D{{{inner}}}"
-    if isinstance(obj, set):
-        items = sorted(_hash_repr(x) for x in obj)
-        return f"S{{{','.join(items)}}}"
-    if isinstance(obj, np.ndarray):
-        return (
-            f"np({obj.shape},{obj.dtype},{hashlib.sha256(obj.tobytes()).hexdigest()})"
+def state_fingerprint(obj: Any) -> bytes:
+    """
+    Computes a digest of the contents of `obj` that changes whenever `obj` is
+    mutated, used to tell whether the value of a gr.State changed during an event.
+    Unlike `cache_hash`, digests are never reused within an event, objects that
+    are hashed by identity are hashed by their attributes instead, and objects
+    that cannot be walked are pickled rather than rejected.
+    """
+    hasher = _hash_constructor()()
+    try:
+        # JSON-like values (the common case) are serialized in a single pass,
+        # with the buffers of arrays and dataframes hashed in place
+        _write(
+            hasher,
+            b"J",
+            orjson.dumps(
+                obj, default=_fingerprint_default, option=_FINGERPRINT_OPTIONS
+            ),
         )
+        return hasher.digest()
+    except TypeError:
+        hasher = _hash_constructor()()
+    try:
+        _update_hash(hasher, obj, track_mutations=True)
+    except RecursionError:
+        # Objects that refer back to themselves through their attributes
+        hasher = _hash_constructor()()
+        _write(hasher, b"I", repr(id(obj)).encode("utf-8"))
+    return hasher.digest()
+
+
+_FINGERPRINT_OPTIONS = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS
+
+
+def _fingerprint_default(obj: Any) -> Any:
+    if isinstance(obj, np.ndarray) and not obj.dtype.hasobject:
+        return "\x00A" + _array_digest(obj).hex()
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        return "\x00F" + _pandas_digest(obj, track_mutations=True).hex()
     if isinstance(obj, Image.Image):
-        return f"PIL({obj.mode},{obj.size},{hashlib.sha256(obj.tobytes()).hexdigest()})"
+        return "\x00I" + _image_digest(obj).hex()
+    raise TypeError
+
+
+def _update_hash(hasher: Any, obj: Any, track_mutations: bool = False) -> None:
+    # Every value is written as a type tag followed by length-prefixed data, so
+    # that the streamed bytes cannot be ambiguous (e.g. ["ab"] vs ["a", "b"]).
+    if obj is None:
+        hasher.update(b"N")
+    elif isinstance(obj, (bool, int, float, str)):
+        _write(hasher, b"P", repr(obj).encode("utf-8"))
+    elif isinstance(obj, (bytes, bytearray, memoryview)):
+        _write(hasher, b"B", obj)
+    elif isinstance(obj, (list, tuple)):
+        hasher.update(b"L" if isinstance(obj, list) else b"T")
+        hasher.update(len(obj).to_bytes(8, "little"))
+        for item in obj:
+            _update_hash(hasher, item, track_mutations)
+    elif isinstance(obj, dict):
+        hasher.update(b"D")
+        hasher.update(len(obj).to_bytes(8, "little"))
+        for key_repr, value in sorted(
+            ((repr(k), v) for k, v in obj.items()), key=lambda x: x[0]
+        ):
+            _write(hasher, b"K", key_repr.encode("utf-8"))
+            _update_hash(hasher, value, track_mutations)
+    elif isinstance(obj, (set, frozenset)):
+        hasher.update(b"S")
+        hasher.update(len(obj).to_bytes(8, "little"))
+        for digest in sorted(_digest(item, track_mutations) for item in obj):
+            hasher.update(digest)
+    elif isinstance(obj, np.ndarray) and not obj.dtype.hasobject:
+        # Streamed into the same hasher, without copying contiguous arrays
+        _write(hasher, b"A", f"{obj.shape},{obj.dtype.str}".encode())
+        hasher.update(np.ascontiguousarray(obj).reshape(-1).view(np.uint8))
+    elif isinstance(obj, np.ndarray):
+        _write(hasher, b"O", _array_digest(obj, track_mutations))
+    elif isinstance(obj, Image.Image):
+        _write(hasher, b"O", _image_digest(obj))
+    elif isinstance(obj, (pd.DataFrame, pd.Series)):
+        _write(hasher, b"O", _pandas_digest(obj, track_mutations))
+    elif isinstance(obj, BaseModel):
+        _update_hash(hasher, obj.model_dump(), track_mutations)
+    elif track_mutations:
+        # The default `object.__hash__` is the identity of the object, which does
+        # not change when the object is mutated
+        if type(obj).__hash__ not in (None, object.__hash__):
+            _write(hasher, b"H", repr(hash(obj)).encode("utf-8"))
+        elif hasattr(obj, "__dict__"):
+            _write(hasher, b"I", repr(id(obj)).encode("utf-8"))
+            _update_hash(hasher, vars(obj), track_mutations)
+        else:
+            try:
+                _write(hasher, b"Q", pickle.dumps(obj, protocol=5))
+            except Exception:
+                # Nothing else to go by: such values are only seen to change
+                # when they are replaced by another object
+                _write(hasher, b"I", repr(id(obj)).encode("utf-8"))
+    else:
+        try:
+            _write(hasher, b"H", repr(hash(obj)).encode("utf-8"))
+            return
+        except TypeError:
+            pass
+        if hasattr(obj, "__dict__"):
+            _update_hash(hasher, vars(obj))
+            return
+        raise TypeError(
+            f"gr.cache: cannot hash object of type {type(obj).__name__}. "
+            f"Preprocess your inputs into hashable types before passing them."
+        )
+
+
+def _write(hasher: Any, tag: bytes, data: bytes | bytearray | memoryview) -> None:
+    hasher.update(tag + memoryview(data).nbytes.to_bytes(8, "little"))
+    hasher.update(data)
+
+
+def _digest(obj: Any, track_mutations: bool = False) -> bytes:
+    hasher = _hash_constructor()()
+    _update_hash(hasher, obj, track_mutations)
+    return hasher.digest()
+
+
+def _array_digest(arr: np.ndarray, track_mutations: bool = False) -> bytes:
+    hasher = _hash_constructor()()
+    _write(hasher, b"A", f"{arr.shape},{arr.dtype.str}".encode())
+    if arr.dtype.hasobject:
+        _update_hash(hasher, arr.tolist(), track_mutations)
+    else:
+        # A view of the (contiguous) buffer as bytes, so nothing is copied unless
+        # the array is not contiguous in the first place
+        hasher.update(np.ascontiguousarray(arr).reshape(-1).view(np.uint8))
+    return hasher.digest()
+
+
+def _image_digest(image: Image.Image) -> bytes:
+    hasher = _hash_constructor()()
+    _write(hasher, b"I", f"{image.mode},{image.size}".encode())
+    if image.width and image.height:
+        hasher.update(image.tobytes())
+    return hasher.digest()
+
+
+def _pandas_digest(
+    obj: pd.DataFrame | pd.Series, track_mutations: bool = False
+) -> bytes:
+    hasher = _hash_constructor()()
     if isinstance(obj, pd.DataFrame):
-        col_hash = _hash_repr(list(obj.columns))
-        val_hash = hashlib.sha256(
-            pd.util.hash_pandas_object(obj, index=False).to_numpy().tobytes()
-        ).hexdigest()
-        idx_hash = hashlib.sha256(
-            pd.util.hash_pandas_object(obj.index).to_numpy().tobytes()
-        ).hexdigest()
-        return f"DF({col_hash},{val_hash},{idx_hash})"
-    if isinstance(obj, BaseModel):
-        return _hash_repr(obj.model_dump())
-    if isinstance(obj, pd.Series):
-        name_hash = _hash_repr(obj.name)
-        val_hash = hashlib.sha256(
-            pd.util.hash_pandas_object(obj, index=False).to_numpy().tobytes()
-        ).hexdigest()
-        idx_hash = hashlib.sha256(
-            pd.util.hash_pandas_object(obj.index).to_numpy().tobytes()
-        ).hexdigest()
-        return f"Series({name_hash},{val_hash},{idx_hash})"
+        hasher.update(b"F")
+        _update_hash(hasher, list(obj.columns), track_mutations)
+    else:
+        hasher.update(b"R")
+        _update_hash(hasher, obj.name, track_mutations)
     try:
-        return repr(hash(obj))
+        hasher.update(pd.util.hash_pandas_object(obj, index=False).to_numpy())
     except TypeError:
-        pass
-    if hasattr(obj, "__dict__"):
-        return _hash_repr(vars(obj))
-    raise TypeError(
-        f"gr.cache: cannot hash object of type {type(obj).__name__}. "
-        f"Preprocess your inputs into hashable types before passing them."
-    )
+        # Columns holding unhashable objects (e.g. lists)
+        if not track_mutations:
+            raise
+        _update_hash(hasher, obj.to_numpy(), track_mutations)
+    hasher.update(pd.util.hash_pandas_object(obj.index).to_numpy())
+    return hasher.digest()
 
 
 def resolve_generator(fn: Callable) -> tuple[Callable, list | None]:
@@ -116,33 +255,96 @@ def resolve_generator(fn: Callable) -> tuple[Callable, list | None]:
     return fn, None
 
 
+# Bytes per pixel of the buffers in which Pillow stores images of each mode:
+# multi-band images always use 4 bytes per pixel
+_PIL_PIXEL_SIZES = {
+    "1": 1,
+    "L": 1,
+    "P": 1,
+    "I;16": 2,
+    "I;16L": 2,
+    "I;16B": 2,
+    "I;16N": 2,
+    "BGR;15": 2,
+    "BGR;16": 2,
+    "BGR;24": 3,
+}
+
+
 def _estimate_size(obj: Any) -> int:
+    """
+    Returns the number of bytes retained by `obj`: the buffers of arrays, images,
+    dataframes and tensors, the Python objects that contain them, and the files
+    in the Gradio cache directory that `obj` refers to (e.g. a cached output file).
+    Objects (and files) referenced several times are only counted once.
+    """
+    from gradio.utils import get_upload_folder
+
+    upload_folder = get_upload_folder()
+    seen: set[int | str] = set()
+    # Walked with an explicit stack rather than recursively, so that deeply nested
+    # objects (e.g. long linked lists) cannot exceed the recursion limit
+    stack = [obj]
+    size = 0
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        size += _size_of(obj, stack, seen, upload_folder)
+    return size
+
+
+def _size_of(obj: Any, stack: list, seen: set[int | str], upload_folder: str) -> int:
+    """Returns the size of `obj` itself, and pushes the objects it contains to `stack`."""
     if isinstance(obj, np.ndarray):
-        return obj.nbytes
+        # A view retains the whole array it was created from
+        base = obj
+        while isinstance(base.base, np.ndarray):
+            base = base.base
+        if base is not obj:
+            stack.append(base)
+            return 0
+        return sys.getsizeof(obj) + (0 if obj.base is None else obj.nbytes)
     if isinstance(obj, Image.Image):
-        return obj.size[0] * obj.size[1] * len(obj.getbands())
+        return obj.width * obj.height * _PIL_PIXEL_SIZES.get(
+            obj.mode, 4
+        ) + sys.getsizeof(obj)
     if isinstance(obj, pd.DataFrame):
-        return obj.memory_usage(deep=True).sum()
+        return int(obj.memory_usage(deep=True).sum())
     if isinstance(obj, pd.Series):
-        return obj.memory_usage(deep=True)
-    if isinstance(obj, (bytes, bytearray)):
-        return len(obj)
-    if isinstance(obj, str):
-        return sys.getsizeof(obj)
-    try:
-        import torch
-
-        if isinstance(obj, torch.Tensor):
-            return obj.nelement() * obj.element_size()
-    except ImportError:
-        pass
+        return int(obj.memory_usage(deep=True))
+    if isinstance(obj, (str, Path)):
+        return sys.getsizeof(obj) + _file_size(str(obj), seen, upload_folder)
+    if (torch := sys.modules.get("torch")) is not None and isinstance(
+        obj, torch.Tensor
+    ):
+        return sys.getsizeof(obj) + obj.nelement() * obj.element_size()
     if isinstance(obj, dict):
-        return sum(_estimate_size(v) for v in obj.values())
-    if isinstance(obj, (list, tuple)):
-        return sum(_estimate_size(v) for v in obj)
+        stack.extend(obj.keys())
+        stack.extend(obj.values())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        stack.extend(obj)
+    elif isinstance(obj, BaseModel) or (
+        hasattr(obj, "__dict__") and not isinstance(obj, type)
+    ):
+        # e.g. FileData, whose `path` is counted as a file
+        stack.append(vars(obj))
     return sys.getsizeof(obj)
 
 
+def _file_size(path: str, seen: set[int | str], upload_folder: str) -> int:
+    # Only files in the Gradio cache directory are owned by the cache; the prefix
+    # check avoids a filesystem call for every string in the entry
+    if not path.startswith(upload_folder) or path in seen:
+        return 0
+    seen.add(path)
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
 def _get_session_hash() -> str | None:
     try:
         from gradio.context import LocalContext
@@ -155,20 +357,588 @@ def _get_session_hash() -> str | None:
     return None
 
 
+def _serialize(obj: Any) -> bytes:
+    # Protocol 5 stores numpy arrays, DataFrames and PIL images as raw buffers,
+    # without going through an intermediate text representation.
+    return pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _deserialize(data: bytes) -> Any:
+    return pickle.loads(data)
+
+
+class CacheBackend:
+    """
+    Storage for the entries of `gr.cache` and `gr.Cache`. Entries are stored under
+    a namespace (one per cached function, or per `gr.Cache`), expire `ttl` seconds
+    after they are written, and are evicted in least-recently-used order once a
+    namespace holds more than `max_size` entries or more than `max_memory` bytes.
+    Subclasses must implement every method and be safe to use from several threads.
+    """
+
+    def get(self, namespace: str, key: str) -> dict | None:
+        """Returns the entry stored under `key` and marks it as recently used."""
+        raise NotImplementedError
+
+    def put(
+        self,
+        namespace: str,
+        key: str,
+        entry: dict,
+        size: int,
+        max_size: int,
+        max_memory: int | None,
+        ttl: float | None = None,
+    ) -> tuple[int, int]:
+        """
+        Stores `entry` under `key`, then removes the expired entries and evicts
+        entries over the limits. Returns the number of evicted and expired entries.
+        """
+        raise NotImplementedError
+
+    def keys(self, namespace: str, prefix: str = "") -> list[Any]:
+        """Returns the raw `_key`s of the entries whose key starts with `prefix`."""
+        raise NotImplementedError
+
+    def delete_prefix(self, namespace: str, prefix: str) -> None:
+        raise NotImplementedError
+
+    def clear(self, namespace: str) -> None:
+        raise NotImplementedError
+
+    def count(self, namespace: str) -> int:
+        raise NotImplementedError
+
+
+def _over_limits(
+    count: int, total_memory: int, max_size: int, max_memory: int | None
+) -> bool:
+    over_count = max_size > 0 and count > max_size
+    over_memory = max_memory is not None and total_memory > max_memory and count > 1
+    return over_count or over_memory
+
+
+class MemoryCacheBackend(CacheBackend):
+    """
+    Stores entries in the memory of the current process (the default backend).
+    """
+
+    def __init__(self):
+        self._namespaces: defaultdict[str, OrderedDict[str, dict]] = defaultdict(
+            OrderedDict
+        )
+        self._entry_sizes: defaultdict[str, dict[str, int]] = defaultdict(dict)
+        self._total_memory: defaultdict[str, int] = defaultdict(int)
+        # Expiry times in the order in which the entries were written, which is
+        # also the order in which they expire since a namespace has a single ttl
+        self._expiry: defaultdict[str, OrderedDict[str, float]] = defaultdict(
+            OrderedDict
+        )
+        self._lock = threading.Lock()
+
+    def _remove(self, namespace: str, key: str) -> None:
+        self._namespaces[namespace].pop(key, None)
+        self._expiry[namespace].pop(key, None)
+        self._total_memory[namespace] -= self._entry_sizes[namespace].pop(key, 0)
+
+    def _remove_expired(self, namespace: str) -> int:
+        expiry = self._expiry.get(namespace)
+        now = time.time()
+        expired = 0
+        while expiry and next(iter(expiry.values())) <= now:
+            self._remove(namespace, next(iter(expiry)))
+            expired += 1
+        return expired
+
+    def get(self, namespace: str, key: str) -> dict | None:
+        with self._lock:
+            entries = self._namespaces[namespace]
+            if key not in entries:
+                return None
+            # Expired entries are removed (and counted) by `_remove_expired`
+            expires_at = self._expiry[namespace].get(key)
+            if expires_at is not None and expires_at <= time.time():
+                return None
+            entries.move_to_end(key)
+            return entries[key]
+
+    def put(
+        self,
+        namespace: str,
+        key: str,
+        entry: dict,
+        size: int,
+        max_size: int,
+        max_memory: int | None,
+        ttl: float | None = None,
+    ) -> tuple[int, int]:
+        with self._lock:
+            entries = self._namespaces[namespace]
+            self._remove(namespace, key)
+            entries[key] = entry
+            self._entry_sizes[namespace][key] = size
+            self._total_memory[namespace] += size
+            if ttl is not None:
+                self._expiry[namespace][key] = time.time() + ttl
+            expired = self._remove_expired(namespace)
+            evicted = 0
+            while entries and _over_limits(
+                len(entries), self._total_memory[namespace], max_size, max_memory
+            ):
+                self._remove(namespace, next(iter(entries)))
+                evicted += 1
+            return evicted, expired
+
+    def keys(self, namespace: str, prefix: str = "") -> list[Any]:
+        with self._lock:
+            self._remove_expired(namespace)
+            return [
+                entry.get("_key")
+                for key, entry in self._namespaces[namespace].items()
+                if key.startswith(prefix)
+            ]
+
+    def delete_prefix(self, namespace: str, prefix: str) -> None:
+        with self._lock:
+            entries = self._namespaces[namespace]
+            for key in [key for key in entries if key.startswith(prefix)]:
+                self._remove(namespace, key)
+
+    def clear(self, namespace: str) -> None:
+        with self._lock:
+            self._namespaces.pop(namespace, None)
+            self._entry_sizes.pop(namespace, None)
+            self._total_memory.pop(namespace, None)
+            self._expiry.pop(namespace, None)
+
+    def count(self, namespace: str) -> int:
+        with self._lock:
+            self._remove_expired(namespace)
+            return len(self._namespaces.get(namespace, ()))
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """
+    Stores entries in a SQLite database on the local disk, so that several Gradio
+    processes running on the same host share their cached results. Values are
+    pickled, so the database file should only be writable by trusted processes.
+    Cache hits do not write to the database: the LRU order is updated in batches,
+    before entries are evicted or listed and at most every `touch_interval` seconds.
+    """
+
+    touch_interval = 1.0
+
+    def __init__(self, path: str | Path, *, namespace: str = "gradio"):
+        """
+        Parameters:
+            path: path of the SQLite database file. It is created if it does not exist.
+            namespace: prefix for all namespaces, so that several apps can share a database.
+        """
+        self.path = str(path)
+        self.namespace = namespace
+        self._local = threading.local()
+        # Times at which entries were last read, by (namespace, key)
+        self._touched: dict[tuple[str, str], int] = {}
+        self._touched_lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS gradio_cache ("
+                "namespace TEXT NOT NULL, key TEXT NOT NULL, value BLOB NOT NULL, "
+                "raw_key BLOB, size INTEGER NOT NULL, last_used INTEGER NOT NULL, "
+                "expires_at REAL, PRIMARY KEY (namespace, key))"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS gradio_cache_lru "
+                "ON gradio_cache (namespace, last_used)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS gradio_cache_expiry "
+                "ON gradio_cache (namespace, expires_at)"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections cannot be shared between threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _ns(self, namespace: str) -> str:
+        return f"{self.namespace}:{namespace}"
+
+    @staticmethod
+    def _remove_expired(conn: sqlite3.Connection, ns: str) -> int:
+        return conn.execute(
+            "DELETE FROM gradio_cache WHERE namespace = ? AND expires_at <= ?",
+            (ns, time.time()),
+        ).rowcount
+
+    def _flush_touches(self, conn: sqlite3.Connection) -> None:
+        with self._touched_lock:
+            touched, self._touched = self._touched, {}
+            self._last_flush = time.monotonic()
+        conn.executemany(
+            "UPDATE gradio_cache SET last_used = MAX(last_used, ?) "
+            "WHERE namespace = ? AND key = ?",
+            [(last_used, ns, key) for (ns, key), last_used in touched.items()],
+        )
+
+    def get(self, namespace: str, key: str) -> dict | None:
+        ns = self._ns(namespace)
+        conn = self._connection()
+        row = conn.execute(
+            "SELECT value, expires_at FROM gradio_cache WHERE namespace = ? AND key = ?",
+            (ns, key),
+        ).fetchone()
+        if row is None:
+            return None
+        if row[1] is not None and row[1] <= time.time():
+            return None
+        with self._touched_lock:
+            self._touched[(ns, key)] = time.time_ns()
+            due = time.monotonic() - self._last_flush >= self.touch_interval
+        if due:
+            with conn:
+                self._flush_touches(conn)
+        return _deserialize(row[0])
+
+    def put(
+        self,
+        namespace: str,
+        key: str,
+        entry: dict,
+        size: int,
+        max_size: int,
+        max_memory: int | None,
+        ttl: float | None = None,
+    ) -> tuple[int, int]:
+        value = _serialize(entry)
+        raw_key = _serialize(entry.get("_key"))
+        expires_at = time.time() + ttl if ttl is not None else None
+        ns = self._ns(namespace)
+        with self._connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            self._flush_touches(conn)
+            conn.execute(
+                "INSERT OR REPLACE INTO gradio_cache "
+                "(namespace, key, value, raw_key, size, last_used, expires_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (ns, key, value, raw_key, size, time.time_ns(), expires_at),
+            )
+            expired = self._remove_expired(conn, ns)
+            count, total_memory = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM gradio_cache "
+                "WHERE namespace = ?",
+                (ns,),
+            ).fetchone()
+            oldest = conn.execute(
+                "SELECT key, size FROM gradio_cache WHERE namespace = ? "
+                "ORDER BY last_used",
+                (ns,),
+            )
+            evicted = []
+            while count and _over_limits(count, total_memory, max_size, max_memory):
+                evicted_key, evicted_size = oldest.fetchone()
+                evicted.append((ns, evicted_key))
+                count -= 1
+                total_memory -= evicted_size
+            conn.executemany(
+                "DELETE FROM gradio_cache WHERE namespace = ? AND key = ?", evicted
+            )
+        return len(evicted), expired
+
+    def keys(self, namespace: str, prefix: str = "") -> list[Any]:
+        ns = self._ns(namespace)
+        with self._connection() as conn:
+            self._flush_touches(conn)
+            self._remove_expired(conn, ns)
+            rows = conn.execute(
+                "SELECT raw_key FROM gradio_cache "
+                "WHERE namespace = ? AND substr(key, 1, ?) = ? ORDER BY last_used",
+                (ns, len(prefix), prefix),
+            ).fetchall()
+        return [_deserialize(row[0]) for row in rows]
+
+    def delete_prefix(self, namespace: str, prefix: str) -> None:
+        with self._connection() as conn:
+            conn.execute(
+                "DELETE FROM gradio_cache "
+                "WHERE namespace = ? AND substr(key, 1, ?) = ?",
+                (self._ns(namespace), len(prefix), prefix),
+            )
+
+    def clear(self, namespace: str) -> None:
+        with self._connection() as conn:
+            conn.execute(
+                "DELETE FROM gradio_cache WHERE namespace = ?", (self._ns(namespace),)
+            )
+
+    def count(self, namespace: str) -> int:
+        ns = self._ns(namespace)
+        with self._connection() as conn:
+            self._remove_expired(conn, ns)
+            return conn.execute(
+                "SELECT COUNT(*) FROM gradio_cache WHERE namespace = ?", (ns,)
+            ).fetchone()[0]
+
+
+# Shared by the Lua scripts of `RedisCacheBackend`. KEYS are the keys returned by
+# `RedisCacheBackend._keys()`: every key that a script touches is passed in KEYS,
+# and they share a hash tag, so that the scripts also run on Redis Cluster.
+_REDIS_LUA_PRELUDE = """
+local values, lru, sizes, raw_keys, expiry, total =
+    KEYS[1], KEYS[2], KEYS[3], KEYS[4], KEYS[5], KEYS[6]
+if redis.call('EXISTS', total) == 0 then
+    -- Caches written before the running total was kept
+    local sum = 0
+    for _, size in ipairs(redis.call('HVALS', sizes)) do
+        sum = sum + tonumber(size)
+    end
+    redis.call('SET', total, sum)
+end
+local function delete(key)
+    redis.call('HDEL', values, key)
+    redis.call('ZREM', lru, key)
+    redis.call('ZREM', expiry, key)
+    redis.call('HDEL', raw_keys, key)
+    local size = redis.call('HGET', sizes, key)
+    if size then
+        redis.call('HDEL', sizes, key)
+        redis.call('DECRBY', total, size)
+    end
+end
+local function remove_expired(now)
+    local expired = redis.call('ZRANGEBYSCORE', expiry, '-inf', now)
+    for _, key in ipairs(expired) do
+        delete(key)
+    end
+    return #expired
+end
+"""
+
+# ARGV: key, current time, LRU score. Returns the value of the entry, unless it is
+# missing or expired (expired entries are removed, and counted, by `put()`).
+_REDIS_GET_SCRIPT = (
+    _REDIS_LUA_PRELUDE
+    + """
+local expires_at = redis.call('ZSCORE', expiry, ARGV[1])
+if expires_at and tonumber(expires_at) <= tonumber(ARGV[2]) then
+    return false
+end
+local value = redis.call('HGET', values, ARGV[1])
+if value then
+    redis.call('ZADD', lru, 'XX', ARGV[3], ARGV[1])
+end
+return value
+"""
+)
+
+# ARGV: key, value, size, raw key, current time, ttl in seconds (or ""), LRU score,
+# max_size, max_memory (or ""). Returns the number of evicted and expired entries.
+_REDIS_PUT_SCRIPT = (
+    _REDIS_LUA_PRELUDE
+    + """
+local key, size = ARGV[1], tonumber(ARGV[3])
+local now, ttl = tonumber(ARGV[5]), tonumber(ARGV[6])
+local max_size, max_memory = tonumber(ARGV[8]), tonumber(ARGV[9])
+redis.call('HSET', values, key, ARGV[2])
+if ttl then
+    redis.call('ZADD', expiry, now + ttl, key)
+else
+    redis.call('ZREM', expiry, key)
+end
+local old_size = tonumber(redis.call('HGET', sizes, key) or 0)
+redis.call('HSET', sizes, key, size)
+redis.call('INCRBY', total, size - old_size)
+redis.call('HSET', raw_keys, key, ARGV[4])
+redis.call('ZADD', lru, ARGV[7], key)
+local expired = remove_expired(now)
+local count = redis.call('ZCARD', lru)
+local memory = tonumber(redis.call('GET', total))
+local evicted = 0
+while count > 0 and ((max_size > 0 and count > max_size)
+        or (max_memory and memory > max_memory and count > 1)) do
+    local oldest = redis.call('ZRANGE', lru, 0, 0)[1]
+    memory = memory - tonumber(redis.call('HGET', sizes, oldest) or 0)
+    delete(oldest)
+    count = count - 1
+    evicted = evicted + 1
+end
+return {evicted, expired}
+"""
+)
+
+# ARGV: current time. Returns the number of expired entries.
+_REDIS_EXPIRE_SCRIPT = (
+    _REDIS_LUA_PRELUDE
+    + """
+return remove_expired(tonumber(ARGV[1]))
+"""
+)
+
+# ARGV: the keys of the entries to delete.
+_REDIS_DELETE_SCRIPT = (
+    _REDIS_LUA_PRELUDE
+    + """
+for _, key in ipairs(ARGV) do
+    delete(key)
+end
+"""
+)
+
+
+class RedisCacheBackend(CacheBackend):
+    """
+    Stores entries on a Redis server (or any server that speaks the Redis
+    protocol, including Redis Cluster), so that Gradio processes running on several
+    hosts share their cached results. Values are pickled, so the server should only
+    be writable by trusted processes. Entries are read, written and evicted by Lua
+    scripts, so that each `get()` and `put()` takes a single round trip and is
+    atomic, and the total size of the entries is kept up to date rather than summed
+    on every write.
+    """
+
+    def __init__(
+        self,
+        url: str = "redis://localhost:6379/0",
+        *,
+        client: Any = None,
+        namespace: str = "gradio",
+    ):
+        """
+        Parameters:
+            url: URL of the Redis server. Ignored if `client` is provided.
+            client: an existing client with the same interface as `redis.Redis`.
+            namespace: prefix for all Redis keys, so that several apps can share a server.
+        """
+        if client is None:
+            try:
+                import redis  # ty: ignore[unresolved-import]
+            except ImportError as e:
+                raise ImportError(
+                    "The `redis` package is required to use the RedisCacheBackend. "
+                    "Please install it with `pip install redis`."
+                ) from e
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.namespace = namespace
+        self._get_script = client.register_script(_REDIS_GET_SCRIPT)
+        self._put_script = client.register_script(_REDIS_PUT_SCRIPT)
+        self._expire_script = client.register_script(_REDIS_EXPIRE_SCRIPT)
+        self._delete_script = client.register_script(_REDIS_DELETE_SCRIPT)
+
+    def _keys(self, namespace: str) -> tuple[str, str, str, str, str, str]:
+        # The hash tag puts all the keys of a namespace in the same cluster slot
+        base = f"{{{self.namespace}:cache:{namespace}}}"
+        # entry values (hash), LRU order (sorted set), entry sizes (hash), raw keys
+        # (hash), expiry times (sorted set), total size of the entries
+        return (
+            f"{base}:values",
+            f"{base}:lru",
+            f"{base}:size",
+            f"{base}:raw",
+            f"{base}:exp",
+            f"{base}:total",
+        )
+
+    def get(self, namespace: str, key: str) -> dict | None:
+        data = self._get_script(
+            keys=self._keys(namespace), args=[key, repr(time.time()), time.time_ns()]
+        )
+        if data is None:
+            return None
+        return _deserialize(data)
+
+    def put(
+        self,
+        namespace: str,
+        key: str,
+        entry: dict,
+        size: int,
+        max_size: int,
+        max_memory: int | None,
+        ttl: float | None = None,
+    ) -> tuple[int, int]:
+        evicted, expired = self._put_script(
+            keys=self._keys(namespace),
+            args=[
+                key,
+                _serialize(entry),
+                size,
+                _serialize(entry.get("_key")),
+                repr(time.time()),
+                "" if ttl is None else repr(ttl),
+                time.time_ns(),
+                max_size,
+                "" if max_memory is None else max_memory,
+            ],
+        )
+        return int(evicted), int(expired)
+
+    @staticmethod
+    def _decode(key: str | bytes) -> str:
+        return key.decode() if isinstance(key, bytes) else key
+
+    def _delete(self, namespace: str, keys: list[str]) -> None:
+        if not keys:
+            return
+        self._delete_script(keys=self._keys(namespace), args=keys)
+
+    def _remove_expired(self, namespace: str) -> int:
+        return int(
+            self._expire_script(keys=self._keys(namespace), args=[repr(time.time())])
+        )
+
+    def _all_keys(self, namespace: str) -> list[str]:
+        _, lru, *_ = self._keys(namespace)
+        return [self._decode(key) for key in self.client.zrange(lru, 0, -1)]
+
+    def keys(self, namespace: str, prefix: str = "") -> list[Any]:
+        _, _, _, raw_keys, _, _ = self._keys(namespace)
+        self._remove_expired(namespace)
+        keys = [key for key in self._all_keys(namespace) if key.startswith(prefix)]
+        if not keys:
+            return []
+        return [_deserialize(raw) for raw in self.client.hmget(raw_keys, keys) if raw]
+
+    def delete_prefix(self, namespace: str, prefix: str) -> None:
+        self._delete(
+            namespace,
+            [key for key in self._all_keys(namespace) if key.startswith(prefix)],
+        )
+
+    def clear(self, namespace: str) -> None:
+        self._delete(namespace, self._all_keys(namespace))
+
+    def count(self, namespace: str) -> int:
+        _, lru, *_ = self._keys(namespace)
+        self._remove_expired(namespace)
+        return self.client.zcard(lru)
+
+
 class _CacheStore:
     def __init__(
         self,
         max_size: int = 128,
         max_memory: int | None = None,
         per_session: bool = False,
+        backend: CacheBackend | None = None,
+        namespace: str = "",
+        ttl: float | None = None,
     ):
         self._max_size = max_size
         self._max_memory = max_memory
         self._per_session = per_session
-        self._exact: OrderedDict[str, dict] = OrderedDict()
-        self._entry_sizes: dict[str, int] = {}
-        self._total_memory: int = 0
-        self._lock = threading.Lock()
+        self._backend = backend if backend is not None else MemoryCacheBackend()
+        self._namespace = namespace
+        self._ttl = ttl
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+        self._stats_lock = threading.Lock()
         if self._per_session:
             _per_session_stores.add(self)
 
@@ -181,76 +951,51 @@ class _CacheStore:
             return key_hash
         return f"{self._session_prefix()}{key_hash}"
 
+    def _count(self, **increments: int) -> None:
+        with self._stats_lock:
+            for name, increment in increments.items():
+                self._stats[name] += increment
+
     def get(self, key_hash: str) -> dict | None:
-        full_key = self._session_key(key_hash)
-        with self._lock:
-            if full_key in self._exact:
-                self._exact.move_to_end(full_key)
-                return self._exact[full_key]
-            return None
+        entry = self._backend.get(self._namespace, self._session_key(key_hash))
+        if entry is not None:
+            self._count(hits=1)
+        elif not _probe_mode_active.get():
+            # A miss while probing is followed by a lookup when the event runs
+            self._count(misses=1)
+        return entry
 
     def put(self, key_hash: str, **entry: Any) -> None:
-        full_key = self._session_key(key_hash)
         entry_size = _estimate_size(entry) if self._max_memory else 0
-        with self._lock:
-            if full_key in self._exact:
-                self._total_memory -= self._entry_sizes.get(full_key, 0)
-                self._exact.move_to_end(full_key)
-                self._exact[full_key] = entry
-                self._entry_sizes[full_key] = entry_size
-                self._total_memory += entry_size
-            else:
-                self._exact[full_key] = entry
-                self._entry_sizes[full_key] = entry_size
-                self._total_memory += entry_size
-            self._evict()
-
-    def _evict(self) -> None:
-        while self._exact:
-            over_count = self._max_size > 0 and len(self._exact) > self._max_size
-            over_memory = (
-                self._max_memory is not None
-                and self._total_memory > self._max_memory
-                and len(self._exact) > 1
-            )
-            if not over_count and not over_memory:
-                break
-            key, _ = self._exact.popitem(last=False)
-            self._total_memory -= self._entry_sizes.pop(key, 0)
+        evicted, expired = self._backend.put(
+            self._namespace,
+            self._session_key(key_hash),
+            entry,
+            entry_size,
+            self._max_size,
+            self._max_memory,
+            self._ttl,
+        )
+        self._count(evictions=evicted, expirations=expired)
+
+    def stats(self) -> dict[str, int]:
+        with self._stats_lock:
+            return {**self._stats, "size": len(self)}
 
     def clear(self) -> None:
-        with self._lock:
-            self._exact.clear()
-            self._entry_sizes.clear()
-            self._total_memory = 0
+        self._backend.clear(self._namespace)
 
     def clear_session(self, session_hash: str | None = None) -> None:
         if not self._per_session:
             return
-        session_prefix = self._session_prefix(session_hash)
-        with self._lock:
-            keys_to_delete = [
-                key for key in self._exact if key.startswith(session_prefix)
-            ]
-            for key in keys_to_delete:
-                self._exact.pop(key, None)
-                self._total_memory -= self._entry_sizes.pop(key, 0)
+        self._backend.delete_prefix(self._namespace, self._session_prefix(session_hash))
 
     def keys(self) -> list[Any]:
-        with self._lock:
-            if not self._per_session:
-                return [entry.get("_key") for entry in self._exact.values()]
-
-            session_prefix = self._session_prefix()
-            return [
-                entry.get("_key")
-                for key, entry in self._exact.items()
-                if key.startswith(session_prefix)
-            ]
+        prefix = self._session_prefix() if self._per_session else ""
+        return self._backend.keys(self._namespace, prefix)
 
     def __len__(self) -> int:
-        with self._lock:
-            return len(self._exact)
+        return self._backend.count(self._namespace)
 
 
 _per_session_stores: weakref.WeakSet[_CacheStore] = weakref.WeakSet()
@@ -326,6 +1071,9 @@ def _make_store(
     max_size: int,
     max_memory: str | int | None,
     per_session: bool,
+    backend: CacheBackend | None = None,
+    namespace: str = "",
+    ttl: float | None = None,
 ) -> _CacheStore:
     from gradio.utils import _parse_file_size
 
@@ -333,6 +1081,9 @@ def _make_store(
         max_size=max_size,
         max_memory=_parse_file_size(max_memory),
         per_session=per_session,
+        backend=backend,
+        namespace=namespace,
+        ttl=ttl,
     )
 
 
@@ -341,6 +1092,78 @@ def clear_session_caches(session_hash: str | None) -> None:
         store.clear_session(session_hash)
 
 
+class _Flight:
+    """
+    An in-flight computation of a cache entry, which concurrent callers with the
+    same key wait for (and, for generators, replay the yields of) instead of
+    computing the same entry again.
+    """
+
+    def __init__(self):
+        self.values: list[Any] = []
+        self.result: Any = None
+        self.error: Exception | None = None
+        # Set if the computation was cancelled (e.g. the leader's client left),
+        # in which case the followers compute the entry themselves
+        self.abandoned = False
+        self.done = False
+        self._condition = threading.Condition()
+        self._async_event: asyncio.Event | None = None
+
+    def _notify(self):
+        self._condition.notify_all()
+        if self._async_event is not None:
+            self._async_event.set()
+            self._async_event = None
+
+    def publish(self, value: Any):
+        with self._condition:
+            self.values.append(value)
+            self._notify()
+
+    def finish(
+        self, result: Any = None, error: Exception | None = None, abandoned=False
+    ):
+        with self._condition:
+            self.result = result
+            self.error = error
+            self.abandoned = abandoned
+            self.done = True
+            self._notify()
+
+    def wait(self, seen: int = 0):
+        """Blocks until more than `seen` values are published or the flight is done."""
+        with self._condition:
+            self._condition.wait_for(lambda: len(self.values) > seen or self.done)
+
+    async def wait_async(self, seen: int = 0):
+        while len(self.values) <= seen and not self.done:
+            if self._async_event is None:
+                self._async_event = asyncio.Event()
+            await self._async_event.wait()
+
+
+class _SingleFlight:
+    def __init__(self):
+        self._flights: dict[str, _Flight] = {}
+        self._lock = threading.Lock()
+
+    def join(self, key: str) -> tuple[_Flight, bool]:
+        """Returns the flight for `key`, and whether the caller must compute it."""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                return flight, False
+            flight = self._flights[key] = _Flight()
+            return flight, True
+
+    def land(self, key: str, flight: _Flight, **outcome: Any):
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+        flight.finish(**outcome)
+
+
 def _make_wrapper(
     func: Callable,
     store: _CacheStore,
@@ -349,6 +1172,7 @@ def _make_wrapper(
     track_cache_hits: bool = False,
 ) -> Callable:
     signature = inspect.signature(func)
+    flights = _SingleFlight()
 
     def _compute_hash(normalized: dict) -> str:
         if key is not None:
@@ -377,11 +1201,47 @@ def _make_wrapper(
                 _on_hit()
                 return
             _on_miss()
-            all_yields = []
-            for value in func(**normalized):
-                all_yields.append(copy.deepcopy(value))
-                yield value
-            store.put(key_hash, yields=all_yields)
+            flight_key = store._session_key(key_hash)
+            flight, is_leader = flights.join(flight_key)
+            seen = 0
+            if not is_leader:
+                from gradio.utils import limiter_released
+
+                while not (flight.done and seen == len(flight.values)):
+                    # Each step of a sync generator runs in a thread of the app's
+                    # limiter, which the leader needs for its own next step: give
+                    # the token back while waiting, so that followers cannot hold
+                    # every token while the leader waits for one
+                    with limiter_released():
+                        flight.wait(seen)
+                    for value in flight.values[seen:]:
+                        _on_hit()
+                        yield value
+                        seen += 1
+                if flight.error is not None:
+                    raise flight.error
+                if not flight.abandoned:
+                    _on_hit()
+                    return
+                # The leader was cancelled: compute the entry, without repeating the
+                # yields that were already replayed
+                flight = _Flight()
+            try:
+                for i, value in enumerate(func(**normalized)):
+                    flight.publish(copy.deepcopy(value))
+                    if i >= seen:
+                        yield value
+            except Exception as e:
+                if is_leader:
+                    flights.land(flight_key, flight, error=e)
+                raise
+            except BaseException:
+                if is_leader:
+                    flights.land(flight_key, flight, abandoned=True)
+                raise
+            store.put(key_hash, yields=flight.values)
+            if is_leader:
+                flights.land(flight_key, flight)
 
         return sync_gen_wrapper
 
@@ -399,11 +1259,42 @@ def _make_wrapper(
                 _on_hit()
                 return
             _on_miss()
-            all_yields = []
-            async for value in func(**normalized):
-                all_yields.append(copy.deepcopy(value))
-                yield value
-            store.put(key_hash, yields=all_yields)
+            flight_key = store._session_key(key_hash)
+            flight, is_leader = flights.join(flight_key)
+            seen = 0
+            if not is_leader:
+                while True:
+                    await flight.wait_async(seen)
+                    for value in flight.values[seen:]:
+                        _on_hit()
+                        yield value
+                        seen += 1
+                    if flight.done and seen == len(flight.values):
+                        break
+                if flight.error is not None:
+                    raise flight.error
+                if not flight.abandoned:
+                    _on_hit()
+                    return
+                flight = _Flight()
+            try:
+                i = 0
+                async for value in func(**normalized):
+                    flight.publish(copy.deepcopy(value))
+                    if i >= seen:
+                        yield value
+                    i += 1
+            except Exception as e:
+                if is_leader:
+                    flights.land(flight_key, flight, error=e)
+                raise
+            except BaseException:
+                if is_leader:
+                    flights.land(flight_key, flight, abandoned=True)
+                raise
+            store.put(key_hash, yields=flight.values)
+            if is_leader:
+                flights.land(flight_key, flight)
 
         return async_gen_wrapper
 
@@ -418,8 +1309,26 @@ def _make_wrapper(
                 _on_hit()
                 return entry["value"]
             _on_miss()
-            result = await func(**normalized)
+            flight_key = store._session_key(key_hash)
+            flight, is_leader = flights.join(flight_key)
+            if not is_leader:
+                await flight.wait_async()
+                if flight.error is not None:
+                    raise flight.error
+                if not flight.abandoned:
+                    _on_hit()
+                    return flight.result
+                return await async_wrapper(*args, **kwargs)
+            try:
+                result = await func(**normalized)
+            except Exception as e:
+                flights.land(flight_key, flight, error=e)
+                raise
+            except BaseException:
+                flights.land(flight_key, flight, abandoned=True)
+                raise
             store.put(key_hash, value=result)
+            flights.land(flight_key, flight, result=result)
             return result
 
         return async_wrapper
@@ -435,13 +1344,85 @@ def _make_wrapper(
                 _on_hit()
                 return entry["value"]
             _on_miss()
-            result = func(**normalized)
+            flight_key = store._session_key(key_hash)
+            flight, is_leader = flights.join(flight_key)
+            if not is_leader:
+                flight.wait()
+                if flight.error is not None:
+                    raise flight.error
+                if not flight.abandoned:
+                    _on_hit()
+                    return flight.result
+                return sync_wrapper(*args, **kwargs)
+            try:
+                result = func(**normalized)
+            except Exception as e:
+                flights.land(flight_key, flight, error=e)
+                raise
+            except BaseException:
+                flights.land(flight_key, flight, abandoned=True)
+                raise
             store.put(key_hash, value=result)
+            flights.land(flight_key, flight, result=result)
             return result
 
         return sync_wrapper
 
 
+def _code_digest(code: Any) -> str:
+    h = hashlib.sha256(code.co_code)
+    h.update(repr(code.co_names).encode())
+    for const in code.co_consts:
+        if inspect.iscode(const):
+            h.update(_code_digest(const).encode())
+        elif isinstance(const, frozenset):
+            # The order of a frozenset depends on the hash seed of the process
+            h.update(repr(sorted(map(repr, const))).encode())
+        else:
+            h.update(repr(const).encode())
+    return h.hexdigest()
+
+
+def _code_fingerprint(func: Callable | None) -> str:
+    if func is None:
+        return ""
+    if isinstance(func, functools.partial):
+        return (
+            f"partial({_code_fingerprint(func.func)}, {func.args!r}, {func.keywords!r})"
+        )
+    code = getattr(inspect.unwrap(func), "__code__", None)
+    if code is None:
+        return f"{type(func).__module__}.{type(func).__qualname__}"
+    return f"{Path(code.co_filename).name}:{code.co_firstlineno}:{_code_digest(code)}"
+
+
+def _function_namespace(
+    func: Callable,
+    key: Callable | None,
+    backend: CacheBackend | None,
+    config: tuple,
+) -> str:
+    """
+    Returns the namespace of the entries of a cached function. Functions are named
+    by their qualified name and code (rather than their id), so that processes that
+    share a backend also share their cached results, and by the configuration of
+    the cache, so that the same function cached twice does not mix its entries.
+    """
+    # Callable objects, such as functools.partial objects, have no __qualname__
+    name = getattr(func, "__qualname__", type(func).__qualname__)
+    shared = backend is not None and not isinstance(backend, MemoryCacheBackend)
+    if shared and "<locals>" in name and getattr(func, "__closure__", None):
+        raise ValueError(
+            f"Cannot cache {name} in a shared backend: it is a closure, "
+            "so its name and code do not identify the values it captures. Define it "
+            "at the top level of a module, or use an in-memory cache."
+        )
+    fingerprint = hashlib.sha256(
+        repr((_code_fingerprint(func), _code_fingerprint(key), config)).encode()
+    ).hexdigest()[:16]
+    return f"{func.__module__}.{name}:{fingerprint}"
+
+
 def _get_cached_wrapper(
     func: Callable,
     *,
@@ -449,22 +1430,25 @@ def _get_cached_wrapper(
     max_size: int,
     max_memory: str | int | None,
     per_session: bool,
+    backend: CacheBackend | None = None,
+    ttl: float | None = None,
 ) -> Callable:
     from gradio.utils import _parse_file_size
 
+    config = (max_size, _parse_file_size(max_memory), per_session, ttl)
     registry_key = (
         id(func),
         id(key) if key is not None else None,
-        max_size,
-        _parse_file_size(max_memory),
-        per_session,
+        id(backend) if backend is not None else None,
+        *config,
     )
     with _runtime_cache_lock:
         wrapper = _cache_wrappers.get(registry_key)
         if wrapper is not None:
             _cache_wrappers.move_to_end(registry_key)
             return wrapper
-        store = _make_store(max_size, max_memory, per_session)
+        namespace = _function_namespace(func, key, backend, config)
+        store = _make_store(max_size, max_memory, per_session, backend, namespace, ttl)
         wrapper = _make_wrapper(
             func,
             store,
@@ -486,6 +1470,8 @@ def cache(
     max_size: int = 128,
     max_memory: str | int | None = None,
     per_session: bool = False,
+    backend: CacheBackend | None = None,
+    ttl: float | None = None,
 ):
     """
     Decorator that auto-caches function results based on content-hashed inputs. Works with sync/async functions and sync/async generators. For generators, all yielded values are cached and replayed on hit. Cache hits bypass the Gradio queue. It can also be called at runtime as `gr.cache(fn)(*args)` to cache intermediate helper calls.
@@ -495,6 +1481,8 @@ def cache(
         max_size: Maximum number of cache entries. Least-recently-used entries are evicted when full. Set to 0 for unlimited. Default: 128.
         max_memory: Maximum total memory usage before eviction. Accepts strings like "512mb", "2gb" or integer bytes. When exceeded, least-recently-used entries are evicted. If None, no memory limit is applied. If both max_size and max_memory are set, the cache will evict entries when either limit is reached.
         per_session: When True, each user session gets an isolated cache namespace, preventing cached results from leaking between users. Per-session entries are cleared when the client session disconnects. The max_size and max_memory limits apply to the sum of all entries across all sessions.
+        backend: Where the cache entries are stored. If None, entries are kept in the memory of the current process. Pass a `gradio.caching.SQLiteCacheBackend` to share cached results between the Gradio processes running on a host, or a `gradio.caching.RedisCacheBackend` to share them between hosts.
+        ttl: Number of seconds after which a cached result expires and is recomputed. If None, results only expire when they are evicted.
     Example: (decorator)
         import gradio as gr
         @gr.cache
@@ -519,6 +1507,8 @@ def cache(
             max_size=max_size,
             max_memory=max_memory,
             per_session=per_session,
+            backend=backend,
+            ttl=ttl,
         )
 
     if fn is not None:
@@ -531,7 +1521,7 @@ def cache(
     return decorator
 
 
-@document("get", "set", "keys", "clear")
+@document("get", "set", "keys", "clear", "stats")
 class Cache:
     """
     Thread-safe cache with manual get/set control, injected as a function parameter (add as a default parameter value and Gradio will inject it automatically). Supports per-session isolation so cached data doesn't leak between users, content-aware hashing for ML types (numpy, PIL, pandas), and LRU eviction with memory limits.
@@ -539,6 +1529,9 @@ class Cache:
         max_size: Maximum number of cache entries. Least-recently-used entries are evicted when full. Set to 0 for unlimited. Default: 128.
         max_memory: Maximum total memory usage before eviction. Accepts strings like "512mb", "2gb" or integer bytes.
         per_session: When True, each user session gets an isolated cache namespace, preventing cached data from leaking between users. Per-session entries are cleared when the client session disconnects. The max_size and max_memory limits still apply to the shared underlying cache store across all sessions. Default: False.
+        backend: Where the cache entries are stored. If None, entries are kept in the memory of the current process. Pass a `gradio.caching.SQLiteCacheBackend` or `gradio.caching.RedisCacheBackend` to share the entries between processes or hosts.
+        name: Name under which the entries are stored in the backend. Caches that use the same backend and name (e.g. the same cache created in several processes) share their entries.
+        ttl: Number of seconds after which an entry expires. If None, entries only expire when they are evicted.
     Example:
         import gradio as gr
         def generate(prompt, c=gr.Cache(per_session=True)):
@@ -556,8 +1549,11 @@ class Cache:
         max_size: int = 128,
         max_memory: str | int | None = None,
         per_session: bool = False,
+        backend: CacheBackend | None = None,
+        name: str = "gr.Cache",
+        ttl: float | None = None,
     ):
-        self._store = _make_store(max_size, max_memory, per_session)
+        self._store = _make_store(max_size, max_memory, per_session, backend, name, ttl)
 
     def get(self, key: Any) -> dict | None:
         """
@@ -594,5 +1590,11 @@ class Cache:
         """
         self._store.clear()
 
+    def stats(self) -> dict[str, int]:
+        """
+        Return the number of hits, misses, evictions and expirations of this cache (in the current process), and its current number of entries. The same statistics are available for functions decorated with gr.cache, as `fn.cache.stats()`.
+        """
+        return self._store.stats()
+
     def __len__(self) -> int:
         return len(self._store)
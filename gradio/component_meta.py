@@ -32,6 +32,8 @@ INTERFACE_TEMPLATE = '''
         queue: bool | None = None,
         batch: bool = False,
         max_batch_size: int = 4,
+        batch_wait_ms: float = 0,
+        queue_priority: int = 0,
         preprocess: bool = True,
         postprocess: bool = True,
         cancels: dict[str, Any] | list[dict[str, Any]] | None = None,
@@ -60,6 +62,8 @@ INTERFACE_TEMPLATE = '''
             queue: if True, will place the request on the queue, if the queue has been enabled. If False, will not put this event on the queue, even if the queue has been enabled. If None, will use the queue setting of the gradio app.
             batch: if True, then the function should process a batch of inputs, meaning that it should accept a list of input values for each parameter. The lists should be of equal length (and be up to length `max_batch_size`). The function is then *required* to return a tuple of lists (even if there is only 1 output component), with each list in the tuple corresponding to one output component.
             max_batch_size: maximum number of inputs to batch together if this is called from the queue (only relevant if batch=True)
+            batch_wait_ms: maximum time (in milliseconds) that the queue may hold the first event of a batch while waiting for more events to arrive, until `max_batch_size` events are available. Increases latency in exchange for larger batches (only relevant if batch=True). Defaults to 0, i.e. a batch is formed from whatever events are queued.
+            queue_priority: events with a higher priority are dispatched from the queue before events with a lower priority that are waiting for a worker, e.g. to give a paid tier its own lane. Defaults to 0.
             preprocess: if False, will not run preprocessing of component data before running 'fn' (e.g. leaving it as a base64 string if this method is called with the `Image` component).
             postprocess: if False, will not run postprocessing of component data before returning 'fn' output to the browser.
             cancels: a list of other events to cancel when this listener is triggered. For example, setting cancels=[click_event] will cancel the click_event, where click_event is the return value of another components .click method. Functions that have not yet run (or generators that are iterating) will be cancelled, but functions that are currently running will be allowed to finish.
@@ -10,6 +10,7 @@ import warnings
 from abc import ABC, abstractmethod
 from collections.abc import Callable, Sequence
 from enum import Enum
+from functools import lru_cache
 from pathlib import Path
 from typing import TYPE_CHECKING, Any, Literal
 
@@ -41,6 +42,16 @@ if TYPE_CHECKING:
     from gradio.components import Timer
 
 
+@lru_cache(maxsize=256)
+def json_schema(model: type[BaseModel]) -> dict[str, Any]:
+    """
+    Returns the JSON schema of a pydantic model. Deriving a schema is slow, so it is
+    computed once per model class and shared by every component that uses the model.
+    The returned schema must not be mutated.
+    """
+    return model.model_json_schema()
+
+
 class _Keywords(Enum):
     NO_VALUE = "NO_VALUE"  # Used as a sentinel to determine if nothing is provided as a argument for `value` in `Component.update()`
     FINISHED_ITERATING = "FINISHED_ITERATING"  # Used to skip processing of a component's value (needed for generators + state)
@@ -151,7 +162,6 @@ class Component(ComponentBase, Block):
         every: Timer | float | None = None,
         inputs: Component | Sequence[Component] | set[Component] | None = None,
     ):
-        self._api_info_cache = None
         self.server_fns = [
             getattr(self, value)
             for value in dir(self.__class__)
@@ -316,13 +326,10 @@ class Component(ComponentBase, Block):
         The typing information for this component as a dictionary whose values are a list of 2 strings: [Python type, language-agnostic description].
         Keys of the dictionary are: raw_input, raw_output, serialized_input, serialized_output
         """
-        if self._api_info_cache is not None:
-            return self._api_info_cache
         if self.data_model is not None:
-            schema = self.data_model.model_json_schema()
+            schema = {**json_schema(self.data_model)}
             desc = schema.pop("description", None)
             schema["additional_description"] = desc
-            self._api_info_cache = schema
             return schema
         raise NotImplementedError(
             f"The api_info method has not been implemented for {self.get_block_name()}"
@@ -334,6 +341,15 @@ class Component(ComponentBase, Block):
     def api_info_as_output(self) -> dict[str, Any]:
         return self.api_info()
 
+    def stream_diff(self, previous: Any, value: Any) -> list[list]:
+        """
+        The edits sent to the frontend, instead of the full value, when a generator yields a new value for this component.
+        `previous` and `value` are the serialized values of the component for the previous and the current yield.
+        Components that know how their value changes while it is streamed (e.g. that only its last item can change)
+        can override this to avoid comparing the parts that cannot have changed.
+        """
+        return utils.diff(previous, value)
+
     def flag(self, payload: Any, flag_dir: str | Path = "") -> str:
         """
         Write the component's value to a format that can be stored in a csv or jsonl format for flagging.
@@ -24,6 +24,8 @@ class Button(Component):
 
     EVENTS = [Events.change, Events.click]
 
+    PATCHABLE_PROPS = frozenset({"visible", "interactive", "scale", "min_width"})
+
     def __init__(
         self,
         value: str | I18nData | Callable = "Run",
@@ -225,6 +225,8 @@ class Chatbot(Component):
         Events.edit,
     ]
 
+    PATCHABLE_PROPS = frozenset({"visible", "label", "scale", "min_width"})
+
     def __init__(
         self,
         value: (list[MessageDict | Message] | Callable | None) = None,
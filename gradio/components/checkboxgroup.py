@@ -27,6 +27,10 @@ class CheckboxGroup(FormComponent):
 
     EVENTS = [Events.change, Events.input, Events.select]
 
+    PATCHABLE_PROPS = frozenset(
+        {"visible", "label", "info", "interactive", "scale", "min_width"}
+    )
+
     def __init__(
         self,
         choices: Sequence[str | int | float | tuple[str | I18nData, str | int | float]]
@@ -46,6 +46,10 @@ class Dropdown(FormComponent):
         Events.key_up,
     ]
 
+    PATCHABLE_PROPS = frozenset(
+        {"visible", "label", "info", "interactive", "scale", "min_width"}
+    )
+
     def __init__(
         self,
         choices: Sequence[str | int | float | tuple[str | I18nData, str | int | float]]
@@ -12,7 +12,7 @@ from gradio_client import handle_file
 from gradio_client.documentation import document
 
 from gradio import image_utils
-from gradio.components.base import Component, StreamingInput
+from gradio.components.base import Component, StreamingInput, json_schema
 from gradio.components.button import Button
 from gradio.components.image_editor import WatermarkOptions, WebcamOptions
 from gradio.data_classes import Base64ImageData, ImageData
@@ -52,6 +52,10 @@ class Image(StreamingInput, Component):
 
     type: Literal["numpy", "pil", "filepath"]
 
+    PATCHABLE_PROPS = frozenset(
+        {"visible", "label", "interactive", "scale", "min_width"}
+    )
+
     def __init__(
         self,
         value: str | PIL.Image.Image | np.ndarray | Callable | None = None,
@@ -226,7 +230,7 @@ class Image(StreamingInput, Component):
 
     def api_info_as_output(self) -> dict[str, Any]:
         if self.streaming == "base64":
-            schema = Base64ImageData.model_json_schema()
+            schema = {**json_schema(Base64ImageData)}
             schema.pop("description", None)
             return schema
         return self.api_info()
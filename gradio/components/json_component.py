@@ -35,6 +35,8 @@ class JSON(Component):
 
     EVENTS = [Events.change]
 
+    PATCHABLE_PROPS = frozenset({"visible", "label", "scale", "min_width"})
+
     def __init__(
         self,
         value: str | dict | list | Callable | None = None,
@@ -32,6 +32,8 @@ class Markdown(Component):
         Events.copy,
     ]
 
+    PATCHABLE_PROPS = frozenset({"visible", "label", "scale", "min_width"})
+
     def __init__(
         self,
         value: str | I18nData | Callable | None = None,
@@ -28,6 +28,10 @@ class Number(FormComponent):
 
     EVENTS = [Events.change, Events.input, Events.submit, Events.focus, Events.blur]
 
+    PATCHABLE_PROPS = frozenset(
+        {"visible", "label", "info", "interactive", "scale", "min_width"}
+    )
+
     def __init__(
         self,
         value: float | Callable | None = None,
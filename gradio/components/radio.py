@@ -28,6 +28,10 @@ class Radio(FormComponent):
 
     EVENTS = [Events.select, Events.change, Events.input]
 
+    PATCHABLE_PROPS = frozenset(
+        {"visible", "label", "info", "interactive", "scale", "min_width"}
+    )
+
     def __init__(
         self,
         choices: Sequence[str | int | float | tuple[str | I18nData, str | int | float]]
@@ -29,6 +29,10 @@ class Slider(FormComponent):
 
     EVENTS = [Events.change, Events.input, Events.release]
 
+    PATCHABLE_PROPS = frozenset(
+        {"visible", "label", "info", "interactive", "scale", "min_width"}
+    )
+
     def __init__(
         self,
         minimum: float = 0,
@@ -67,6 +67,10 @@ class Textbox(FormComponent):
         Events.copy,
     ]
 
+    PATCHABLE_PROPS = frozenset(
+        {"visible", "label", "info", "interactive", "scale", "min_width"}
+    )
+
     def __init__(
         self,
         value: str | I18nData | Callable | None = None,
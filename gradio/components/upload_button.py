@@ -13,7 +13,7 @@ from gradio_client import handle_file
 from gradio_client.documentation import document
 
 from gradio import processing_utils
-from gradio.components.base import Component
+from gradio.components.base import Component, json_schema
 from gradio.data_classes import FileData, ListFiles
 from gradio.events import Events
 from gradio.exceptions import Error
@@ -124,9 +124,9 @@ class UploadButton(Component):
 
     def api_info(self) -> dict[str, list[str]]:
         if self.file_count == "single":
-            return FileData.model_json_schema()
+            return {**json_schema(FileData)}
         else:
-            return ListFiles.model_json_schema()
+            return {**json_schema(ListFiles)}
 
     def example_payload(self) -> Any:
         if self.file_count == "single":
@@ -632,6 +632,8 @@ class EventListener(str):
             queue: bool = True,
             batch: bool = False,
             max_batch_size: int = 4,
+            batch_wait_ms: float = 0,
+            queue_priority: int = 0,
             preprocess: bool = True,
             postprocess: bool = True,
             cancels: dict[str, Any] | list[dict[str, Any]] | None = None,
@@ -658,6 +660,8 @@ class EventListener(str):
                 queue: If True, will place the request on the queue, if the queue has been enabled. If False, will not put this event on the queue, even if the queue has been enabled. If None, will use the queue setting of the gradio app.
                 batch: If True, then the function should process a batch of inputs, meaning that it should accept a list of input values for each parameter. The lists should be of equal length (and be up to length `max_batch_size`). The function is then *required* to return a tuple of lists (even if there is only 1 output component), with each list in the tuple corresponding to one output component.
                 max_batch_size: Maximum number of inputs to batch together if this is called from the queue (only relevant if batch=True)
+                batch_wait_ms: Maximum time (in milliseconds) that the queue may hold the first event of a batch while waiting for more events to arrive, until `max_batch_size` events are available. Increases latency in exchange for larger batches (only relevant if batch=True). Defaults to 0, i.e. a batch is formed from whatever events are queued.
+                queue_priority: Events with a higher priority are dispatched from the queue before events with a lower priority that are waiting for a worker, e.g. to give a paid tier its own lane. Defaults to 0.
                 preprocess: If False, will not run preprocessing of component data before running 'fn' (e.g. leaving it as a base64 string if this method is called with the `Image` component).
                 postprocess: If False, will not run postprocessing of component data before returning 'fn' output to the browser.
                 cancels: A list of other events to cancel when this listener is triggered. For example, setting cancels=[click_event] will cancel the click_event, where click_event is the return value of another components .click method. Functions that have not yet run (or generators that are iterating) will be cancelled, but functions that are currently running will be allowed to finish.
@@ -696,6 +700,8 @@ class EventListener(str):
                         queue=queue,
                         batch=batch,
                         max_batch_size=max_batch_size,
+                        batch_wait_ms=batch_wait_ms,
+                        queue_priority=queue_priority,
                         preprocess=preprocess,
                         postprocess=postprocess,
                         cancels=cancels,
@@ -731,6 +737,8 @@ class EventListener(str):
                         queue=queue,
                         batch=batch,
                         max_batch_size=max_batch_size,
+                        batch_wait_ms=batch_wait_ms,
+                        queue_priority=queue_priority,
                         preprocess=preprocess,
                         postprocess=postprocess,
                         cancels=cancels,
@@ -791,6 +799,8 @@ class EventListener(str):
                 queue=queue,
                 batch=batch,
                 max_batch_size=max_batch_size,
+                batch_wait_ms=batch_wait_ms,
+                queue_priority=queue_priority,
                 trigger_after=_trigger_after,
                 trigger_only_on_success=_trigger_only_on_success,
                 trigger_only_on_failure=_trigger_only_on_failure,
@@ -858,6 +868,8 @@ def on(
     queue: bool = True,
     batch: bool = False,
     max_batch_size: int = 4,
+    batch_wait_ms: float = 0,
+    queue_priority: int = 0,
     preprocess: bool = True,
     postprocess: bool = True,
     cancels: dict[str, Any] | list[dict[str, Any]] | None = None,
@@ -887,6 +899,8 @@ def on(
         queue: If True, will place the request on the queue, if the queue has been enabled. If False, will not put this event on the queue, even if the queue has been enabled. If None, will use the queue setting of the gradio app.
         batch: If True, then the function should process a batch of inputs, meaning that it should accept a list of input values for each parameter. The lists should be of equal length (and be up to length `max_batch_size`). The function is then *required* to return a tuple of lists (even if there is only 1 output component), with each list in the tuple corresponding to one output component.
         max_batch_size: Maximum number of inputs to batch together if this is called from the queue (only relevant if batch=True)
+        batch_wait_ms: Maximum time (in milliseconds) that the queue may hold the first event of a batch while waiting for more events to arrive, until `max_batch_size` events are available. Increases latency in exchange for larger batches (only relevant if batch=True). Defaults to 0, i.e. a batch is formed from whatever events are queued.
+        queue_priority: Events with a higher priority are dispatched from the queue before events with a lower priority that are waiting for a worker, e.g. to give a paid tier its own lane. Defaults to 0.
         preprocess: If False, will not run preprocessing of component data before running 'fn' (e.g. leaving it as a base64 string if this method is called with the `Image` component).
         postprocess: If False, will not run postprocessing of component data before returning 'fn' output to the browser.
         cancels: A list of other events to cancel when this listener is triggered. For example, setting cancels=[click_event] will cancel the click_event, where click_event is the return value of another components .click method. Functions that have not yet run (or generators that are iterating) will be cancelled, but functions that are currently running will be allowed to finish.
@@ -948,6 +962,8 @@ def on(
                 queue=queue,
                 batch=batch,
                 max_batch_size=max_batch_size,
+                batch_wait_ms=batch_wait_ms,
+                queue_priority=queue_priority,
                 preprocess=preprocess,
                 postprocess=postprocess,
                 cancels=cancels,
@@ -983,6 +999,8 @@ def on(
                 queue=queue,
                 batch=batch,
                 max_batch_size=max_batch_size,
+                batch_wait_ms=batch_wait_ms,
+                queue_priority=queue_priority,
                 preprocess=preprocess,
                 postprocess=postprocess,
                 cancels=cancels,
@@ -1044,6 +1062,8 @@ def on(
         queue=queue,
         batch=batch,
         max_batch_size=max_batch_size,
+        batch_wait_ms=batch_wait_ms,
+        queue_priority=queue_priority,
         api_visibility=api_visibility,
         trigger_mode=trigger_mode,
         connection="stream"
@@ -1072,6 +1092,8 @@ def api(
     queue: bool = True,
     batch: bool = False,
     max_batch_size: int = 4,
+    batch_wait_ms: float = 0,
+    queue_priority: int = 0,
     concurrency_limit: int | None | Literal["default"] = "default",
     concurrency_id: str | None = None,
     api_visibility: Literal["public", "private", "undocumented"] = "public",
@@ -1088,6 +1110,8 @@ def api(
         queue: If True, will place the request on the queue, if the queue has been enabled. If False, will not put this event on the queue, even if the queue has been enabled. If None, will use the queue setting of the gradio app.
         batch: If True, then the function should process a batch of inputs, meaning that it should accept a list of input values for each parameter. The lists should be of equal length (and be up to length `max_batch_size`). The function is then *required* to return a tuple of lists (even if there is only 1 output component), with each list in the tuple corresponding to one output component.
         max_batch_size: Maximum number of inputs to batch together if this is called from the queue (only relevant if batch=True)
+        batch_wait_ms: Maximum time (in milliseconds) that the queue may hold the first event of a batch while waiting for more events to arrive, until `max_batch_size` events are available. Increases latency in exchange for larger batches (only relevant if batch=True). Defaults to 0, i.e. a batch is formed from whatever events are queued.
+        queue_priority: Events with a higher priority are dispatched from the queue before events with a lower priority that are waiting for a worker, e.g. to give a paid tier its own lane. Defaults to 0.
         concurrency_limit: If set, this is the maximum number of this event that can be running simultaneously. Can be set to None to mean no concurrency_limit (any number of this event can be running simultaneously). Set to "default" to use the default concurrency limit (defined by the `default_concurrency_limit` parameter in `Blocks.queue()`, which itself is 1 by default).
         concurrency_id: If set, this is the id of the concurrency group. Events with the same concurrency_id will be limited by the lowest set concurrency_limit.
         api_visibility: controls the visibility and accessibility of this endpoint. Can be "public" (shown in API docs and callable by clients), "private" (hidden from API docs and not callable by the Gradio client libraries), or "undocumented" (hidden from API docs but callable by clients and via gr.load). If fn is None, api_visibility will automatically be set to "private".
@@ -1125,6 +1149,8 @@ def api(
                 queue=queue,
                 batch=batch,
                 max_batch_size=max_batch_size,
+                batch_wait_ms=batch_wait_ms,
+                queue_priority=queue_priority,
                 concurrency_limit=concurrency_limit,
                 concurrency_id=concurrency_id,
                 api_visibility=api_visibility,
@@ -1186,6 +1212,8 @@ def api(
         queue=queue,
         batch=batch,
         max_batch_size=max_batch_size,
+        batch_wait_ms=batch_wait_ms,
+        queue_priority=queue_priority,
         api_visibility=api_visibility,
         trigger_mode=None,
         time_limit=time_limit,
@@ -28,6 +28,8 @@ class Column(BlockContext, metaclass=ComponentMeta):
 
     EVENTS = []
 
+    PATCHABLE_PROPS = frozenset({"visible", "scale", "min_width"})
+
     def __init__(
         self,
         *,
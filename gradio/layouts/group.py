@@ -21,6 +21,8 @@ class Group(BlockContext, metaclass=ComponentMeta):
 
     EVENTS = []
 
+    PATCHABLE_PROPS = frozenset({"visible"})
+
     def __init__(
         self,
         *,
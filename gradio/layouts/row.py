@@ -24,6 +24,8 @@ class Row(BlockContext, metaclass=ComponentMeta):
 
     EVENTS = []
 
+    PATCHABLE_PROPS = frozenset({"visible", "scale"})
+
     def __init__(
         self,
         *,
@@ -2,7 +2,9 @@ from __future__ import annotations
 
 import asyncio
 import base64
+import dataclasses
 import hashlib
+import heapq
 import ipaddress
 import json
 import logging
@@ -10,15 +12,20 @@ import mimetypes
 import os
 import shutil
 import subprocess
+import sys
 import tempfile
+import threading
+import time
 import warnings
-from collections.abc import Awaitable, Callable, Coroutine
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Coroutine, Iterable
 from functools import lru_cache, wraps
 from io import BytesIO
 from pathlib import Path
 from typing import TYPE_CHECKING, Any, TypeVar
 from urllib.parse import urljoin, urlparse
 
+import anyio
 import httpx
 import numpy as np
 import safehttpx as sh
@@ -157,6 +164,367 @@ def hash_base64(base64_encoding: str, chunk_num_blocks: int = 128) -> str:
     return sha.hexdigest()
 
 
+class BlobIndex:
+    """
+    Content-addressed index of the files that Gradio has written to the upload and
+    cache folders. It remembers the digest of each file, so that a file that has
+    already been hashed (and has not changed since, going by its size, mtime and
+    inode) is not hashed again, and it maps each digest to a file with that content,
+    so that a new copy of the same content can be cloned from it (sharing its data
+    blocks on filesystems that support reflinks) instead of the bytes being written
+    to disk again. Files are never hard-linked to each other, since user code can
+    edit the files that Gradio hands to it in place.
+    """
+
+    def __init__(self, max_entries: int = 10_000):
+        self.max_entries = max_entries
+        self._digests: OrderedDict[str, tuple[str, int, int, int]] = OrderedDict()
+        self._blobs: dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _signature(path: str) -> tuple[int, int, int] | None:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_size, stat.st_mtime_ns, stat.st_ino
+
+    def record(self, path: str | Path, digest: str, *, blob: bool = True) -> None:
+        """
+        Records that the file at `path` has the given content digest. If `blob` is
+        True, the file is owned by Gradio (i.e. it is in the upload or cache folder)
+        and other copies of the same content can be linked to it.
+        """
+        path = str(abspath(path))
+        if (signature := self._signature(path)) is None:
+            return
+        with self._lock:
+            self._digests[path] = (digest, *signature)
+            self._digests.move_to_end(path)
+            if blob:
+                self._blobs[digest] = path
+            while len(self._digests) > self.max_entries:
+                old_path, (old_digest, *_) = self._digests.popitem(last=False)
+                if self._blobs.get(old_digest) == old_path:
+                    del self._blobs[old_digest]
+
+    def lookup(self, path: str | Path) -> str | None:
+        """Returns the digest of the file at `path` if it is known and the file has not changed."""
+        path = str(abspath(path))
+        with self._lock:
+            entry = self._digests.get(path)
+        if entry is None:
+            return None
+        digest, *signature = entry
+        if tuple(signature) != self._signature(path):
+            with self._lock:
+                if self._digests.get(path) == entry:
+                    del self._digests[path]
+            return None
+        return digest
+
+    def find(self, digest: str) -> str | None:
+        """Returns the path of an unchanged file with the given content digest, if any."""
+        with self._lock:
+            path = self._blobs.get(digest)
+        if path is None or self.lookup(path) != digest:
+            return None
+        return path
+
+    def hash_file(self, file_path: str | Path) -> str:
+        """Like `hash_file()`, but skips reading files whose digest is already known."""
+        if (digest := self.lookup(file_path)) is None:
+            digest = hash_file(file_path)
+            self.record(file_path, digest, blob=False)
+        return digest
+
+    def clone(self, digest: str, dest: str | Path) -> bool:
+        """
+        Creates `dest` as a copy-on-write clone of an existing file with the given
+        digest, with `clone_file()`. Returns False if there is no such file or it
+        cannot be cloned (e.g. the filesystem does not support reflinks), in which
+        case the caller should write the file itself.
+        """
+        if (blob := self.find(digest)) is None:
+            return False
+        return clone_file(blob, dest)
+
+
+blob_index = BlobIndex()
+
+
+@dataclasses.dataclass
+class _TempFileEntry:
+    created: float
+    size: int
+    owners: list[TempFileSet]
+
+
+@dataclasses.dataclass
+class _Budget:
+    """The maximum total size of the files of an app, and the files counted towards it."""
+
+    owners: list[TempFileSet]
+    max_size: int
+    size: int = 0
+    paths: set[str] = dataclasses.field(default_factory=set)
+
+
+class TempFileIndex:
+    """
+    Index of the temp files created by Gradio apps in this process, recording the
+    creation time, size and last access of each file when it is added to a block's
+    `TempFileSet` (or served), so that the cache can be cleaned up without walking
+    and stat-ing every file. Files are deleted incrementally: by age from a heap
+    ordered by creation time, and, for apps that set a size budget, in least recently
+    used order whenever the total size of their files exceeds it. A file is only
+    deleted from disk once no app owns it anymore, and files kept in cache (e.g.
+    examples and default values) are never deleted.
+    """
+
+    def __init__(self):
+        self.total_size = 0
+        self._entries: dict[str, _TempFileEntry] = {}
+        self._by_age: list[tuple[float, str]] = []
+        self._lru: OrderedDict[str, None] = OrderedDict()
+        self._pinned: set[str] = set()
+        # Keyed by the id of the list of temp file sets of each app
+        self._budgets: dict[int, _Budget] = {}
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, path: str) -> bool:
+        return path in self._entries
+
+    def set_max_size(self, owners: list[TempFileSet], max_size: int | None) -> None:
+        """
+        Sets the maximum total size, in bytes, of the files that belong to one of
+        `owners` (i.e. the temp file sets of an app), which is enforced as files are
+        added. If `max_size` is None, removes the budget of `owners`.
+        """
+        with self._lock:
+            if max_size is None:
+                self._budgets.pop(id(owners), None)
+                return
+            budget = _Budget(owners, max_size)
+            for path, entry in self._entries.items():
+                if self._owned(entry, owners):
+                    budget.paths.add(path)
+                    budget.size += entry.size
+            self._budgets[id(owners)] = budget
+
+    def add(self, path: str, owner: TempFileSet) -> None:
+        with self._lock:
+            if (entry := self._entries.get(path)) is not None:
+                if not any(o is owner for o in entry.owners):
+                    entry.owners.append(owner)
+                self.touch(path)
+            else:
+                try:
+                    stat = os.lstat(path)
+                    created, size = stat.st_ctime, stat.st_size
+                except OSError:
+                    # e.g. an upload that is still being moved into place
+                    created, size = time.time(), 0
+                entry = self._entries[path] = _TempFileEntry(created, size, [owner])
+                heapq.heappush(self._by_age, (created, path))
+                if path not in self._pinned:
+                    self._lru[path] = None
+                self.total_size += size
+            for budget in list(self._budgets.values()):
+                if path not in budget.paths and any(o is owner for o in budget.owners):
+                    budget.paths.add(path)
+                    budget.size += entry.size
+                if path in budget.paths:
+                    self._enforce(budget, keep=path)
+
+    def refresh(self, path: str) -> None:
+        """
+        Updates the size of a file that was added before it was in place, e.g. an
+        upload that is moved into the cache in the background.
+        """
+        with self._lock:
+            if (entry := self._entries.get(path)) is None:
+                return
+            try:
+                size = os.lstat(path).st_size
+            except OSError:
+                return
+            delta, entry.size = size - entry.size, size
+            self.total_size += delta
+            for budget in list(self._budgets.values()):
+                if path in budget.paths:
+                    budget.size += delta
+                    self._enforce(budget, keep=path)
+
+    def _enforce(self, budget: _Budget, keep: str) -> None:
+        if budget.size > budget.max_size:
+            self._delete(
+                self._least_recently_used(
+                    budget.max_size, budget.owners, budget.size, keep=keep
+                ),
+                budget.owners,
+            )
+
+    def touch(self, path: str) -> None:
+        """Marks a file as used, e.g. because it has been served."""
+        with self._lock:
+            if path in self._lru:
+                self._lru.move_to_end(path)
+
+    def pin(self, path: str) -> None:
+        """Keeps a file in the cache for as long as the process runs."""
+        with self._lock:
+            self._pinned.add(path)
+            self._lru.pop(path, None)
+
+    def is_pinned(self, path: str) -> bool:
+        return path in self._pinned
+
+    def remove(self, path: str, owner: TempFileSet | None = None) -> None:
+        """
+        Forgets a file, or only that it belongs to `owner`. The file is left on disk
+        (and in the heap, from which it is dropped the next time it is reached).
+        """
+        with self._lock:
+            if (entry := self._entries.get(path)) is None:
+                return
+            entry.owners = (
+                [o for o in entry.owners if o is not owner] if owner is not None else []
+            )
+            for budget in self._budgets.values():
+                if path in budget.paths and not self._owned(entry, budget.owners):
+                    budget.paths.discard(path)
+                    budget.size -= entry.size
+            if entry.owners:
+                return
+            del self._entries[path]
+            self._lru.pop(path, None)
+            self.total_size -= entry.size
+
+    def _owned(self, entry: _TempFileEntry, owners: list | None) -> bool:
+        return owners is None or any(o is s for o in entry.owners for s in owners)
+
+    def _owned_size(self, owners: list | None) -> int:
+        if owners is None:
+            return self.total_size
+        if (budget := self._budgets.get(id(owners))) is not None:
+            return budget.size
+        return sum(
+            entry.size for entry in self._entries.values() if self._owned(entry, owners)
+        )
+
+    def _expired(self, age: float, owners: list | None) -> list[str]:
+        cutoff = time.time() - age
+        expired, skipped = [], []
+        while self._by_age and self._by_age[0][0] < cutoff:
+            created, path = heapq.heappop(self._by_age)
+            entry = self._entries.get(path)
+            if entry is None or entry.created != created or path in self._pinned:
+                continue
+            if self._owned(entry, owners):
+                expired.append(path)
+            else:
+                skipped.append((created, path))
+        for item in skipped:
+            heapq.heappush(self._by_age, item)
+        return expired
+
+    def _least_recently_used(
+        self, max_size: int, owners: list | None, size: int, keep: str | None = None
+    ) -> list[str]:
+        victims = []
+        for path in self._lru:
+            if size <= max_size:
+                break
+            entry = self._entries[path]
+            if path != keep and self._owned(entry, owners):
+                victims.append(path)
+                size -= entry.size
+        return victims
+
+    def _delete(self, paths: list[str], owners: list | None = None) -> int:
+        """
+        Removes the files from the temp file sets of `owners` (or of every app), and
+        deletes those that no other app owns. Returns the number of files deleted.
+        """
+        deleted = 0
+        for path in paths:
+            entry = self._entries.get(path)
+            if entry is None:
+                continue
+            for owner in list(entry.owners):
+                if owners is None or any(owner is s for s in owners):
+                    set.discard(owner, path)
+                    self.remove(path, owner)
+            if path in self._entries:
+                continue
+            deleted += 1
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        return deleted
+
+    def evict(
+        self,
+        age: float | None = None,
+        max_size: int | None = None,
+        owners: list | None = None,
+    ) -> int:
+        """
+        Deletes the files (belonging to one of `owners`, if given) that are older than
+        `age` seconds, then the least recently used files until their total size is
+        at most `max_size` bytes, or the budget set for `owners`. Returns the number
+        of files deleted.
+        """
+        with self._lock:
+            deleted = 0
+            if age is not None:
+                deleted += self._delete(self._expired(age, owners), owners)
+            if max_size is None and owners is not None:
+                budget = self._budgets.get(id(owners))
+                max_size = budget.max_size if budget is not None else None
+            if max_size is not None:
+                size = self._owned_size(owners)
+                if size > max_size:
+                    deleted += self._delete(
+                        self._least_recently_used(max_size, owners, size), owners
+                    )
+        return deleted
+
+
+temp_file_index = TempFileIndex()
+
+
+class TempFileSet(set[str]):
+    """
+    The set of temp files created by a block, which records the files added to it in
+    `temp_file_index` so that they can be deleted without scanning the set.
+    """
+
+    def add(self, path: str, /) -> None:
+        super().add(path)
+        temp_file_index.add(path, self)
+
+    def update(self, *paths: Iterable[str]) -> None:
+        for group in paths:
+            for path in group:
+                self.add(path)
+
+    def discard(self, path: object, /) -> None:
+        super().discard(path)
+        if isinstance(path, str):
+            temp_file_index.remove(path, self)
+
+    def remove(self, path: str, /) -> None:
+        super().remove(path)
+        temp_file_index.remove(path, self)
+
+
 @traced_sync("postprocess_save_pil_to_cache")
 def save_pil_to_cache(
     img: Image.Image,
@@ -225,33 +593,133 @@ def detect_audio_format(data: bytes) -> str:
 
 @traced_sync("postprocess_save_bytes_to_cache")
 def save_bytes_to_cache(data: bytes, file_name: str, cache_dir: str) -> str:
-    path = Path(cache_dir) / hash_bytes(data)
+    digest = hash_bytes(data)
+    path = Path(cache_dir) / digest
     path.mkdir(exist_ok=True, parents=True)
     if not Path(file_name).suffix:
         detected_extension = detect_audio_format(data)
         file_name = file_name + detected_extension
     path = path / Path(file_name).name
-    path.write_bytes(data)
+    if blob_index.lookup(path) != digest:
+        path.unlink(missing_ok=True)
+        if not blob_index.clone(digest, path):
+            path.write_bytes(data)
+        blob_index.record(path, digest)
     return str(path.resolve())
 
 
+# FICLONE from linux/fs.h
+_FICLONE = 0x40049409
+
+
+def clone_file(src: str | Path, dst: str | Path) -> bool:
+    """
+    Creates `dst` as a copy-on-write clone (reflink) of `src`: the two files share
+    their data blocks until either of them is modified, so the clone is made without
+    copying any data and editing one file does not affect the other. Returns False,
+    without creating `dst`, if the platform or filesystem does not support it.
+    """
+    if sys.platform != "linux":
+        return False
+    import fcntl
+
+    try:
+        with open(src, "rb") as fsrc, open(dst, "xb") as fdst:
+            try:
+                fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+            except OSError:
+                os.unlink(dst)
+                return False
+    except OSError:
+        return False
+    return True
+
+
+def copy_file(src: str | Path, dst: str | Path) -> None:
+    """
+    Copies the file `src` to `dst` along with its metadata, like `shutil.copy2()`, but
+    lets the kernel copy the data with `os.copy_file_range()` where it is available,
+    which can share the data blocks of the file (reflink) on filesystems that support
+    it. Otherwise, `shutil.copy2()` copies the file with `os.sendfile()` on Linux.
+    """
+    if hasattr(os, "copy_file_range"):
+        try:
+            with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+                while os.copy_file_range(fsrc.fileno(), fdst.fileno(), 1 << 30):
+                    pass
+                # Some kernels report special files (e.g. in /proc) as empty
+                if os.fstat(fsrc.fileno()).st_size != os.fstat(fdst.fileno()).st_size:
+                    raise OSError("copy_file_range() did not copy the whole file")
+            shutil.copystat(src, dst)
+            return
+        except OSError:
+            # e.g. copying between filesystems that do not support it
+            pass
+    shutil.copy2(src, dst)
+
+
+def _cache_file_path(file_path: str | Path, cache_dir: str, digest: str) -> str:
+    name = client_utils.strip_invalid_filename_characters(Path(file_path).name)
+    return str(abspath(Path(cache_dir) / digest / name))
+
+
 @traced_sync("save_file_to_cache")
 def save_file_to_cache(file_path: str | Path, cache_dir: str) -> str:
     """Returns a temporary file path for a copy of the given file path if it does
     not already exist. Otherwise returns the path to the existing temp file."""
-    temp_dir = hash_file(file_path)
-    temp_dir = Path(cache_dir) / temp_dir
+    digest = blob_index.hash_file(file_path)
+    temp_dir = Path(cache_dir) / digest
     temp_dir.mkdir(exist_ok=True, parents=True)
 
-    name = client_utils.strip_invalid_filename_characters(Path(file_path).name)
-    full_temp_file_path = str(abspath(temp_dir / name))
+    full_temp_file_path = _cache_file_path(file_path, cache_dir, digest)
 
     if not Path(full_temp_file_path).exists():
-        shutil.copy2(file_path, full_temp_file_path)
+        if not blob_index.clone(digest, full_temp_file_path):
+            # Copy under a temporary name, so that the file never appears in the
+            # cache partially written
+            fd, partial_path = tempfile.mkstemp(dir=temp_dir, prefix=".partial-")
+            os.close(fd)
+            try:
+                copy_file(file_path, partial_path)
+                os.replace(partial_path, full_temp_file_path)
+            finally:
+                Path(partial_path).unlink(missing_ok=True)
+        blob_index.record(full_temp_file_path, digest)
 
     return full_temp_file_path
 
 
+_pending_saves: dict[tuple[str, str], asyncio.Future[str]] = {}
+
+
+async def async_save_file_to_cache(file_path: str | Path, cache_dir: str) -> str:
+    """
+    Like `save_file_to_cache()`, but hashes and copies the file in a worker thread, so
+    that large files do not block the event loop. Concurrent calls for the same file
+    share a single copy, and a file whose cached copy is known to be up to date is
+    not read at all.
+    """
+    if (digest := blob_index.lookup(file_path)) is not None:
+        cached_path = _cache_file_path(file_path, cache_dir, digest)
+        if blob_index.lookup(cached_path) == digest:
+            return cached_path
+
+    key = (str(abspath(file_path)), cache_dir)
+    future = _pending_saves.get(key)
+    if future is None or future.get_loop() is not asyncio.get_running_loop():
+        future = asyncio.ensure_future(
+            anyio.to_thread.run_sync(save_file_to_cache, file_path, cache_dir)
+        )
+        _pending_saves[key] = future
+
+        def forget(done: asyncio.Future[str]):
+            if _pending_saves.get(key) is done:
+                del _pending_saves[key]
+
+        future.add_done_callback(forget)
+    return await asyncio.shield(future)
+
+
 # Always return these URLs as is, without checking to see if they resolve
 # to an internal IP address. This is because Hugging Face uses DNS splitting,
 # which means that requests from HF Spaces to HF Datasets or HF Models
@@ -478,6 +946,7 @@ def move_files_to_cache(
                 payload.path = temp_file_path
                 if keep_in_cache:
                     block.keep_in_cache.add(payload.path)
+                    temp_file_index.pin(payload.path)
 
         url_prefix = (
             f"{API_PREFIX}/stream/" if payload.is_stream else f"{API_PREFIX}/file="
@@ -600,6 +1069,7 @@ async def async_move_files_to_cache(
                 payload.path = temp_file_path
                 if keep_in_cache:
                     block.keep_in_cache.add(payload.path)
+                    temp_file_index.pin(payload.path)
 
         url_prefix = (
             f"{API_PREFIX}/stream/" if payload.is_stream else f"{API_PREFIX}/file="
@@ -1184,7 +1654,7 @@ def convert_audio_to_playable(audio_path: str, cache_dir: str) -> str:
     next to the source: `.aif` and `.wav` share a directory far more often than
     the video containers do, so writing alongside would clobber the user's files.
     """
-    temp_dir = Path(cache_dir) / hash_file(audio_path)
+    temp_dir = Path(cache_dir) / blob_index.hash_file(audio_path)
     temp_dir.mkdir(exist_ok=True, parents=True)
     stem = Path(audio_path).stem
 
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import contextvars
+import math
 import os
 import time
 from collections import deque
@@ -26,6 +27,8 @@ class RequestTrace:
     streaming_diff_ms: float = 0.0
     total_ms: float = 0.0
     n_iterations: int = 0
+    # Number of events processed together, only set for batch functions
+    batch_size: int = 0
     upload_ms: float = 0.0
     preprocess_move_to_cache_ms: float = 0.0
     preprocess_format_image_ms: float = 0.0
@@ -62,6 +65,7 @@ class RequestTrace:
             "streaming_diff_ms": self.streaming_diff_ms,
             "total_ms": self.total_ms,
             "n_iterations": self.n_iterations,
+            "batch_size": self.batch_size,
             "preprocess_move_to_cache_ms": self.preprocess_move_to_cache_ms,
             "preprocess_format_image_ms": self.preprocess_format_image_ms,
             "postprocess_save_img_array_to_cache_ms": self.postprocess_save_img_array_to_cache_ms,
@@ -78,6 +82,69 @@ class RequestTrace:
         }
 
 
+class QuantileSketch:
+    """
+    A mergeable streaming quantile sketch (in the style of DDSketch). Values are
+    counted in logarithmically sized buckets, so adding a value is O(1), memory is
+    bounded by the range of the values rather than their number, and every quantile
+    is returned with a relative error of at most `relative_accuracy`.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        self.relative_accuracy = relative_accuracy
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self._buckets: dict[int, int] = {}
+        # Values that are too small to be bucketed (e.g. durations of 0 ms)
+        self._zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float):
+        if value < 0 or math.isnan(value):
+            return
+        if value < 1e-9:
+            self._zero_count += 1
+        else:
+            index = math.ceil(math.log(value) / self._log_gamma)
+            self._buckets[index] = self._buckets.get(index, 0) + 1
+        self.count += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def merge(self, other: QuantileSketch):
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge sketches with a different accuracy.")
+        for index, count in other._buckets.items():
+            self._buckets[index] = self._buckets.get(index, 0) + count
+        self._zero_count += other._zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q: float) -> float | None:
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        seen = self._zero_count
+        if rank < seen:
+            return 0.0
+        for index in sorted(self._buckets):
+            seen += self._buckets[index]
+            if seen > rank:
+                value = 2 * self._gamma**index / (self._gamma + 1)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    @property
+    def mean(self) -> float | None:
+        return self.sum / self.count if self.count else None
+
+
 _current_trace: contextvars.ContextVar[RequestTrace | None] = contextvars.ContextVar(
     "_current_trace", default=None
 )
@@ -152,11 +219,44 @@ def traced_sync(phase):
 
 
 class TraceCollector:
+    PHASES = [
+        "queue_wait",
+        "preprocess",
+        "fn_call",
+        "postprocess",
+        "streaming_diff",
+        "total",
+    ]
+
     def __init__(self, maxlen: int = 100_000):
         self._traces: deque[RequestTrace] = deque(maxlen=maxlen)
+        self._init_sketches()
+
+    def _init_sketches(self):
+        # Summaries are computed from sketches that are updated as traces are
+        # added, so that `get_summary()` does not need to go over every trace.
+        self._prediction_count = 0
+        self._phase_sketches = {phase: QuantileSketch() for phase in self.PHASES}
+        self._fn_phase_sketches: dict[str, dict[str, QuantileSketch]] = {}
+        self._batch_size_sketch = QuantileSketch()
+        self._upload_sketch = QuantileSketch()
 
     def add(self, trace: RequestTrace):
         self._traces.append(trace)
+        if trace.fn_name == "gradio_file_upload":
+            self._upload_sketch.add(trace.upload_ms)
+            return
+        self._prediction_count += 1
+        fn_sketches = self._fn_phase_sketches.setdefault(
+            str(trace.fn_name),
+            {phase: QuantileSketch() for phase in self.PHASES},
+        )
+        for phase in self.PHASES:
+            value = getattr(trace, f"{phase}_ms")
+            self._phase_sketches[phase].add(value)
+            fn_sketches[phase].add(value)
+        if trace.batch_size > 0:
+            self._batch_size_sketch.add(trace.batch_size)
 
     def get_all(self, last_n: int | None = None) -> list[dict[str, Any]]:
         traces = list(self._traces)
@@ -164,67 +264,67 @@ class TraceCollector:
             traces = traces[-last_n:]
         return [t.to_dict() for t in traces]
 
+    @staticmethod
+    def _percentiles(sketch: QuantileSketch) -> dict[str, float]:
+        if sketch.count == 0:
+            return {
+                "p50": 0.0,
+                "p90": 0.0,
+                "p95": 0.0,
+                "p99": 0.0,
+                "mean": 0.0,
+                "min": 0.0,
+                "max": 0.0,
+            }
+        return {
+            "p50": float(sketch.quantile(0.5) or 0.0),
+            "p90": float(sketch.quantile(0.9) or 0.0),
+            "p95": float(sketch.quantile(0.95) or 0.0),
+            "p99": float(sketch.quantile(0.99) or 0.0),
+            "mean": float(sketch.mean or 0.0),
+            "min": float(sketch.min),
+            "max": float(sketch.max),
+        }
+
     def get_summary(self) -> dict[str, Any]:
         if not self._traces:
             return {"count": 0, "phases": {}}
 
-        import numpy as np
-
-        prediction_traces = [
-            t for t in self._traces if t.fn_name != "gradio_file_upload"
-        ]
-        upload_traces = [t for t in self._traces if t.fn_name == "gradio_file_upload"]
-
-        phases = [
-            "queue_wait",
-            "preprocess",
-            "fn_call",
-            "postprocess",
-            "streaming_diff",
-            "total",
-        ]
-
-        def _percentiles(arr):
-            return {
-                "p50": float(np.percentile(arr, 50)),
-                "p90": float(np.percentile(arr, 90)),
-                "p95": float(np.percentile(arr, 95)),
-                "p99": float(np.percentile(arr, 99)),
-                "mean": float(np.mean(arr)),
-                "min": float(np.min(arr)),
-                "max": float(np.max(arr)),
-            }
-
         result: dict[str, Any] = {
-            "count": len(prediction_traces),
-            "phases": {},
-        }
-        for phase in phases:
-            values = [getattr(t, f"{phase}_ms") for t in prediction_traces]
-            if values:
-                result["phases"][phase] = _percentiles(np.array(values))
-            else:
-                result["phases"][phase] = {
-                    "p50": 0.0,
-                    "p90": 0.0,
-                    "p95": 0.0,
-                    "p99": 0.0,
-                    "mean": 0.0,
-                    "min": 0.0,
-                    "max": 0.0,
+            "count": self._prediction_count,
+            "phases": {
+                phase: self._percentiles(sketch)
+                for phase, sketch in self._phase_sketches.items()
+            },
+            "functions": {
+                fn_name: {
+                    "count": sketches["total"].count,
+                    "phases": {
+                        phase: self._percentiles(sketch)
+                        for phase, sketch in sketches.items()
+                    },
                 }
+                for fn_name, sketches in self._fn_phase_sketches.items()
+            },
+        }
+
+        if self._batch_size_sketch.count:
+            result["batch_size"] = {
+                "count": self._batch_size_sketch.count,
+                **self._percentiles(self._batch_size_sketch),
+            }
 
-        if upload_traces:
-            upload_values = [t.upload_ms for t in upload_traces]
+        if self._upload_sketch.count:
             result["upload"] = {
-                "count": len(upload_traces),
-                **_percentiles(np.array(upload_values)),
+                "count": self._upload_sketch.count,
+                **self._percentiles(self._upload_sketch),
             }
 
         return result
 
     def clear(self):
         self._traces.clear()
+        self._init_sketches()
 
 
 # Global collector instance
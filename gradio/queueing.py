@@ -1,7 +1,10 @@
 from __future__ import annotations
 
 import asyncio
+import heapq
 import inspect
+import itertools
+import math
 import os
 import platform
 import random
@@ -10,11 +13,10 @@ import traceback
 import uuid
 from asyncio import Queue as AsyncQueue
 from collections import defaultdict
+from collections.abc import Callable, Iterable, Iterator
 from typing import TYPE_CHECKING, Any, Literal, cast
 
 import fastapi
-import numpy as np
-from anyio.to_thread import run_sync
 
 from gradio import route_utils, routes
 from gradio.caching import CacheMissError, ProbeCache
@@ -25,6 +27,7 @@ from gradio.exceptions import Error
 from gradio.helpers import TrackedIterable
 from gradio.profiling import (
     PROFILING_ENABLED,
+    QuantileSketch,
     RequestTrace,
     collector,
     get_current_trace,
@@ -33,6 +36,7 @@ from gradio.profiling import (
 from gradio.server_messages import (
     EstimationMessage,
     EventMessage,
+    HeartbeatMessage,
     LogMessage,
     ProcessCompletedMessage,
     ProcessGeneratingMessage,
@@ -44,6 +48,7 @@ from gradio.server_messages import (
 from gradio.utils import (
     LRUCache,
     error_payload,
+    get_heartbeat_rate,
     run_coro_in_background,
     safe_aclose_iterator,
     safe_get_lock,
@@ -57,6 +62,134 @@ if TYPE_CHECKING:
     from gradio.blocks import Blocks
 
 
+class SessionMessageQueue(AsyncQueue["EventMessage"]):
+    """
+    The messages waiting to be streamed to a session. A message sent with a
+    `coalesce_key` replaces the message with the same key that has not been read
+    yet, if any, so that a client that reads slowly only receives the latest status
+    instead of a backlog of outdated ones. Producers that cannot be coalesced, such
+    as generators, wait in `wait_for_room()` while the client is `max_unread`
+    messages behind.
+    """
+
+    def __init__(self, max_unread: int = 100):
+        super().__init__()
+        self.max_unread = max_unread
+        self._unread_by_key: dict[str, EventMessage] = {}
+        self._keys_by_message: dict[int, str] = {}
+        self._room = asyncio.Event()
+        # The event loop of the stream reading the queue, set when it waits for a
+        # message
+        self.loop: asyncio.AbstractEventLoop | None = None
+
+    async def get(self) -> EventMessage:
+        self.loop = asyncio.get_running_loop()
+        return await super().get()
+
+    def put_coalesced(self, key: str, message: EventMessage):
+        unread = self._unread_by_key.get(key)
+        if unread is not None and type(unread) is type(message):
+            for field in type(message).model_fields:
+                setattr(unread, field, getattr(message, field))
+            return
+        self._unread_by_key[key] = message
+        self._keys_by_message[id(message)] = key
+        self.put_nowait(message)
+
+    def put_nowait(self, item: EventMessage):
+        # The stream reading this queue may run on another event loop than the one
+        # producing its messages (e.g. when the app is mounted in another server), in
+        # which case the reader has to be woken up on its own loop.
+        loop = self.loop
+        if loop is not None and not loop.is_closed():
+            try:
+                running_loop = asyncio.get_running_loop()
+            except RuntimeError:
+                running_loop = None
+            if running_loop is not loop:
+                loop.call_soon_threadsafe(super().put_nowait, item)
+                return
+        super().put_nowait(item)
+
+    def _get(self):
+        message = super()._get()
+        key = self._keys_by_message.pop(id(message), None)
+        if key is not None:
+            self._unread_by_key.pop(key, None)
+        if self.qsize() < self.max_unread:
+            self._room.set()
+        return message
+
+    @property
+    def backlogged(self) -> bool:
+        return self.qsize() >= self.max_unread
+
+    async def wait_for_room(self, timeout: float):
+        """
+        Waits until the client has read enough messages for the queue to be below
+        `max_unread`, or for at most `timeout` seconds.
+        """
+        if not self.backlogged:
+            return
+        self._room.clear()
+        try:
+            await asyncio.wait_for(self._room.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+
+class HeartbeatWheel:
+    """
+    Sends heartbeats to every open `/queue/data` connection from a single timer,
+    instead of one task and one timer per connection. Connections are spread over
+    `n_slots` slots and each tick only goes through one slot, so the heartbeats of
+    many connections are sent evenly over the interval rather than all at once. A
+    new connection joins the slot that was ticked last, so that its first heartbeat
+    is sent about one interval after it connects. A connection that still has
+    unread messages is not sent a heartbeat, and a connection is sent at most one
+    unread heartbeat.
+    """
+
+    def __init__(self, interval: float, n_slots: int = 16):
+        self.interval = interval
+        self.slots: list[dict[int, SessionMessageQueue]] = [{} for _ in range(n_slots)]
+        self._slot_of_handle: dict[int, int] = {}
+        self._last_slot = n_slots - 1
+        self._handles = itertools.count()
+
+    def add(self, messages: SessionMessageQueue) -> int:
+        handle = next(self._handles)
+        self._slot_of_handle[handle] = self._last_slot
+        self.slots[self._last_slot][handle] = messages
+        return handle
+
+    def remove(self, handle: int):
+        slot = self._slot_of_handle.pop(handle, None)
+        if slot is not None:
+            del self.slots[slot][handle]
+
+    def __len__(self) -> int:
+        return len(self._slot_of_handle)
+
+    def tick(self, slot: int):
+        self._last_slot = slot
+        for messages in self.slots[slot].values():
+            if messages.empty():
+                messages.put_coalesced("heartbeat", HeartbeatMessage())
+
+    def wake_all(self):
+        for slot in self.slots:
+            for messages in slot.values():
+                messages.put_coalesced("heartbeat", HeartbeatMessage())
+
+    async def run(self, stopped: Callable[[], bool]):
+        while True:
+            await asyncio.sleep(self.interval / len(self.slots))
+            if stopped():
+                return
+            self.tick((self._last_slot + 1) % len(self.slots))
+
+
 class Event:
     def __init__(
         self,
@@ -80,6 +213,17 @@ class Event:
         self.run_time: float = 0
         self.enqueue_time: float = time.monotonic()
         self.signal = asyncio.Event()
+        # Index of the entry in `Queue.active_jobs` while the event is being processed
+        self.worker_slot: int | None = None
+        # Set by `EventQueue.push()`: the key that fair scheduling and in-flight
+        # caps are applied to, and the key that determines the dispatch order
+        self.flow: str = self.session_hash
+        self.dispatch_key: tuple[int, float, int] = (0, 0, 0)
+        # The (rank, rank_eta) most recently sent to the client
+        self.last_estimation: tuple[int, float | None] | None = None
+        # Set by `ArrivalIndex.add()`: the number of events of each function that
+        # had been pushed to the lane when this event was pushed
+        self.arrival: dict[BlockFunction, int] = {}
 
     @property
     def streaming(self):
@@ -96,15 +240,263 @@ class Event:
         return self.run_time >= self.fn.time_limit
 
 
+class OrderedEventSet:
+    """
+    A FIFO of events that supports O(1) append, membership checks and removal of an
+    arbitrary event (e.g. when an event is cancelled), while keeping insertion order.
+    """
+
+    def __init__(self):
+        self._events: dict[str, Event] = {}
+
+    def append(self, event: Event):
+        self._events[event._id] = event
+
+    def remove(self, event: Event):
+        try:
+            del self._events[event._id]
+        except KeyError as e:
+            raise ValueError(f"Event {event._id} is not in the queue.") from e
+
+    def first(self) -> Event:
+        return next(iter(self._events.values()))
+
+    def get(self, event_id: str) -> Event | None:
+        return self._events.get(event_id)
+
+    def __contains__(self, event: object) -> bool:
+        return isinstance(event, Event) and event._id in self._events
+
+    def __iter__(self) -> Iterator[Event]:
+        return iter(self._events.values())
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+
+class ArrivalIndex:
+    """
+    Counts the queued events of each function by arrival order, with one Fenwick
+    tree per function, so that the number of events of each function that arrived
+    before an event and are still queued can be computed in O(log n) rather than by
+    walking the queue. When the dispatch order is the arrival order, these counts
+    give the rank and ETA of the event.
+    """
+
+    def __init__(self):
+        # 1-indexed Fenwick trees, tree[0] is unused
+        self.trees: dict[BlockFunction, list[int]] = {}
+        self.size = 0
+
+    def add(self, event: Event):
+        event.arrival = {fn: len(tree) - 1 for fn, tree in self.trees.items()}
+        tree = self.trees.setdefault(event.fn, [0])
+        event.arrival[event.fn] = len(tree) - 1
+        # The new node covers (i - lowbit(i), i]: the event plus the nodes before it
+        i = len(tree)
+        total, j, low = 1, i - 1, i - (i & -i)
+        while j > low:
+            total += tree[j]
+            j -= j & -j
+        tree.append(total)
+        self.size += 1
+
+    def discard(self, event: Event):
+        tree = self.trees.get(event.fn)
+        if tree is None or event.fn not in event.arrival:
+            return
+        i = event.arrival[event.fn] + 1
+        while i < len(tree):
+            tree[i] -= 1
+            i += i & -i
+
+    def ahead(self, event: Event) -> dict[BlockFunction, int]:
+        """Returns the number of queued events of each function that arrived before `event`."""
+        counts = {}
+        for fn, tree in self.trees.items():
+            count, i = 0, event.arrival.get(fn, 0)
+            while i > 0:
+                count += tree[i]
+                i -= i & -i
+            counts[fn] = count
+        return counts
+
+    def rebuild(self, events: Iterable[Event]):
+        """Re-indexes `events`, in arrival order, to drop the events that left the queue."""
+        self.trees.clear()
+        self.size = 0
+        for event in events:
+            self.add(event)
+
+
 class EventQueue:
     def __init__(self, concurrency_id: str, concurrency_limit: int | None):
-        self.queue: list[Event] = []
+        self.queue = OrderedEventSet()
         self.concurrency_id = concurrency_id
         self.concurrency_limit = concurrency_limit
         self.current_concurrency = 0
         self.start_times_per_fn: defaultdict[BlockFunction, set[float]] = defaultdict(
             set
         )
+        # Min-heap of (dispatch key, event id) that determines the order in which
+        # queued events are dispatched. Entries of events that have been removed
+        # from `queue` are discarded lazily when they reach the top of the heap.
+        self._dispatch_heap: list[tuple[tuple[int, float, int], str]] = []
+        # Heap entries of events that could not start because their flow was at its
+        # in-flight cap, per flow, until an event of the flow finishes
+        self._parked: dict[str, list[tuple[tuple[int, float, int], str]]] = {}
+        self._sequence = itertools.count()
+        # State for weighted fair queuing: the virtual finish time of the last
+        # dispatched event, and of the last queued event of each flow
+        self.virtual_time = 0.0
+        self.flow_finish_times: dict[str, float] = {}
+        self.queued_per_flow: dict[str, int] = {}
+        # True as long as the dispatch order is the same as the arrival order
+        self.dispatch_order_is_arrival_order = True
+        self._last_dispatch_key: tuple[int, float, int] = (0, 0, 0)
+        self.arrivals = ArrivalIndex()
+        # The queued events of each function, in arrival order, from which batches
+        # are formed without going through the events of other functions
+        self.queued_per_fn: dict[BlockFunction, OrderedEventSet] = {}
+        # Number of events that have left the queue, and min-heap of (removed count,
+        # dispatch key, event id) of the events whose estimation must be checked once
+        # that many events have left the queue. Each event that leaves the queue
+        # lowers the rank of the others by at most one, so until then their rank
+        # cannot have changed enough for a new estimation to be sent.
+        self.removed_count = 0
+        self.estimation_schedule: list[tuple[int, tuple[int, float, int], str]] = []
+        # `time.monotonic()` of the last estimation sent to every queued event
+        self.last_full_estimation = float("-inf")
+
+    def push(
+        self,
+        event: Event,
+        flow: str | None = None,
+        priority: int = 0,
+        weight: float | None = None,
+    ):
+        """
+        Adds an event to the queue. Events are dispatched by descending `priority`,
+        then by virtual finish time and finally in arrival order. If `weight` is None,
+        all events share the same virtual finish time, so events of the same priority
+        are dispatched in FIFO order. Otherwise, each flow (the session or user that
+        the event belongs to) is served in proportion to its `weight`, no matter how
+        many events it has queued (weighted fair queuing).
+        """
+        if flow is not None:
+            event.flow = flow
+        finish_time = 0.0
+        if weight is not None:
+            start_time = max(
+                self.virtual_time, self.flow_finish_times.get(event.flow, 0.0)
+            )
+            finish_time = start_time + 1 / weight
+            self.flow_finish_times[event.flow] = finish_time
+            self.queued_per_flow[event.flow] = (
+                self.queued_per_flow.get(event.flow, 0) + 1
+            )
+        event.dispatch_key = (-priority, finish_time, next(self._sequence))
+        if len(self.queue) and event.dispatch_key < self._last_dispatch_key:
+            self.dispatch_order_is_arrival_order = False
+        self._last_dispatch_key = event.dispatch_key
+        self.queue.append(event)
+        self.queued_per_fn.setdefault(event.fn, OrderedEventSet()).append(event)
+        heapq.heappush(self._dispatch_heap, (event.dispatch_key, event._id))
+        if self.arrivals.size > 2 * len(self.queue) + 64:
+            self.arrivals.rebuild(self.queue)
+        else:
+            self.arrivals.add(event)
+        if self.dispatch_order_is_arrival_order:
+            self.schedule_estimation(event, 0)
+
+    def remove(self, event: Event, dispatched: bool = False):
+        """
+        Removes an event from the queue, either because it is being dispatched or
+        because it was cancelled. Raises a ValueError if the event is not queued.
+        """
+        self.queue.remove(event)
+        queued = self.queued_per_fn.get(event.fn)
+        if queued is not None and event in queued:
+            queued.remove(event)
+            if not len(queued):
+                del self.queued_per_fn[event.fn]
+        self.arrivals.discard(event)
+        self.removed_count += 1
+        if dispatched:
+            self.virtual_time = max(self.virtual_time, event.dispatch_key[1])
+        if event.flow in self.queued_per_flow:
+            remaining = self.queued_per_flow[event.flow] - 1
+            if remaining > 0:
+                self.queued_per_flow[event.flow] = remaining
+            else:
+                # A flow without queued events restarts from the current virtual time
+                del self.queued_per_flow[event.flow]
+                self.flow_finish_times.pop(event.flow, None)
+        if not len(self.queue):
+            self._dispatch_heap.clear()
+            self._parked.clear()
+            self.arrivals.rebuild(())
+            self.queued_per_fn.clear()
+            self.estimation_schedule.clear()
+            self.dispatch_order_is_arrival_order = True
+
+    def first_in_dispatch_order(
+        self, is_eligible: Callable[[Event], bool] | None = None
+    ) -> Event | None:
+        """
+        Returns the queued event that should be dispatched next, skipping events
+        for which `is_eligible` returns False. Returns None if there is none.
+        Skipped events are parked, rather than checked again on every call, until
+        `unpark()` is called for their flow: `is_eligible` must only depend on the
+        number of events of the flow that are in flight.
+        """
+        heap = self._dispatch_heap
+        while heap:
+            event = self.queue.get(heap[0][1])
+            if event is None:
+                heapq.heappop(heap)
+            elif is_eligible is None or is_eligible(event):
+                return event
+            else:
+                heapq.heappush(
+                    self._parked.setdefault(event.flow, []), heapq.heappop(heap)
+                )
+        return None
+
+    def unpark(self, flow: str):
+        """
+        Makes the next parked event of `flow` eligible for dispatch again, because an
+        event of the flow has finished.
+        """
+        parked = self._parked.get(flow)
+        while parked:
+            entry = heapq.heappop(parked)
+            if self.queue.get(entry[1]) is not None:
+                heapq.heappush(self._dispatch_heap, entry)
+                break
+        if not parked:
+            self._parked.pop(flow, None)
+
+    def schedule_estimation(self, event: Event, after_removals: int):
+        """Checks the estimation of `event` again once `after_removals` more events have left the queue."""
+        heapq.heappush(
+            self.estimation_schedule,
+            (self.removed_count + after_removals, event.dispatch_key, event._id),
+        )
+
+    def due_estimations(self) -> Iterator[Event]:
+        """Yields (and unschedules) the queued events whose estimation must be checked."""
+        schedule = self.estimation_schedule
+        while schedule and schedule[0][0] <= self.removed_count:
+            event = self.queue.get(heapq.heappop(schedule)[2])
+            if event is not None:
+                yield event
+
+    def in_dispatch_order(self) -> list[Event]:
+        """Returns all the queued events, in the order in which they will be dispatched."""
+        if self.dispatch_order_is_arrival_order:
+            return list(self.queue)
+        return sorted(self.queue, key=lambda event: event.dispatch_key)
 
 
 class ProcessTime:
@@ -128,30 +520,50 @@ class Queue:
         max_size: int | None,
         blocks: Blocks,
         default_concurrency_limit: int | None | Literal["not_set"] = "not_set",
+        scheduling: Literal["fifo", "fair"] = "fifo",
+        fair_share_key: Literal["session", "username"] = "session",
+        fair_share_weights: dict[str, float] | None = None,
+        max_in_flight_per_user: int | None = None,
     ):
-        self.pending_messages_per_session: LRUCache[str, AsyncQueue[EventMessage]] = (
+        self.pending_messages_per_session: LRUCache[str, SessionMessageQueue] = (
             LRUCache(2000)
         )
         self.pending_event_ids_session: dict[str, set[str]] = {}
+        # Queued and running events, indexed by event id and by session hash
         self.event_ids_to_events: dict[str, Event] = {}
+        self.events_per_session: dict[str, dict[str, Event]] = {}
         self.pending_message_lock = safe_get_lock()
         self.event_queue_per_concurrency_id: dict[str, EventQueue] = {}
         self.stopped = False
         self.max_thread_count = concurrency_count
         self.update_intervals = update_intervals
         self.active_jobs: list[None | list[Event]] = []
+        self.free_worker_slots: list[int] = []
         self.delete_lock = safe_get_lock()
         self.server_app = None
         self.process_time_per_fn: defaultdict[BlockFunction, ProcessTime] = defaultdict(
             ProcessTime
         )
         self.live_updates = live_updates
-        self.sleep_when_free = 0.05 if platform.system() == "Windows" else 0.001
         self.progress_update_sleep_when_free = (
             0.1 if platform.system() == "Windows" else 0.01
         )
+        # The scheduler and progress loops sleep on these signals instead of
+        # polling. They are created in `start()` so that they are bound to the
+        # event loop the server is running on.
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._dispatch_signal: asyncio.Event | None = None
+        self._progress_signal: asyncio.Event | None = None
+        # Earliest time (in `time.monotonic()` seconds) at which a batch that is
+        # being held back because of `batch_wait_ms` must be dispatched anyway
+        self.next_batch_deadline: float | None = None
         self.max_size = max_size
         self.blocks = blocks
+        self.scheduling = scheduling
+        self.fair_share_key = fair_share_key
+        self.fair_share_weights = fair_share_weights or {}
+        self.max_in_flight_per_user = max_in_flight_per_user
+        self.in_flight_per_flow: dict[str, int] = {}
         self._asyncio_tasks: set[asyncio.Task] = set()
         self.default_concurrency_limit = self._resolve_concurrency_limit(
             default_concurrency_limit
@@ -161,66 +573,80 @@ class Queue:
             1, int(os.getenv("GRADIO_ANALYTICS_MAX_EVENTS", "10000"))
         )
         self.events_recorded_per_fn: defaultdict[str | None, int] = defaultdict(int)
+        # Outcomes and process times of finished events, aggregated as the events
+        # finish so that the summary never has to go over `self.event_analytics`
+        self.outcomes_per_fn: defaultdict[str | None, dict[str, int]] = defaultdict(
+            lambda: {"success": 0, "failed": 0}
+        )
+        self.process_time_sketch_per_fn: defaultdict[str | None, QuantileSketch] = (
+            defaultdict(QuantileSketch)
+        )
         self.cached_event_analytics_summary = {"functions": {}}
         self.events_recorded = 0
         self.event_count_at_last_cache = 0
         self.ANAYLTICS_CACHE_FREQUENCY = int(
             os.getenv("GRADIO_ANALYTICS_CACHE_FREQUENCY", "1")
         )
-
-    @staticmethod
-    def _get_df(records):
-        import pandas as pd
-
-        try:
-            with pd.option_context("future.no_silent_downcasting", True):
-                return (
-                    pd.DataFrame(records).fillna(value=np.nan).infer_objects(copy=False)  # type: ignore
-                )
-        except Exception as e:
-            if "No such keys(s)" in str(e):
-                return (
-                    pd.DataFrame(records).fillna(value=np.nan).infer_objects(copy=False)  # type: ignore
-                )
-            raise e
-
-    def compute_analytics_summary(self, records):
-        if not records:
+        # An event is only sent a new estimation if it is one of the first
+        # ESTIMATION_EXACT_RANKS events of the queue, or if its rank or ETA changed
+        # by more than ESTIMATION_RELATIVE_TOLERANCE (or ESTIMATION_MIN_ETA_CHANGE
+        # seconds) since the last estimation it was sent. This keeps the number of
+        # messages logarithmic, rather than linear, in the queue size as it drains.
+        self.ESTIMATION_EXACT_RANKS = 10
+        self.ESTIMATION_RELATIVE_TOLERANCE = 0.1
+        self.ESTIMATION_MIN_ETA_CHANGE = 1.0
+        # A generator is held back while any of the sessions it streams to has
+        # this many messages that have not been read yet
+        self.MAX_UNREAD_MESSAGES_PER_SESSION = 100
+        self.heartbeats = HeartbeatWheel(get_heartbeat_rate())
+
+    def record_event_outcome(self, event_id: str):
+        analytics = self.event_analytics.get(event_id)
+        if analytics is None:
+            return
+        fn_name = cast(str | None, analytics["function"])
+        status = analytics["status"]
+        if status in ("success", "failed"):
+            self.outcomes_per_fn[fn_name][status] += 1  # type: ignore
+        if (process_time := analytics["process_time"]) is not None:
+            self.process_time_sketch_per_fn[fn_name].add(float(process_time))
+
+    def compute_analytics_summary(self):
+        if not self.events_recorded:
             return self.cached_event_analytics_summary
         if (
             self.events_recorded - self.event_count_at_last_cache
             >= self.ANAYLTICS_CACHE_FREQUENCY
         ):
-            df = self._get_df(records)
             self.event_count_at_last_cache = self.events_recorded
-            grouped = df.groupby("function")
             metrics = {"functions": {}}
-            for fn_name, fn_df in grouped:
-                status = fn_df["status"].values
-                success = np.sum(status == "success")
-                failure = np.sum(status == "failed")
-                total = success + failure
-                success_rate = success / total if total > 0 else None
-                percentiles = np.percentile(fn_df["process_time"].values, [50, 90, 99])  # type: ignore
+            for fn_name, total_requests in self.events_recorded_per_fn.items():
+                outcomes = self.outcomes_per_fn[fn_name]
+                total = outcomes["success"] + outcomes["failed"]
+                sketch = self.process_time_sketch_per_fn[fn_name]
                 metrics["functions"][fn_name] = {
-                    "success_rate": success_rate,
+                    "success_rate": outcomes["success"] / total if total > 0 else None,
                     "process_time_percentiles": {
-                        "50th": percentiles[0],  # type: ignore
-                        "90th": percentiles[1],  # type: ignore
-                        "99th": percentiles[2],  # type: ignore
+                        "50th": sketch.quantile(0.5),
+                        "90th": sketch.quantile(0.9),
+                        "99th": sketch.quantile(0.99),
                     },
-                    "total_requests": self.events_recorded_per_fn.get(
-                        fn_name, fn_df.shape[0]
-                    ),
+                    "total_requests": total_requests,
                 }
             self.cached_event_analytics_summary = metrics
         return self.cached_event_analytics_summary
 
     def start(self):
         self.active_jobs = [None] * self.max_thread_count
+        # Used as a stack so that the lowest free slot is handed out first
+        self.free_worker_slots = list(range(self.max_thread_count - 1, -1, -1))
+        self._loop = asyncio.get_running_loop()
+        self._dispatch_signal = asyncio.Event()
+        self._progress_signal = asyncio.Event()
 
         run_coro_in_background(self.start_processing)
         run_coro_in_background(self.start_progress_updates)
+        run_coro_in_background(self.heartbeats.run, lambda: self.stopped)
         if not self.live_updates:
             run_coro_in_background(self.notify_clients)
 
@@ -247,17 +673,81 @@ class Queue:
 
     def close(self):
         self.stopped = True
+        self.wake_scheduler()
+        self._set_signal(self._progress_signal)
+        # Wake up the `/queue/data` streams so that they notice the queue stopped
+        self._call_in_loop(self.heartbeats.wake_all)
+
+    def _set_signal(self, signal: asyncio.Event | None):
+        """
+        Sets an asyncio signal owned by the queue's event loop. Safe to call from
+        worker threads (e.g. progress updates coming from a user function running
+        in the threadpool) as well as from the event loop itself.
+        """
+        if signal is not None:
+            self._call_in_loop(signal.set)
+
+    def _call_in_loop(self, callback: Callable[[], Any]):
+        """
+        Calls `callback` on the queue's event loop, right away if this is called from
+        the event loop and as soon as possible otherwise.
+        """
+        loop = self._loop
+        if loop is None:
+            return
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+        if running_loop is loop:
+            callback()
+        else:
+            try:
+                loop.call_soon_threadsafe(callback)
+            except RuntimeError:
+                # The event loop has already been closed
+                pass
+
+    def wake_scheduler(self):
+        """
+        Wakes up `start_processing` so that it re-checks whether an event can be
+        dispatched. Must be called whenever an event is pushed or a worker slot
+        or concurrency slot is released.
+        """
+        self._set_signal(self._dispatch_signal)
 
     def send_message(
         self,
         event: Event,
         event_message: EventMessage,
+        coalesce: bool = False,
     ):
+        """
+        Queues a message to be streamed to the event's session. If `coalesce` is True,
+        the message replaces a message of the same type for the same event that the
+        client has not read yet.
+        """
         if not event.alive:
             return
         event_message.event_id = event._id
         messages = self.pending_messages_per_session[event.session_hash]
-        messages.put_nowait(event_message)
+        if coalesce:
+            messages.put_coalesced(f"{event_message.msg}:{event._id}", event_message)
+        else:
+            messages.put_nowait(event_message)
+
+    async def wait_for_readers(self, events: list[Event]):
+        """
+        Holds back a generator while any of the sessions it streams to is too far
+        behind in reading its messages, so that a slow client slows down its own
+        generator instead of making the server buffer an unbounded backlog.
+        """
+        for event in events:
+            while event.alive:
+                messages = self.pending_messages_per_session.get(event.session_hash)
+                if messages is None or not messages.backlogged:
+                    break
+                await messages.wait_for_room(timeout=1)
 
     def _resolve_concurrency_limit(
         self, default_concurrency_limit: int | None | Literal["not_set"]
@@ -392,11 +882,13 @@ class Queue:
             body.session_hash = event.session_hash
         async with self.pending_message_lock:
             if body.session_hash not in self.pending_messages_per_session:
-                self.pending_messages_per_session[body.session_hash] = AsyncQueue()
+                self.pending_messages_per_session[body.session_hash] = (
+                    SessionMessageQueue(self.MAX_UNREAD_MESSAGES_PER_SESSION)
+                )
             if body.session_hash not in self.pending_event_ids_session:
                 self.pending_event_ids_session[body.session_hash] = set()
         self.pending_event_ids_session[body.session_hash].add(event._id)
-        self.event_ids_to_events[event._id] = event
+        self._index_event(event)
         body.event_id = event._id if not fn.batch else None
 
         if hasattr(fn.fn, "cache"):
@@ -454,6 +946,7 @@ class Queue:
                         avg_time=avg_time,
                     ),
                 )
+                self._unindex_event(event)
                 return True, event._id, "success"
             except CacheMissError:
                 pass  # Fall through to normal queue path
@@ -466,7 +959,16 @@ class Queue:
             raise KeyError(
                 "Event not found in queue. If you are deploying this Gradio app with multiple replicas, please enable stickiness to ensure that all requests from the same user are routed to the same instance."
             ) from e
-        event_queue.queue.append(event)
+        flow = self.get_flow(event)
+        event_queue.push(
+            event,
+            flow=flow,
+            priority=fn.queue_priority,
+            weight=self.fair_share_weights.get(flow, 1)
+            if self.scheduling == "fair"
+            else None,
+        )
+        self.wake_scheduler()
         self.event_analytics[event._id] = {
             "time": time.time(),
             "status": "queued",
@@ -479,17 +981,29 @@ class Queue:
         while len(self.event_analytics) > self.ANALYTICS_MAX_EVENTS:
             self.event_analytics.pop(next(iter(self.event_analytics)))
 
-        self.broadcast_estimations(event.concurrency_id, len(event_queue.queue) - 1)
+        self.update_estimations(event.concurrency_id)
         return True, event._id, "success"
 
+    def _index_event(self, event: Event):
+        self.event_ids_to_events[event._id] = event
+        self.events_per_session.setdefault(event.session_hash, {})[event._id] = event
+
+    def _unindex_event(self, event: Event):
+        self.event_ids_to_events.pop(event._id, None)
+        session_events = self.events_per_session.get(event.session_hash)
+        if session_events is not None:
+            session_events.pop(event._id, None)
+            if not session_events:
+                del self.events_per_session[event.session_hash]
+
     async def remove_from_queue(self, event_id: str):
         event = self.event_ids_to_events.get(event_id)
         if event:
             async with self.delete_lock:
                 q = self.event_queue_per_concurrency_id[event.concurrency_id]
                 try:
-                    q.queue.remove(event)
-                    self.event_ids_to_events.pop(event_id, None)
+                    q.remove(event)
+                    self._unindex_event(event)
                 except ValueError:
                     pass
 
@@ -502,101 +1016,208 @@ class Queue:
         self.server_app = app
 
     def get_active_worker_count(self) -> int:
-        count = 0
-        for worker in self.active_jobs:
-            if worker is not None:
-                count += 1
-        return count
+        return len(self.active_jobs) - len(self.free_worker_slots)
 
     def get_events(self) -> tuple[list[Event], bool, str] | None:
-        concurrency_ids = list(self.event_queue_per_concurrency_id.keys())
-        random.shuffle(concurrency_ids)
-        for concurrency_id in concurrency_ids:
-            event_queue = self.event_queue_per_concurrency_id[concurrency_id]
-            if len(event_queue.queue) and (
-                event_queue.concurrency_limit is None
-                or event_queue.current_concurrency < event_queue.concurrency_limit
+        # Among the concurrency ids that can dispatch, the ones whose next event has
+        # the highest `queue_priority` are served first. Ties are broken uniformly at
+        # random, which gives the same fairness as shuffling all the ids and taking
+        # the first one that can run, without copying and shuffling every id.
+        now = time.monotonic()
+        ready: list[tuple[str, Event]] = []
+        for concurrency_id, event_queue in self.event_queue_per_concurrency_id.items():
+            if not len(event_queue.queue) or (
+                event_queue.concurrency_limit is not None
+                and event_queue.current_concurrency >= event_queue.concurrency_limit
             ):
-                first_event = event_queue.queue[0]
-                block_fn = first_event.fn
-                events = [first_event]
-                batch = block_fn.batch
-                if batch:
-                    events += [
-                        event
-                        for event in event_queue.queue[1:]
-                        if event.fn == first_event.fn
-                    ][: block_fn.max_batch_size - 1]
+                continue
+            head = event_queue.first_in_dispatch_order(self.can_start)
+            if head is None:
+                continue
+            deadline = self.get_batch_hold_deadline(event_queue, head, now)
+            if deadline is not None:
+                if (
+                    self.next_batch_deadline is None
+                    or deadline < self.next_batch_deadline
+                ):
+                    self.next_batch_deadline = deadline
+                continue
+            ready.append((concurrency_id, head))
+        if not ready:
+            return None
+        top_priority = min(head.dispatch_key[0] for _, head in ready)
+        concurrency_id, head = random.choice(
+            [(cid, head) for cid, head in ready if head.dispatch_key[0] == top_priority]
+        )
+        event_queue = self.event_queue_per_concurrency_id[concurrency_id]
+        events = self.get_batch_candidates(event_queue, head)
+        for event in events:
+            event_queue.remove(event, dispatched=True)
 
-                for event in events:
-                    event_queue.queue.remove(event)
+        return events, head.fn.batch, concurrency_id
 
-                return events, batch, concurrency_id
+    def get_flow(self, event: Event) -> str:
+        """Returns the key that fair scheduling and in-flight caps are applied to."""
+        if self.fair_share_key == "username" and event.username is not None:
+            return event.username
+        return event.session_hash
 
-    async def start_processing(self) -> None:
-        try:
-            while not self.stopped:
-                if len(self) == 0:
-                    await asyncio.sleep(self.sleep_when_free)
-                    continue
+    def can_start(self, event: Event, also_starting: int = 0) -> bool:
+        """
+        Whether the event can start without exceeding `max_in_flight_per_user`, if
+        `also_starting` other events of the same flow are started along with it.
+        """
+        if self.max_in_flight_per_user is None:
+            return True
+        in_flight = self.in_flight_per_flow.get(event.flow, 0) + also_starting
+        return in_flight < self.max_in_flight_per_user
 
-                if None not in self.active_jobs:
-                    await asyncio.sleep(self.sleep_when_free)
-                    continue
+    def finish_in_flight(self, flow: str):
+        """
+        Records that an event of `flow` is no longer in flight, which lets the next
+        event of the flow that was held back by `max_in_flight_per_user` start.
+        """
+        in_flight = self.in_flight_per_flow.get(flow, 1) - 1
+        if in_flight > 0:
+            self.in_flight_per_flow[flow] = in_flight
+        else:
+            self.in_flight_per_flow.pop(flow, None)
+        if self.max_in_flight_per_user is not None:
+            for event_queue in self.event_queue_per_concurrency_id.values():
+                event_queue.unpark(flow)
 
-                # Using mutex to avoid editing a list in use
-                async with self.delete_lock:
-                    event_batch = self.get_events()
-
-                if event_batch:
-                    events, batch, concurrency_id = event_batch
-                    self.active_jobs[self.active_jobs.index(None)] = events
-                    event_queue = self.event_queue_per_concurrency_id[concurrency_id]
-                    event_queue.current_concurrency += 1
-                    start_time = time.time()
-                    fn = events[0].fn
-                    event_queue.start_times_per_fn[fn].add(start_time)
-                    for event in events:
-                        if (a := self.event_analytics.get(event._id)) is not None:
-                            a["status"] = "processing"
-                    process_event_task = run_coro_in_background(
-                        self.process_events, events, batch, start_time, fn
-                    )
-                    set_task_name(
-                        process_event_task,
-                        events[0].session_hash,
-                        fn._id,
-                        events[0]._id,
-                        batch,
-                    )
+    def get_batch_candidates(
+        self, event_queue: EventQueue, first_event: Event
+    ) -> list[Event]:
+        """
+        Returns the events that would be dispatched together with `first_event`:
+        just the event itself, or for batch functions, the event followed by up to
+        `max_batch_size - 1` queued events for the same function.
+        """
+        block_fn = first_event.fn
+        events = [first_event]
+        if block_fn.batch:
+            starting_per_flow = {first_event.flow: 1}
+            for event in event_queue.queued_per_fn.get(block_fn, ()):
+                if len(events) >= block_fn.max_batch_size:
+                    break
+                if event is first_event:
+                    continue
+                starting = starting_per_flow.get(event.flow, 0)
+                if self.can_start(event, starting):
+                    events.append(event)
+                    starting_per_flow[event.flow] = starting + 1
+        return events
+
+    def get_batch_hold_deadline(
+        self, event_queue: EventQueue, first_event: Event, now: float
+    ) -> float | None:
+        """
+        If `first_event` belongs to a batch function with a `batch_wait_ms` budget
+        that has not expired and the batch is not full yet, returns the time at
+        which the batch must be dispatched anyway. Otherwise returns None, meaning
+        the batch can be dispatched right away.
+        """
+        block_fn = first_event.fn
+        if not block_fn.batch or block_fn.batch_wait_ms <= 0:
+            return None
+        deadline = first_event.enqueue_time + block_fn.batch_wait_ms / 1000
+        if deadline <= now:
+            return None
+        if len(event_queue.queued_per_fn.get(block_fn, ())) < block_fn.max_batch_size:
+            return deadline
+        batch = self.get_batch_candidates(event_queue, first_event)
+        if len(batch) >= block_fn.max_batch_size:
+            return None
+        return deadline
 
-                    self._asyncio_tasks.add(process_event_task)
-                    process_event_task.add_done_callback(self._asyncio_tasks.discard)
-                    if self.live_updates:
-                        self.broadcast_estimations(concurrency_id)
-                else:
-                    await asyncio.sleep(self.sleep_when_free)
+    async def start_processing(self) -> None:
+        """
+        Dispatches queued events to free workers. Rather than polling, this loop
+        sleeps until it is woken up by `wake_scheduler()`, which is called when an
+        event is pushed, when a worker finishes (releasing both a worker slot and a
+        concurrency slot) and when the queue is closed, or until a batch that is
+        being held back because of `batch_wait_ms` reaches its deadline. Once awake,
+        it dispatches as many events as there are free workers and runnable events.
+        """
+        if self._dispatch_signal is None:
+            raise ValueError("Queue has not been started.")
+        dispatch_signal = self._dispatch_signal
+        try:
+            while not self.stopped:
+                timeout = (
+                    None
+                    if self.next_batch_deadline is None
+                    else max(self.next_batch_deadline - time.monotonic(), 0)
+                )
+                try:
+                    await asyncio.wait_for(dispatch_signal.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                dispatch_signal.clear()
+                self.next_batch_deadline = None
+                while not self.stopped and self.free_worker_slots:
+                    # Using mutex to avoid editing a list in use
+                    async with self.delete_lock:
+                        event_batch = self.get_events()
+                    if not event_batch:
+                        break
+                    self.dispatch(*event_batch)
         finally:
             self.stopped = True
             self._cancel_asyncio_tasks()
 
+    def dispatch(self, events: list[Event], batch: bool, concurrency_id: str) -> None:
+        worker_slot = self.free_worker_slots.pop()
+        self.active_jobs[worker_slot] = events
+        for event in events:
+            event.worker_slot = worker_slot
+            self.in_flight_per_flow[event.flow] = (
+                self.in_flight_per_flow.get(event.flow, 0) + 1
+            )
+        event_queue = self.event_queue_per_concurrency_id[concurrency_id]
+        event_queue.current_concurrency += 1
+        start_time = time.time()
+        fn = events[0].fn
+        event_queue.start_times_per_fn[fn].add(start_time)
+        for event in events:
+            if (a := self.event_analytics.get(event._id)) is not None:
+                a["status"] = "processing"
+        process_event_task = run_coro_in_background(
+            self.process_events, events, batch, start_time, fn
+        )
+        set_task_name(
+            process_event_task,
+            events[0].session_hash,
+            fn._id,
+            events[0]._id,
+            batch,
+        )
+
+        self._asyncio_tasks.add(process_event_task)
+        process_event_task.add_done_callback(self._asyncio_tasks.discard)
+        if self.live_updates:
+            self.update_estimations(concurrency_id)
+
     async def start_progress_updates(self) -> None:
         """
         Because progress updates can be very frequent, we do not necessarily want to send a message per update.
         Rather, we check for progress updates at regular intervals, and send a message if there is a pending update.
         Consecutive progress updates between sends will overwrite each other so only the most recent update will be sent.
+        When no progress update is pending, this loop sleeps until `set_progress` wakes it up.
         """
+        if self._progress_signal is None:
+            raise ValueError("Queue has not been started.")
+        progress_signal = self._progress_signal
         while not self.stopped:
-            events = [evt for job in self.active_jobs if job is not None for evt in job]
-
-            if len(events) == 0:
-                await asyncio.sleep(self.progress_update_sleep_when_free)
-                continue
+            await progress_signal.wait()
+            progress_signal.clear()
 
+            events = [evt for job in self.active_jobs if job is not None for evt in job]
             for event in events:
                 if event.progress_pending and event.progress:
                     event.progress_pending = False
-                    self.send_message(event, event.progress)
+                    self.send_message(event, event.progress, coalesce=True)
 
             await asyncio.sleep(self.progress_update_sleep_when_free)
 
@@ -607,23 +1228,22 @@ class Queue:
     ):
         if iterables is None:
             return
-        for job in self.active_jobs:
-            if job is None:
-                continue
-            for evt in job:
-                if evt._id == event_id:
-                    progress_data: list[ProgressUnit] = []
-                    for iterable in iterables:
-                        progress_unit = ProgressUnit(
-                            index=iterable.index,
-                            length=iterable.length,
-                            unit=iterable.unit,
-                            progress=iterable.progress,
-                            desc=iterable.desc,
-                        )
-                        progress_data.append(progress_unit)
-                    evt.progress = ProgressMessage(progress_data=progress_data)
-                    evt.progress_pending = True
+        evt = self.event_ids_to_events.get(event_id)
+        if evt is None or evt.worker_slot is None:
+            return
+        progress_data: list[ProgressUnit] = []
+        for iterable in iterables:
+            progress_unit = ProgressUnit(
+                index=iterable.index,
+                length=iterable.length,
+                unit=iterable.unit,
+                progress=iterable.progress,
+                desc=iterable.desc,
+            )
+            progress_data.append(progress_unit)
+        evt.progress = ProgressMessage(progress_data=progress_data)
+        evt.progress_pending = True
+        self._set_signal(self._progress_signal)
 
     def log_message(
         self,
@@ -634,39 +1254,43 @@ class Queue:
         duration: float | None = 10,
         visible: bool = True,
     ):
-        events = [evt for job in self.active_jobs if job is not None for evt in job]
-        for event in events:
-            if event._id == event_id:
-                log_message = LogMessage(
-                    log=log,
-                    level=level,
-                    duration=duration,
-                    visible=visible,
-                    title=title,
-                )
-                self.send_message(event, log_message)
+        event = self.event_ids_to_events.get(event_id)
+        if event is None or event.worker_slot is None:
+            return
+        log_message = LogMessage(
+            log=log,
+            level=level,
+            duration=duration,
+            visible=visible,
+            title=title,
+        )
+        self.send_message(event, log_message)
 
     async def clean_events(
         self, *, session_hash: str | None = None, event_id: str | None = None
     ) -> None:
-        for job_set in self.active_jobs:
-            if job_set:
-                for job in job_set:
-                    if job.session_hash == session_hash or job._id == event_id:
-                        job.alive = False
+        matching_events: dict[str, Event] = {}
+        if session_hash is not None:
+            matching_events.update(self.events_per_session.get(session_hash, {}))
+        if event_id is not None and (event := self.event_ids_to_events.get(event_id)):
+            matching_events[event_id] = event
+
+        for event in matching_events.values():
+            if event.worker_slot is not None:
+                event.alive = False
 
         async with self.delete_lock:
             events_to_remove: list[Event] = []
-            for event_queue in self.event_queue_per_concurrency_id.values():
-                for event in event_queue.queue:
-                    if event.session_hash == session_hash or event._id == event_id:
-                        events_to_remove.append(event)
+            for event in matching_events.values():
+                event_queue = self.event_queue_per_concurrency_id.get(
+                    event.concurrency_id
+                )
+                if event_queue is not None and event in event_queue.queue:
+                    events_to_remove.append(event)
 
             for event in events_to_remove:
-                self.event_queue_per_concurrency_id[event.concurrency_id].queue.remove(
-                    event
-                )
-                self.event_ids_to_events.pop(event._id, None)
+                self.event_queue_per_concurrency_id[event.concurrency_id].remove(event)
+                self._unindex_event(event)
 
             if session_hash and session_hash in self.pending_event_ids_session:
                 removed_ids = {e._id for e in events_to_remove}
@@ -684,33 +1308,17 @@ class Queue:
                 for concurrency_id in self.event_queue_per_concurrency_id:
                     self.broadcast_estimations(concurrency_id)
 
-    def broadcast_estimations(
-        self, concurrency_id: str, after: int | None = None
-    ) -> None:
+    def broadcast_estimations(self, concurrency_id: str) -> None:
+        """
+        Sends a new estimation to every queued event of `concurrency_id` whose rank or
+        ETA changed meaningfully, by walking the whole queue.
+        """
         wait_so_far = 0
         event_queue = self.event_queue_per_concurrency_id[concurrency_id]
-        time_till_available_worker: int | None = 0
+        event_queue.last_full_estimation = time.monotonic()
+        time_till_available_worker = self.time_till_available_worker(event_queue)
 
-        if event_queue.current_concurrency == event_queue.concurrency_limit:
-            expected_end_times = []
-            for fn, start_times in event_queue.start_times_per_fn.items():
-                if fn not in self.process_time_per_fn:
-                    time_till_available_worker = None
-                    break
-                if fn.connection == "stream":
-                    process_time = fn.time_limit or 0
-                else:
-                    process_time = self.process_time_per_fn[fn].avg_time
-                expected_end_times += [
-                    start_time + process_time for start_time in start_times
-                ]
-            if time_till_available_worker is not None and len(expected_end_times) > 0:
-                time_of_first_completion = min(expected_end_times)
-                time_till_available_worker = max(
-                    time_of_first_completion - time.time(), 0
-                )
-
-        for rank, event in enumerate(event_queue.queue):
+        for rank, event in enumerate(event_queue.in_dispatch_order()):
             process_time_for_fn = (
                 self.process_time_per_fn[event.fn].avg_time
                 if event.fn in self.process_time_per_fn
@@ -731,13 +1339,7 @@ class Queue:
                 else None
             )
 
-            if after is None or rank >= after:
-                self.send_message(
-                    event,
-                    EstimationMessage(
-                        rank=rank, rank_eta=rank_eta, queue_size=len(event_queue.queue)
-                    ),
-                )
+            self.send_estimation(event_queue, event, rank, rank_eta)
             if event_queue.concurrency_limit is None:
                 wait_so_far = 0
             elif wait_so_far is not None and process_time_for_fn is not None:
@@ -750,6 +1352,144 @@ class Queue:
             else:
                 wait_so_far = None
 
+    def update_estimations(self, concurrency_id: str) -> None:
+        """
+        Sends a new estimation to the queued events of `concurrency_id` whose rank or
+        ETA changed meaningfully since an event was pushed or dispatched. When the
+        dispatch order is the arrival order, only the first ESTIMATION_EXACT_RANKS
+        events and the events whose rank may have dropped by
+        ESTIMATION_RELATIVE_TOLERANCE are checked, and their rank and ETA are computed
+        from the arrival index, so this does not walk the queue. The whole queue is
+        still walked at most once every `update_intervals` seconds, to send the ETAs
+        that changed because the average process times did, and on every call if
+        priorities or fair scheduling change the dispatch order.
+        """
+        event_queue = self.event_queue_per_concurrency_id[concurrency_id]
+        if (
+            not event_queue.dispatch_order_is_arrival_order
+            or time.monotonic() - event_queue.last_full_estimation
+            >= self.update_intervals
+        ):
+            self.broadcast_estimations(concurrency_id)
+            return
+        time_till_available_worker = self.time_till_available_worker(event_queue)
+        events = {
+            event._id: event
+            for event in itertools.chain(
+                itertools.islice(event_queue.queue, self.ESTIMATION_EXACT_RANKS),
+                event_queue.due_estimations(),
+            )
+        }
+        for event in events.values():
+            ahead = event_queue.arrivals.ahead(event)
+            rank = sum(ahead.values())
+            rank_eta = self.estimate_eta(
+                event_queue, event, ahead, time_till_available_worker
+            )
+            self.send_estimation(event_queue, event, rank, rank_eta)
+            if rank >= self.ESTIMATION_EXACT_RANKS and event.last_estimation:
+                # In arrival order, ranks only go down: the next estimation is due
+                # once the rank dropped by ESTIMATION_RELATIVE_TOLERANCE of the last
+                # rank that was sent (or into the first ESTIMATION_EXACT_RANKS)
+                last_rank = event.last_estimation[0]
+                next_rank = max(
+                    math.floor(last_rank * (1 - self.ESTIMATION_RELATIVE_TOLERANCE)),
+                    self.ESTIMATION_EXACT_RANKS - 1,
+                )
+                event_queue.schedule_estimation(event, max(rank - next_rank, 1))
+
+    def time_till_available_worker(self, event_queue: EventQueue) -> float | None:
+        """
+        The time until a worker of `event_queue` is expected to be free, or None if it
+        cannot be estimated yet.
+        """
+        if event_queue.current_concurrency != event_queue.concurrency_limit:
+            return 0
+        expected_end_times = []
+        for fn, start_times in event_queue.start_times_per_fn.items():
+            if fn not in self.process_time_per_fn:
+                return None
+            if fn.connection == "stream":
+                process_time = fn.time_limit or 0
+            else:
+                process_time = self.process_time_per_fn[fn].avg_time
+            expected_end_times += [
+                start_time + process_time for start_time in start_times
+            ]
+        if not expected_end_times:
+            return 0
+        return max(min(expected_end_times) - time.time(), 0)
+
+    def estimate_eta(
+        self,
+        event_queue: EventQueue,
+        event: Event,
+        ahead: dict[BlockFunction, int],
+        time_till_available_worker: float | None,
+    ) -> float | None:
+        """
+        The ETA of `event`, given the number of events of each function queued ahead
+        of it. This is the same estimation as the one `broadcast_estimations()`
+        accumulates while walking the queue.
+        """
+        if (
+            event.fn not in self.process_time_per_fn
+            or time_till_available_worker is None
+        ):
+            return None
+        wait_so_far = 0.0
+        if event_queue.concurrency_limit is not None:
+            for fn, count in ahead.items():
+                if not count:
+                    continue
+                if fn not in self.process_time_per_fn:
+                    return None
+                if fn.connection == "stream":
+                    delta = time_till_available_worker
+                else:
+                    delta = self.process_time_per_fn[fn].avg_time
+                wait_so_far += count * delta / event_queue.concurrency_limit
+        return (
+            self.process_time_per_fn[event.fn].avg_time
+            + wait_so_far
+            + time_till_available_worker
+        )
+
+    def send_estimation(
+        self,
+        event_queue: EventQueue,
+        event: Event,
+        rank: int,
+        rank_eta: float | None,
+    ):
+        if self.estimation_changed(event, rank, rank_eta):
+            event.last_estimation = (rank, rank_eta)
+            self.send_message(
+                event,
+                EstimationMessage(
+                    rank=rank, rank_eta=rank_eta, queue_size=len(event_queue.queue)
+                ),
+                coalesce=True,
+            )
+
+    def estimation_changed(
+        self, event: Event, rank: int, rank_eta: float | None
+    ) -> bool:
+        if event.last_estimation is None:
+            return True
+        last_rank, last_eta = event.last_estimation
+        if rank != last_rank and (
+            rank < self.ESTIMATION_EXACT_RANKS
+            or abs(rank - last_rank) >= self.ESTIMATION_RELATIVE_TOLERANCE * last_rank
+        ):
+            return True
+        if rank_eta is None or last_eta is None:
+            return (rank_eta is None) != (last_eta is None)
+        return abs(rank_eta - last_eta) > max(
+            self.ESTIMATION_MIN_ETA_CHANGE,
+            self.ESTIMATION_RELATIVE_TOLERANCE * last_eta,
+        )
+
     def get_status(self) -> EstimationMessage:
         return EstimationMessage(
             queue_size=len(self),
@@ -809,6 +1549,9 @@ class Queue:
         begin_time: float,
         fn: BlockFunction,
     ) -> None:
+        # Every event of the job, including those that died before it started, which
+        # must be unindexed as well
+        job_events = events
         awake_events: list[Event] = []
         success = False
         try:
@@ -873,6 +1616,8 @@ class Queue:
                     session_hash=events[0].session_hash,
                 )
                 trace.queue_wait_ms = (time.monotonic() - events[0].enqueue_time) * 1000
+                if batch:
+                    trace.batch_size = len(events)
                 set_current_trace(trace)
             else:
                 trace = None
@@ -909,10 +1654,7 @@ class Queue:
                             success=False,
                         ),
                     )
-                    await run_sync(
-                        self.compute_analytics_summary,
-                        list(self.event_analytics.values()),
-                    )
+                    self.compute_analytics_summary()
             if response and response.get("is_generating", False):
                 old_response = response
                 old_err = err
@@ -936,6 +1678,7 @@ class Queue:
                                 else None,
                             ),
                         )
+                    await self.wait_for_readers(awake_events)
                     awake_events = [event for event in awake_events if event.alive]
                     if not awake_events:
                         return
@@ -1080,15 +1823,20 @@ class Queue:
                 start_times.discard(begin_time)
                 if not start_times:
                     del event_queue.start_times_per_fn[fn]
-            try:
-                self.active_jobs[self.active_jobs.index(events)] = None
-            except ValueError:
-                # `events` can be absent from `self.active_jobs`
-                # when this coroutine is called from the `join_queue` endpoint handler in `routes.py`
-                # without putting the `events` into `self.active_jobs`.
-                # https://github.com/gradio-app/gradio/blob/f09aea34d6bd18c1e2fef80c86ab2476a6d1dd83/gradio/routes.py#L594-L596
-                pass
-            for event in events:
+            # `events` can be absent from `self.active_jobs`
+            # when this coroutine is called from the `join_queue` endpoint handler in `routes.py`
+            # without putting the `events` into `self.active_jobs`.
+            # https://github.com/gradio-app/gradio/blob/f09aea34d6bd18c1e2fef80c86ab2476a6d1dd83/gradio/routes.py#L594-L596
+            worker_slot = events[0].worker_slot
+            if worker_slot is not None:
+                job = self.active_jobs[worker_slot]
+                for event in job or events:
+                    event.worker_slot = None
+                    self.finish_in_flight(event.flow)
+                self.active_jobs[worker_slot] = None
+                self.free_worker_slots.append(worker_slot)
+            self.wake_scheduler()
+            for event in job_events:
                 # Always reset the state of the iterator
                 # If the job finished successfully, this has no effect
                 # If the job is cancelled, this will enable future runs
@@ -1101,12 +1849,10 @@ class Queue:
                         if event in awake_events
                         else "cancelled"
                     )
-                await run_sync(
-                    self.compute_analytics_summary,
-                    list(self.event_analytics.values()),
-                )
+                self.record_event_outcome(event._id)
+                self.compute_analytics_summary()
 
-                self.event_ids_to_events.pop(event._id, None)
+                self._unindex_event(event)
 
     async def reset_iterators(self, event_id: str):
         # Do the same thing as the /reset route
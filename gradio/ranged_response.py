@@ -4,6 +4,7 @@ from __future__ import annotations
 
 import os
 import re
+import secrets
 import stat
 from typing import NamedTuple
 from urllib.parse import quote
@@ -45,13 +46,56 @@ class OpenRange(NamedTuple):
         return ClosedRange(begin, end)
 
 
+RANGE_SPEC_REGEX = re.compile(r"^(?P<start>\d*)-(?P<end>\d*)$")
+
+
+def parse_range_header(
+    value: str, size: int, max_ranges: int = 100
+) -> list[ClosedRange] | None:
+    """
+    Parses a `Range` header into the byte ranges of a file of `size` bytes, sorted and
+    with overlapping or adjacent ranges merged. Returns None if the header should be
+    ignored (because it is malformed or asks for more than `max_ranges` ranges), and
+    an empty list if none of the ranges can be satisfied.
+    """
+    unit, _, specs = value.partition("=")
+    if unit.strip().lower() != "bytes":
+        return None
+    ranges = []
+    for spec in specs.split(","):
+        match = RANGE_SPEC_REGEX.match(spec.strip())
+        if not match or not (match.group("start") or match.group("end")):
+            return None
+        start, end = match.group("start"), match.group("end")
+        if not start:
+            # A suffix range, i.e. the last `end` bytes
+            if int(end) > 0 and size > 0:
+                ranges.append(ClosedRange(max(size - int(end), 0), size - 1))
+        elif int(start) < size:
+            last = size - 1 if not end else min(int(end), size - 1)
+            if last < int(start):
+                return None
+            ranges.append(ClosedRange(int(start), last))
+    if len(ranges) > max_ranges:
+        return None
+    merged: list[ClosedRange] = []
+    for byte_range in sorted(ranges):
+        if merged and byte_range.start <= merged[-1].end + 1:
+            merged[-1] = ClosedRange(
+                merged[-1].start, max(merged[-1].end, byte_range.end)
+            )
+        else:
+            merged.append(byte_range)
+    return merged
+
+
 class RangedFileResponse(Response):
     chunk_size = 4096
 
     def __init__(
         self,
         path: str | os.PathLike,
-        range: OpenRange,
+        range: OpenRange | ClosedRange | list[ClosedRange],
         headers: dict[str, str] | None = None,
         media_type: str | None = None,
         filename: str | None = None,
@@ -107,7 +151,15 @@ class RangedFileResponse(Response):
                 if not stat.S_ISREG(mode):
                     raise RuntimeError(f"File at path {self.path} is not a file.")
 
-        byte_range = self.range.clamp(0, self.stat_result.st_size)
+        if isinstance(self.range, list):
+            if len(self.range) > 1:
+                await self.send_multiple_ranges(self.range, send)
+                return
+            byte_range = self.range[0]
+        elif isinstance(self.range, OpenRange):
+            byte_range = self.range.clamp(0, self.stat_result.st_size)
+        else:
+            byte_range = self.range
         self.set_range_headers(byte_range)
 
         async with aiofiles.open(self.path, mode="rb") as file:
@@ -144,6 +196,60 @@ class RangedFileResponse(Response):
                         }
                     )
 
+    async def send_multiple_ranges(self, ranges: list[ClosedRange], send: Send) -> None:
+        """Sends the ranges as the parts of a `multipart/byteranges` response."""
+        if not self.stat_result:
+            raise ValueError("No stat result to set range headers with")
+        boundary = secrets.token_hex(16)
+        part_headers = [
+            (
+                f"--{boundary}\r\n"
+                f"Content-Type: {self.media_type}\r\n"
+                f"Content-Range: bytes {r.start}-{r.end}/{self.stat_result.st_size}\r\n"
+                "\r\n"
+            ).encode("latin-1")
+            for r in ranges
+        ]
+        closing = f"\r\n--{boundary}--\r\n".encode("latin-1")
+        self.headers["content-type"] = f"multipart/byteranges; boundary={boundary}"
+        self.headers["content-length"] = str(
+            sum(len(h) + len(r) for h, r in zip(part_headers, ranges, strict=True))
+            + 2 * (len(ranges) - 1)
+            + len(closing)
+        )
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 206,
+                "headers": self.raw_headers,
+            }
+        )
+        if self.send_header_only:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+        async with aiofiles.open(self.path, mode="rb") as file:
+            for i, (header, byte_range) in enumerate(
+                zip(part_headers, ranges, strict=True)
+            ):
+                await send(
+                    {
+                        "type": "http.response.body",
+                        "body": (b"\r\n" if i else b"") + header,
+                        "more_body": True,
+                    }
+                )
+                await file.seek(byte_range.start)
+                remaining_bytes = len(byte_range)
+                while remaining_bytes > 0:
+                    chunk = await file.read(min(self.chunk_size, remaining_bytes))
+                    if not chunk:
+                        break
+                    remaining_bytes -= len(chunk)
+                    await send(
+                        {"type": "http.response.body", "body": chunk, "more_body": True}
+                    )
+        await send({"type": "http.response.body", "body": closing, "more_body": False})
+
 
 class RangedStaticFiles(StaticFiles):
     def file_response(
@@ -2,9 +2,12 @@ from __future__ import annotations
 
 import asyncio
 import functools
+import gzip
 import hashlib
 import hmac
 import importlib.resources
+import importlib.util
+import ipaddress
 import json
 import mimetypes
 import os
@@ -14,6 +17,7 @@ import secrets
 import shutil
 import tempfile
 import threading
+import time
 import traceback
 import unicodedata
 import uuid
@@ -21,7 +25,8 @@ from collections import defaultdict, deque
 from collections.abc import AsyncGenerator, Callable
 from contextlib import AbstractAsyncContextManager, AsyncExitStack, asynccontextmanager
 from dataclasses import dataclass as python_dataclass
-from datetime import datetime
+from dataclasses import field
+from email.utils import formatdate, parsedate_to_datetime
 from pathlib import Path
 from tempfile import NamedTemporaryFile, _TemporaryFileWrapper
 from typing import (
@@ -79,6 +84,7 @@ if TYPE_CHECKING:
     from gradio.helpers import EventData
     from gradio.oauth import OAuthToken
     from gradio.routes import App
+    from gradio.server_messages import EventMessage
 
 
 config_lock = threading.Lock()
@@ -402,6 +408,9 @@ async def call_process_api(
     if batch_in_single_out:
         inputs = [inputs]
 
+    if session_hash is not None:
+        await app.state_holder.async_refresh(session_hash)
+
     try:
         from gradio.profiling import trace_phase
 
@@ -426,6 +435,8 @@ async def call_process_api(
             app.iterators[event_id] = iterator  # type: ignore
         if isinstance(output, Error):
             raise output
+        if session_hash is not None:
+            await app.state_holder.async_save(session_hash)
     except BaseException:
         iterator = app.iterators.get(event_id) if event_id is not None else None
         if iterator is not None:  # close off any streams that are still open
@@ -442,6 +453,32 @@ async def call_process_api(
     return output
 
 
+def accepts_msgpack_stream(request: fastapi.Request) -> bool:
+    """
+    Whether the queue stream should be sent to this client as msgpack frames rather
+    than server-sent events. The client opts in through its Accept header, and msgpack
+    is an optional dependency of the server.
+    """
+    accept = request.headers.get("accept", "")
+    return (
+        client_utils.MSGPACK_STREAM_MEDIA_TYPE in accept
+        and importlib.util.find_spec("msgpack") is not None
+    )
+
+
+def msgpack_frame(message: EventMessage) -> bytes:
+    """
+    Encodes a queue message as msgpack, prefixed with its length as a 4-byte
+    big-endian integer. The message is the same as in the server-sent event stream
+    (e.g. files are still referenced by URL): msgpack only makes it smaller and
+    faster to decode, mostly for large numeric payloads such as dataframes.
+    """
+    import msgpack
+
+    payload = msgpack.packb(message.model_dump(), default=str)
+    return len(payload).to_bytes(4, "big") + payload
+
+
 def get_first_header_value(request: fastapi.Request, header_name: str):
     header_value = request.headers.get(header_name)
     if header_value:
@@ -449,6 +486,38 @@ def get_first_header_value(request: fastapi.Request, header_name: str):
     return None
 
 
+def _is_private_address(address: str) -> bool:
+    try:
+        return ipaddress.ip_address(address).is_private
+    except ValueError:
+        return False
+
+
+def get_client_ip(request: fastapi.Request) -> str | None:
+    """
+    Returns the IP address of the client that sent the request. A request that comes
+    from a private (or loopback) address most likely comes from a reverse proxy in
+    front of the app, so the x-forwarded-for header is used instead: the rightmost
+    public address in it is the one the proxies received the request from (the
+    addresses to its left were sent by the client itself and cannot be trusted). The
+    header of a request from a public address is ignored, since the client may have
+    set it to anything.
+    """
+    host = request.client.host if request.client else None
+    if host is None or not _is_private_address(host):
+        return host
+    addresses = [
+        address.strip()
+        for header in request.headers.getlist("x-forwarded-for")
+        for address in header.split(",")
+        if address.strip()
+    ]
+    for address in reversed(addresses):
+        if not _is_private_address(address):
+            return address
+    return addresses[0] if addresses else host
+
+
 def get_request_origin(request: fastapi.Request, route_path: str) -> httpx.URL:
     """
     Examines the request headers to determine the origin of the request.
@@ -636,6 +705,202 @@ class FileUploadProgress:
             raise FileUploadProgressNotQueuedError() from e
 
 
+@python_dataclass
+class ChunkedUpload:
+    filename: str | None
+    path: str
+    sha: Any
+    total_size: int | None = None
+    upload_id: str | None = None
+    client: str | None = None
+    size: int = 0
+    last_active: float = field(default_factory=time.monotonic)
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+
+class ChunkedUploads:
+    """
+    Files being uploaded with the resumable upload protocol: an upload is started
+    with `start()`, its content is appended with `write()` in one or more chunks (each
+    of which can be retried from the offset returned by `offset()` if a connection
+    drops) and it is moved to the upload folder with `finish()`. Uploads that have
+    not received a chunk for `expiry` seconds (or `empty_expiry` seconds, if they have
+    not received any data yet) are discarded, and each client can only have
+    `max_uploads_per_client` uploads in progress.
+    """
+
+    def __init__(
+        self,
+        max_uploads: int = 1000,
+        expiry: float = 60 * 60,
+        empty_expiry: float = 60,
+        max_uploads_per_client: int = 20,
+    ) -> None:
+        self.max_uploads = max_uploads
+        self.expiry = expiry
+        self.empty_expiry = empty_expiry
+        self.max_uploads_per_client = max_uploads_per_client
+        self._uploads: dict[str, ChunkedUpload] = {}
+        self._uploads_per_client: dict[str | None, int] = {}
+
+    def discard_expired(self) -> None:
+        """Aborts the uploads that have expired, deleting what they received."""
+        now = time.monotonic()
+        for token, upload in list(self._uploads.items()):
+            expiry = self.expiry if upload.size else self.empty_expiry
+            if now - upload.last_active > expiry and not upload.lock.locked():
+                self.abort(token)
+
+    def _pop(self, token: str) -> ChunkedUpload | None:
+        if (upload := self._uploads.pop(token, None)) is not None:
+            count = self._uploads_per_client[upload.client] - 1
+            if count:
+                self._uploads_per_client[upload.client] = count
+            else:
+                del self._uploads_per_client[upload.client]
+        return upload
+
+    def start(
+        self,
+        filename: str | None,
+        total_size: int | None,
+        max_file_size: int | float,
+        upload_id: str | None = None,
+        upload_progress: FileUploadProgress | None = None,
+        client: str | None = None,
+    ) -> str:
+        """
+        Starts an upload for `client` (e.g. its IP address) and returns its token. The
+        file name is validated here, so that `finish()` cannot fail because of it once
+        the whole file has been received.
+        """
+        if total_size is not None and total_size > max_file_size:
+            raise HTTPException(
+                status_code=413,
+                detail=f"File size exceeded maximum allowed size of {max_file_size} bytes.",
+            )
+        upload_file_name(filename)
+        self.discard_expired()
+        if len(self._uploads) >= self.max_uploads:
+            raise HTTPException(status_code=429, detail="Too many uploads in progress.")
+        if self._uploads_per_client.get(client, 0) >= self.max_uploads_per_client:
+            raise HTTPException(
+                status_code=429, detail="Too many uploads in progress for this client."
+            )
+        with NamedTemporaryFile(delete=False) as f:
+            path = f.name
+        sha = hashlib.sha256()
+        sha.update(processing_utils.hash_seed)
+        token = secrets.token_urlsafe(32)
+        self._uploads[token] = ChunkedUpload(
+            filename,
+            path,
+            sha,
+            total_size=total_size,
+            upload_id=upload_id,
+            client=client,
+        )
+        self._uploads_per_client[client] = self._uploads_per_client.get(client, 0) + 1
+        if upload_id and upload_progress:
+            upload_progress.track(upload_id)
+        return token
+
+    def get(self, token: str) -> ChunkedUpload:
+        if (upload := self._uploads.get(token)) is None:
+            raise HTTPException(status_code=404, detail="Upload not found.")
+        return upload
+
+    def offset(self, token: str) -> int:
+        return self.get(token).size
+
+    async def write(
+        self,
+        token: str,
+        offset: int,
+        stream: AsyncGenerator[bytes, None],
+        max_file_size: int | float,
+        upload_progress: FileUploadProgress | None = None,
+    ) -> int:
+        """
+        Appends the chunk in `stream` to the upload, which must start at `offset`, the
+        number of bytes received so far. Whatever arrives before the stream is cut off
+        is kept, so the client can resume from the new offset. Returns the new offset.
+        """
+        upload = self.get(token)
+        async with upload.lock:
+            if offset != upload.size:
+                raise HTTPException(
+                    status_code=409,
+                    detail=f"Expected a chunk at offset {upload.size}, got {offset}.",
+                    headers={"Upload-Offset": str(upload.size)},
+                )
+            with open(upload.path, "ab") as f:
+                async for data in stream:
+                    upload.last_active = time.monotonic()
+                    if not data:
+                        continue
+                    if upload.size + len(data) > max_file_size:
+                        raise HTTPException(
+                            status_code=413,
+                            detail=f"File size exceeded maximum allowed size of {max_file_size} bytes.",
+                        )
+                    if (
+                        upload.total_size is not None
+                        and upload.size + len(data) > upload.total_size
+                    ):
+                        raise HTTPException(
+                            status_code=400,
+                            detail=f"Received more than the {upload.total_size} bytes declared for this upload.",
+                        )
+                    await anyio.to_thread.run_sync(f.write, data)
+                    upload.sha.update(data)
+                    upload.size += len(data)
+                    if upload.upload_id and upload_progress:
+                        upload_progress.append(
+                            upload.upload_id, upload.filename or "", data
+                        )
+            return upload.size
+
+    async def finish(
+        self,
+        token: str,
+        upload_dir: str,
+        upload_progress: FileUploadProgress | None = None,
+    ) -> tuple[str, str | None]:
+        """
+        Moves a complete upload to the upload folder with `save_upload()`. Returns the
+        destination and, if the file still has to be moved there, its temp path. If
+        the upload cannot be saved, it is aborted.
+        """
+        upload = self.get(token)
+        async with upload.lock:
+            if upload.total_size is not None and upload.size != upload.total_size:
+                raise HTTPException(
+                    status_code=409,
+                    detail=f"Upload is incomplete: received {upload.size} of {upload.total_size} bytes.",
+                    headers={"Upload-Offset": str(upload.size)},
+                )
+            self._pop(token)
+            if upload.upload_id and upload_progress:
+                upload_progress.set_done(upload.upload_id)
+            try:
+                dest, moved = save_upload(
+                    upload.path,
+                    upload.filename,
+                    upload.sha.hexdigest(),
+                    upload_dir,
+                    force_move=False,
+                )
+            except BaseException:
+                Path(upload.path).unlink(missing_ok=True)
+                raise
+            return dest, None if moved else upload.path
+
+    def abort(self, token: str) -> None:
+        if (upload := self._pop(token)) is not None:
+            Path(upload.path).unlink(missing_ok=True)
+
+
 class GradioMultiPartParser:
     """Vendored from starlette.MultipartParser.
 
@@ -856,6 +1121,11 @@ class GradioMultiPartParser:
 def move_uploaded_files_to_cache(files: list[str], destinations: list[str]) -> None:
     for file, dest in zip(files, destinations, strict=False):
         shutil.move(file, dest)
+        # Uploaded files are stored in a directory named after their digest
+        processing_utils.blob_index.record(dest, Path(dest).parent.name)
+        # The file was indexed with a size of 0 if it was added to a block's temp
+        # files before it was moved into place
+        processing_utils.temp_file_index.refresh(dest)
 
 
 def update_root_in_config(config: BlocksConfigDict, root: str) -> BlocksConfigDict:
@@ -871,6 +1141,104 @@ def update_root_in_config(config: BlocksConfigDict, root: str) -> BlocksConfigDi
     return config
 
 
+# Rendered in place of the username when a page or config payload is cached
+USERNAME_PLACEHOLDER = "\x00gradio-username\x00"
+
+
+class SplicedPayload:
+    """
+    A response body rendered with `USERNAME_PLACEHOLDER` in place of the username
+    and split around it, so that the username of each request is spliced in without
+    rendering the body again. The body sent to anonymous users is compressed once
+    per content encoding.
+    """
+
+    def __init__(self, prefix: bytes, suffix: bytes, media_type: str):
+        self.prefix = prefix
+        self.suffix = suffix
+        self.media_type = media_type
+        self._compressed: dict[str, bytes] = {}
+
+    @classmethod
+    def split(
+        cls, body: bytes | memoryview, rendered_placeholder: bytes, media_type: str
+    ) -> SplicedPayload | None:
+        parts = bytes(body).split(rendered_placeholder)
+        if len(parts) != 2:
+            return None
+        return cls(parts[0], parts[1], media_type)
+
+    def body(self, rendered_username: bytes) -> bytes:
+        return b"".join((self.prefix, rendered_username, self.suffix))
+
+    def _compress(self, encoding: str, body: bytes) -> bytes:
+        if encoding not in self._compressed:
+            if encoding == "br":
+                import brotli
+
+                # Higher qualities take hundreds of times longer for little gain
+                compressed = brotli.compress(body, quality=9, mode=brotli.MODE_TEXT)
+            else:
+                compressed = gzip.compress(body, mtime=0)
+            self._compressed[encoding] = compressed
+        return self._compressed[encoding]
+
+    def response(
+        self,
+        request: fastapi.Request,
+        rendered_username: bytes,
+        anonymous: bool,
+    ) -> Response:
+        body = self.body(rendered_username)
+        headers = {"Vary": "Accept-Encoding"}
+        accept_encoding = request.headers.get("Accept-Encoding", "")
+        encoding = (
+            "br"
+            if "br" in accept_encoding
+            else "gzip"
+            if "gzip" in accept_encoding
+            else None
+        )
+        if anonymous and encoding is not None:
+            body = self._compress(encoding, body)
+            headers["Content-Encoding"] = encoding
+        return Response(body, media_type=self.media_type, headers=headers)
+
+
+class PayloadCache:
+    """
+    Caches the `SplicedPayload`s of the `/` pages and `/config` of an app. Each
+    entry remembers the objects it was rendered from (e.g. the Blocks and its
+    config), and the whole cache is dropped once one of them has been replaced, as
+    the config is when the app is reloaded.
+    """
+
+    def __init__(self, max_size: int = 64):
+        self._entries: utils.LRUCache[tuple, tuple[tuple, SplicedPayload | None]] = (
+            utils.LRUCache(max_size)
+        )
+        self._lock = threading.Lock()
+
+    def get(
+        self,
+        key: tuple,
+        sources: tuple,
+        render: Callable[[], SplicedPayload | None],
+    ) -> SplicedPayload | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if len(entry[0]) == len(sources) and all(
+                    a is b for a, b in zip(entry[0], sources, strict=True)
+                ):
+                    return entry[1]
+                self._entries.clear()
+        payload = render()
+        with self._lock:
+            self._entries[key] = (sources, payload)
+        return payload
+
+
 def update_example_values_to_use_public_url(api_info: dict[str, Any]) -> dict[str, Any]:
     """
     Updates the example values in the api_info dictionary to use a public url
@@ -1029,10 +1397,20 @@ class CustomCORSMiddleware:
         headers.add_vary_header("Origin")
 
 
-def delete_files_created_by_app(blocks: Blocks, age: int | None) -> None:
-    """Delete files that are older than age. If age is None, delete all files."""
-    dont_delete = set()
+def delete_files_created_by_app(
+    blocks: Blocks, age: int | None, max_size: int | None = None
+) -> None:
+    """
+    Delete files that are older than age, then the least recently used files until
+    they take up at most max_size bytes. If age is None, delete all files.
+    """
+    if age is not None:
+        processing_utils.temp_file_index.evict(
+            age, max_size, owners=blocks.temp_file_sets
+        )
+        return
 
+    dont_delete = set()
     for component in blocks.blocks.values():
         dont_delete.update(getattr(component, "keep_in_cache", set()))
     for temp_set in blocks.temp_file_sets:
@@ -1043,25 +1421,22 @@ def delete_files_created_by_app(blocks: Blocks, age: int | None) -> None:
             if file in dont_delete:
                 continue
             try:
-                file_path = Path(file)
-                modified_time = datetime.fromtimestamp(file_path.lstat().st_ctime)
-                if (
-                    age is None
-                    or (datetime.now() - modified_time).total_seconds() > age
-                ):
-                    os.remove(file)
-                    to_remove.add(file)
+                os.remove(file)
             except FileNotFoundError:
-                continue
+                pass
+            to_remove.add(file)
+            processing_utils.temp_file_index.remove(file)
         temp_set -= to_remove
 
 
-async def delete_files_on_schedule(app: App, frequency: int, age: int) -> None:
+async def delete_files_on_schedule(
+    app: App, frequency: int, age: int, max_size: int | None = None
+) -> None:
     """Startup task to delete files created by the app based on time since last modification."""
     while True:
         await asyncio.sleep(frequency)
         await anyio.to_thread.run_sync(
-            delete_files_created_by_app, app.get_blocks(), age
+            delete_files_created_by_app, app.get_blocks(), age, max_size
         )
 
 
@@ -1081,25 +1456,34 @@ async def _cancel_background_task(task: asyncio.Task) -> None:
 
 @asynccontextmanager
 async def _lifespan_handler(
-    app: App, frequency: int = 1, age: int = 1
+    app: App, frequency: int = 1, age: int = 1, max_size: int | None = None
 ) -> AsyncGenerator:
     """A context manager that triggers the startup and shutdown events of the app."""
     # Keep the handle so the task can be cancelled below. It never finishes on
     # its own, and its pending `sleep` keeps it reachable from the event loop,
     # so not cancelling it leaves one `while True` task (and the `App` it closes
     # over) alive for the lifetime of the process on every launch.
-    task = asyncio.create_task(delete_files_on_schedule(app, frequency, age))
+    task = asyncio.create_task(delete_files_on_schedule(app, frequency, age, max_size))
+    temp_file_sets = app.get_blocks().temp_file_sets
+    if max_size is not None:
+        # Between scheduled runs, the budget is enforced as files are created
+        processing_utils.temp_file_index.set_max_size(temp_file_sets, max_size)
     try:
         yield
     finally:
         await _cancel_background_task(task)
+        if max_size is not None:
+            processing_utils.temp_file_index.set_max_size(temp_file_sets, None)
         delete_files_created_by_app(app.get_blocks(), age=None)
 
 
 async def _delete_state(app: App):
-    """Delete all expired state every second."""
+    """Delete all expired state and expired chunked uploads every second."""
+    from gradio.routes import chunked_uploads
+
     while True:
-        app.state_holder.delete_all_expired_state()
+        await app.state_holder.async_delete_all_expired_state()
+        chunked_uploads.discard_expired()
         await asyncio.sleep(1)
 
 
@@ -1117,6 +1501,7 @@ def create_lifespan_handler(
     user_lifespan: Callable[[App], AbstractAsyncContextManager] | None,
     frequency: int | None = 1,
     age: int | None = 1,
+    max_size: int | None = None,
 ) -> Callable[[App], AbstractAsyncContextManager]:
     """Return a context manager that applies _lifespan_handler and user_lifespan if it exists."""
 
@@ -1126,7 +1511,9 @@ def create_lifespan_handler(
         async with AsyncExitStack() as stack:
             await stack.enter_async_context(_delete_state_handler(app))
             if frequency and age:
-                await stack.enter_async_context(_lifespan_handler(app, frequency, age))
+                await stack.enter_async_context(
+                    _lifespan_handler(app, frequency, age, max_size)
+                )
             if user_lifespan is not None:
                 state = await stack.enter_async_context(user_lifespan(app))
             yield state
@@ -1156,6 +1543,35 @@ class MediaStream:
         self.ended = True
 
 
+class DisconnectAwareStreamingResponse(StreamingResponse):
+    """
+    A StreamingResponse that stops streaming as soon as the client disconnects, by
+    listening for `http.disconnect` on the ASGI receive channel. Starlette only does
+    this for servers that implement ASGI spec versions before 2.4; otherwise a
+    disconnect is only noticed the next time a write fails, which for an idle
+    stream is the next heartbeat.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            return await super().__call__(scope, receive, send)
+        async with anyio.create_task_group() as task_group:
+
+            async def wrap(func: Callable[[], Any]) -> None:
+                try:
+                    await func()
+                except OSError:
+                    # The client disconnected while a message was being written
+                    pass
+                task_group.cancel_scope.cancel()
+
+            task_group.start_soon(wrap, functools.partial(self.stream_response, send))
+            await wrap(functools.partial(self.listen_for_disconnect, receive))
+
+        if self.background is not None:
+            await self.background()
+
+
 def create_url_safe_hash(data: bytes, digest_size=8):
     """Create a URL-safe short hash of the data. Used to generate unique short deep links."""
     import base64
@@ -1402,6 +1818,7 @@ def file_fetch(
     request,
     blocks_or_config,
     upload_dir,
+    private: bool = False,
 ):
     # NOTE: http(s) URLs are intentionally NOT handled here. Previously this
     # returned a 302 redirect to the URL, which was an open redirect and — since
@@ -1431,6 +1848,7 @@ def file_fetch(
     if not allowed:
         raise HTTPException(403, f"File not allowed: {path_or_url}.")
 
+    processing_utils.temp_file_index.touch(str(abs_path))
     mime_type, _ = mimetypes.guess_type(abs_path)
     if mime_type in XSS_SAFE_MIMETYPES or reason == "allowed":
         media_type = mime_type or "application/octet-stream"
@@ -1439,34 +1857,153 @@ def file_fetch(
         media_type = "application/octet-stream"
         content_disposition_type = "attachment"
 
+    stat_result = os.stat(abs_path)
+    headers = file_cache_headers(
+        abs_path,
+        stat_result,
+        content_addressed_dirs=[upload_dir, str(utils.get_cache_folder())],
+        private=private,
+    )
+    if is_not_modified(request.headers, headers):
+        return Response(status_code=304, headers=headers)
+
     range_val = request.headers.get("Range", "").strip()
-    if range_val.startswith("bytes=") and "-" in range_val:
-        range_val = range_val[6:]
-        start, end = range_val.split("-")
-        if start.isnumeric() and end.isnumeric():
-            from gradio import ranged_response  # type: ignore
-
-            start = int(start)
-            end = int(end)
-            headers = dict(request.headers)
+    if_range = request.headers.get("If-Range")
+    if range_val and (if_range is None or if_range == headers["ETag"]):
+        from gradio import ranged_response  # type: ignore
+
+        ranges = ranged_response.parse_range_header(range_val, stat_result.st_size)
+        if ranges == []:
+            return Response(
+                status_code=416,
+                headers={"Content-Range": f"bytes */{stat_result.st_size}"},
+            )
+        if ranges:
             headers["Content-Disposition"] = content_disposition_type
             headers["Content-Type"] = media_type
+            headers["Accept-Ranges"] = "bytes"
             return ranged_response.RangedFileResponse(
                 abs_path,
-                ranged_response.OpenRange(start, end),
+                ranges,
                 headers,
-                stat_result=os.stat(abs_path),
+                media_type=media_type,
+                stat_result=stat_result,
+                method=request.method,
             )
 
     return FileResponse(
         abs_path,
-        headers={"Accept-Ranges": "bytes"},
+        headers={"Accept-Ranges": "bytes", **headers},
         content_disposition_type=content_disposition_type,
         media_type=media_type,
         filename=abs_path.name,
+        stat_result=stat_result,
     )
 
 
+CONTENT_HASH_REGEX = re.compile(r"^[0-9a-f]{64}$")
+
+
+def file_cache_headers(
+    path: Path,
+    stat_result: os.stat_result,
+    content_addressed_dirs: list[str],
+    private: bool = False,
+) -> dict[str, str]:
+    """
+    Returns the ETag, Last-Modified and Cache-Control headers for serving a file. Files
+    in the upload and cache folders are stored under the hash of their content
+    (`<sha256>/<name>`) and never change, so they get a strong ETag derived from that
+    hash and can be cached forever; other files get a weak ETag from their mtime and
+    size and must be revalidated.
+    """
+    headers = {"Last-Modified": formatdate(stat_result.st_mtime, usegmt=True)}
+    if CONTENT_HASH_REGEX.match(path.parent.name) and any(
+        utils.is_in_or_equal(path, directory) for directory in content_addressed_dirs
+    ):
+        # A hash directory can hold several files derived from the same content
+        # (e.g. an audio file converted to another format), so include the name.
+        name_hash = hashlib.sha256(path.name.encode("utf-8")).hexdigest()[:16]
+        headers["ETag"] = f'"{path.parent.name}-{name_hash}"'
+        headers["Cache-Control"] = (
+            f"{'private' if private else 'public'}, max-age=31536000, immutable"
+        )
+    else:
+        headers["ETag"] = f'W/"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"'
+        headers["Cache-Control"] = "no-cache"
+    return headers
+
+
+def is_not_modified(request_headers: Headers, response_headers: dict[str, str]) -> bool:
+    """Whether a conditional GET can be answered with a 304 Not Modified."""
+    if (if_none_match := request_headers.get("If-None-Match")) is not None:
+        etag = response_headers["ETag"].removeprefix("W/")
+        return any(
+            tag.strip() == "*" or tag.strip().removeprefix("W/") == etag
+            for tag in if_none_match.split(",")
+        )
+    if (if_modified_since := request_headers.get("If-Modified-Since")) is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+            modified = parsedate_to_datetime(response_headers["Last-Modified"])
+        except (TypeError, ValueError):
+            return False
+        return modified <= since
+    return False
+
+
+def upload_file_name(filename: str | None) -> str:
+    """
+    Returns the name under which an uploaded file called `filename` is saved. Raises
+    a 400 error if the name cannot be used.
+    """
+    if not filename:
+        return f"tmp{secrets.token_hex(5)}"
+    name = client_utils.strip_invalid_filename_characters(Path(filename).name)
+    try:
+        utils.safe_join(DeveloperPath("."), UserProvidedPath(name))
+    except InvalidPathError as err:
+        raise HTTPException(
+            status_code=400, detail=f"Invalid file name: {name}"
+        ) from err
+    return name
+
+
+def save_upload(
+    temp_path: str,
+    filename: str | None,
+    digest: str,
+    upload_dir: str,
+    force_move: bool = True,
+) -> tuple[str, bool]:
+    """
+    Moves an uploaded temp file to `upload_dir/<digest>/<filename>`. Returns the
+    destination and whether the file is in place: if the temp file cannot be renamed
+    (e.g. it is on another filesystem) and `force_move` is False, it is left for the
+    caller to move with `move_uploaded_files_to_cache`.
+    """
+    name = upload_file_name(filename)
+    directory = Path(upload_dir) / digest
+    directory.mkdir(exist_ok=True, parents=True)
+    dest = utils.safe_join(DeveloperPath(str(directory)), UserProvidedPath(name))
+    blob_index = processing_utils.blob_index
+    if blob_index.lookup(dest) == digest or (
+        not os.path.exists(dest) and blob_index.clone(digest, dest)
+    ):
+        # The same content has been uploaded before, so there is no need to
+        # move (or, across filesystems, copy) the temp file into place.
+        os.unlink(temp_path)
+    else:
+        try:
+            os.rename(temp_path, dest)
+        except OSError:
+            if not force_move:
+                return dest, False
+            shutil.move(temp_path, dest)
+    blob_index.record(dest, digest)
+    return dest, True
+
+
 async def upload_fn(
     request: StarletteRequest,
     upload_dir,
@@ -1501,32 +2038,17 @@ async def upload_fn(
     for temp_file in form.getlist("files"):
         if not isinstance(temp_file, GradioUploadFile):
             raise TypeError("File is not an instance of GradioUploadFile")
-        if temp_file.filename:
-            file_name = Path(temp_file.filename).name
-            name = client_utils.strip_invalid_filename_characters(file_name)
-        else:
-            name = f"tmp{secrets.token_hex(5)}"
-        directory = Path(upload_dir) / temp_file.sha.hexdigest()
-        directory.mkdir(exist_ok=True, parents=True)
-        try:
-            dest = utils.safe_join(
-                DeveloperPath(str(directory)), UserProvidedPath(name)
-            )
-        except InvalidPathError as err:
-            raise HTTPException(
-                status_code=400, detail=f"Invalid file name: {name}"
-            ) from err
         temp_file.file.close()
-        try:
-            os.rename(temp_file.file.name, dest)
-        except OSError:
-            if force_move:
-                import shutil
-
-                shutil.move(temp_file.file.name, dest)
-            else:
-                files_to_copy.append(temp_file.file.name)
-                locations.append(dest)
+        dest, moved = save_upload(
+            temp_file.file.name,
+            temp_file.filename,
+            temp_file.sha.hexdigest(),
+            upload_dir,
+            force_move=force_move,
+        )
+        if not moved:
+            files_to_copy.append(temp_file.file.name)
+            locations.append(dest)
         output_files.append(dest)
 
     return output_files, files_to_copy, locations
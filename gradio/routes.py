@@ -73,6 +73,7 @@ from gradio import (
 from gradio.brotli_middleware import BrotliMiddleware
 from gradio.context import Context
 from gradio.data_classes import (
+    BlocksConfigDict,
     CancelBody,
     ComponentServerBlobBody,
     ComponentServerJSONBody,
@@ -102,6 +103,7 @@ from gradio.route_utils import (  # noqa: F401
     STATIC_TEMPLATE_LIB,
     VERSION,
     XSS_SAFE_MIMETYPES,
+    ChunkedUploads,
     CustomCORSMiddleware,
     FileUploadProgress,
     FileUploadProgressNotQueuedError,
@@ -114,6 +116,7 @@ from gradio.route_utils import (  # noqa: F401
     favicon,
     file_fetch,
     file_response,
+    get_client_ip,
     move_uploaded_files_to_cache,
     register_media_mimetypes,
     routes_safe_join,
@@ -130,7 +133,7 @@ from gradio.server_messages import (
     ProcessGeneratingMessage,
     UnexpectedErrorMessage,
 )
-from gradio.state_holder import StateHolder
+from gradio.state_holder import SessionStore, StateHolder
 from gradio.themes import ThemeClass as Theme
 from gradio.utils import (
     cancel_tasks,
@@ -219,6 +222,7 @@ _proxy_transport = httpx.AsyncHTTPTransport(
 
 
 file_upload_statuses = FileUploadProgress()
+chunked_uploads = ChunkedUploads()
 
 
 class App(FastAPI):
@@ -254,6 +258,7 @@ class App(FastAPI):
         self._asyncio_tasks: list[asyncio.Task] = []
         self.auth_dependency = auth_dependency
         self.api_info = None
+        self.payload_cache = route_utils.PayloadCache()
         self.static_worker_pool = None  # Set by launch() when num_workers > 0
         self.all_app_info = None
         self._static_prefixes: tuple[
@@ -636,33 +641,36 @@ class App(FastAPI):
                 or request.scope.get("root_path")
                 or blocks.custom_mount_path,
             )
+            template = "frontend/share.html" if blocks.share else "frontend/index.html"
+            base_url = (
+                ("../../" if request.url.path.endswith("/") else "../")
+                if is_run_history
+                else "./"
+            )
             if (app.auth is None and app.auth_dependency is None) or user is not None:
-                config = utils.safe_deepcopy(blocks.config)
-                deep_link_state = "none"
-                components = [
-                    component
-                    for component in config["components"]
-                    if component["id"] in config["page"][page]["components"]
-                ]
-                if deep_link:
-                    components, deep_link_state = load_deep_link(
-                        deep_link,
-                        config,  # type: ignore
-                        page,
+                if not deep_link:
+                    gradio_api_info = api_info(request)
+                    payload = app.payload_cache.get(
+                        ("page", template, page, root, base_url),
+                        (blocks, blocks.config, gradio_api_info),
+                        lambda: route_utils.SplicedPayload.split(
+                            render_page(
+                                request,
+                                template,
+                                base_url,
+                                page_config(
+                                    blocks, page, root, route_utils.USERNAME_PLACEHOLDER
+                                ),
+                            ).body,
+                            toorjson(route_utils.USERNAME_PLACEHOLDER).encode(),
+                            "text/html",
+                        ),
                     )
-                config["username"] = user
-                config["deep_link_state"] = deep_link_state
-                config["components"] = components  # type: ignore
-                config["dependencies"] = [
-                    dependency
-                    for dependency in config.get("dependencies", [])
-                    if dependency["id"] in config["page"][page]["dependencies"]
-                ]
-                config["layout"] = config["page"][page]["layout"]
-                config["current_page"] = page
-                # Update root after loading the deep link state (if applicable)
-                # so that static files are served from the correct root
-                config = route_utils.update_root_in_config(config, root)
+                    if payload is not None:
+                        return payload.response(
+                            request, toorjson(user).encode(), anonymous=user is None
+                        )
+                config = page_config(blocks, page, root, user, deep_link)
             elif app.auth_dependency:
                 raise HTTPException(
                     status_code=status.HTTP_401_UNAUTHORIZED,
@@ -683,21 +691,56 @@ class App(FastAPI):
                     "dependencies": [],
                     "current_page": "",
                 }
+            return render_page(request, template, base_url, config)
 
-            try:
-                template = (
-                    "frontend/share.html" if blocks.share else "frontend/index.html"
+        def page_config(
+            blocks: gradio.Blocks,
+            page: str,
+            root: str,
+            user: str | None,
+            deep_link: str = "",
+        ) -> BlocksConfigDict:
+            config = utils.safe_deepcopy(blocks.config)
+            deep_link_state = "none"
+            components = [
+                component
+                for component in config["components"]
+                if component["id"] in config["page"][page]["components"]
+            ]
+            if deep_link:
+                components, deep_link_state = load_deep_link(
+                    deep_link,
+                    config,  # type: ignore
+                    page,
                 )
+            config["username"] = user
+            config["deep_link_state"] = deep_link_state
+            config["components"] = components  # type: ignore
+            config["dependencies"] = [
+                dependency
+                for dependency in config.get("dependencies", [])
+                if dependency["id"] in config["page"][page]["dependencies"]
+            ]
+            config["layout"] = config["page"][page]["layout"]
+            config["current_page"] = page
+            # Update root after loading the deep link state (if applicable)
+            # so that static files are served from the correct root
+            return route_utils.update_root_in_config(config, root)
+
+        def render_page(
+            request: fastapi.Request,
+            template: str,
+            base_url: str,
+            config: BlocksConfigDict | dict[str, Any],
+        ) -> HTMLResponse:
+            blocks = app.get_blocks()
+            try:
                 gradio_api_info = api_info(request)
                 resp = templates.TemplateResponse(
                     request=request,
                     name=template,
                     context={
-                        "base_url": (
-                            "../../" if request.url.path.endswith("/") else "../"
-                        )
-                        if is_run_history
-                        else "./",
+                        "base_url": base_url,
                         "config": config,
                         "gradio_api_info": gradio_api_info,
                     },
@@ -992,7 +1035,6 @@ class App(FastAPI):
             user: str = Depends(get_current_user),
             deep_link: str = "",
         ):
-            config = utils.safe_deepcopy(app.get_blocks().config)
             root = route_utils.get_root_url(
                 request=request,
                 route_path="/config",
@@ -1000,6 +1042,31 @@ class App(FastAPI):
                 or request.scope.get("root_path")
                 or blocks.custom_mount_path,
             )
+            if not deep_link:
+                current_blocks = app.get_blocks()
+                payload = app.payload_cache.get(
+                    ("config", root),
+                    (current_blocks, current_blocks.config),
+                    lambda: route_utils.SplicedPayload.split(
+                        ORJSONResponse._render(
+                            full_config(root, route_utils.USERNAME_PLACEHOLDER)
+                        ),
+                        ORJSONResponse._render(route_utils.USERNAME_PLACEHOLDER),
+                        "application/json",
+                    ),
+                )
+                if payload is not None:
+                    return payload.response(
+                        request,
+                        ORJSONResponse._render(user),
+                        anonymous=user is None,
+                    )
+            return ORJSONResponse(content=full_config(root, user, deep_link))
+
+        def full_config(
+            root: str, user: str | None, deep_link: str = ""
+        ) -> BlocksConfigDict:
+            config = utils.safe_deepcopy(app.get_blocks().config)
             config["username"] = user
             if deep_link:
                 components, deep_link_state = load_deep_link(deep_link, config, page="")  # type: ignore
@@ -1009,8 +1076,7 @@ class App(FastAPI):
                 config["i18n_translations"] = blocks.i18n_instance.translations_dict
             else:
                 config["i18n_translations"] = None
-            config = route_utils.update_root_in_config(config, root)
-            return ORJSONResponse(content=config)
+            return route_utils.update_root_in_config(config, root)
 
         @app.get("/static/{path:path}")
         async def static_resource(path: str):
@@ -1123,7 +1189,13 @@ class App(FastAPI):
             if client_utils.is_http_url_like(path_or_url):
                 return await secure_url_stream_response(path_or_url, request)
             blocks = app.get_blocks()
-            return file_fetch(path_or_url, request, blocks, app.uploaded_file_dir)
+            return file_fetch(
+                path_or_url,
+                request,
+                blocks,
+                app.uploaded_file_dir,
+                private=app.auth is not None or app.auth_dependency is not None,
+            )
 
         @router.post("/stream/{event_id}")
         async def _(event_id: str, body: PredictBody, request: fastapi.Request):
@@ -1508,7 +1580,6 @@ class App(FastAPI):
         )
         @router.get("/call/{api_name}/{event_id}", dependencies=[Depends(login_check)])
         async def simple_predict_get(
-            request: fastapi.Request,
             event_id: str,
         ):
             def process_msg(message: EventMessage) -> str | None:
@@ -1552,60 +1623,54 @@ class App(FastAPI):
                     ),
                     event_id,
                 )
-            return await queue_data_helper(request, session_hash, process_msg)
+            return await queue_data_helper(session_hash, process_msg)
 
         @router.get("/queue/data", dependencies=[Depends(login_check)])
         async def queue_data(
             request: fastapi.Request,
             session_hash: str,
         ):
+            if route_utils.accepts_msgpack_stream(request):
+                return await queue_data_helper(
+                    session_hash,
+                    route_utils.msgpack_frame,
+                    media_type=client_utils.MSGPACK_STREAM_MEDIA_TYPE,
+                )
+
             def process_msg(message: EventMessage) -> str:
                 return f"data: {orjson.dumps(message.model_dump(), default=str).decode('utf-8')}\n\n"
 
-            return await queue_data_helper(request, session_hash, process_msg)
+            return await queue_data_helper(session_hash, process_msg)
 
         async def queue_data_helper(
-            request: fastapi.Request,
             session_hash: str,
-            process_msg: Callable[[EventMessage], str | None],
+            process_msg: Callable[[EventMessage], str | bytes | None],
+            media_type: str = "text/event-stream",
         ):
             blocks = app.get_blocks()
-            heartbeat_rate = utils.get_heartbeat_rate()
-
-            async def heartbeat():
-                while blocks.is_running:
-                    await asyncio.sleep(heartbeat_rate)
-                    # It's possible the event has finished by the time
-                    # the heartbeat wakes up
-                    queue = blocks._queue.pending_messages_per_session.get(session_hash)
-                    if queue:
-                        await queue.put(HeartbeatMessage())
 
-            async def sse_stream(request: fastapi.Request):
-                heartbeat_task = asyncio.create_task(heartbeat())
+            # Disconnects are detected by `DisconnectAwareStreamingResponse`, which
+            # cancels this generator, and heartbeats are sent by the queue's
+            # `HeartbeatWheel`, so the loop only has to wait for the next message.
+            async def sse_stream():
+                messages = None
+                heartbeat = None
                 try:
                     while True:
-                        if await request.is_disconnected():
-                            await blocks._queue.clean_events(session_hash=session_hash)
-                            heartbeat_task.cancel()
-                            return
-
-                        if (
+                        current = blocks._queue.pending_messages_per_session.get(
                             session_hash
-                            not in blocks._queue.pending_messages_per_session
-                        ):
+                        )
+                        if current is None:
                             raise HTTPException(
                                 status_code=status.HTTP_404_NOT_FOUND,
                             )
+                        if current is not messages:
+                            if heartbeat is not None:
+                                blocks._queue.heartbeats.remove(heartbeat)
+                            messages = current
+                            heartbeat = blocks._queue.heartbeats.add(messages)
 
-                        message = None
-                        try:
-                            messages = blocks._queue.pending_messages_per_session[
-                                session_hash
-                            ]
-                            message = await asyncio.wait_for(messages.get(), timeout=10)
-                        except (TimeoutError, asyncio.TimeoutError):
-                            pass
+                        message = await messages.get()
 
                         if blocks._queue.stopped:
                             message = UnexpectedErrorMessage(
@@ -1649,25 +1714,30 @@ class App(FastAPI):
                                     response = process_msg(message)
                                     if response is not None:
                                         yield response
-                                    heartbeat_task.cancel()
                                     return
-                except BaseException as e:
+                except asyncio.CancelledError:
+                    # The client disconnected, so there is no one left to send an
+                    # error to: only clean up, shielded from the cancellation
+                    blocks._queue.pending_messages_per_session.pop(session_hash, None)
+                    with anyio.CancelScope(shield=True):
+                        await blocks._queue.clean_events(session_hash=session_hash)
+                    raise
+                except Exception as e:
                     message = UnexpectedErrorMessage(
                         message=str(e),
                         session_not_found=isinstance(e, HTTPException),
                     )
                     response = process_msg(message)
-                    if isinstance(e, asyncio.CancelledError):
-                        del blocks._queue.pending_messages_per_session[session_hash]
-                        await blocks._queue.clean_events(session_hash=session_hash)
                     if response is not None:
                         yield response
-                    heartbeat_task.cancel()
                     raise e
+                finally:
+                    if heartbeat is not None:
+                        blocks._queue.heartbeats.remove(heartbeat)
 
-            return StreamingResponse(
-                sse_stream(request),
-                media_type="text/event-stream",
+            return route_utils.DisconnectAwareStreamingResponse(
+                sse_stream(),
+                media_type=media_type,
             )
 
         async def get_item_or_file(
@@ -1884,6 +1954,66 @@ class App(FastAPI):
 
             return output_files
 
+        def max_file_size() -> int | float:
+            return (
+                blocks.max_file_size if blocks.max_file_size is not None else math.inf
+            )
+
+        @router.post("/upload/init", dependencies=[Depends(login_check)])
+        async def init_chunked_upload(
+            request: fastapi.Request,
+            filename: str | None = None,
+            size: int | None = None,
+            upload_id: str | None = None,
+        ):
+            """Starts a resumable upload, whose content is sent with PUT /upload/{upload_token}."""
+            upload_token = chunked_uploads.start(
+                filename,
+                size,
+                max_file_size(),
+                upload_id,
+                upload_progress=file_upload_statuses if upload_id else None,
+                client=get_client_ip(request),
+            )
+            return {"upload_token": upload_token, "offset": 0}
+
+        @router.get("/upload/{upload_token}", dependencies=[Depends(login_check)])
+        async def get_chunked_upload_offset(upload_token: str):
+            """Returns the offset from which an interrupted upload can be resumed."""
+            return {"offset": chunked_uploads.offset(upload_token)}
+
+        @router.put("/upload/{upload_token}", dependencies=[Depends(login_check)])
+        async def upload_chunk(
+            upload_token: str, request: fastapi.Request, offset: int = 0
+        ):
+            offset = await chunked_uploads.write(
+                upload_token,
+                offset,
+                request.stream(),
+                max_file_size(),
+                upload_progress=file_upload_statuses,
+            )
+            return {"offset": offset}
+
+        @router.post(
+            "/upload/{upload_token}/finalize", dependencies=[Depends(login_check)]
+        )
+        async def finalize_chunked_upload(upload_token: str, bg_tasks: BackgroundTasks):
+            dest, file_to_copy = await chunked_uploads.finish(
+                upload_token,
+                app.uploaded_file_dir,
+                upload_progress=file_upload_statuses,
+            )
+            if file_to_copy:
+                bg_tasks.add_task(move_uploaded_files_to_cache, [file_to_copy], [dest])
+            blocks.upload_file_set.add(dest)
+            return [dest]
+
+        @router.delete("/upload/{upload_token}", dependencies=[Depends(login_check)])
+        async def abort_chunked_upload(upload_token: str):
+            chunked_uploads.abort(upload_token)
+            return {"success": True}
+
         @router.get("/startup-events")
         async def startup_events():
             if not app.startup_events_triggered:
@@ -2578,6 +2708,7 @@ def mount_gradio_app(
     js: str | Literal[True] | None = None,
     head: str | None = None,
     head_paths: str | Path | Sequence[str | Path] | None = None,
+    session_store: SessionStore | str | Path | None = None,
 ) -> fastapi.FastAPI:
     """Mount a gradio.Blocks to an existing FastAPI application.
 
@@ -2610,6 +2741,7 @@ def mount_gradio_app(
         js: Custom js as a code string. The custom js should be in the form of a single js function. This function will automatically be executed when the page loads. For more flexibility, use the head parameter to insert js inside <script> tags.
         head: Custom html code to insert into the head of the demo webpage. This can be used to add custom meta tags, multiple scripts, stylesheets, etc. to the page.
         head_paths: Custom html code as a pathlib.Path to a html file or a list of such paths. This html files will be read, concatenated, and included in the head of the demo webpage. If the `head` parameter is also set, the html from `head` will be included first.
+        session_store: Where to also keep the values of gradio.State for each session, so that they survive restarts of the server and are shared between the processes serving the app (e.g. several uvicorn workers). Can be the path to a SQLite database file, or a `gradio.state_holder.SessionStore` instance. Values are pickled. Can be set by environment variable GRADIO_SESSION_STORE. If None, sessions are only kept in the memory of the process.
     Example:
         from fastapi import FastAPI
         import gradio as gr
@@ -2667,6 +2799,7 @@ def mount_gradio_app(
     blocks.allowed_paths = allowed_paths or []
     blocks.blocked_paths = blocked_paths or []
     blocks.show_error = show_error
+    blocks.session_store = session_store
 
     if not isinstance(blocks.allowed_paths, list):
         raise ValueError("`allowed_paths` must be a list of directories.")
@@ -13,6 +13,7 @@ from gradio_client.documentation import document
 from gradio import mcp
 from gradio.i18n import I18n
 from gradio.routes import App
+from gradio.state_holder import SessionStore
 from gradio.themes import ThemeClass as Theme
 
 
@@ -188,6 +189,8 @@ class Server(App):
         queue: bool = True,
         batch: bool = False,
         max_batch_size: int = 4,
+        batch_wait_ms: float = 0,
+        queue_priority: int = 0,
         api_visibility: Literal["public", "private", "undocumented"] = "public",
         time_limit: int | None = None,
         stream_every: float = 0.5,
@@ -204,6 +207,8 @@ class Server(App):
             "queue": queue,
             "batch": batch,
             "max_batch_size": max_batch_size,
+            "batch_wait_ms": batch_wait_ms,
+            "queue_priority": queue_priority,
             "api_visibility": api_visibility,
             "time_limit": time_limit,
             "stream_every": stream_every,
@@ -252,6 +257,7 @@ class Server(App):
         root_path: str | None = None,
         app_kwargs: dict[str, Any] | None = None,
         state_session_capacity: int = 10000,
+        session_store: SessionStore | str | Path | None = None,
         share_server_address: str | None = None,
         share_server_protocol: Literal["http", "https"] | None = None,
         share_server_tls_certificate: str | None = None,
@@ -319,6 +325,7 @@ class Server(App):
             root_path=root_path,
             app_kwargs=app_kwargs,
             state_session_capacity=state_session_capacity,
+            session_store=session_store,
             share_server_address=share_server_address,
             share_server_protocol=share_server_protocol,
             share_server_tls_certificate=share_server_tls_certificate,
@@ -1,29 +1,201 @@
 from __future__ import annotations
 
 import datetime
+import hashlib
 import os
+import pickle
+import sqlite3
 import threading
+import time
+import warnings
 from collections import OrderedDict
-from collections.abc import Iterator
+from collections.abc import Iterator, MutableMapping
 from copy import copy, deepcopy
+from pathlib import Path
 from typing import TYPE_CHECKING, Any
 
+import anyio
+
+from gradio.caching import state_fingerprint
+
 if TYPE_CHECKING:
-    from gradio.blocks import Blocks
+    from gradio.blocks import Block, Blocks, BlocksConfig
     from gradio.components import State
 
 
+class SessionStore:
+    """
+    Where the values of the gr.State components of each session are kept outside of
+    the memory of the process. Sessions are stored as opaque bytes, along with a
+    version number that is incremented every time a session is saved, so that a
+    process can tell whether its copy of a session is out of date, and cannot
+    overwrite a session that another process saved after it last loaded it.
+    Subclass it to keep sessions in another database, e.g. Redis.
+    """
+
+    shared = True
+
+    def version(self, session_id: str) -> int | None:
+        """Returns the version of the stored session, or None if it is not stored."""
+        raise NotImplementedError()
+
+    def load(self, session_id: str) -> tuple[int, bytes] | None:
+        """Returns the version and the data of the stored session, if it is stored."""
+        raise NotImplementedError()
+
+    def save(self, session_id: str, data: bytes, version: int | None) -> int | None:
+        """
+        Stores the data of a session if its stored version is still `version` (None
+        if the session was not stored), and returns its new version. Returns None
+        without storing anything if another process has saved the session since.
+        """
+        raise NotImplementedError()
+
+    def trim(self, capacity: int) -> None:
+        """Deletes the least recently saved sessions, keeping at most `capacity`."""
+        raise NotImplementedError()
+
+
+class InMemorySessionStore(SessionStore):
+    """The default store, which keeps sessions in the memory of the process only."""
+
+    shared = False
+
+    def version(self, session_id: str) -> int | None:  # noqa: ARG002
+        return None
+
+    def load(self, session_id: str) -> tuple[int, bytes] | None:  # noqa: ARG002
+        return None
+
+    def save(
+        self,
+        session_id: str,  # noqa: ARG002
+        data: bytes,  # noqa: ARG002
+        version: int | None,
+    ) -> int | None:
+        return (version or 0) + 1
+
+    def trim(self, capacity: int) -> None:  # noqa: ARG002
+        pass
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    Stores sessions in a SQLite database file, so that they survive restarts of the
+    server and are shared between the processes (e.g. uvicorn workers) that use the
+    same file. State values are pickled, so the file must only be writable by the app.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = str(path)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            self.path, check_same_thread=False, isolation_level=None, timeout=30
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS sessions (session_id TEXT PRIMARY KEY, "
+            "version INTEGER NOT NULL, saved_at REAL NOT NULL, data BLOB NOT NULL)"
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS sessions_saved_at ON sessions (saved_at)"
+        )
+
+    def version(self, session_id: str) -> int | None:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT version FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        return None if row is None else row[0]
+
+    def load(self, session_id: str) -> tuple[int, bytes] | None:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT version, data FROM sessions WHERE session_id = ?",
+                (session_id,),
+            ).fetchone()
+        return None if row is None else (row[0], row[1])
+
+    def save(self, session_id: str, data: bytes, version: int | None) -> int | None:
+        with self._lock:
+            if version is None:
+                cursor = self._connection.execute(
+                    "INSERT OR IGNORE INTO sessions VALUES (?, 1, ?, ?)",
+                    (session_id, time.time(), data),
+                )
+            else:
+                cursor = self._connection.execute(
+                    "UPDATE sessions SET version = version + 1, saved_at = ?, "
+                    "data = ? WHERE session_id = ? AND version = ?",
+                    (time.time(), data, session_id, version),
+                )
+        if cursor.rowcount != 1:
+            return None
+        return 1 if version is None else version + 1
+
+    def trim(self, capacity: int) -> None:
+        with self._lock:
+            self._connection.execute(
+                "DELETE FROM sessions WHERE session_id IN (SELECT session_id FROM "
+                "sessions ORDER BY saved_at DESC LIMIT -1 OFFSET ?)",
+                (capacity,),
+            )
+
+
+def get_session_store(store: SessionStore | str | Path | None) -> SessionStore:
+    """
+    Returns the session store to use for `store`, which is either a store, a path to a
+    SQLite database file, or None to use the GRADIO_SESSION_STORE environment variable,
+    if it is set, or else to keep sessions in memory.
+    """
+    if store is None:
+        store = os.environ.get("GRADIO_SESSION_STORE") or None
+    if store is None:
+        return InMemorySessionStore()
+    if isinstance(store, (str, Path)):
+        return SQLiteSessionStore(store)
+    return store
+
+
+def app_fingerprint(blocks: Blocks) -> str:
+    """
+    Identifies the layout of an app, so that the gr.State values saved by another
+    version of the app, whose component ids may refer to other components, are not
+    loaded into the wrong gr.State.
+    """
+    layout = sorted((_id, type(block).__name__) for _id, block in blocks.blocks.items())
+    return hashlib.sha256(repr(layout).encode()).hexdigest()
+
+
+# The value of a gr.State and when it was set, or None if the value could not be
+# pickled by the process that saved it
+StateEntry = tuple[Any, Any] | None
+
+# The values of the gr.State components of a session that were saved or loaded, and
+# their `state_fingerprint()`s
+StoredState = tuple[dict[int, StateEntry], dict[int, bytes]]
+
+
 class StateHolder:
     def __init__(self):
         self.capacity = 10000
         self.session_data: OrderedDict[str, SessionState] = OrderedDict()
         self.time_last_used: dict[str, datetime.datetime] = {}
         self.lock = threading.Lock()
+        self.store: SessionStore = InMemorySessionStore()
+        self.fingerprint = ""
+        # Deleting the least recently saved sessions from the store takes a write,
+        # so it is done at most every `trim_interval` seconds
+        self.trim_interval = 60.0
+        self._last_trim: float | None = None
 
     def set_blocks(self, blocks: Blocks):
         self.blocks = blocks
         blocks.state_holder = self
         self.capacity = blocks.state_session_capacity
+        self.store = get_session_store(blocks.session_store)
+        self.fingerprint = app_fingerprint(blocks)
 
     def __getitem__(self, session_id: str) -> SessionState:
         if session_id not in self.session_data:
@@ -35,6 +207,170 @@ class StateHolder:
     def __contains__(self, session_id: str):
         return session_id in self.session_data
 
+    async def async_refresh(self, session_id: str):
+        """Loads the state of a session from the store, in a worker thread, if it has been saved since this process last loaded or saved it."""
+        if not self.store.shared:
+            return
+        session_state = self[session_id]
+        stored = await anyio.to_thread.run_sync(
+            self._fetch, session_id, session_state.store_version
+        )
+        self._loaded(session_state, stored)
+
+    async def async_save(self, session_id: str):
+        """
+        Saves the state of a session to the store, in a worker thread, if it has
+        changed: a value that was set or deleted, or that was read during an event
+        and has a different `state_fingerprint()` than when it was last saved or
+        loaded (i.e. it was mutated in place).
+        """
+        session_state = self.session_data.get(session_id)
+        if not self.store.shared or session_state is None or not session_state.dirty:
+            return
+        entries, changed, read = session_state.snapshot_state()
+        try:
+            saved = await anyio.to_thread.run_sync(
+                self._write,
+                session_id,
+                session_state.store_version,
+                entries,
+                changed,
+                read,
+                dict(session_state.stored_fingerprints),
+            )
+        except BaseException:
+            session_state.changed |= changed
+            session_state.read |= read
+            raise
+        if saved is not None:
+            self._saved(session_state, *saved)
+
+    def _fetch(
+        self, session_id: str, known_version: int | None
+    ) -> tuple[int, StoredState | None] | None:
+        version = self.store.version(session_id)
+        if version is None or version == known_version:
+            return None
+        stored = self.store.load(session_id)
+        if stored is None:
+            return None
+        entries = self._decode(stored[1])
+        return stored[0], None if entries is None else self._fingerprinted(entries)
+
+    @staticmethod
+    def _fingerprinted(entries: dict[int, StateEntry]) -> StoredState:
+        return entries, {
+            key: state_fingerprint(entry[0])
+            for key, entry in entries.items()
+            if entry is not None
+        }
+
+    def _loaded(
+        self,
+        session_state: SessionState,
+        stored: tuple[int, StoredState | None] | None,
+    ):
+        if stored is None:
+            return
+        session_state.store_version, loaded = stored
+        if loaded is not None:
+            session_state.load_state(*loaded)
+
+    def _write(
+        self,
+        session_id: str,
+        version: int | None,
+        entries: dict[int, StateEntry],
+        changed: set[int],
+        read: set[int],
+        stored_fingerprints: dict[int, bytes],
+    ) -> tuple[int, dict[int, bytes], StoredState | None] | None:
+        """
+        Saves `entries` if any of them changed, unless another process has saved the
+        session since `version`, in which case its values are merged with those that
+        changed, and saved instead. Returns None if nothing changed, and otherwise the
+        new version, the fingerprints of the saved values that changed, and the
+        merged values, if they were merged.
+        """
+        fingerprints = {
+            key: state_fingerprint(entry[0])
+            for key in changed | read
+            if (entry := entries.get(key)) is not None
+        }
+        changed = changed | {
+            key
+            for key in read
+            if key in fingerprints and fingerprints[key] != stored_fingerprints.get(key)
+        }
+        if not changed:
+            return None
+        merged = None
+        while True:
+            new_version = self.store.save(session_id, self._encode(entries), version)
+            if new_version is not None:
+                return (
+                    new_version,
+                    {key: fingerprints[key] for key in changed if key in fingerprints},
+                    None if merged is None else self._fingerprinted(merged),
+                )
+            stored = self.store.load(session_id)
+            version, theirs = (
+                (None, {}) if stored is None else (stored[0], self._decode(stored[1]))
+            )
+            merged = {
+                key: entry
+                for key, entry in (theirs or {}).items()
+                if key not in changed
+            }
+            merged.update({key: entries[key] for key in changed if key in entries})
+            entries = merged
+
+    def _saved(
+        self,
+        session_state: SessionState,
+        version: int,
+        fingerprints: dict[int, bytes],
+        merged: StoredState | None,
+    ):
+        # Saves of the same session may complete out of order
+        if session_state.store_version is None or version > session_state.store_version:
+            session_state.store_version = version
+        session_state.stored_fingerprints.update(fingerprints)
+        if merged is not None:
+            session_state.load_state(*merged)
+
+    def _encode(self, entries: dict[int, StateEntry]) -> bytes:
+        pickled: dict[int, bytes | None] = {}
+        for key, entry in entries.items():
+            try:
+                pickled[key] = None if entry is None else pickle.dumps(entry)
+            except Exception as e:
+                pickled[key] = None
+                warnings.warn(
+                    f"The value of the gr.State with id {key} cannot be pickled, so it "
+                    f"is not saved to the session store: {e}"
+                )
+        return pickle.dumps((self.fingerprint, pickled))
+
+    def _decode(self, data: bytes) -> dict[int, StateEntry] | None:
+        """Returns the values saved in `data`, or None if they were saved by another version of the app."""
+        try:
+            fingerprint, pickled = pickle.loads(data)
+        except Exception:
+            return None
+        if fingerprint != self.fingerprint:
+            return None
+        entries: dict[int, StateEntry] = {}
+        for key, entry in pickled.items():
+            try:
+                entries[key] = None if entry is None else pickle.loads(entry)
+            except Exception as e:
+                entries[key] = None
+                warnings.warn(
+                    f"The value of the gr.State with id {key} could not be loaded from the session store: {e}"
+                )
+        return entries
+
     def update(self, session_id: str):
         with self.lock:
             if session_id in self.session_data:
@@ -45,13 +381,28 @@ class StateHolder:
 
     def delete_all_expired_state(
         self,
-    ):
-        for session_id in list(self.session_data):
-            self.delete_state(session_id, expired_only=True)
+    ) -> list[str]:
+        """Deletes the expired gr.State values of every session, and returns the ids of the sessions that had some."""
+        return [
+            session_id
+            for session_id in list(self.session_data)
+            if self.delete_state(session_id, expired_only=True)
+        ]
+
+    async def async_delete_all_expired_state(self):
+        """Same as `delete_all_expired_state()`, but also removes the deleted values and (every `trim_interval` seconds) the least recently saved sessions from the store."""
+        for session_id in self.delete_all_expired_state():
+            await self.async_save(session_id)
+        now = time.monotonic()
+        if self.store.shared and (
+            self._last_trim is None or now - self._last_trim >= self.trim_interval
+        ):
+            self._last_trim = now
+            await anyio.to_thread.run_sync(self.store.trim, self.capacity)
 
-    def delete_state(self, session_id: str, expired_only: bool = False):
+    def delete_state(self, session_id: str, expired_only: bool = False) -> bool:
         if session_id not in self.session_data:
-            return
+            return False
         to_delete = []
         session_state = self.session_data[session_id]
         for component, value, expired in session_state.state_components:
@@ -60,20 +411,76 @@ class StateHolder:
                 to_delete.append(component._id)
         for component in to_delete:
             del session_state.state_data[component]
+            session_state.stored_fingerprints.pop(component, None)
+        session_state.changed.update(to_delete)
+        return bool(to_delete)
+
+
+class SessionConfigValues(MutableMapping[int, dict]):
+    """
+    The config of every block in a session, copy-on-write. Until a session modifies a
+    block, reading its config returns the config shared by all sessions, which must
+    not be mutated; `materialize()` returns a copy private to this session instead.
+    """
+
+    def __init__(self, base: BlocksConfig):
+        self.base = base
+        self.shared_blocks = base.blocks
+        self.own: dict[int, dict] = {}
+
+    def __getitem__(self, key: int) -> dict:
+        if key in self.own:
+            return self.own[key]
+        if key in self.shared_blocks:
+            return self.base.shared_config_for_block(key)
+        raise KeyError(key)
+
+    def __setitem__(self, key: int, value: dict):
+        self.own[key] = value
+
+    def __delitem__(self, key: int):
+        raise TypeError("Block configs cannot be removed from a session")
+
+    def __contains__(self, key: object) -> bool:
+        return key in self.own or key in self.shared_blocks
+
+    def __iter__(self) -> Iterator[int]:
+        yield from self.shared_blocks
+        for key in self.own:
+            if key not in self.shared_blocks:
+                yield key
+
+    def __len__(self) -> int:
+        return len(self.shared_blocks) + sum(
+            key not in self.shared_blocks for key in self.own
+        )
+
+    def materialize(self, key: int) -> dict:
+        if key not in self.own:
+            config = self[key]
+            config = {**config}
+            if "props" in config:
+                config["props"] = {**config["props"]}
+            self.own[key] = config
+        return self.own[key]
 
 
 class SessionState:
     def __init__(self, blocks: Blocks):
         self.blocks_config = copy(blocks.default_config)
-        # Keep a separate deep copy of the config so we can recreate
-        # the state for deep links
-        self.config_values = {
-            k: self.blocks_config.config_for_block(k, [], v)
-            for k, v in self.blocks_config.blocks.items()
-            if k in blocks.blocks
-        }
+        # Keep a separate copy of the config so we can recreate the state for deep
+        # links. It is shared with the app until the session modifies a block.
+        self.config_values = SessionConfigValues(blocks.default_config)
         self.state_data: dict[int, Any] = {}
         self._state_ttl = {}
+        # The ids of the gr.State values that were set or deleted, and of those that
+        # were read (and so may have been mutated in place), since the session was
+        # last saved to the session store; the version that was saved or loaded; and
+        # the `state_fingerprint()`s of the values that were saved or loaded
+        self.changed: set[int] = set()
+        self.read: set[int] = set()
+        self.store_version: int | None = None
+        self.stored_fingerprints: dict[int, bytes] = {}
         self.is_closed = False
         # When a session is closed, the state is stored for an hour to give the user time to reopen the session.
         # During testing we set to a lower value to be able to test
@@ -84,6 +491,7 @@ class SessionState:
     def __getitem__(self, key: int) -> Any:
         block = self.blocks_config.blocks[key]
         if block.stateful:
+            self.read.add(key)
             if key not in self.state_data:
                 value = getattr(block, "value", None)
                 if callable(value):
@@ -108,6 +516,7 @@ class SessionState:
                 datetime.datetime.now(),
             )
             self.state_data[key] = value
+            self.changed.add(key)
         else:
             self.blocks_config.blocks[key] = value
         if block:
@@ -115,19 +524,81 @@ class SessionState:
                 key, [], block
             )
 
+    @property
+    def dirty(self) -> bool:
+        return bool(self.changed or self.read)
+
+    def snapshot_state(self) -> tuple[dict[int, StateEntry], set[int], set[int]]:
+        """
+        Returns the values of the gr.State components of the session, along with when
+        they were set, and the ids of those that were set or deleted and of those that
+        were read since the last snapshot.
+        """
+        entries: dict[int, StateEntry] = {
+            key: (value, self._state_ttl.get(key))
+            for key, value in self.state_data.items()
+        }
+        changed, self.changed = self.changed, set()
+        read, self.read = self.read, set()
+        return entries, changed, read
+
+    def load_state(
+        self, entries: dict[int, StateEntry], fingerprints: dict[int, bytes]
+    ):
+        """
+        Replaces the values of the gr.State components with those saved by another
+        process, except those that changed in this process and were not saved yet.
+        """
+        from gradio.components import State
+
+        for key in list(self.state_data):
+            if key not in entries and key not in self.changed:
+                # e.g. the state has expired and been deleted by another process
+                del self.state_data[key]
+                self._state_ttl.pop(key, None)
+                self.stored_fingerprints.pop(key, None)
+        for key, entry in entries.items():
+            if (
+                entry is None
+                or key in self.changed
+                or not isinstance(self.blocks_config.blocks.get(key), State)
+            ):
+                continue
+            value, ttl = entry
+            self.state_data[key] = value
+            if ttl is not None:
+                self._state_ttl[key] = ttl
+            if key in fingerprints:
+                self.stored_fingerprints[key] = fingerprints[key]
+
     def _update_config(self, key: int):
         if self[key] is not None:
             self.config_values[key] = self.blocks_config.config_for_block(
                 key, [], self[key]
             )
 
+    def _patch_props(self, key: int, block: Block, props: dict[str, Any]):
+        """
+        Replaces the block at `key` with `block`, a copy of it that only differs in
+        `props`, and updates just those props in the session config.
+        """
+        self.blocks_config.blocks[key] = block
+        config = self.config_values.get(key)
+        if not config or "props" not in config:
+            self.config_values[key] = self.blocks_config.config_for_block(
+                key, [], block
+            )
+            return
+        config = self.config_values.materialize(key)
+        config["props"].update(props)
+
     def _update_value_in_config(self, key: int, value: Any):
         if key not in self.config_values:
             self.config_values[key] = self.blocks_config.config_for_block(
                 key, [], self.blocks_config.blocks[key]
             )
         if "props" in self.config_values[key]:
-            self.config_values[key]["props"]["value"] = value
+            self.config_values.materialize(key)["props"]["value"] = value
 
     def __contains__(self, key: int):
         block = self.blocks_config.blocks.get(key)
@@ -140,7 +611,7 @@ class SessionState:
 
     @property
     def components(self) -> Iterator[dict]:
-        for _, config in self.config_values.items():
+        for config in self.config_values.values():
             if config:
                 yield config
 
@@ -11,7 +11,9 @@ class CapacityLimiter:
     def __init__(self, total_tokens: float): ...
     async def acquire(self) -> None: ...
     async def acquire_nowait(self) -> None: ...
+    async def acquire_on_behalf_of(self, borrower: object) -> None: ...
     def release(self) -> None: ...
+    def release_on_behalf_of(self, borrower: object) -> None: ...
     @property
     def total_tokens(self) -> float: ...
     @property
@@ -33,6 +35,14 @@ class to_thread:
         limiter: Optional[CapacityLimiter] = None,
         **kwargs: Any,
     ) -> Coroutine[Any, Any, T]: ...
+    @staticmethod
+    def current_default_thread_limiter() -> CapacityLimiter: ...
+
+class from_thread:
+    @staticmethod
+    def run(func: Callable[..., Coroutine[Any, Any, T]], *args: Any) -> T: ...
+    @staticmethod
+    def run_sync(func: Callable[..., T], *args: Any) -> T: ...
 
 @overload
 def run(
@@ -55,7 +65,19 @@ def current_time() -> float: ...
 def get_cancelled_exc_class() -> type[BaseException]: ...
 def create_task_group() -> TaskGroup: ...
 
+class CancelScope:
+    def __init__(self, *, deadline: float = ..., shield: bool = False): ...
+    def cancel(self) -> None: ...
+    def __enter__(self) -> CancelScope: ...
+    def __exit__(
+        self,
+        exc_type: Optional[type],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[TracebackType],
+    ) -> bool: ...
+
 class TaskGroup:
+    cancel_scope: CancelScope
     async def __aenter__(self) -> TaskGroup: ...
     async def __aexit__(
         self,
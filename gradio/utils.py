@@ -4,12 +4,12 @@ import asyncio
 import copy
 import dataclasses
 import functools
-import hashlib
 import importlib
 import importlib.metadata
 import importlib.resources
 import inspect
 import json
+import math
 import os
 import pkgutil
 import posixpath
@@ -30,13 +30,13 @@ from abc import ABC, abstractmethod
 from collections import OrderedDict
 from collections.abc import (
     Callable,
-    Hashable,
     Iterable,
     Iterator,
     MutableMapping,
     Sequence,
 )
 from contextlib import contextmanager
+from contextvars import ContextVar
 from functools import wraps
 from io import BytesIO
 from pathlib import Path
@@ -180,6 +180,7 @@ class BaseReloader(ABC):
         demo.pending_diff_streams = self.running_app.blocks.pending_diff_streams
         demo.allowed_paths = self.running_app.blocks.allowed_paths
         demo.blocked_paths = self.running_app.blocks.blocked_paths
+        demo.session_store = self.running_app.state_holder.store
 
         demo.theme = self.get_attribute("theme", demo)
         demo.css = self.get_attribute("css", demo)
@@ -892,20 +893,76 @@ def run_sync_iterator_async(iterator):
         raise StopAsyncIteration() from None
 
 
+class _LimiterSlot:
+    """A token of a limiter, held on behalf of a step of a `SyncToAsyncIterator`."""
+
+    def __init__(self, limiter: anyio.CapacityLimiter) -> None:
+        self.limiter = limiter
+        self.held = False
+
+    async def acquire(self) -> None:
+        await self.limiter.acquire_on_behalf_of(self)
+        self.held = True
+
+    def release(self) -> None:
+        self.limiter.release_on_behalf_of(self)
+        self.held = False
+
+
+_limiter_slot: ContextVar[_LimiterSlot | None] = ContextVar(
+    "limiter_slot", default=None
+)
+
+
+@contextmanager
+def limiter_released():
+    """
+    Gives back the limiter token of the `SyncToAsyncIterator` step that is running in
+    the current thread while the block runs, and takes it again afterwards. A sync
+    generator uses this to block on something that another step has to produce,
+    without holding a token that the other step may need. Outside of such a step,
+    this does nothing.
+    """
+    slot = _limiter_slot.get()
+    if slot is None or not slot.held:
+        yield
+        return
+    anyio.from_thread.run_sync(slot.release)
+    try:
+        yield
+    finally:
+        anyio.from_thread.run(slot.acquire)
+
+
 class SyncToAsyncIterator:
     """Treat a synchronous iterator as async one."""
 
     def __init__(self, iterator, limiter) -> None:
         self.iterator = iterator
         self.limiter = limiter
+        self._threads: anyio.CapacityLimiter | None = None
 
     def __aiter__(self):
         return self
 
     async def __anext__(self):
-        return await anyio.to_thread.run_sync(
-            run_sync_iterator_async, self.iterator, limiter=self.limiter
+        # The step holds a token of `limiter` on behalf of itself, rather than of the
+        # worker thread, so that it can hand the token back with `limiter_released()`
+        slot = _LimiterSlot(
+            self.limiter or anyio.to_thread.current_default_thread_limiter()
         )
+        if self._threads is None:
+            self._threads = anyio.CapacityLimiter(math.inf)
+        await slot.acquire()
+        token = _limiter_slot.set(slot)
+        try:
+            return await anyio.to_thread.run_sync(
+                run_sync_iterator_async, self.iterator, limiter=self._threads
+            )
+        finally:
+            _limiter_slot.reset(token)
+            if slot.held:
+                slot.release()
 
     async def aclose(self, timeout=60.0, retry_interval=0.05):
         start = time.monotonic()
@@ -1513,55 +1570,72 @@ def get_cache_folder() -> Path:
     return Path(os.environ.get("GRADIO_EXAMPLES_CACHE", ".gradio/cached_examples"))
 
 
-def diff(old, new):
-    def compare_objects(obj1, obj2, path=None):
-        if path is None:
-            path = []
-        edits = []
-
-        if obj1 == obj2:
-            return edits
-
-        if type(obj1) is not type(obj2):
-            edits.append(["replace", path, obj2])
-            return edits
-
-        if isinstance(obj1, str) and obj2.startswith(obj1):
-            edits.append(["append", path, obj2[len(obj1) :]])
-            return edits
-
-        if isinstance(obj1, list):
-            common_length = min(len(obj1), len(obj2))
-            for i in range(common_length):
-                edits.extend(compare_objects(obj1[i], obj2[i], path + [i]))
-            for i in range(common_length, len(obj1)):
-                edits.append(["delete", path + [i], None])
-            for i in range(common_length, len(obj2)):
-                edits.append(["add", path + [i], obj2[i]])
-            # Deletes are always placed at the end
-            # So subtract 1 since deleting one element will shift all the indices
-            deletes_seen = 0
-            for edit in edits:
-                if edit[0] == "delete" and isinstance(edit[1][-1], int):
-                    edit[1][-1] -= deletes_seen
-                    deletes_seen += 1
-            return edits
-
-        if isinstance(obj1, dict):
-            for key in obj1:
-                if key in obj2:
-                    edits.extend(compare_objects(obj1[key], obj2[key], path + [key]))
-                else:
-                    edits.append(["delete", path + [key], None])
-            for key in obj2:
-                if key not in obj1:
-                    edits.append(["add", path + [key], obj2[key]])
-            return edits
+def diff(old: Any, new: Any) -> list[list]:
+    """
+    Computes the edits that turn `old` into `new`, two JSON-like values, as a list of
+    `[action, path, value]` edits that the frontend applies with `apply_diff()`.
+
+    Subtrees that are the same object are skipped without being looked at, and
+    unchanged items of lists and dicts are found with a single C-level comparison
+    each, so only the parts that changed are walked in Python. A list whose items
+    only changed at the end (e.g. a chat history while a reply is streamed) is
+    checked with one comparison of its unchanged part, and a string that only grew
+    is sent as an "append" of its new characters.
+    """
+    edits: list[list] = []
+    _diff_into(old, new, [], edits)
+    return edits
 
-        edits.append(["replace", path, obj2])
-        return edits
 
-    return compare_objects(old, new)
+def _diff_into(old: Any, new: Any, path: list, edits: list[list]):
+    if old is new:
+        return
+
+    if type(old) is not type(new):
+        edits.append(["replace", path, new])
+        return
+
+    if isinstance(old, str):
+        if old == new:
+            return
+        if new.startswith(old):
+            edits.append(["append", path, new[len(old) :]])
+        else:
+            edits.append(["replace", path, new])
+        return
+
+    if isinstance(old, list):
+        common_length = min(len(old), len(new))
+        start = 0
+        if common_length > 1 and old[: common_length - 1] == new[: common_length - 1]:
+            start = common_length - 1
+        for i in range(start, common_length):
+            old_item, new_item = old[i], new[i]
+            if old_item is not new_item and old_item != new_item:
+                _diff_into(old_item, new_item, path + [i], edits)
+        # Deletes are applied one after the other, so each one removes the item
+        # that has shifted into the position of the first removed item
+        for _ in range(common_length, len(old)):
+            edits.append(["delete", path + [common_length], None])
+        for i in range(common_length, len(new)):
+            edits.append(["add", path + [i], new[i]])
+        return
+
+    if isinstance(old, dict):
+        for key, old_value in old.items():
+            if key not in new:
+                edits.append(["delete", path + [key], None])
+                continue
+            new_value = new[key]
+            if old_value is not new_value and old_value != new_value:
+                _diff_into(old_value, new_value, path + [key], edits)
+        for key in new:
+            if key not in old:
+                edits.append(["add", path + [key], new[key]])
+        return
+
+    if old != new:
+        edits.append(["replace", path, new])
 
 
 def get_upload_folder() -> str:
@@ -1763,27 +1837,19 @@ def connect_heartbeat(config: BlocksConfigDict, blocks, fns=None) -> bool:
 
 
 def deep_hash(obj):
-    """Compute a hash for a deeply nested data structure."""
-    hasher = hashlib.sha256()
-    if isinstance(obj, (int, float, str, bytes)):
-        items = obj
-    elif isinstance(obj, dict):
-        items = tuple(
-            [
-                (k, deep_hash(v))
-                for k, v in sorted(obj.items(), key=lambda x: hash(x[0]))
-            ]
-        )
-    elif isinstance(obj, (list, tuple)):
-        items = tuple(deep_hash(x) for x in obj)
-    elif isinstance(obj, set):
-        items = tuple(deep_hash(x) for x in sorted(obj, key=hash))
-    elif isinstance(obj, Hashable):
-        items = str(hash(obj)).encode("utf-8")
-    else:
-        items = str(id(obj)).encode("utf-8")
-    hasher.update(repr(items).encode("utf-8"))
-    return hasher.hexdigest()
+    """
+    Deprecated: use `gradio.caching.state_fingerprint` instead. Returns the hex
+    digest of the `state_fingerprint()` of `obj`.
+    """
+    from gradio.caching import state_fingerprint
+
+    warnings.warn(
+        "`gradio.utils.deep_hash` is deprecated and will be removed. Please use "
+        "`gradio.caching.state_fingerprint` instead.",
+        UserWarning,
+        stacklevel=2,
+    )
+    return state_fingerprint(obj).hex()
 
 
 def error_payload(
@@ -0,0 +1,80 @@
+"""
+Measures the time that `Blocks.process_api` spends on preprocessing and
+postprocessing for an event with several image outputs, and for a batch event,
+with the components processed one by one and concurrently
+(`GRADIO_CONCURRENT_PROCESSING=true`).
+
+Usage: python scripts/benchmark_concurrent_processing.py
+"""
+
+import asyncio
+import statistics
+import time
+
+import numpy as np
+
+import gradio as gr
+
+N_OUTPUTS = 6
+BATCH_SIZE = 8
+N_RUNS = 10
+IMAGE_SHAPE = (768, 768, 3)
+
+rng = np.random.default_rng(0)
+images = [rng.integers(0, 255, IMAGE_SHAPE, dtype=np.uint8) for _ in range(N_OUTPUTS)]
+
+
+def many_outputs():
+    return images
+
+
+def batch(images):
+    return ([255 - image for image in images],)
+
+
+with gr.Blocks() as demo:
+    outputs = [gr.Image(format="png") for _ in range(N_OUTPUTS)]
+    button = gr.Button()
+    button.click(many_outputs, None, outputs, api_name="many_outputs")
+
+    batch_input = gr.Image(format="png")
+    batch_output = gr.Image(format="png")
+    batch_input.upload(
+        batch,
+        batch_input,
+        batch_output,
+        batch=True,
+        max_batch_size=BATCH_SIZE,
+        api_name="batch",
+    )
+
+
+async def measure(fn_index: int, inputs: list) -> list[float]:
+    timings = []
+    for _ in range(N_RUNS):
+        start = time.perf_counter()
+        await demo.process_api(fn_index, inputs, state=None)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+async def main():
+    # One encoded image, preprocessed once per sample of the batch
+    output = await demo.process_api(0, [], state=None)
+    batch_inputs = [[output["data"][0]] * BATCH_SIZE]
+
+    for concurrent in [False, True]:
+        demo.concurrent_processing = concurrent
+        for name, fn_index, inputs in [
+            (f"{N_OUTPUTS} image outputs", 0, []),
+            (f"batch of {BATCH_SIZE} images", 1, batch_inputs),
+        ]:
+            timings = await measure(fn_index, inputs)
+            print(
+                f"{'concurrent' if concurrent else 'sequential':>10} | {name:<20} | "
+                f"median {statistics.median(timings) * 1000:7.1f} ms, "
+                f"min {min(timings) * 1000:7.1f} ms"
+            )
+
+
+asyncio.run(main())
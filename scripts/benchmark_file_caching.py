@@ -0,0 +1,76 @@
+"""
+Measures how long the event loop is blocked while a large file returned by an event
+is moved to the cache (hashed and copied), when the file is cached on the event loop,
+as it used to be, and when it is cached in a worker thread. A ticker task that wakes
+up every 5 ms records the longest delay between two ticks, i.e. how long every other
+request and stream served by the process had to wait.
+
+Usage: python scripts/benchmark_file_caching.py
+"""
+
+import asyncio
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import gradio as gr
+from gradio import processing_utils
+
+FILE_SIZE = 256 * 1024 * 1024
+TICK = 0.005
+N_RUNS = 3
+
+
+async def ticker(stop: asyncio.Event) -> float:
+    longest = 0.0
+    last = time.perf_counter()
+    while not stop.is_set():
+        await asyncio.sleep(TICK)
+        now = time.perf_counter()
+        longest = max(longest, now - last - TICK)
+        last = now
+    return longest
+
+
+async def on_the_event_loop(path: str, cache_dir: str) -> str:
+    return processing_utils.save_file_to_cache(path, cache_dir)
+
+
+async def measure(save, source: Path) -> tuple[float, float]:
+    with tempfile.TemporaryDirectory() as cache_dir:
+        # Touch the file, so that it is hashed again
+        os.utime(source)
+        stop = asyncio.Event()
+        ticks = asyncio.create_task(ticker(stop))
+        await asyncio.sleep(TICK * 2)
+        start = time.perf_counter()
+        await save(str(source), cache_dir)
+        elapsed = time.perf_counter() - start
+        stop.set()
+        return await ticks, elapsed
+
+
+async def main():
+    with tempfile.TemporaryDirectory(dir=os.getcwd()) as source_dir:
+        source = Path(source_dir) / "video.mp4"
+        with open(source, "wb") as f:
+            for _ in range(FILE_SIZE // (1 << 20)):
+                f.write(os.urandom(1 << 20))
+        gr.Video(render=False)  # imports and warms up the components
+
+        for name, save in [
+            ("event loop", on_the_event_loop),
+            ("thread", processing_utils.async_save_file_to_cache),
+        ]:
+            results = [await measure(save, source) for _ in range(N_RUNS)]
+            stall = max(r[0] for r in results)
+            elapsed = min(r[1] for r in results)
+            print(
+                f"{name:>10} | {FILE_SIZE >> 20} MiB file | cached in "
+                f"{elapsed * 1000:7.1f} ms | event loop blocked for up to "
+                f"{stall * 1000:7.1f} ms"
+            )
+
+
+asyncio.run(main())
@@ -0,0 +1,85 @@
+"""
+Opens many idle `/queue/data` connections (each waiting for an event that is
+stuck in the queue behind a long-running one) and reports how many asyncio tasks
+the server is running and how much CPU time the process uses while they are idle.
+
+Usage: python scripts/benchmark_idle_queue_connections.py [n_connections]
+"""
+
+import asyncio
+import sys
+import threading
+import time
+from typing import cast
+
+import httpx
+
+import gradio as gr
+from gradio.route_utils import API_PREFIX
+
+N_CONNECTIONS = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+IDLE_SECONDS = 10
+
+release = threading.Event()
+
+
+def wait():
+    release.wait()
+    return "done"
+
+
+with gr.Blocks() as demo:
+    output = gr.Textbox()
+    button = gr.Button()
+    button.click(wait, None, output, concurrency_limit=1)
+
+demo.queue(max_size=None)
+_, url, _ = demo.launch(prevent_thread_lock=True, quiet=True)
+base = f"{url.rstrip('/')}{API_PREFIX}"
+
+
+async def open_connection(client: httpx.AsyncClient, session_hash: str):
+    await client.post(
+        f"{base}/queue/join",
+        json={"data": [], "fn_index": 0, "session_hash": session_hash},
+    )
+    async with client.stream(
+        "GET", f"{base}/queue/data", params={"session_hash": session_hash}
+    ) as response:
+        async for _ in response.aiter_bytes():
+            pass
+
+
+async def server_tasks() -> int:
+    async def count() -> int:
+        return len(asyncio.all_tasks())
+
+    loop = cast(asyncio.AbstractEventLoop, demo._queue._loop)
+    return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(count(), loop))
+
+
+async def main():
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=0)
+    async with httpx.AsyncClient(timeout=None, limits=limits) as client:
+        tasks_before = await server_tasks()
+        connections = [
+            asyncio.create_task(open_connection(client, f"session-{i}"))
+            for i in range(N_CONNECTIONS)
+        ]
+        await asyncio.sleep(15)
+        tasks_idle = await server_tasks()
+
+        cpu_start = time.process_time()
+        await asyncio.sleep(IDLE_SECONDS)
+        cpu_idle = time.process_time() - cpu_start
+
+        print(f"{N_CONNECTIONS} idle connections")
+        print(f"server tasks: {tasks_before} before, {tasks_idle} while idle")
+        print(f"CPU time over {IDLE_SECONDS} s idle: {cpu_idle * 1000:.0f} ms")
+
+        release.set()
+        await asyncio.wait(connections, timeout=30)
+
+
+asyncio.run(main())
+demo.close()
@@ -0,0 +1,57 @@
+"""
+Measures the time that the server takes to answer `GET /` and `GET /config` for an
+app with several hundred components, when the payloads are rendered for every
+request and when they are served from the app's payload cache (which sends anonymous
+users a body that was compressed ahead of time).
+
+Usage: python scripts/benchmark_page_payloads.py
+"""
+
+import statistics
+import time
+
+from fastapi.testclient import TestClient
+
+import gradio as gr
+from gradio.route_utils import PayloadCache
+
+N_ROWS = 100
+N_REQUESTS = 50
+
+with gr.Blocks() as demo:
+    for i in range(N_ROWS):
+        with gr.Row():
+            text = gr.Textbox(label=f"Input {i}", info="Some text")
+            number = gr.Number(label=f"Output {i}")
+            button = gr.Button(f"Run {i}")
+            button.click(lambda x: len(x), text, number)
+
+app, _, _ = demo.launch(prevent_thread_lock=True, quiet=True)
+client = TestClient(app)
+
+
+def measure(path: str, headers: dict) -> float:
+    timings = []
+    for _ in range(N_REQUESTS):
+        start = time.perf_counter()
+        response = client.get(path, headers=headers)
+        timings.append(time.perf_counter() - start)
+        assert response.status_code == 200  # noqa: S101
+    return statistics.median(timings)
+
+
+cached_get = PayloadCache.get
+for name in ["rendered", "cached"]:
+    # Without a cached payload, the routes render the payload for the request
+    PayloadCache.get = cached_get if name == "cached" else lambda *_: None  # type: ignore
+    for path in ["/", "/config"]:
+        for encoding in ["identity", "br"]:
+            median = measure(path, {"Accept-Encoding": encoding})
+            response = client.get(path, headers={"Accept-Encoding": encoding})
+            size = int(response.headers["Content-Length"])
+            print(
+                f"{name:>8} | GET {path:<7} | {encoding:<8} | "
+                f"median {median * 1000:6.2f} ms | {size / 1024:7.1f} KiB sent"
+            )
+
+demo.close()
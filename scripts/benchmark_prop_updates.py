@@ -0,0 +1,62 @@
+"""
+Measures the time that `Blocks.postprocess_data` takes for one tick of a dashboard
+that updates a few props (label, visible, interactive) of 30 components with
+gr.update(), when the updates are patched into the session config and when every
+updated component is built again from its constructor, as all updates used to be.
+
+Usage: python scripts/benchmark_prop_updates.py
+"""
+
+import asyncio
+import statistics
+import time
+
+import gradio as gr
+from gradio.state_holder import SessionState
+
+N_COMPONENTS = 30
+N_TICKS = 200
+
+with gr.Blocks() as demo:
+    outputs = []
+    for i in range(N_COMPONENTS // 3):
+        outputs.append(gr.Textbox(f"text {i}", label=f"Text {i}"))
+        outputs.append(gr.Slider(0, 100, value=i, label=f"Slider {i}"))
+        outputs.append(gr.Image(label=f"Image {i}"))
+    timer = gr.Timer(1)
+    timer.tick(lambda: None, None, outputs)
+
+
+def tick(n: int) -> list:
+    return [
+        gr.update(label=f"{i}: {n}", visible=n % 2 == 0, interactive=n % 3 == 0)
+        for i in range(N_COMPONENTS)
+    ]
+
+
+async def measure() -> list[float]:
+    state = SessionState(demo)
+    block_fn = demo.fns[0]
+    timings = []
+    for n in range(N_TICKS):
+        predictions = tick(n)
+        start = time.perf_counter()
+        await demo.postprocess_data(block_fn, predictions, state)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+async def main():
+    classes = {type(block) for block in outputs}
+    patchable = {cls: cls.PATCHABLE_PROPS for cls in classes}
+    for name in ["rebuild", "patch"]:
+        for cls in classes:
+            cls.PATCHABLE_PROPS = patchable[cls] if name == "patch" else frozenset()
+        timings = await measure()
+        print(
+            f"{name:>8} | {N_COMPONENTS} updated components | "
+            f"median {statistics.median(timings) * 1000:7.2f} ms per tick"
+        )
+
+
+asyncio.run(main())
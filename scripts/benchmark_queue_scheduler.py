@@ -0,0 +1,66 @@
+"""
+Measures the idle CPU usage of the queue and the time it takes for a pushed event
+to be dispatched to a worker (i.e. from `Queue.push` to `Queue.process_events`).
+
+Usage: python scripts/benchmark_queue_scheduler.py
+"""
+
+import resource
+import statistics
+import time
+
+from gradio_client import Client
+
+import gradio as gr
+
+IDLE_SECONDS = 5
+N_REQUESTS = 200
+
+
+def cpu_seconds() -> float:
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+with gr.Blocks() as demo:
+    input = gr.Textbox(label="Input")
+    output = gr.Textbox(label="Output")
+    input.submit(lambda x: x, input, output, api_name="echo")
+
+_, url, _ = demo.launch(prevent_thread_lock=True, quiet=True)
+client = Client(url, verbose=False)
+client.predict("warmup", api_name="/echo")
+
+start_cpu = cpu_seconds()
+time.sleep(IDLE_SECONDS)
+idle_cpu = cpu_seconds() - start_cpu
+print(
+    f"Idle CPU: {idle_cpu * 1000:.1f} ms over {IDLE_SECONDS} s "
+    f"({idle_cpu / IDLE_SECONDS * 100:.2f}% of one core)"
+)
+
+queue = demo._queue
+dispatch_latencies = []
+original_process_events = queue.process_events
+
+
+async def timed_process_events(events, *args, **kwargs):
+    now = time.monotonic()
+    for event in events:
+        dispatch_latencies.append(now - event.enqueue_time)
+    return await original_process_events(events, *args, **kwargs)
+
+
+queue.process_events = timed_process_events
+
+for _ in range(N_REQUESTS):
+    client.predict("Hello", api_name="/echo")
+
+dispatch_latencies.sort()
+print(
+    f"Push to dispatch over {N_REQUESTS} requests: "
+    f"p50={statistics.median(dispatch_latencies) * 1000:.3f} ms, "
+    f"p99={dispatch_latencies[int(len(dispatch_latencies) * 0.99) - 1] * 1000:.3f} ms"
+)
+
+demo.close()
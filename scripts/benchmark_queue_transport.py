@@ -0,0 +1,63 @@
+"""
+Compares the size of each message on the `/queue/data` stream, and the CPU time
+spent encoding it on the server and decoding it in the Python client, when it is
+sent as server-sent events with JSON (the default) and as msgpack frames (when the
+client sends `Accept: application/vnd.gradio.msgpack-stream` and msgpack is
+installed).
+
+Usage: python scripts/benchmark_queue_transport.py
+"""
+
+import time
+
+import numpy as np
+import orjson
+import pandas as pd
+from gradio_client import utils as client_utils
+
+import gradio as gr
+from gradio.route_utils import msgpack_frame
+from gradio.server_messages import ProcessCompletedMessage
+
+N_RUNS = 50
+
+rng = np.random.default_rng(0)
+table = pd.DataFrame(rng.standard_normal((2000, 8)), columns=list("abcdefgh"))
+history = [
+    {"role": "user" if i % 2 == 0 else "assistant", "content": f"Message {i} " * 40}
+    for i in range(200)
+]
+series = pd.DataFrame({"x": np.arange(5000), "y": rng.standard_normal(5000)})
+
+payloads = {
+    "dataframe": gr.Dataframe().postprocess(table).model_dump(),
+    "chat": gr.Chatbot().postprocess(history).model_dump(),
+    "plot": gr.LinePlot(x="x", y="y").postprocess(series).model_dump(),  # type: ignore
+}
+
+
+def sse_frame(message: ProcessCompletedMessage) -> bytes:
+    return b"data: " + orjson.dumps(message.model_dump(), default=str) + b"\n\n"
+
+
+def timed(fn, *args) -> tuple[float, object]:
+    start = time.perf_counter()
+    for _ in range(N_RUNS):
+        result = fn(*args)
+    return (time.perf_counter() - start) / N_RUNS, result
+
+
+for name, payload in payloads.items():
+    message = ProcessCompletedMessage(
+        event_id="0" * 32, output={"data": [payload]}, success=True
+    )
+    for transport, encode, decode in [
+        ("sse+json", sse_frame, client_utils.iter_sse_messages),
+        ("msgpack", msgpack_frame, client_utils.iter_msgpack_messages),
+    ]:
+        encode_time, frame = timed(encode, message)
+        decode_time, _ = timed(lambda f: list(decode([f])), frame)
+        print(
+            f"{name:<10} | {transport:<8} | {len(frame) / 1024:8.1f} KiB | "
+            f"encode {encode_time * 1000:6.2f} ms | decode {decode_time * 1000:6.2f} ms"
+        )
@@ -0,0 +1,63 @@
+"""
+Measures the time that a gr.render() re-render of 500 dynamic components (chatbots,
+images and galleries) takes, when the JSON schemas in their API info are derived
+once per data model and when each component derives its own schema, as they used to.
+
+Usage: python scripts/benchmark_render_api_info.py
+"""
+
+import asyncio
+import statistics
+import time
+
+import gradio as gr
+from gradio.components.base import Component, json_schema
+from gradio.state_holder import SessionState
+
+N_COMPONENTS = 500
+N_RUNS = 5
+
+with gr.Blocks() as demo:
+    count = gr.Number(N_COMPONENTS, render=False)
+
+    @gr.render(inputs=count)
+    def render(n):
+        for i in range(int(n)):
+            component = [gr.Chatbot, gr.Image, gr.Gallery][i % 3]
+            component(label=f"Component {i}")
+
+
+render_fn_index = next(fn._id for fn in demo.fns.values() if fn.renderable is not None)
+api_info = Component.api_info
+
+
+def api_info_per_component(self):
+    if "_api_info_cache" not in vars(self):
+        json_schema.cache_clear()
+        self._api_info_cache = api_info(self)
+    return self._api_info_cache
+
+
+async def measure() -> list[float]:
+    state = SessionState(demo)
+    timings = []
+    for _ in range(N_RUNS):
+        start = time.perf_counter()
+        await demo.process_api(render_fn_index, [N_COMPONENTS], state=state)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+async def main():
+    for name in ["per component", "memoized"]:
+        Component.api_info = (
+            api_info_per_component if name == "per component" else api_info
+        )
+        timings = await measure()
+        print(
+            f"{name:>13} | re-render of {N_COMPONENTS} components | "
+            f"median {statistics.median(timings) * 1000:7.1f} ms"
+        )
+
+
+asyncio.run(main())
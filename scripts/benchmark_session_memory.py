@@ -0,0 +1,67 @@
+"""
+Measures the memory held by 10,000 sessions of an app with 300 components, and the
+time taken to create a session, when every session shares the per-block configs of
+the app and only copies the blocks it modifies, and when every session computes the
+config of every block up front, as sessions used to. Each session updates the value
+of one component, as after a first event.
+
+The up-front mode is measured on a sample of sessions and extrapolated, since
+creating 10,000 of them takes several minutes.
+
+Usage: python scripts/benchmark_session_memory.py
+"""
+
+import gc
+import time
+import tracemalloc
+
+import gradio as gr
+from gradio.state_holder import StateHolder
+
+N_SESSIONS = 10_000
+N_UP_FRONT_SAMPLE = 100
+N_COMPONENTS = 300
+
+with gr.Blocks() as demo:
+    for i in range(N_COMPONENTS // 3):
+        gr.Textbox(f"text {i}", label=f"Text {i}")
+        gr.Slider(0, 100, value=i, label=f"Slider {i}")
+        gr.Dropdown([f"choice {j}" for j in range(10)], label=f"Dropdown {i}")
+first_id = next(iter(demo.blocks))
+
+
+def compute_up_front(session):
+    session.config_values.own = {
+        k: session.blocks_config.config_for_block(k, [], v)
+        for k, v in session.blocks_config.blocks.items()
+    }
+
+
+def measure(n_sessions: int, up_front: bool) -> tuple[float, float]:
+    holder = StateHolder()
+    holder.set_blocks(demo)
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    for i in range(n_sessions):
+        session = holder[f"session-{i}"]
+        if up_front:
+            compute_up_front(session)
+        session._update_value_in_config(first_id, f"value {i}")
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return memory / n_sessions, elapsed / n_sessions
+
+
+for name, n_sessions, up_front in [
+    ("up front", N_UP_FRONT_SAMPLE, True),
+    ("shared", N_SESSIONS, False),
+]:
+    per_session, seconds = measure(n_sessions, up_front)
+    print(
+        f"{name:>8} | {per_session / 1024:7.1f} KiB and {seconds * 1000:7.2f} ms "
+        f"per session | {per_session * N_SESSIONS / 1024**2:8.1f} MiB for "
+        f"{N_SESSIONS} sessions"
+    )
@@ -0,0 +1,56 @@
+"""
+Measures the time that the session store adds to each event of a chat app whose
+gr.State holds a conversation of 50 messages: saving the session after the event,
+and checking whether another process has saved the session since, when the next
+event of the session looks it up. Sessions are kept in memory (the default) or in a
+SQLite database file shared by several processes.
+
+Usage: python scripts/benchmark_session_store.py
+"""
+
+import asyncio
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+import gradio as gr
+from gradio.state_holder import StateHolder
+
+N_SESSIONS = 1000
+N_MESSAGES = 50
+
+with gr.Blocks() as demo:
+    history = gr.State([])
+
+conversation = [
+    {"role": "user" if i % 2 == 0 else "assistant", "content": "lorem ipsum " * 20}
+    for i in range(N_MESSAGES)
+]
+
+
+async def measure(session_store) -> list[float]:
+    demo.session_store = session_store
+    holder = StateHolder()
+    holder.set_blocks(demo)
+    timings = []
+    for i in range(N_SESSIONS):
+        session_id = f"session-{i}"
+        holder[session_id][history._id] = conversation
+        start = time.perf_counter()
+        await holder.async_save(session_id)
+        await holder.async_refresh(session_id)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+with tempfile.TemporaryDirectory() as tmp:
+    for name, session_store in [
+        ("memory", None),
+        ("sqlite", Path(tmp) / "sessions.db"),
+    ]:
+        timings = asyncio.run(measure(session_store))
+        print(
+            f"{name:>6} | {N_MESSAGES} messages in gr.State | "
+            f"median {statistics.median(timings) * 1000:6.3f} ms per event"
+        )
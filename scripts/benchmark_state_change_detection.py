@@ -0,0 +1,97 @@
+"""
+Measures the time that `Blocks.process_api` spends telling whether a large gr.State
+(a list of embeddings, or a DataFrame) that has a .change() listener was changed by
+an event, compared to the `deep_hash` digests it replaced, which hashed the `repr`
+of every nested value and could not see in-place changes to arrays and DataFrames.
+
+Usage: python scripts/benchmark_state_change_detection.py
+"""
+
+import asyncio
+import hashlib
+import statistics
+import time
+from collections.abc import Hashable
+
+import numpy as np
+import pandas as pd
+
+import gradio as gr
+from gradio.caching import state_fingerprint
+from gradio.state_holder import SessionState
+
+N_RUNS = 20
+N_LISTENERS = 200
+
+rng = np.random.default_rng(0)
+STATES = {
+    "2000 embeddings": lambda: [rng.random(768) for _ in range(2000)],
+    "100k-row DataFrame": lambda: pd.DataFrame(
+        {"a": rng.random(100_000), "b": rng.integers(0, 100, 100_000)}
+    ),
+    "5000 chat messages": lambda: [
+        {"role": "user", "content": f"message {i} " * 20} for i in range(5000)
+    ],
+}
+
+
+def deep_hash(obj):
+    hasher = hashlib.sha256()
+    if isinstance(obj, (int, float, str, bytes)):
+        items = obj
+    elif isinstance(obj, dict):
+        items = tuple(
+            [
+                (k, deep_hash(v))
+                for k, v in sorted(obj.items(), key=lambda x: hash(x[0]))
+            ]
+        )
+    elif isinstance(obj, (list, tuple)):
+        items = tuple(deep_hash(x) for x in obj)
+    elif isinstance(obj, set):
+        items = tuple(deep_hash(x) for x in sorted(obj, key=hash))
+    elif isinstance(obj, Hashable):
+        items = str(hash(obj)).encode("utf-8")
+    else:
+        items = str(id(obj)).encode("utf-8")
+    hasher.update(repr(items).encode("utf-8"))
+    return hasher.hexdigest()
+
+
+def timed(fn, *args) -> float:
+    timings = []
+    for _ in range(N_RUNS):
+        start = time.perf_counter()
+        fn(*args)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+async def main():
+    for name, make_value in STATES.items():
+        value = make_value()
+        with gr.Blocks() as demo:
+            state = gr.State(value)
+            button = gr.Button()
+            button.click(lambda x: x, state, state)
+            state.change(lambda x: x, state, None)
+            # Unrelated listeners, which used to be scanned for every output State
+            for _ in range(N_LISTENERS):
+                gr.Textbox().change(lambda: None, None, None)
+        session = SessionState(demo)
+        session[state._id] = value
+
+        timings = []
+        for _ in range(N_RUNS):
+            start = time.perf_counter()
+            await demo.process_api(0, [value], state=session)
+            timings.append(time.perf_counter() - start)
+
+        print(
+            f"{name:<20} | deep_hash {timed(deep_hash, value) * 1000:8.2f} ms | "
+            f"state_fingerprint {timed(state_fingerprint, value) * 1000:8.2f} ms | "
+            f"process_api {statistics.median(timings) * 1000:8.2f} ms"
+        )
+
+
+asyncio.run(main())
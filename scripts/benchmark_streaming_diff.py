@@ -0,0 +1,93 @@
+"""
+Measures the time that `utils.diff` takes per yield when a chatbot streams a reply
+token by token at the end of a long history, compared to the implementation it
+replaced, which compared whole subtrees again at every level.
+
+Usage: python scripts/benchmark_streaming_diff.py
+"""
+
+import time
+
+import gradio as gr
+from gradio.utils import diff
+
+HISTORY_LENGTHS = [10, 200, 1000]
+N_TOKENS = 200
+
+
+def previous_diff(old, new):
+    def compare_objects(obj1, obj2, path=None):
+        if path is None:
+            path = []
+        edits = []
+
+        if obj1 == obj2:
+            return edits
+
+        if type(obj1) is not type(obj2):
+            edits.append(["replace", path, obj2])
+            return edits
+
+        if isinstance(obj1, str) and obj2.startswith(obj1):
+            edits.append(["append", path, obj2[len(obj1) :]])
+            return edits
+
+        if isinstance(obj1, list):
+            common_length = min(len(obj1), len(obj2))
+            for i in range(common_length):
+                edits.extend(compare_objects(obj1[i], obj2[i], path + [i]))
+            for i in range(common_length, len(obj1)):
+                edits.append(["delete", path + [i], None])
+            for i in range(common_length, len(obj2)):
+                edits.append(["add", path + [i], obj2[i]])
+            # Deletes are always placed at the end
+            # So subtract 1 since deleting one element will shift all the indices
+            deletes_seen = 0
+            for edit in edits:
+                if edit[0] == "delete" and isinstance(edit[1][-1], int):
+                    edit[1][-1] -= deletes_seen
+                    deletes_seen += 1
+            return edits
+
+        if isinstance(obj1, dict):
+            for key in obj1:
+                if key in obj2:
+                    edits.extend(compare_objects(obj1[key], obj2[key], path + [key]))
+                else:
+                    edits.append(["delete", path + [key], None])
+            for key in obj2:
+                if key not in obj1:
+                    edits.append(["add", path + [key], obj2[key]])
+            return edits
+
+        edits.append(["replace", path, obj2])
+        return edits
+
+    return compare_objects(old, new)
+
+
+def measure(diff_fn, history_length: int) -> float:
+    chatbot = gr.Chatbot()
+    history = [
+        {"role": "user" if i % 2 == 0 else "assistant", "content": f"Message {i} " * 50}
+        for i in range(history_length)
+    ] + [{"role": "assistant", "content": ""}]
+    previous = chatbot.postprocess(history).model_dump()
+    elapsed = 0.0
+    for i in range(N_TOKENS):
+        history[-1]["content"] += f"token{i} "
+        current = chatbot.postprocess(history).model_dump()
+        start = time.perf_counter()
+        diff_fn(previous, current)
+        elapsed += time.perf_counter() - start
+        previous = current
+    return elapsed / N_TOKENS
+
+
+for history_length in HISTORY_LENGTHS:
+    before = measure(previous_diff, history_length)
+    after = measure(diff, history_length)
+    print(
+        f"{history_length:>5} messages | previous {before * 1e6:8.1f} us/yield | "
+        f"current {after * 1e6:8.1f} us/yield | {before / after:5.1f}x"
+    )
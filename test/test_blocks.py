@@ -31,6 +31,7 @@ from gradio.data_classes import GradioModel, GradioRootModel
 from gradio.events import SelectData
 from gradio.exceptions import ComponentProcessingError, DuplicateBlockError
 from gradio.route_utils import API_PREFIX
+from gradio.state_holder import SessionState
 from gradio.utils import assert_configs_are_equivalent_besides_ids, cancel_tasks
 
 pytest_plugins = ("pytest_asyncio",)
@@ -993,6 +994,119 @@ class TestBlocksPostprocessing:
         assert "New" in session_2.json()["data"][0]
 
 
+class TestConcurrentProcessing:
+    @staticmethod
+    def slow_postprocess(delay: float, fail: bool = False):
+        def postprocess(value):
+            time.sleep(delay)
+            if fail:
+                raise ValueError(f"failed after {delay}s")
+            return value
+
+        return postprocess
+
+    @pytest.mark.asyncio
+    async def test_outputs_are_postprocessed_concurrently_and_in_order(self):
+        with gr.Blocks() as demo:
+            outputs = [gr.Textbox() for _ in range(4)]
+            gr.Button().click(lambda: ["a", "b", "c", "d"], None, outputs)
+        for delay, textbox in zip([0.3, 0.2, 0.1, 0.0], outputs, strict=True):
+            textbox.postprocess = self.slow_postprocess(delay)
+
+        demo.concurrent_processing = True
+        start = time.monotonic()
+        output = await demo.postprocess_data(
+            demo.fns[0], ["a", "b", "c", "d"], state=None
+        )
+        assert time.monotonic() - start < 0.55
+        assert output == ["a", "b", "c", "d"]
+
+    @pytest.mark.asyncio
+    async def test_error_of_first_failing_output_is_raised(self):
+        with gr.Blocks() as demo:
+            first, second = gr.Textbox(), gr.Textbox()
+            gr.Button().click(lambda: ["a", "b"], None, [first, second])
+        first.postprocess = self.slow_postprocess(0.2, fail=True)
+        second.postprocess = self.slow_postprocess(0.0, fail=True)
+
+        demo.concurrent_processing = True
+        with pytest.raises(ComponentProcessingError) as exc_info:
+            await demo.postprocess_data(demo.fns[0], ["a", "b"], state=None)
+        assert "index 0" in str(exc_info.value)
+
+    @pytest.mark.asyncio
+    async def test_state_is_updated_output_by_output_by_default(self):
+        with gr.Blocks() as demo:
+            first, second = gr.Textbox(), gr.Textbox()
+            gr.Button().click(lambda: ["a", "b"], None, [first, second])
+        state = SessionState(demo)
+        seen = []
+
+        def postprocess(value):
+            seen.append(state.config_values[first._id]["props"]["value"])
+            return value
+
+        second.postprocess = postprocess
+
+        assert not demo.concurrent_processing
+        await demo.postprocess_data(demo.fns[0], ["a", "b"], state=state)
+        assert seen == ["a"]
+
+    @pytest.mark.asyncio
+    async def test_batch_updates_state_in_sample_order(self):
+        with gr.Blocks() as demo:
+            text = gr.Textbox()
+            text.submit(
+                lambda x: ([v.upper() for v in x],),
+                text,
+                text,
+                batch=True,
+                max_batch_size=3,
+            )
+        # Later samples finish first
+        delays = iter([0.2, 0.1, 0.0])
+        text.postprocess = lambda value: time.sleep(next(delays)) or value
+
+        demo.concurrent_processing = True
+        state = SessionState(demo)
+        output = await demo.process_api(0, [["a", "b", "c"]], state=state)
+        assert output["data"] == [("A", "B", "C")]
+        assert state.config_values[text._id]["props"]["value"] == "C"
+
+    @pytest.mark.asyncio
+    async def test_in_place_state_mutations_are_reported_as_changes(self):
+        def append(history, array):
+            history.append(len(history))
+            array[0] += 1
+            return history, array
+
+        with gr.Blocks() as demo:
+            history = gr.State([])
+            array = gr.State(np.zeros(4))
+            untracked = gr.State(np.zeros(4))
+            button = gr.Button()
+            button.click(append, [history, array], [history, array])
+            button.click(append, [history, untracked], [history, untracked])
+            history.change(lambda x: x, history, None)
+            array.change(lambda x: x, array, None)
+
+        state = SessionState(demo)
+        assert state.blocks_config.change_listened_ids == {history._id, array._id}
+        output = await demo.process_api(0, [[], np.zeros(4)], state=state)
+        assert output["changed_state_ids"] == [history._id, array._id]
+        output = await demo.process_api(1, [[0], np.zeros(4)], state=state)
+        assert output["changed_state_ids"] == [history._id]
+
+        # The index of watched states is rebuilt when listeners are added
+        with demo:
+            untracked.change(lambda x: x, untracked, None)
+        assert demo.default_config.change_listened_ids == {
+            history._id,
+            array._id,
+            untracked._id,
+        }
+
+
 class TestStateHolder:
     @pytest.mark.asyncio
     async def test_state_stored_up_to_capacity(self):
@@ -1210,6 +1324,36 @@ class TestCallFunction:
         output = await demo.call_function(0, [3], iterator=output["iterator"])
         assert output["prediction"] == 0
 
+    @pytest.mark.asyncio
+    async def test_streamed_outputs_are_diffed_by_the_component(self):
+        def generator():
+            yield "a"
+            yield "ab"
+            yield "abc"
+
+        with gr.Blocks() as demo:
+            out = gr.Textbox()
+            btn = gr.Button()
+            btn.click(generator, None, out)
+
+        with patch.object(out, "stream_diff", wraps=out.stream_diff) as stream_diff:
+            output = await demo.process_api(0, [], state=None, session_hash="s")
+            assert output["data"] == ["a"]
+            output = await demo.process_api(
+                0, [], state=None, iterator=output["iterator"], session_hash="s"
+            )
+            assert output["data"] == [[["append", [], "b"]]]
+            stream_diff.assert_called_once_with("a", "ab")
+
+        with patch.object(
+            out, "stream_diff", return_value=[["replace", [], "custom"]]
+        ) as stream_diff:
+            output = await demo.process_api(
+                0, [], state=None, iterator=output["iterator"], session_hash="s"
+            )
+            assert output["data"] == [[["replace", [], "custom"]]]
+            stream_diff.assert_called_once_with("ab", "abc")
+
     @pytest.mark.asyncio
     async def test_call_both_generator_and_function(self):
         def generator(x):
@@ -1398,6 +1542,95 @@ class TestUpdate:
             "__type__": "update",
         }
 
+    @pytest.mark.asyncio
+    async def test_updates_to_patchable_props_do_not_rebuild_the_component(self):
+        with gr.Blocks() as demo:
+            text = gr.Textbox("Hello", label="Greeting")
+            button = gr.Button()
+            button.click(
+                lambda: gr.update(visible=False, label="Name", interactive=True),
+                None,
+                text,
+            )
+            button.click(lambda: gr.update(placeholder="Type here"), None, text)
+
+        state = SessionState(demo)
+        with patch.object(
+            gr.Textbox,
+            "__init__",
+            autospec=True,
+            side_effect=AssertionError("rebuilt"),
+        ):
+            result = await demo.process_api(0, [], state=state)
+        assert result["data"][0] == {
+            "visible": False,
+            "label": "Name",
+            "interactive": True,
+            "__type__": "update",
+        }
+        patched = state[text._id]
+        assert patched is not text and patched._id == text._id
+        assert (patched.visible, patched.label, patched.interactive) == (
+            False,
+            "Name",
+            True,
+        )
+        assert (text.visible, text.label, text.interactive) == (True, "Greeting", None)
+        props = state.config_values[text._id]["props"]
+        assert (props["visible"], props["label"], props["interactive"]) == (
+            False,
+            "Name",
+            True,
+        )
+        assert props["value"] == "Hello"
+
+        result = await demo.process_api(1, [], state=state)
+        assert result["data"][0]["placeholder"] == "Type here"
+        rebuilt = state[text._id]
+        assert (rebuilt.placeholder, rebuilt.visible) == ("Type here", False)
+        assert state.config_values[text._id]["props"]["placeholder"] == "Type here"
+
+    def test_only_audited_classes_patch_props(self):
+        assert "label" in gr.Textbox.PATCHABLE_PROPS
+        assert "label" not in gr.Button.PATCHABLE_PROPS
+        assert not gr.Checkbox.PATCHABLE_PROPS
+        assert not gr.LinePlot.PATCHABLE_PROPS
+        assert {"visible", "scale"} == gr.Row.PATCHABLE_PROPS
+
+    @pytest.mark.asyncio
+    async def test_subclasses_are_rebuilt_unless_they_declare_patchable_props(self):
+        class LabeledTextbox(gr.Textbox):
+            def __init__(self, *args, label=None, **kwargs):
+                super().__init__(*args, label=f"* {label}", **kwargs)
+
+        with gr.Blocks() as demo:
+            text = LabeledTextbox(label="Name")
+            button = gr.Button()
+            button.click(lambda: gr.update(label="Email"), None, text)
+            button.click(lambda: gr.update(label="Run"), None, button)
+
+        state = SessionState(demo)
+        await demo.process_api(0, [], state=state)
+        assert state[text._id].label == "* Email"
+        assert state.config_values[text._id]["props"]["label"] == "* Email"
+
+        with pytest.raises(TypeError, match="label"):
+            await demo.process_api(1, [], state=state)
+
+    @pytest.mark.asyncio
+    async def test_patched_props_set_to_none_match_a_rebuilt_config(self):
+        with gr.Blocks() as demo:
+            text = gr.Textbox(label="Name", info="Your name")
+            button = gr.Button()
+            button.click(lambda: gr.Textbox(label=None, info=None), None, text)
+
+        state = SessionState(demo)
+        await demo.process_api(0, [], state=state)
+        rebuilt = gr.Textbox(render=False).get_config()
+        props = state.config_values[text._id]["props"]
+        assert props["label"] is rebuilt["label"] is None
+        assert props["info"] is rebuilt["info"] is None
+
 
 @pytest.mark.asyncio
 async def test_root_path():
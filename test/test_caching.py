@@ -1,20 +1,31 @@
 import asyncio
+import functools
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
 
+import anyio
 import numpy as np
 import pandas as pd
 import pytest
 from PIL import Image
 
+from gradio import utils
 from gradio.caching import (
     Cache,
     CacheMissError,
     ProbeCache,
+    RedisCacheBackend,
+    SQLiteCacheBackend,
     TrackManualCacheUsage,
+    _estimate_size,
     cache,
     cache_hash,
     clear_session_caches,
     resolve_generator,
+    state_fingerprint,
     used_manual_cache,
 )
 from gradio.context import LocalContext
@@ -65,6 +76,61 @@ class TestCacheHash:
         b = pd.Series(["a", "b"], name="letters")
         assert cache_hash(a) == cache_hash(b)
 
+    def test_strings_are_unambiguous(self):
+        assert cache_hash(["ab"]) != cache_hash(["a", "b"])
+        assert cache_hash({"a": "b,c"}) != cache_hash({"a": "b", "c": None})
+        assert cache_hash(1) != cache_hash("1")
+
+    def test_non_contiguous_numpy_array(self):
+        a = np.arange(20, dtype=np.int32).reshape(4, 5)
+        assert cache_hash(a[:, ::2]) == cache_hash(np.ascontiguousarray(a[:, ::2]))
+        assert cache_hash(a.T) != cache_hash(a)
+        assert cache_hash(np.array(["a", 1], dtype=object)) == cache_hash(
+            np.array(["a", 1], dtype=object)
+        )
+
+    def test_images_and_frames_mutated_within_an_event_are_hashed_again(self):
+        image = Image.new("RGB", (10, 10), color=(255, 0, 0))
+        df = pd.DataFrame({"a": [1, 2]})
+        token = LocalContext.event_id.set("event-1")
+        try:
+            before = cache_hash(image), cache_hash(df)
+            image.putpixel((0, 0), (0, 0, 0))
+            df.loc[0, "a"] = 5
+            assert cache_hash(image) != before[0]
+            assert cache_hash(df) != before[1]
+        finally:
+            LocalContext.event_id.reset(token)
+
+    def test_inputs_mutated_within_an_event_are_hashed_again(self):
+        a = np.zeros(4)
+        view = a.view()
+        view.flags.writeable = False
+        token = LocalContext.event_id.set("event-1")
+        try:
+            before = cache_hash(a), cache_hash(view)
+            a += 1
+            assert cache_hash(a) != before[0]
+            assert cache_hash(view) != before[1]
+        finally:
+            LocalContext.event_id.reset(token)
+
+    def test_xxh3_hash_algorithm(self, monkeypatch):
+        from gradio import caching
+
+        monkeypatch.setenv("GRADIO_CACHE_HASH_ALGORITHM", "md5")
+        caching._hash_constructor.cache_clear()
+        try:
+            with pytest.raises(ValueError, match="GRADIO_CACHE_HASH_ALGORITHM"):
+                cache_hash(1)
+            pytest.importorskip("xxhash")
+            monkeypatch.setenv("GRADIO_CACHE_HASH_ALGORITHM", "xxh3")
+            caching._hash_constructor.cache_clear()
+            assert cache_hash([1, "a"]) == cache_hash([1, "a"])
+            assert len(cache_hash(1)) == 32
+        finally:
+            caching._hash_constructor.cache_clear()
+
     def test_unhashable_raises(self):
         with pytest.raises(TypeError, match="gr.cache"):
             cache_hash(
@@ -72,6 +138,51 @@ class TestCacheHash:
             )
 
 
+class TestStateFingerprint:
+    def test_detects_in_place_mutations(self):
+        class Counter:
+            def __init__(self):
+                self.count = 0
+
+        values = [
+            np.zeros((64, 64)),
+            pd.DataFrame({"a": [1, 2], "b": [[1], [2]]}),
+            Counter(),
+            {"embeddings": [np.ones(8)]},
+        ]
+        before = [state_fingerprint(value) for value in values]
+        assert before == [state_fingerprint(value) for value in values]
+
+        values[0][3, 3] = 1
+        values[1].loc[0, "a"] = 5
+        values[2].count += 1
+        values[3]["embeddings"][0][0] = 2
+        after = [state_fingerprint(value) for value in values]
+        assert all(b != a for b, a in zip(before, after, strict=True))
+
+    def test_digests_are_not_memoized_within_an_event(self):
+        a = np.zeros(10)
+        token = LocalContext.event_id.set("event-1")
+        try:
+            before = state_fingerprint(a)
+            a[0] = 1
+            assert state_fingerprint(a) != before
+        finally:
+            LocalContext.event_id.reset(token)
+
+    def test_objects_that_cannot_be_walked(self):
+        lock = threading.Lock()
+        assert state_fingerprint(lock) == state_fingerprint(lock)
+        assert state_fingerprint(lock) != state_fingerprint(threading.Lock())
+
+        class Node:
+            pass
+
+        node = Node()
+        node.self = node  # type: ignore
+        assert state_fingerprint(node) == state_fingerprint(node)
+
+
 class TestResolveGenerator:
     def test_sync_generator(self):
         def gen(n):
@@ -313,6 +424,212 @@ class TestCacheDecorator:
             cache(add(1))
 
 
+class TestSingleFlight:
+    def test_concurrent_sync_misses_compute_once(self):
+        calls = 0
+        release = threading.Event()
+
+        @cache
+        def slow(x):
+            nonlocal calls
+            calls += 1
+            release.wait(5)
+            return [x]
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            futures = [executor.submit(slow, 1) for _ in range(4)]
+            time.sleep(0.1)
+            release.set()
+            results = [f.result() for f in futures]
+
+        assert calls == 1
+        assert results == [[1]] * 4
+
+    @pytest.mark.asyncio
+    async def test_concurrent_async_misses_compute_once(self):
+        calls = 0
+
+        @cache
+        async def slow(x):
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            return x * 2
+
+        assert await asyncio.gather(*(slow(2) for _ in range(5))) == [4] * 5
+        assert await slow(3) == 6
+        assert calls == 2
+
+    @pytest.mark.asyncio
+    async def test_async_generator_followers_replay_yields(self):
+        calls = 0
+
+        @cache
+        async def stream(n):
+            nonlocal calls
+            calls += 1
+            for i in range(n):
+                await asyncio.sleep(0.01)
+                yield i
+
+        async def consume():
+            return [value async for value in stream(3)]
+
+        leader = asyncio.ensure_future(consume())
+        await asyncio.sleep(0.015)
+        assert await asyncio.gather(leader, consume()) == [[0, 1, 2]] * 2
+        assert calls == 1
+
+    def test_sync_generator_followers_replay_yields(self):
+        calls = 0
+        started = threading.Event()
+        release = threading.Event()
+
+        @cache
+        def stream(n):
+            nonlocal calls
+            calls += 1
+            yield 0
+            started.set()
+            release.wait(5)
+            yield from range(1, n)
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            leader = executor.submit(lambda: list(stream(3)))
+            started.wait(5)
+            follower = executor.submit(lambda: list(stream(3)))
+            time.sleep(0.05)
+            release.set()
+            assert leader.result() == follower.result() == [0, 1, 2]
+        assert calls == 1
+
+    @pytest.mark.asyncio
+    async def test_slow_followers_replay_every_yield(self):
+        calls = 0
+
+        @cache
+        async def stream(n):
+            nonlocal calls
+            calls += 1
+            for i in range(n):
+                await asyncio.sleep(0.005)
+                yield i
+
+        async def consume():
+            values = []
+            async for value in stream(5):
+                values.append(value)
+                await asyncio.sleep(0.02)
+            return values
+
+        assert (
+            await asyncio.gather(*(consume() for _ in range(3))) == [list(range(5))] * 3
+        )
+        assert calls == 1
+
+    def test_slow_sync_followers_replay_every_yield(self):
+        @cache
+        def stream(n):
+            for i in range(n):
+                time.sleep(0.005)
+                yield i
+
+        def consume():
+            values = []
+            for value in stream(5):
+                values.append(value)
+                time.sleep(0.02)
+            return values
+
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            futures = [executor.submit(consume) for _ in range(3)]
+            assert [f.result() for f in futures] == [list(range(5))] * 3
+
+    @pytest.mark.asyncio
+    async def test_sync_generator_followers_do_not_starve_the_leader(self):
+        @cache
+        def stream(n):
+            for i in range(n):
+                time.sleep(0.01)
+                yield i
+
+        limiter = anyio.CapacityLimiter(2)
+
+        async def consume():
+            return [
+                value async for value in utils.SyncToAsyncIterator(stream(3), limiter)
+            ]
+
+        results = await asyncio.wait_for(
+            asyncio.gather(*(consume() for _ in range(6))), timeout=20
+        )
+        assert results == [[0, 1, 2]] * 6
+
+    @pytest.mark.asyncio
+    async def test_slow_sync_generators_run_once_for_all_followers(self):
+        calls = 0
+
+        @cache
+        def stream(n):
+            nonlocal calls
+            calls += 1
+            for i in range(n):
+                time.sleep(1.2)
+                yield i
+
+        limiter = anyio.CapacityLimiter(2)
+
+        async def consume():
+            return [
+                value async for value in utils.SyncToAsyncIterator(stream(2), limiter)
+            ]
+
+        results = await asyncio.wait_for(
+            asyncio.gather(*(consume() for _ in range(4))), timeout=20
+        )
+        assert results == [[0, 1]] * 4
+        assert calls == 1
+
+    def test_errors_are_shared_and_not_cached(self):
+        calls = 0
+        release = threading.Event()
+
+        @cache
+        def failing(x):
+            nonlocal calls
+            calls += 1
+            release.wait(5)
+            raise ValueError("boom")
+
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            futures = [executor.submit(failing, 1) for _ in range(3)]
+            time.sleep(0.1)
+            release.set()
+            for future in futures:
+                with pytest.raises(ValueError, match="boom"):
+                    future.result()
+        assert calls == 1
+
+        with pytest.raises(ValueError):
+            failing(1)
+        assert calls == 2
+
+    def test_follower_recomputes_when_leader_generator_is_closed(self):
+        calls = 0
+
+        @cache
+        def stream():
+            nonlocal calls
+            calls += 1
+            yield from range(3)
+
+        leader = stream()
+        assert next(leader) == 0
+        leader.close()
+        assert list(stream()) == [0, 1, 2]
+        assert calls == 2
+
+
 class TestCacheManual:
     def test_get_set(self):
         c = Cache()
@@ -354,6 +671,32 @@ class TestCacheManual:
         assert len(c) == 1
         assert c.get("a") is None
 
+    def test_stats(self):
+        c = Cache(max_size=2)
+        c.get("a")
+        c.set("a", v=1)
+        c.get("a")
+        c.set("b", v=2)
+        c.set("c", v=3)
+        assert c.stats() == {
+            "hits": 1,
+            "misses": 1,
+            "evictions": 1,
+            "expirations": 0,
+            "size": 2,
+        }
+
+        @cache
+        def double(x):
+            return x * 2
+
+        double(1)
+        double(1)
+        with ProbeCache(), pytest.raises(CacheMissError):
+            double(2)
+        assert double.cache.stats()["hits"] == 1
+        assert double.cache.stats()["misses"] == 1
+
     def test_manual_cache_hit_tracking(self):
         c = Cache()
         c.set("k", value=42)
@@ -399,3 +742,322 @@ class TestCacheManual:
 
         assert global_cache.get("shared") == {"value": 100}
         assert call_count == 3
+
+
+_square_calls = []
+
+
+def _square(x):
+    _square_calls.append(x)
+    return x * x
+
+
+class FakeRedis:
+    """
+    A local stand-in for the subset of the `redis.Redis` API used by the backend,
+    which runs Lua scripts with `lupa`. Like Redis Cluster, it only lets scripts
+    access the keys passed in KEYS.
+    """
+
+    def __init__(self):
+        self.strings = {}
+        self.zsets = {}
+        self.hashes = {}
+
+    def get(self, key):
+        return self.strings.get(key)
+
+    def set(self, key, value):
+        self.strings[key] = value
+
+    def zadd(self, key, mapping, xx=False):
+        zset = self.zsets.setdefault(key, {})
+        for member, score in mapping.items():
+            if not xx or member in zset:
+                zset[member] = score
+
+    def zcard(self, key):
+        return len(self.zsets.get(key, {}))
+
+    def zrange(self, key, start, end):
+        members = sorted(self.zsets.get(key, {}).items(), key=lambda m: m[1])
+        members = members[start:] if end == -1 else members[start : end + 1]
+        return [member.encode() for member, _ in members]
+
+    def zrangebyscore(self, key, min, max):
+        members = sorted(self.zsets.get(key, {}).items(), key=lambda m: m[1])
+        return [member.encode() for member, score in members if score <= max]
+
+    def zscore(self, key, member):
+        return self.zsets.get(key, {}).get(member)
+
+    def zrem(self, key, *members):
+        for member in members:
+            self.zsets.get(key, {}).pop(member, None)
+
+    def hset(self, key, field, value):
+        self.hashes.setdefault(key, {})[field] = value
+
+    def hget(self, key, field):
+        return self.hashes.get(key, {}).get(field)
+
+    def hmget(self, key, fields):
+        return [self.hashes.get(key, {}).get(field) for field in fields]
+
+    def hvals(self, key):
+        return list(self.hashes.get(key, {}).values())
+
+    def hdel(self, key, *fields):
+        for field in fields:
+            self.hashes.get(key, {}).pop(field, None)
+
+    def exists(self, key):
+        return int(key in self.strings or key in self.zsets or key in self.hashes)
+
+    def incrby(self, key, amount):
+        self.strings[key] = int(self.strings.get(key, 0)) + int(amount)
+        return self.strings[key]
+
+    def register_script(self, script):
+        import lupa
+
+        lua = lupa.LuaRuntime(encoding=None)
+
+        def to_lua(value):
+            if value is None:
+                return False
+            if isinstance(value, list):
+                return lua.table_from([to_lua(v) for v in value])
+            if isinstance(value, str):
+                return value.encode()
+            return value
+
+        allowed_keys = set()
+
+        def call(command, key, *args):
+            command = command.decode().lower()
+            key = key.decode()
+            assert key in allowed_keys, f"{key} was not passed in KEYS"
+            # Values are kept as bytes, names of keys, members and fields as str
+            values = args
+            args = [
+                arg.decode("latin-1") if isinstance(arg, bytes) else arg for arg in args
+            ]
+            if command == "hset":
+                result = self.hset(key, args[0], values[1])
+            elif command == "zadd":
+                xx = args[0] == "XX"
+                score, member = args[1:] if xx else args
+                result = self.zadd(key, {member: float(score)}, xx=xx)
+            elif command == "zrange":
+                result = self.zrange(key, int(args[0]), int(args[1]))
+            elif command == "zrangebyscore":
+                result = self.zrangebyscore(key, args[0], float(args[1]))
+            elif command == "decrby":
+                result = self.incrby(key, -int(args[0]))
+            else:
+                result = getattr(self, command)(key, *args)
+            return to_lua(result)
+
+        lua.globals()[b"redis"] = lua.table_from({b"call": call})
+        function = lua.eval(f"function(KEYS, ARGV) {script} end")
+
+        def run(keys, args):
+            allowed_keys.clear()
+            allowed_keys.update(keys)
+            result = function(
+                lua.table_from([to_lua(k) for k in keys]),
+                lua.table_from(
+                    [a if isinstance(a, bytes) else str(a).encode() for a in args]
+                ),
+            )
+            if result is False:
+                return None
+            return list(result.values()) if lupa.lua_type(result) else result
+
+        return run
+
+
+@pytest.fixture(params=["sqlite", "redis"])
+def make_backend(request, tmp_path):
+    if request.param == "sqlite":
+        return lambda: SQLiteCacheBackend(tmp_path / "cache.db")
+    client = FakeRedis()
+    return lambda: RedisCacheBackend(client=client)
+
+
+class TestEstimateSize:
+    def test_buffers_are_counted_exactly(self):
+        arr = np.zeros((100, 100), dtype=np.float64)
+        assert 80_000 < _estimate_size(arr) < 81_000
+        # A view retains the whole array
+        assert 80_000 < _estimate_size(arr[:1]) < 81_000
+        # Pillow stores RGB images with 4 bytes per pixel
+        image = Image.new("RGB", (100, 100))
+        assert 40_000 < _estimate_size(image) < 41_000
+
+    def test_shared_objects_are_counted_once(self):
+        arr = np.zeros(10_000, dtype=np.uint8)
+        assert _estimate_size([arr, arr, {"a": arr}]) < 11_000
+
+    def test_deeply_nested_objects(self):
+        class Node:
+            def __init__(self, next_node):
+                self.next = next_node
+
+        head = None
+        for _ in range(5000):
+            head = Node(head)
+        assert _estimate_size(head) > 5000 * sys.getsizeof(Node(None))
+
+        c = Cache(max_memory="10mb")
+        c.set("linked", head=head)
+        assert c.get("linked")["head"] is head
+
+    def test_files_in_the_cache_directory_are_counted(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("GRADIO_TEMP_DIR", str(tmp_path))
+        path = tmp_path / "output.bin"
+        path.write_bytes(b"0" * 50_000)
+        assert _estimate_size({"path": str(path)}) > 50_000
+        assert _estimate_size([str(path), str(path)]) < 51_000
+        other_file = tmp_path.parent / "other.bin"
+        assert _estimate_size(str(other_file)) < 1000
+
+
+class TestCacheBackends:
+    def test_entries_are_shared_between_backend_instances(self, make_backend):
+        writer = Cache(backend=make_backend())
+        reader = Cache(backend=make_backend())
+        df = pd.DataFrame({"a": [1, 2], "b": ["x", "y"]})
+        image = Image.new("RGB", (4, 4), color="red")
+        writer.set("k", arr=np.arange(10), df=df, image=image)
+
+        entry = reader.get("k")
+        assert entry is not None
+        np.testing.assert_array_equal(entry["arr"], np.arange(10))
+        pd.testing.assert_frame_equal(entry["df"], df)
+        assert entry["image"].tobytes() == image.tobytes()
+        assert reader.keys() == ["k"]
+        assert Cache(backend=make_backend(), name="other").get("k") is None
+
+    def test_decorated_function_is_computed_once(self, make_backend):
+        _square_calls.clear()
+        first = cache(_square, backend=make_backend())
+        second = cache(_square, backend=make_backend())
+        assert first(3) == 9
+        assert second(3) == 9
+        assert len(_square_calls) == 1
+
+    def test_functions_with_the_same_name_do_not_share_entries(self, make_backend):
+        backend = make_backend()
+        double, triple = (lambda x: x * 2), (lambda x: x * 3)
+        assert cache(double, backend=backend)(2) == 4
+        assert cache(triple, backend=backend)(2) == 6
+        assert cache(_square, backend=backend, key=lambda kw: 0)(2) == 4
+        assert cache(_square, backend=backend, key=lambda kw: 0)(3) == 9
+        assert cache(_square, backend=backend, max_size=1)(3) == 9
+
+        def make_adder(n):
+            def add(x):
+                return x + n
+
+            return add
+
+        with pytest.raises(ValueError, match="closure"):
+            cache(make_adder(1), backend=backend)
+        assert cache(make_adder(1))(1) == 2
+
+        def power(x, n):
+            return x**n
+
+        assert cache(functools.partial(power, n=2), backend=backend)(3) == 9
+        assert cache(functools.partial(power, n=3), backend=backend)(3) == 27
+
+    def test_eviction_by_count_and_memory(self, make_backend):
+        c = Cache(max_size=2, backend=make_backend())
+        c.set("a", v=1)
+        c.set("b", v=2)
+        assert c.get("a") == {"v": 1}
+        c.set("c", v=3)
+        assert len(c) == 2
+        assert c.get("b") is None
+
+        c = Cache(max_size=0, max_memory="1kb", backend=make_backend(), name="mem")
+        c.set("a", data=np.zeros(100, dtype=np.float64))
+        c.set("b", data=np.zeros(100, dtype=np.float64))
+        assert len(c) == 1
+        assert c.get("a") is None
+
+    def test_ttl(self, make_backend):
+        c = Cache(backend=make_backend(), ttl=0.05)
+        c.set("a", v=1)
+        assert c.get("a") == {"v": 1}
+        time.sleep(0.1)
+        assert c.get("a") is None
+        c.set("b", v=2)
+        c.set("c", v=3)
+        time.sleep(0.1)
+        c.set("d", v=4)
+        assert c.keys() == ["d"]
+        assert c.stats()["expirations"] == 3
+
+    def test_per_session(self, make_backend):
+        c = Cache(per_session=True, backend=make_backend())
+        with session_context("session-1"):
+            c.set("k", value=1)
+        with session_context("session-2"):
+            c.set("k", value=2)
+            assert c.keys() == ["k"]
+
+        clear_session_caches("session-1")
+
+        with session_context("session-1"):
+            assert c.get("k") is None
+        with session_context("session-2"):
+            assert c.get("k") == {"value": 2}
+
+    def test_sqlite_hits_do_not_write(self, tmp_path):
+        backend = SQLiteCacheBackend(tmp_path / "cache.db")
+        backend.put("c", "a", {"v": 1}, 1, 2, None)
+        backend.put("c", "b", {"v": 2}, 1, 2, None)
+        statements = []
+        backend._connection().set_trace_callback(statements.append)
+        for _ in range(10):
+            assert backend.get("c", "a") == {"v": 1}
+        assert not [s for s in statements if not s.startswith("SELECT")]
+        # The hits are taken into account when evicting
+        backend.put("c", "c", {"v": 3}, 1, 2, None)
+        assert backend.get("c", "b") is None
+        assert backend.get("c", "a") == {"v": 1}
+
+    def test_redis_put_is_a_single_round_trip(self, monkeypatch):
+        client = FakeRedis()
+        backend = RedisCacheBackend(client=client)
+        total = "{gradio:cache:c}:total"
+        # All the keys of a namespace are in the same Redis Cluster slot
+        assert all(k.startswith("{gradio:cache:c}:") for k in backend._keys("c"))
+        backend.put("c", "a", {"v": 1}, 100, 0, 250)
+        backend.put("c", "b", {"v": 2}, 100, 0, 250)
+        # Overwriting an entry replaces its size in the running total
+        backend.put("c", "a", {"v": 3}, 50, 0, 250)
+        assert client.strings[total] == 150
+
+        calls = []
+        hvals = client.hvals
+        monkeypatch.setattr(
+            client, "hvals", lambda key: calls.append("hvals") or hvals(key)
+        )
+        put_script = backend._put_script
+        monkeypatch.setattr(
+            backend,
+            "_put_script",
+            lambda **kwargs: calls.append("script") or put_script(**kwargs),
+        )
+        assert backend.put("c", "c", {"v": 4}, 150, 0, 250) == (1, 0)
+        # The entry was written and evicted in one call, without summing the sizes
+        assert calls == ["script"]
+        assert backend.get("c", "b") is None
+        assert client.strings[total] == 200
+
+        backend.clear("c")
+        assert client.strings[total] == 0
@@ -176,3 +176,34 @@ def test_all_components_have_change_event(io_components):
     for component in io_components:
         with gr.Blocks():
             component().change(lambda: None)
+
+
+def test_api_info_schema_is_derived_once_per_data_model(monkeypatch):
+    class Payload(GradioModel):
+        text: str
+
+    calls = []
+    original = Payload.model_json_schema
+
+    def model_json_schema(*args, **kwargs):
+        calls.append(1)
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(Payload, "model_json_schema", model_json_schema)
+    monkeypatch.setattr(gr.Chatbot, "data_model", Payload)
+
+    infos = [gr.Chatbot(render=False).api_info() for _ in range(5)]
+
+    assert len(calls) == 1
+    assert infos[0] == infos[4]
+    assert infos[0]["properties"] == {"text": {"title": "Text", "type": "string"}}
+    infos[0]["additional_description"] = "changed"
+    assert infos[1]["additional_description"] is None
+
+
+def test_api_info_follows_the_data_model_of_each_instance():
+    single = gr.File(file_count="single", render=False).api_info()
+    multiple = gr.File(file_count="multiple", render=False).api_info()
+
+    assert single["title"] == "FileData"
+    assert multiple["type"] == "array"
@@ -1,3 +1,5 @@
+import asyncio
+import errno
 import hashlib
 import json
 import os
@@ -57,6 +59,114 @@ class TestTempFileManagement:
         assert len([f for f in gradio_temp_dir.glob("**/*") if f.is_file()]) == 2
         assert Path(f).name == "cheetah1-copy.jpg"
 
+    def test_blob_index_skips_rehashing_and_clones_duplicates(
+        self, gradio_temp_dir, tmp_path
+    ):
+        source = tmp_path / "source.txt"
+        source.write_bytes(b"abc" * 1000)
+        duplicate = tmp_path / "duplicate.txt"
+        duplicate.write_bytes(b"abc" * 1000)
+
+        with patch.object(
+            processing_utils, "hash_file", wraps=processing_utils.hash_file
+        ) as hash_file:
+            f1 = processing_utils.save_file_to_cache(source, cache_dir=gradio_temp_dir)
+            processing_utils.save_file_to_cache(source, cache_dir=gradio_temp_dir)
+            assert hash_file.call_count == 1
+
+            f2 = processing_utils.save_file_to_cache(
+                duplicate, cache_dir=gradio_temp_dir
+            )
+            assert hash_file.call_count == 2
+        assert Path(f1).parent == Path(f2).parent
+        assert not os.path.samefile(f1, f2)
+        # Editing one copy in place, as user code may do, leaves the other intact
+        with open(f2, "r+b") as f:
+            f.write(b"xyz")
+        assert Path(f1).read_bytes() == b"abc" * 1000
+
+        # A file that has changed since it was indexed is hashed again
+        source.write_bytes(b"xyz" * 1000)
+        assert processing_utils.blob_index.lookup(source) is None
+        f3 = processing_utils.save_file_to_cache(source, cache_dir=gradio_temp_dir)
+        assert Path(f3).read_bytes() == b"xyz" * 1000
+        assert Path(f1).read_bytes() == b"abc" * 1000
+
+    @pytest.mark.asyncio
+    async def test_async_save_file_to_cache_shares_pending_copies(
+        self, gradio_temp_dir, tmp_path
+    ):
+        source = tmp_path / "video.mp4"
+        source.write_bytes(os.urandom(1 << 20))
+
+        with patch.object(
+            processing_utils,
+            "save_file_to_cache",
+            wraps=processing_utils.save_file_to_cache,
+        ) as save_file_to_cache:
+            paths = await asyncio.gather(
+                *[
+                    processing_utils.async_save_file_to_cache(source, gradio_temp_dir)
+                    for _ in range(5)
+                ]
+            )
+            assert save_file_to_cache.call_count == 1
+            assert len(set(paths)) == 1
+            assert Path(paths[0]).read_bytes() == source.read_bytes()
+
+            # The cached copy is known to be up to date, so it is returned directly
+            path = await processing_utils.async_save_file_to_cache(
+                source, gradio_temp_dir
+            )
+            assert path == paths[0]
+            assert save_file_to_cache.call_count == 1
+
+            source.write_bytes(b"changed")
+            path = await processing_utils.async_save_file_to_cache(
+                source, gradio_temp_dir
+            )
+            assert save_file_to_cache.call_count == 2
+            assert Path(path).read_bytes() == b"changed"
+        assert not processing_utils._pending_saves
+
+    def test_copy_file_falls_back_to_copy2(self, tmp_path, monkeypatch):
+        source = tmp_path / "source.bin"
+        source.write_bytes(b"abc" * 1000)
+        os.utime(source, (0, 1_000_000))
+
+        def copy_file_range(*args):
+            raise OSError(errno.EXDEV, "Invalid cross-device link")
+
+        monkeypatch.setattr(os, "copy_file_range", copy_file_range, raising=False)
+        processing_utils.copy_file(source, tmp_path / "copy.bin")
+
+        assert (tmp_path / "copy.bin").read_bytes() == source.read_bytes()
+        assert (tmp_path / "copy.bin").stat().st_mtime == 1_000_000
+
+    def test_clone_file(self, tmp_path):
+        src = tmp_path / "src.bin"
+        src.write_bytes(b"abc")
+        dst = tmp_path / "dst.bin"
+        if processing_utils.clone_file(src, dst):
+            assert dst.read_bytes() == b"abc"
+            assert not os.path.samefile(src, dst)
+        else:
+            assert not dst.exists()
+        # An existing file is never overwritten
+        dst.write_bytes(b"xyz")
+        assert not processing_utils.clone_file(src, dst)
+        assert dst.read_bytes() == b"xyz"
+
+    def test_save_bytes_to_cache_does_not_write_through_links(self, gradio_temp_dir):
+        f1 = processing_utils.save_bytes_to_cache(b"abc", "a.txt", gradio_temp_dir)
+        f2 = processing_utils.save_bytes_to_cache(b"abc", "b.txt", gradio_temp_dir)
+        assert not os.path.samefile(f1, f2)
+        Path(f2).unlink()
+        Path(f2).write_bytes(b"changed")
+        f2 = processing_utils.save_bytes_to_cache(b"abc", "b.txt", gradio_temp_dir)
+        assert Path(f2).read_bytes() == b"abc"
+        assert Path(f1).read_bytes() == b"abc"
+
     def test_save_b64_to_cache(self, gradio_temp_dir, media_data):
         base64_file_1 = media_data.BASE64_IMAGE
         base64_file_2 = media_data.BASE64_AUDIO["data"]
@@ -111,6 +221,107 @@ class TestTempFileManagement:
         assert len([f for f in gradio_temp_dir.glob("**/*") if f.is_file()]) == 1
 
 
+class TestTempFileIndex:
+    @pytest.fixture
+    def index(self, monkeypatch):
+        index = processing_utils.TempFileIndex()
+        monkeypatch.setattr(processing_utils, "temp_file_index", index)
+        return index
+
+    def make_files(self, directory, n, size=10):
+        paths = []
+        for i in range(n):
+            path = directory / f"{i}.txt"
+            path.write_bytes(b"a" * size)
+            paths.append(str(path))
+        return paths
+
+    def test_records_files_added_to_temp_file_sets(self, index, tmp_path):
+        a, b = self.make_files(tmp_path, 2)
+        temp_files = processing_utils.TempFileSet()
+        temp_files.add(a)
+        temp_files.update([a, b])
+        assert len(index) == 2
+        assert index.total_size == 20
+        temp_files.discard(a)
+        assert a not in index
+        assert index.total_size == 10
+
+    def test_evicts_expired_files_of_the_given_owners(self, index, tmp_path):
+        a, b, c = self.make_files(tmp_path, 3)
+        mine, other = processing_utils.TempFileSet(), processing_utils.TempFileSet()
+        mine.update([a, b])
+        other.add(c)
+        index.pin(b)
+
+        assert index.evict(age=3600, owners=[mine]) == 0
+        assert index.evict(age=-1, owners=[mine]) == 1
+        assert not os.path.exists(a)
+        assert mine == {b}
+        assert os.path.exists(b)
+        assert os.path.exists(c)
+        # Files that have been checked are not rescanned
+        assert index.evict(age=-1, owners=[mine]) == 0
+        assert index.evict(age=-1) == 1
+        assert other == set()
+
+    def test_evicts_least_recently_used_files_over_budget(self, index, tmp_path):
+        a, b, c, d = self.make_files(tmp_path, 4)
+        temp_files = processing_utils.TempFileSet()
+        owners = [temp_files]
+        index.set_max_size(owners, 25)
+        temp_files.update([a, b])
+        index.touch(a)
+        temp_files.add(c)
+        assert temp_files == {a, c}
+        assert not os.path.exists(b)
+        assert index.total_size == 20
+
+        index.set_max_size(owners, None)
+        temp_files.add(d)
+        assert index.evict(max_size=10) == 2
+        assert temp_files == {d}
+        assert index.total_size == 10
+
+    def test_budgets_only_evict_the_files_of_their_app(self, index, tmp_path):
+        a, b, c, d, shared = self.make_files(tmp_path, 5)
+        limited, unlimited = (
+            processing_utils.TempFileSet(),
+            processing_utils.TempFileSet(),
+        )
+        owners = [limited]
+        index.set_max_size(owners, 25)
+        unlimited.update([a, b, shared])
+        limited.update([shared, c])
+        assert os.path.exists(a) and os.path.exists(b)
+
+        limited.add(d)
+        assert limited == {c, d}
+        assert unlimited == {a, b, shared}
+        assert os.path.exists(shared)
+
+        assert index.evict(max_size=10, owners=owners) == 1
+        assert limited == {d}
+        assert index.total_size == 40
+
+    def test_files_moved_into_place_later_are_counted(self, index, tmp_path):
+        from gradio.route_utils import move_uploaded_files_to_cache
+
+        upload, b = self.make_files(tmp_path, 2, size=30)
+        dest = str(tmp_path / "digest" / "upload.txt")
+        os.makedirs(os.path.dirname(dest))
+        temp_files = processing_utils.TempFileSet()
+        index.set_max_size([temp_files], 50)
+        temp_files.add(dest)
+        assert index.total_size == 0
+
+        move_uploaded_files_to_cache([upload], [dest])
+        assert index.total_size == 30
+        temp_files.add(b)
+        assert temp_files == {b}
+        assert not os.path.exists(dest)
+
+
 class TestImagePreprocessing:
     def test_encode_plot_to_base64(self):
         with utils.MatplotlibBackendMananger():
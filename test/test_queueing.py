@@ -2,6 +2,7 @@ import asyncio
 import json
 import sys
 import time
+from types import SimpleNamespace
 from unittest.mock import patch
 
 import gradio_client as grc
@@ -9,6 +10,7 @@ import pytest
 from fastapi.testclient import TestClient
 
 import gradio as gr
+from gradio.profiling import QuantileSketch
 from gradio.route_utils import API_PREFIX
 
 
@@ -177,8 +179,8 @@ class TestQueueing:
     "loop returns on Windows CI (cancellation does not propagate within a "
     "reasonable wait). Passes on Linux/macOS.",
 )
-def test_heartbeat_task_cancelled_after_stream_completes():
-    """Verify the heartbeat task is cancelled when the SSE stream ends normally."""
+def test_heartbeat_stops_after_stream_completes():
+    """Verify the connection leaves the heartbeat wheel when the SSE stream ends normally."""
     with gr.Blocks() as demo:
         name = gr.Textbox()
         output = gr.Textbox()
@@ -190,15 +192,15 @@ def test_heartbeat_task_cancelled_after_stream_completes():
 
     app, local_url, _ = demo.launch(prevent_thread_lock=True)
 
-    heartbeat_tasks = []
-    original_create_task = asyncio.create_task
+    added = []
+    heartbeats = demo._queue.heartbeats
+    original_add = heartbeats.add
 
-    def tracking_create_task(coro, **kwargs):
-        task = original_create_task(coro, **kwargs)
-        heartbeat_tasks.append(task)
-        return task
+    def tracking_add(messages):
+        added.append(messages)
+        return original_add(messages)
 
-    with patch("gradio.routes.asyncio.create_task", side_effect=tracking_create_task):
+    with patch.object(heartbeats, "add", side_effect=tracking_add):
         test_client = TestClient(app)
         r = test_client.post(
             f"{API_PREFIX}/queue/join",
@@ -223,14 +225,220 @@ def test_heartbeat_task_cancelled_after_stream_completes():
                     got_completed = True
         assert got_completed
 
-    assert len(heartbeat_tasks) > 0, "No heartbeat tasks were created"
-    for task in heartbeat_tasks:
-        assert task.cancelled() or task.done(), (
-            "Heartbeat task was not cancelled after stream completed"
-        )
+    assert len(added) == 1, "The stream was not registered for heartbeats"
+    assert len(heartbeats) == 0, "The stream was not removed from the heartbeat wheel"
     demo.close()
 
 
+class TestHeartbeatWheel:
+    def test_ticks_only_idle_connections_in_one_slot(self):
+        from gradio.queueing import HeartbeatWheel, SessionMessageQueue
+        from gradio.server_messages import LogMessage
+
+        wheel = HeartbeatWheel(interval=1, n_slots=2)
+        idle, busy, other = (SessionMessageQueue() for _ in range(3))
+        busy.put_nowait(LogMessage(log="hi", level="info", title="Info"))
+        handles = [wheel.add(idle), wheel.add(busy)]
+        wheel.tick(0)
+        # Joins the slot that was just ticked, so it is not sent a heartbeat
+        # until that slot comes around again
+        handles.append(wheel.add(other))
+        assert len(wheel) == 3
+
+        wheel.tick(1)
+        wheel.tick(1)
+        assert idle.qsize() == 1  # At most one unread heartbeat
+        assert busy.qsize() == 1  # Not sent a heartbeat while it has unread messages
+        assert other.empty()
+        wheel.tick(0)
+        assert other.qsize() == 1
+
+        for handle in handles:
+            wheel.remove(handle)
+        assert len(wheel) == 0
+
+    @pytest.mark.asyncio
+    async def test_wait_for_room(self):
+        from gradio.queueing import SessionMessageQueue
+        from gradio.server_messages import HeartbeatMessage
+
+        messages = SessionMessageQueue(max_unread=2)
+        messages.put_nowait(HeartbeatMessage())
+        messages.put_nowait(HeartbeatMessage())
+        assert messages.backlogged
+
+        waiter = asyncio.create_task(messages.wait_for_room(timeout=5))
+        await asyncio.sleep(0)
+        assert not waiter.done()
+        await messages.get()
+        await asyncio.wait_for(waiter, 1)
+        assert not messages.backlogged
+
+    def test_put_wakes_up_a_reader_on_another_loop(self):
+        import threading
+
+        from gradio.queueing import SessionMessageQueue
+        from gradio.server_messages import HeartbeatMessage
+
+        messages = SessionMessageQueue()
+        received = []
+
+        def read():
+            received.append(asyncio.run(asyncio.wait_for(messages.get(), 5)))
+
+        reader = threading.Thread(target=read)
+        reader.start()
+        while messages.loop is None:
+            time.sleep(0.01)
+
+        async def produce():
+            messages.put_nowait(HeartbeatMessage())
+
+        asyncio.run(produce())
+        reader.join(5)
+        assert isinstance(received[0], HeartbeatMessage)
+
+
+@pytest.mark.asyncio
+async def test_cancelled_stream_cleans_up_without_sending_anything():
+    from gradio.queueing import SessionMessageQueue
+
+    with gr.Blocks() as demo:
+        gr.Textbox()
+
+    app, _, _ = demo.launch(prevent_thread_lock=True)
+    try:
+        queue = demo._queue
+        queue.pending_messages_per_session["s"] = SessionMessageQueue()
+        sent = []
+
+        async def receive():
+            await asyncio.Event().wait()
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0", "spec_version": "2.4"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": f"{API_PREFIX}/queue/data",
+            "raw_path": f"{API_PREFIX}/queue/data".encode(),
+            "root_path": "",
+            "query_string": b"session_hash=s",
+            "headers": [],
+            "client": ("127.0.0.1", 1234),
+            "server": ("testserver", 80),
+        }
+        stream = asyncio.ensure_future(app(scope, receive, send))
+        await asyncio.sleep(0.2)
+        with patch.object(queue, "clean_events", wraps=queue.clean_events) as clean:
+            stream.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await stream
+        assert not any(message.get("body") for message in sent)
+        clean.assert_awaited_once_with(session_hash="s")
+        assert "s" not in queue.pending_messages_per_session
+        assert len(queue.heartbeats) == 0
+    finally:
+        demo.close()
+
+
+def test_slow_reader_holds_back_generator():
+    import gradio.queueing
+
+    produced = []
+
+    def count():
+        for i in range(50):
+            produced.append(i)
+            yield i
+
+    with gr.Blocks() as demo:
+        output = gr.Number()
+        demo.load(count, None, output)
+
+    app, _, _ = demo.launch(prevent_thread_lock=True)
+    try:
+        demo._queue.MAX_UNREAD_MESSAGES_PER_SESSION = 5
+        test_client = TestClient(app)
+        r = test_client.post(
+            f"{API_PREFIX}/queue/join",
+            json={
+                "data": [],
+                "fn_index": 0,
+                "event_data": None,
+                "session_hash": "slow",
+                "trigger_id": None,
+            },
+        )
+        assert r.status_code == 200
+        messages = demo._queue.pending_messages_per_session["slow"]
+        assert isinstance(messages, gradio.queueing.SessionMessageQueue)
+        time.sleep(1)
+        # The client has not read anything, so the generator is paused once the
+        # session has `MAX_UNREAD_MESSAGES_PER_SESSION` unread messages
+        assert len(produced) < 50
+        assert messages.qsize() <= 5 + 1
+
+        r = test_client.get(f"{API_PREFIX}/queue/data?session_hash=slow")
+        outputs = [
+            json.loads(line[5:]) for line in r.iter_lines() if line.startswith("data:")
+        ]
+        assert outputs[-2]["msg"] == "process_completed"
+        assert len(produced) == 50
+    finally:
+        demo.close()
+
+
+def test_queue_data_negotiates_msgpack_stream():
+    pytest.importorskip("msgpack")
+    from gradio_client.utils import MSGPACK_STREAM_MEDIA_TYPE, iter_msgpack_messages
+
+    with gr.Blocks() as demo:
+        name = gr.Textbox()
+        output = gr.Textbox()
+        name.submit(lambda x: f"Hello, {x}!", name, output)
+
+    app, _, _ = demo.launch(prevent_thread_lock=True)
+    test_client = TestClient(app)
+
+    def join(session_hash):
+        r = test_client.post(
+            f"{API_PREFIX}/queue/join",
+            json={
+                "data": ["msgpack"],
+                "fn_index": 0,
+                "event_data": None,
+                "session_hash": session_hash,
+                "trigger_id": None,
+            },
+        )
+        assert r.status_code == 200
+
+    try:
+        join("binary")
+        r = test_client.get(
+            f"{API_PREFIX}/queue/data?session_hash=binary",
+            headers={"Accept": f"{MSGPACK_STREAM_MEDIA_TYPE}, text/event-stream"},
+        )
+        assert r.headers["content-type"].startswith(MSGPACK_STREAM_MEDIA_TYPE)
+        messages = list(iter_msgpack_messages([r.content]))
+        completed = next(m for m in messages if m["msg"] == "process_completed")
+        assert completed["output"]["data"] == ["Hello, msgpack!"]
+        assert messages[-1]["msg"] == "close_stream"
+
+        # Clients that do not ask for msgpack keep getting server-sent events
+        join("text")
+        r = test_client.get(f"{API_PREFIX}/queue/data?session_hash=text")
+        assert r.headers["content-type"].startswith("text/event-stream")
+        assert '"Hello, msgpack!"' in r.text
+    finally:
+        demo.close()
+
+
 def test_cancel_removes_pending_event_from_queue():
     """Cancelling a queued (not yet running) event should remove it from the queue."""
     with gr.Blocks() as demo:
@@ -347,6 +555,30 @@ def test_analytics_summary(monkeypatch):
         assert event_analytics["functions"]["predict"]["total_requests"] == 4
 
 
+def test_quantile_sketch_is_accurate_and_mergeable():
+    values = [(i % 997) * 1.7 + 0.5 for i in range(20_000)]
+    sketch, first_half, second_half = (
+        QuantileSketch(),
+        QuantileSketch(),
+        QuantileSketch(),
+    )
+    for i, value in enumerate(values):
+        sketch.add(value)
+        (first_half if i % 2 else second_half).add(value)
+    first_half.merge(second_half)
+
+    values.sort()
+    for q in [0.5, 0.9, 0.99]:
+        exact = values[int(q * (len(values) - 1))]
+        assert sketch.quantile(q) == pytest.approx(exact, rel=0.02)
+        assert first_half.quantile(q) == sketch.quantile(q)
+    assert sketch.count == 20_000
+    assert sketch.min == values[0]
+    assert sketch.max == values[-1]
+    assert len(sketch._buckets) < 500
+    assert QuantileSketch().quantile(0.5) is None
+
+
 class TestQueueDoesNotAccumulate:
     def test_finished_events_are_not_retained(self, connect):
         with gr.Blocks() as demo:
@@ -403,3 +635,438 @@ class TestQueueDoesNotAccumulate:
             ]
             == 8
         )
+
+
+def test_scheduler_does_not_poll_when_idle(connect):
+    with gr.Blocks() as demo:
+        box = gr.Textbox()
+        out = gr.Textbox()
+        box.submit(lambda x: x, box, out)
+
+    with connect(demo) as client:
+        calls = []
+        original_get_events = demo._queue.get_events
+
+        def counting_get_events():
+            calls.append(time.monotonic())
+            return original_get_events()
+
+        demo._queue.get_events = counting_get_events
+        time.sleep(0.5)
+        assert calls == []
+
+        assert client.predict("a", api_name="/lambda") == "a"
+        assert len(calls) >= 1
+
+
+@pytest.mark.asyncio
+async def test_clean_events_uses_session_index():
+    from fastapi import Request
+
+    from gradio.queueing import Event, Queue
+
+    with gr.Blocks() as demo:
+        box = gr.Textbox()
+        box.submit(lambda x: x, box, box)
+
+    fn = next(iter(demo.default_config.fns.values()))
+    queue = Queue(
+        live_updates=True,
+        concurrency_count=1,
+        update_intervals=1,
+        max_size=None,
+        blocks=demo,
+    )
+    queue.create_event_queue_for_fn(fn)
+    event_queue = queue.event_queue_per_concurrency_id[fn.concurrency_id]
+    request = Request({"type": "http", "headers": [], "path": "/"})
+    events = [
+        Event(session_hash=session, fn=fn, request=request, username=None)
+        for session in ["a", "b", "a", "b"]
+    ]
+    for event in events:
+        event_queue.queue.append(event)
+        queue._index_event(event)
+
+    await queue.clean_events(session_hash="a")
+    assert list(event_queue.queue) == [events[1], events[3]]
+    assert set(queue.event_ids_to_events) == {events[1]._id, events[3]._id}
+    assert "a" not in queue.events_per_session
+
+    await queue.clean_events(event_id=events[3]._id)
+    assert list(event_queue.queue) == [events[1]]
+    assert queue.events_per_session == {"b": {events[1]._id: events[1]}}
+
+
+@pytest.mark.asyncio
+async def test_events_that_died_before_their_job_started_are_unindexed():
+    from fastapi import Request
+
+    from gradio.queueing import Event, Queue, SessionMessageQueue
+
+    with gr.Blocks() as demo:
+        box = gr.Textbox()
+        box.submit(lambda x: x, box, box, batch=True)
+
+    fn = next(iter(demo.default_config.fns.values()))
+    queue = Queue(
+        live_updates=True,
+        concurrency_count=1,
+        update_intervals=1,
+        max_size=None,
+        blocks=demo,
+    )
+    queue.server_app = SimpleNamespace(iterators={})
+    queue.create_event_queue_for_fn(fn)
+    request = Request({"type": "http", "headers": [], "path": "/"})
+    dead, awake = (
+        Event(session_hash=session, fn=fn, request=request, username=None)
+        for session in ["a", "b"]
+    )
+    dead.alive = False
+    queue.pending_messages_per_session["b"] = SessionMessageQueue(10)
+    for event in [dead, awake]:
+        queue._index_event(event)
+        queue.event_analytics[event._id] = {
+            "function": "lambda",
+            "status": "queued",
+            "process_time": None,
+        }
+
+    # The awake event has no data, so the job fails once it has started
+    await queue.process_events([dead, awake], True, time.time(), fn)
+
+    assert queue.event_ids_to_events == {}
+    assert queue.events_per_session == {}
+    assert queue.event_analytics[dead._id]["status"] == "cancelled"
+    assert queue.event_analytics[awake._id]["status"] == "failed"
+
+
+def test_batch_wait_ms_holds_batch_until_full(connect):
+    batch_sizes = []
+
+    def batch_fn(words):
+        batch_sizes.append(len(words))
+        return ([w.upper() for w in words],)
+
+    with gr.Blocks() as demo:
+        box = gr.Textbox()
+        out = gr.Textbox()
+        box.submit(
+            batch_fn,
+            box,
+            out,
+            batch=True,
+            max_batch_size=3,
+            batch_wait_ms=5000,
+            api_name="upper",
+        )
+
+    with connect(demo) as client:
+        start = time.monotonic()
+        jobs = [client.submit(word, api_name="/upper") for word in ["a", "b", "c"]]
+        assert [job.result() for job in jobs] == ["A", "B", "C"]
+        assert batch_sizes == [3]
+        assert time.monotonic() - start < 5
+
+
+def test_batch_wait_ms_dispatches_partial_batch_after_deadline(connect):
+    batch_sizes = []
+
+    def batch_fn(words):
+        batch_sizes.append(len(words))
+        return ([w.upper() for w in words],)
+
+    with gr.Blocks() as demo:
+        box = gr.Textbox()
+        out = gr.Textbox()
+        box.submit(
+            batch_fn,
+            box,
+            out,
+            batch=True,
+            max_batch_size=4,
+            batch_wait_ms=300,
+            api_name="upper",
+        )
+
+    with connect(demo) as client:
+        assert client.predict("a", api_name="/upper") == "A"
+        assert batch_sizes == [1]
+
+
+def make_queue(**kwargs):
+    from gradio.queueing import Queue
+
+    with gr.Blocks() as demo:
+        box = gr.Textbox()
+        box.submit(lambda x: x, box, box, concurrency_limit=None)
+        box.change(lambda x: x, box, box, queue_priority=1, concurrency_id="fast")
+
+    queue = Queue(
+        live_updates=True,
+        concurrency_count=1,
+        update_intervals=1,
+        max_size=None,
+        blocks=demo,
+        **kwargs,
+    )
+    fns = list(demo.default_config.fns.values())
+    for fn in fns:
+        queue.create_event_queue_for_fn(fn)
+    return queue, fns
+
+
+def enqueue(queue, fn, session_hash, username=None):
+    from fastapi import Request
+
+    from gradio.queueing import Event
+
+    request = Request({"type": "http", "headers": [], "path": "/"})
+    event = Event(session_hash, fn, request, username)
+    event_queue = queue.event_queue_per_concurrency_id[fn.concurrency_id]
+    flow = queue.get_flow(event)
+    event_queue.push(
+        event,
+        flow=flow,
+        priority=fn.queue_priority,
+        weight=queue.fair_share_weights.get(flow, 1)
+        if queue.scheduling == "fair"
+        else None,
+    )
+    return event
+
+
+def drain(queue):
+    order = []
+    while batch := queue.get_events():
+        order.extend(batch[0])
+    return order
+
+
+class TestSchedulingPolicies:
+    def test_fifo_by_default(self):
+        queue, (fn, _) = make_queue()
+        events = [enqueue(queue, fn, s) for s in ["a", "a", "a", "b"]]
+        assert drain(queue) == events
+
+    def test_fair_scheduling_interleaves_sessions(self):
+        queue, (fn, _) = make_queue(scheduling="fair")
+        a = [enqueue(queue, fn, "a") for _ in range(3)]
+        b = [enqueue(queue, fn, "b") for _ in range(2)]
+        assert drain(queue) == [a[0], b[0], a[1], b[1], a[2]]
+
+    def test_fair_scheduling_weights_and_usernames(self):
+        queue, (fn, _) = make_queue(
+            scheduling="fair",
+            fair_share_key="username",
+            fair_share_weights={"pro": 2},
+        )
+        free = [enqueue(queue, fn, f"s{i}", "free") for i in range(3)]
+        pro = [enqueue(queue, fn, f"t{i}", "pro") for i in range(4)]
+        assert drain(queue) == [
+            pro[0],
+            free[0],
+            pro[1],
+            pro[2],
+            free[1],
+            pro[3],
+            free[2],
+        ]
+        assert (
+            queue.event_queue_per_concurrency_id[fn.concurrency_id].flow_finish_times
+            == {}
+        )
+
+    def test_priority_lanes_across_concurrency_groups(self):
+        queue, (slow_fn, fast_fn) = make_queue()
+        slow = enqueue(queue, slow_fn, "a")
+        fast = enqueue(queue, fast_fn, "b")
+        assert drain(queue) == [fast, slow]
+
+    def test_max_in_flight_per_user(self):
+        queue, (fn, _) = make_queue(max_in_flight_per_user=1)
+        a = [enqueue(queue, fn, "a") for _ in range(2)]
+        b = enqueue(queue, fn, "b")
+        queue.in_flight_per_flow["a"] = 1
+        assert drain(queue) == [b]
+        queue.finish_in_flight("a")
+        assert drain(queue) == a[:1]
+        queue.finish_in_flight("a")
+        assert drain(queue) == a[1:]
+
+    def test_capped_events_are_not_checked_on_every_wake(self):
+        queue, (fn, _) = make_queue(max_in_flight_per_user=1)
+        [enqueue(queue, fn, "a") for _ in range(100)]
+        queue.in_flight_per_flow["a"] = 1
+        checked = []
+        can_start = queue.can_start
+        queue.can_start = lambda event: checked.append(event) or can_start(event)
+        assert queue.get_events() is None
+        assert len(checked) == 100
+        for _ in range(10):
+            assert queue.get_events() is None
+        assert len(checked) == 100
+        queue.finish_in_flight("a")
+        assert len(queue.get_events()[0]) == 1
+
+    def test_held_batch_only_looks_at_events_of_its_function(self, monkeypatch):
+        from fastapi import Request
+
+        from gradio.queueing import Event, OrderedEventSet
+
+        queue, (fn, other_fn) = make_queue()
+        fn.batch, fn.max_batch_size, fn.batch_wait_ms = True, 4, 60_000
+        event_queue = queue.event_queue_per_concurrency_id[fn.concurrency_id]
+        request = Request({"type": "http", "headers": [], "path": "/"})
+        event_queue.push(Event("a", fn, request, None))
+        for _ in range(1000):
+            event_queue.push(Event("b", other_fn, request, None))
+
+        visited = 0
+        iterate = OrderedEventSet.__iter__
+
+        def counting_iter(self):
+            nonlocal visited
+            for event in iterate(self):
+                visited += 1
+                yield event
+
+        monkeypatch.setattr(OrderedEventSet, "__iter__", counting_iter)
+        for _ in range(10):
+            assert queue.get_events() is None
+        assert queue.next_batch_deadline is not None
+        assert visited < 10
+
+        for _ in range(3):
+            event_queue.push(Event("c", fn, request, None))
+        events, batch, _ = queue.get_events()
+        assert batch and len(events) == 4
+        assert all(event.fn is fn for event in events)
+
+
+class TestEstimations:
+    def test_draining_queue_sends_few_estimations(self):
+        from gradio.queueing import SessionMessageQueue
+
+        queue, (fn, _) = make_queue()
+        n_events = 1000
+        for i in range(n_events):
+            queue.pending_messages_per_session[f"s{i}"] = SessionMessageQueue()
+            enqueue(queue, fn, f"s{i}")
+
+        sent = []
+        original_send_message = queue.send_message
+
+        def counting_send_message(event, message, coalesce=False):
+            sent.append((event, message.rank))
+            original_send_message(event, message, coalesce)
+
+        queue.send_message = counting_send_message
+        queue.broadcast_estimations(fn.concurrency_id)
+        assert len(sent) == n_events
+        while queue.get_events():
+            queue.broadcast_estimations(fn.concurrency_id)
+
+        # Sending every rank to every event would be ~n_events**2 / 2 messages
+        assert len(sent) < 60 * n_events
+        # Events close to the front of the queue still get every rank
+        last_event_ranks = [
+            rank for event, rank in sent if event.session_hash == "s999"
+        ]
+        assert last_event_ranks[-10:] == list(range(9, -1, -1))
+
+    def test_draining_queue_only_checks_events_whose_rank_moved(self):
+        from gradio.queueing import SessionMessageQueue
+
+        queue, (fn, _) = make_queue()
+        queue.update_intervals = float("inf")
+        n_events = 1000
+        for i in range(n_events):
+            queue.pending_messages_per_session[f"s{i}"] = SessionMessageQueue()
+            enqueue(queue, fn, f"s{i}")
+
+        checked = []
+        sent = []
+        original_send_estimation = queue.send_estimation
+
+        def recording_send_estimation(event_queue, event, rank, rank_eta):
+            checked.append(event)
+            assert rank == event_queue.in_dispatch_order().index(event)
+            if queue.estimation_changed(event, rank, rank_eta):
+                sent.append((event, rank))
+            original_send_estimation(event_queue, event, rank, rank_eta)
+
+        queue.send_estimation = recording_send_estimation
+        queue.update_estimations(fn.concurrency_id)
+        assert len(sent) == n_events
+        checked.clear()
+        while queue.get_events():
+            queue.update_estimations(fn.concurrency_id)
+
+        # Walking the queue on every dispatch would check ~n_events**2 / 2 events
+        assert len(checked) < 60 * n_events
+        last_event_ranks = [
+            rank for event, rank in sent if event.session_hash == "s999"
+        ]
+        assert last_event_ranks[-10:] == list(range(9, -1, -1))
+
+    def test_arrival_index_counts_queued_events_ahead(self):
+        import random
+
+        from fastapi import Request
+
+        from gradio.queueing import Event
+
+        queue, (fn, other_fn) = make_queue()
+        event_queue = queue.event_queue_per_concurrency_id[fn.concurrency_id]
+        request = Request({"type": "http", "headers": [], "path": "/"})
+        rng = random.Random(0)
+        for _ in range(500):
+            if len(event_queue.queue) and rng.random() < 0.4:
+                event_queue.remove(rng.choice(list(event_queue.queue)))
+            else:
+                event_fn = rng.choice([fn, other_fn])
+                event_queue.push(Event("a", event_fn, request, None))
+            events = list(event_queue.queue)
+            for i, event in enumerate(events):
+                expected = {
+                    f: sum(e.fn is f for e in events[:i]) for f in (fn, other_fn)
+                }
+                ahead = event_queue.arrivals.ahead(event)
+                assert {f: ahead.get(f, 0) for f in (fn, other_fn)} == expected
+
+    def test_estimated_etas_match_walking_the_queue(self):
+        from gradio.queueing import SessionMessageQueue
+
+        queue, (fn, _) = make_queue()
+        event_queue = queue.event_queue_per_concurrency_id[fn.concurrency_id]
+        event_queue.concurrency_limit = 2
+        queue.process_time_per_fn[fn].add(3.0)
+        events = []
+        for i in range(30):
+            queue.pending_messages_per_session[f"s{i}"] = SessionMessageQueue()
+            events.append(enqueue(queue, fn, f"s{i}"))
+        queue.broadcast_estimations(fn.concurrency_id)
+        for event in events:
+            ahead = event_queue.arrivals.ahead(event)
+            assert event.last_estimation == (
+                sum(ahead.values()),
+                pytest.approx(queue.estimate_eta(event_queue, event, ahead, 0)),
+            )
+
+    def test_unread_estimations_are_coalesced(self):
+        from gradio.queueing import SessionMessageQueue
+        from gradio.server_messages import EstimationMessage, HeartbeatMessage
+
+        messages = SessionMessageQueue()
+        messages.put_coalesced("a", EstimationMessage(rank=5, queue_size=6))
+        messages.put_nowait(HeartbeatMessage())
+        messages.put_coalesced("a", EstimationMessage(rank=4, queue_size=5))
+        assert messages.qsize() == 2
+        first = messages.get_nowait()
+        assert (first.rank, first.queue_size) == (4, 5)
+        messages.put_coalesced("a", EstimationMessage(rank=3, queue_size=4))
+        assert messages.qsize() == 2
+        assert isinstance(messages.get_nowait(), HeartbeatMessage)
+        assert messages.get_nowait().rank == 3
@@ -4,6 +4,7 @@ import asyncio
 import functools
 import inspect
 import json
+import math
 import os
 import pickle
 import sys
@@ -13,7 +14,7 @@ from contextlib import asynccontextmanager, closing
 from pathlib import Path
 from threading import Thread
 from types import SimpleNamespace
-from unittest.mock import patch
+from unittest.mock import AsyncMock, patch
 
 import gradio_client as grc
 import httpx
@@ -24,6 +25,7 @@ import requests
 import starlette.routing
 from fastapi import FastAPI, Request
 from fastapi.testclient import TestClient
+from starlette.exceptions import HTTPException
 
 import gradio as gr
 from gradio import (
@@ -37,12 +39,14 @@ from gradio import (
 )
 from gradio.route_utils import (
     API_PREFIX,
+    ChunkedUploads,
     FnIndexInferError,
     _delete_state_handler,
     _lifespan_handler,
     compare_passwords_securely,
     create_lifespan_handler,
     get_api_call_path,
+    get_client_ip,
     get_request_origin,
     get_root_url,
     slugify,
@@ -112,6 +116,154 @@ class TestRoutes:
         with open(file, "rb") as saved_file:
             assert saved_file.read() == b"abcdefghijklmnopqrstuvwxyz"
 
+    def test_upload_same_content_is_deduplicated(self, test_client):
+        files = []
+        for name in ["first.txt", "second.txt", "first.txt"]:
+            with open("test/test_files/alphabet.txt", "rb") as f:
+                response = test_client.post(
+                    f"{API_PREFIX}/upload", files={"files": (name, f)}
+                )
+            assert response.status_code == 200
+            files.append(response.json()[0])
+        assert files[0] == files[2]
+        assert Path(files[0]).parent == Path(files[1]).parent
+        assert not os.path.samefile(files[0], files[1])
+        assert Path(files[1]).read_bytes() == b"abcdefghijklmnopqrstuvwxyz"
+
+    def test_chunked_upload(self, test_client):
+        content = b"abcdefghijklmnopqrstuvwxyz"
+        response = test_client.post(
+            f"{API_PREFIX}/upload/init",
+            params={"filename": "alphabet.txt", "size": len(content)},
+        )
+        assert response.status_code == 200
+        upload_url = f"{API_PREFIX}/upload/{response.json()['upload_token']}"
+
+        response = test_client.put(
+            upload_url, params={"offset": 0}, content=content[:10]
+        )
+        assert response.json() == {"offset": 10}
+        # A chunk that does not continue from the received offset is rejected
+        response = test_client.put(
+            upload_url, params={"offset": 5}, content=content[5:]
+        )
+        assert response.status_code == 409
+        assert response.headers["Upload-Offset"] == "10"
+        assert test_client.get(upload_url).json() == {"offset": 10}
+        response = test_client.post(f"{upload_url}/finalize")
+        assert response.status_code == 409
+
+        response = test_client.put(
+            upload_url, params={"offset": 10}, content=content[10:]
+        )
+        assert response.json() == {"offset": len(content)}
+        response = test_client.post(f"{upload_url}/finalize")
+        assert response.status_code == 200
+        file = response.json()[0]
+        assert Path(file).name == "alphabet.txt"
+        assert Path(file).read_bytes() == content
+        assert test_client.get(upload_url).status_code == 404
+
+        with open("test/test_files/alphabet.txt", "rb") as f:
+            response = test_client.post(
+                f"{API_PREFIX}/upload", files={"files": ("alphabet.txt", f)}
+            )
+        assert response.json() == [file]
+
+    def test_chunked_upload_enforces_max_file_size(self):
+        io = Interface(lambda x: x, "file", "file")
+        app, _, _ = io.launch(prevent_thread_lock=True, max_file_size=10)
+        test_client = TestClient(app)
+        response = test_client.post(f"{API_PREFIX}/upload/init", params={"size": 11})
+        assert response.status_code == 413
+
+        response = test_client.post(f"{API_PREFIX}/upload/init")
+        upload_url = f"{API_PREFIX}/upload/{response.json()['upload_token']}"
+        response = test_client.put(upload_url, params={"offset": 0}, content=b"a" * 8)
+        assert response.json() == {"offset": 8}
+        response = test_client.put(upload_url, params={"offset": 8}, content=b"a" * 8)
+        assert response.status_code == 413
+        assert test_client.delete(upload_url).status_code == 200
+        assert test_client.get(upload_url).status_code == 404
+        io.close()
+
+    def test_chunked_upload_rejects_invalid_file_names_when_started(self, test_client):
+        response = test_client.post(
+            f"{API_PREFIX}/upload/init", params={"filename": ".."}
+        )
+        assert response.status_code == 400
+
+    def test_chunked_uploads_are_limited_per_client(self):
+        uploads = ChunkedUploads(max_uploads_per_client=2)
+        tokens = [uploads.start(None, None, math.inf, client="a") for _ in range(2)]
+        with pytest.raises(HTTPException) as exc:
+            uploads.start(None, None, math.inf, client="a")
+        assert exc.value.status_code == 429
+        uploads.start(None, None, math.inf, client="b")
+        uploads.abort(tokens[0])
+        uploads.start(None, None, math.inf, client="a")
+
+    @pytest.mark.asyncio
+    async def test_chunked_uploads_without_data_expire_sooner(self):
+        uploads = ChunkedUploads(expiry=60, empty_expiry=0)
+        empty = uploads.start(None, None, math.inf)
+        path = uploads.get(empty).path
+        started = uploads.start(None, None, math.inf)
+
+        async def stream():
+            yield b"abc"
+
+        await uploads.write(started, 0, stream(), math.inf)
+        with pytest.raises(HTTPException):
+            uploads.get(empty)
+        assert not os.path.exists(path)
+        assert uploads.offset(started) == 3
+
+    @pytest.mark.parametrize(
+        "host, forwarded_for, client_ip",
+        [
+            ("8.8.8.8", None, "8.8.8.8"),
+            ("8.8.8.8", "1.1.1.1", "8.8.8.8"),
+            ("127.0.0.1", None, "127.0.0.1"),
+            ("127.0.0.1", "1.1.1.1", "1.1.1.1"),
+            ("10.0.0.2", "1.2.3.4, 1.1.1.1, 10.0.0.1", "1.1.1.1"),
+            ("10.0.0.2", "10.0.0.3", "10.0.0.3"),
+        ],
+    )
+    def test_get_client_ip(self, host, forwarded_for, client_ip):
+        headers = []
+        if forwarded_for is not None:
+            headers.append((b"x-forwarded-for", forwarded_for.encode()))
+        request = Request({"type": "http", "headers": headers, "client": (host, 1234)})
+        assert get_client_ip(request) == client_ip
+
+    def test_expired_chunked_uploads_are_discarded_while_the_app_runs(self):
+        io = Interface(lambda x: x, "text", "text")
+        app, _, _ = io.launch(prevent_thread_lock=True)
+        with (
+            patch.object(routes.chunked_uploads, "empty_expiry", 0),
+            TestClient(app) as client,
+        ):
+            token = client.post(f"{API_PREFIX}/upload/init").json()["upload_token"]
+            path = routes.chunked_uploads.get(token).path
+            time.sleep(1.5)
+            assert not os.path.exists(path)
+            assert client.get(f"{API_PREFIX}/upload/{token}").status_code == 404
+        io.close()
+
+    @pytest.mark.asyncio
+    async def test_chunked_upload_that_cannot_be_saved_is_aborted(self, tmp_path):
+        uploads = ChunkedUploads()
+        token = uploads.start("a.txt", None, math.inf, client="a")
+        path = uploads.get(token).path
+        with (
+            patch("gradio.route_utils.save_upload", side_effect=HTTPException(400)),
+            pytest.raises(HTTPException),
+        ):
+            await uploads.finish(token, str(tmp_path))
+        assert not os.path.exists(path)
+        assert uploads._uploads_per_client == {}
+
     def test_custom_upload_path(self, gradio_temp_dir):
         io = Interface(lambda x: x + x, "text", "text")
         app, _, _ = io.launch(prevent_thread_lock=True)
@@ -432,6 +584,88 @@ class TestRoutes:
         assert file_response_with_partial_range.is_success
         assert len(file_response_with_partial_range.text) == 11
 
+    def test_file_route_conditional_and_cache_headers(self, tmp_path):
+        io = gr.Interface(lambda x: x, "text", "text")
+        app, _, _ = io.launch(prevent_thread_lock=True, allowed_paths=[str(tmp_path)])
+        client = TestClient(app)
+        with open("test/test_files/alphabet.txt", "rb") as f:
+            uploaded = client.post(f"{API_PREFIX}/upload", files={"files": f}).json()[0]
+
+        response = client.get(f"{API_PREFIX}/file={uploaded}")
+        assert response.status_code == 200
+        etag = response.headers["ETag"]
+        assert etag.startswith(f'"{Path(uploaded).parent.name}-')
+        assert (
+            response.headers["Cache-Control"] == "public, max-age=31536000, immutable"
+        )
+
+        response = client.get(
+            f"{API_PREFIX}/file={uploaded}", headers={"If-None-Match": etag}
+        )
+        assert response.status_code == 304
+        assert response.content == b""
+        response = client.get(
+            f"{API_PREFIX}/file={uploaded}",
+            headers={"If-Modified-Since": response.headers["Last-Modified"]},
+        )
+        assert response.status_code == 304
+        response = client.get(
+            f"{API_PREFIX}/file={uploaded}", headers={"If-None-Match": '"other"'}
+        )
+        assert response.status_code == 200
+
+        # Files outside the content-addressed folders must be revalidated
+        allowed = tmp_path / "allowed.txt"
+        allowed.write_text("hello")
+        response = client.get(f"{API_PREFIX}/file={allowed}")
+        assert response.headers["ETag"].startswith('W/"')
+        assert response.headers["Cache-Control"] == "no-cache"
+        response = client.get(
+            f"{API_PREFIX}/file={allowed}",
+            headers={"If-None-Match": response.headers["ETag"]},
+        )
+        assert response.status_code == 304
+        allowed.write_text("hello again")
+        response = client.get(
+            f"{API_PREFIX}/file={allowed}",
+            headers={"If-None-Match": response.headers["ETag"]},
+        )
+        assert response.status_code == 200
+        io.close()
+
+    def test_file_route_ranges(self):
+        io = gr.Interface(lambda x: x, "text", "text")
+        app, _, _ = io.launch(prevent_thread_lock=True)
+        client = TestClient(app)
+        with open("test/test_files/alphabet.txt", "rb") as f:
+            uploaded = client.post(f"{API_PREFIX}/upload", files={"files": f}).json()[0]
+        url = f"{API_PREFIX}/file={uploaded}"
+
+        response = client.get(url, headers={"Range": "bytes=-3"})
+        assert response.status_code == 206
+        assert response.content == b"xyz"
+        assert response.headers["Content-Range"] == "bytes 23-25/26"
+        response = client.get(url, headers={"Range": "bytes=100-"})
+        assert response.status_code == 416
+        assert response.headers["Content-Range"] == "bytes */26"
+
+        response = client.get(url, headers={"Range": "bytes=0-1, 24-, 1-2"})
+        assert response.status_code == 206
+        content_type = response.headers["Content-Type"]
+        assert content_type.startswith("multipart/byteranges; boundary=")
+        boundary = content_type.split("boundary=")[1].encode()
+        assert int(response.headers["Content-Length"]) == len(response.content)
+        parts = response.content.split(b"--" + boundary)
+        assert parts[-1] == b"--\r\n"
+        assert parts[1].endswith(b"Content-Range: bytes 0-2/26\r\n\r\nabc\r\n")
+        assert parts[2].endswith(b"Content-Range: bytes 24-25/26\r\n\r\nyz\r\n")
+
+        # A range is ignored if the file has changed since the If-Range validator
+        response = client.get(url, headers={"Range": "bytes=0-1", "If-Range": '"x"'})
+        assert response.status_code == 200
+        assert response.content == b"abcdefghijklmnopqrstuvwxyz"
+        io.close()
+
     def test_mount_gradio_app(self):
         app = FastAPI()
 
@@ -939,6 +1173,26 @@ class TestRoutes:
         assert "IN CUSTOM LIFESPAN" in captured.out
         assert "AFTER CUSTOM LIFESPAN" in captured.out
 
+    def test_delete_cache_with_size_budget(self, connect, gradio_temp_dir):
+        demo = gr.Interface(
+            lambda s: s, gr.Textbox(), gr.File(), delete_cache=(3600, 3600, "1kb")
+        )
+        assert demo.delete_cache == (3600, 3600, 1024)
+
+        def cached_names():
+            return {
+                Path(file).name
+                for temp_file_set in demo.temp_file_sets
+                for file in temp_file_set
+                if os.path.exists(file)
+            }
+
+        with connect(demo) as client:
+            client.predict("test/test_files/alphabet.txt")
+            assert cached_names() == {"alphabet.txt"}
+            client.predict("test/test_files/bus.png")
+            assert cached_names() == {"bus.png"}
+
     def test_monitoring_link(self):
         with Blocks() as demo:
             i = Textbox()
@@ -995,7 +1249,7 @@ class TestLifespanHandlers:
     def _fake_app():
         blocks = SimpleNamespace(blocks={}, temp_file_sets=[])
         return SimpleNamespace(
-            state_holder=SimpleNamespace(delete_all_expired_state=lambda: None),
+            state_holder=SimpleNamespace(async_delete_all_expired_state=AsyncMock()),
             get_blocks=lambda: blocks,
         )
 
@@ -1028,10 +1282,10 @@ class TestLifespanHandlers:
         deleted = []
         app.get_blocks().temp_file_sets.append(set())
 
-        def boom():
+        async def boom():
             raise RuntimeError("state cleanup blew up")
 
-        app.state_holder.delete_all_expired_state = boom
+        app.state_holder.async_delete_all_expired_state = boom
 
         with patch(
             "gradio.route_utils.delete_files_created_by_app",
@@ -1165,6 +1419,76 @@ class TestConfigUsername:
             assert response.json()["username"] == "abubakar"
 
 
+class TestPayloadCache:
+    def test_config_and_page_are_rendered_once_per_root(self):
+        io = Interface(lambda x: x, "text", "text")
+        app, _, _ = io.launch(prevent_thread_lock=True)
+        try:
+            with (
+                TestClient(app) as client,
+                patch.object(
+                    gr.utils, "safe_deepcopy", wraps=gr.utils.safe_deepcopy
+                ) as deepcopy,
+            ):
+                for _ in range(3):
+                    assert client.get("/config").json()["username"] is None
+                    assert '"username":null' in client.get("/").text
+                assert deepcopy.call_count == 2
+
+                response = client.get("/config", headers={"X-Forwarded-Host": "other"})
+                assert response.json()["root"] == "http://other"
+                assert deepcopy.call_count == 3
+
+                # Replacing the config, as a reload does, drops the cached payloads
+                io.config = io.get_config_file()
+                client.get("/config")
+                assert deepcopy.call_count == 4
+        finally:
+            io.close()
+
+    def test_username_is_spliced_into_cached_payloads(self):
+        io = Interface(lambda x: x, "text", "text")
+        app, _, _ = io.launch(
+            auth=[("admin", "password"), ("</script>", "password")],
+            prevent_thread_lock=True,
+        )
+        try:
+            for username in ["admin", "</script>"]:
+                with TestClient(app) as client:
+                    client.post(
+                        "/login", data={"username": username, "password": "password"}
+                    )
+                    assert client.get("/config").json()["username"] == username
+                    page = client.get("/").text
+                    assert "</script>;" not in page
+                    config = json.loads(
+                        page.split("window.gradio_config =", 1)[1].split(
+                            ";</script>", 1
+                        )[0]
+                    )
+                    assert config["username"] == username
+        finally:
+            io.close()
+
+    def test_anonymous_payloads_are_precompressed(self):
+        io = Interface(lambda x: x, "text", "text")
+        app, _, _ = io.launch(prevent_thread_lock=True)
+        try:
+            with TestClient(app) as client:
+                expected = client.get(
+                    "/config", headers={"Accept-Encoding": "identity"}
+                ).json()
+                for encoding in ["gzip", "br"]:
+                    response = client.get(
+                        "/config", headers={"Accept-Encoding": encoding}
+                    )
+                    assert response.headers["Content-Encoding"] == encoding
+                    assert response.headers["Vary"] == "Accept-Encoding"
+                    assert response.json() == expected
+        finally:
+            io.close()
+
+
 class TestQueueRoutes:
     @pytest.mark.asyncio
     async def test_queue_join_routes_sets_app_if_none_set(self):
@@ -1,8 +1,19 @@
+import datetime
+import threading
+
+import pytest
+
 import gradio as gr
-from gradio.state_holder import StateHolder
+from gradio.state_holder import (
+    InMemorySessionStore,
+    SessionState,
+    SQLiteSessionStore,
+    StateHolder,
+)
 
 
-def _holder(demo: gr.Blocks) -> StateHolder:
+def _holder(demo: gr.Blocks, session_store=None) -> StateHolder:
+    demo.session_store = session_store
     holder = StateHolder()
     holder.set_blocks(demo)
     return holder
@@ -36,3 +47,254 @@ class TestStateHolderDoesNotAccumulate:
 
         assert len(holder.session_data) == 2
         assert set(holder.time_last_used) == set(holder.session_data)
+
+
+class TestSessionConfigValues:
+    def test_sessions_share_configs_until_they_modify_a_block(self):
+        with gr.Blocks() as demo:
+            text = gr.Textbox("Hello")
+            number = gr.Number(1)
+        first, second = SessionState(demo), SessionState(demo)
+
+        assert first.config_values[text._id] is second.config_values[text._id]
+        assert not first.config_values.own
+
+        first._update_value_in_config(text._id, "Bye")
+
+        assert first.config_values[text._id]["props"]["value"] == "Bye"
+        assert second.config_values[text._id]["props"]["value"] == "Hello"
+        assert set(first.config_values.own) == {text._id}
+        assert first.config_values[number._id] is second.config_values[number._id]
+
+    def test_components_include_shared_and_materialized_configs(self):
+        with gr.Blocks() as demo:
+            text = gr.Textbox("Hello")
+            gr.Number(1)
+        state = SessionState(demo)
+        state._update_value_in_config(text._id, "Bye")
+
+        configs = {c["id"]: c for c in state.components}
+
+        assert set(configs) == set(demo.blocks)
+        assert configs[text._id]["props"]["value"] == "Bye"
+        assert len(state.config_values) == len(demo.blocks)
+
+    def test_shared_configs_follow_replaced_blocks(self):
+        with gr.Blocks() as demo:
+            text = gr.Textbox("Hello")
+        state = SessionState(demo)
+        assert state.config_values[text._id]["props"]["value"] == "Hello"
+
+        demo.blocks[text._id] = gr.Textbox("Bye", render=False)
+
+        assert state.config_values[text._id]["props"]["value"] == "Bye"
+
+
+class TestSessionStore:
+    def _demo(self):
+        with gr.Blocks() as demo:
+            history = gr.State([])
+            expiring = gr.State(0, time_to_live=60)
+        return demo, history, expiring
+
+    def test_sessions_are_kept_in_memory_by_default(self, monkeypatch):
+        monkeypatch.delenv("GRADIO_SESSION_STORE", raising=False)
+        holder = _holder(_demo())
+        assert isinstance(holder.store, InMemorySessionStore)
+        assert holder.store.version("abc") is None
+        assert holder.store.load("abc") is None
+        assert holder.store.save("abc", b"", None) == 1
+
+    @pytest.mark.asyncio
+    async def test_sessions_survive_restarts(self, tmp_path):
+        demo, history, expiring = self._demo()
+        holder = _holder(demo, tmp_path / "sessions.db")
+        holder["abc"][history._id] = ["hello"]
+        holder["abc"][expiring._id] = 1
+        await holder.async_save("abc")
+
+        restarted = _holder(demo, str(tmp_path / "sessions.db"))
+        await restarted.async_refresh("abc")
+        await restarted.async_refresh("xyz")
+
+        assert restarted["abc"][history._id] == ["hello"]
+        assert restarted["abc"][expiring._id] == 1
+        assert restarted["xyz"][history._id] == []
+
+    @pytest.mark.asyncio
+    async def test_sessions_are_shared_between_processes(self, tmp_path):
+        demo, history, _ = self._demo()
+        first = _holder(demo, SQLiteSessionStore(tmp_path / "sessions.db"))
+        second = StateHolder()
+        second.set_blocks(demo)
+        second.store = SQLiteSessionStore(tmp_path / "sessions.db")
+
+        first["abc"][history._id] = ["hello"]
+        await first.async_save("abc")
+        await second.async_refresh("abc")
+        assert second["abc"][history._id] == ["hello"]
+
+        second["abc"][history._id].append("world")
+        await second.async_save("abc")
+        await first.async_refresh("abc")
+        assert first["abc"][history._id] == ["hello", "world"]
+
+    @pytest.mark.asyncio
+    async def test_concurrent_saves_are_merged(self, tmp_path):
+        demo, history, expiring = self._demo()
+        first = _holder(demo, tmp_path / "sessions.db")
+        second = _holder(demo, tmp_path / "sessions.db")
+        first["abc"][history._id] = ["hello"]
+        await first.async_save("abc")
+        await second.async_refresh("abc")
+
+        first["abc"][history._id] = ["hello", "first"]
+        await first.async_save("abc")
+        second["abc"][expiring._id] = 2
+        await second.async_save("abc")
+
+        assert second["abc"][history._id] == ["hello", "first"]
+        assert second["abc"][expiring._id] == 2
+        assert second.store.version("abc") == 3
+        await first.async_refresh("abc")
+        assert first["abc"][expiring._id] == 2
+
+    @pytest.mark.asyncio
+    async def test_sessions_saved_by_another_version_of_the_app_are_ignored(
+        self, tmp_path
+    ):
+        demo, history, _ = self._demo()
+        holder = _holder(demo, tmp_path / "sessions.db")
+        holder["abc"][history._id] = ["hello"]
+        await holder.async_save("abc")
+
+        with demo:
+            gr.Textbox()
+        changed = _holder(demo, tmp_path / "sessions.db")
+        await changed.async_refresh("abc")
+
+        assert changed["abc"][history._id] == []
+
+    @pytest.mark.asyncio
+    async def test_store_is_used_from_worker_threads(self, tmp_path):
+        demo, history, _ = self._demo()
+        first = _holder(demo, tmp_path / "sessions.db")
+        second = _holder(demo, tmp_path / "sessions.db")
+        loop_thread = threading.get_ident()
+        threads = set()
+        save = first.store.save
+
+        def recording_save(*args):
+            threads.add(threading.get_ident())
+            return save(*args)
+
+        first.store.save = recording_save
+
+        first["abc"][history._id] = ["hello"]
+        await first.async_save("abc")
+        await second.async_refresh("abc")
+
+        assert second["abc"][history._id] == ["hello"]
+        assert threads and loop_thread not in threads
+
+    @pytest.mark.asyncio
+    async def test_unchanged_sessions_are_not_saved(self, tmp_path):
+        demo, history, _ = self._demo()
+        holder = _holder(demo, SQLiteSessionStore(tmp_path / "sessions.db"))
+        holder["abc"]
+        await holder.async_save("abc")
+        assert holder.store.version("abc") is None
+
+        holder["abc"][history._id] = ["hello"]
+        await holder.async_save("abc")
+        await holder.async_save("abc")
+        assert holder.store.version("abc") == 1
+
+    @pytest.mark.asyncio
+    async def test_time_to_live_is_kept(self, tmp_path):
+        demo, history, expiring = self._demo()
+        holder = _holder(demo, tmp_path / "sessions.db")
+        holder["abc"][history._id] = ["hello"]
+        holder["abc"][expiring._id] = 1
+        time_to_live, created_at = holder["abc"]._state_ttl[expiring._id]
+        holder["abc"]._state_ttl[expiring._id] = (
+            time_to_live,
+            created_at - datetime.timedelta(seconds=61),
+        )
+        await holder.async_save("abc")
+
+        restarted = _holder(demo, tmp_path / "sessions.db")
+        await restarted.async_refresh("abc")
+        await restarted.async_delete_all_expired_state()
+
+        assert expiring._id not in restarted["abc"].state_data
+        assert restarted["abc"][history._id] == ["hello"]
+        again = _holder(demo, tmp_path / "sessions.db")
+        await again.async_refresh("abc")
+        assert expiring._id not in again["abc"].state_data
+
+    @pytest.mark.asyncio
+    async def test_values_that_cannot_be_pickled_stay_in_memory(self, tmp_path):
+        demo, history, expiring = self._demo()
+        holder = _holder(demo, tmp_path / "sessions.db")
+        lock = threading.Lock()
+        holder["abc"][history._id] = lock
+        holder["abc"][expiring._id] = 1
+        with pytest.warns(UserWarning, match="cannot be pickled"):
+            await holder.async_save("abc")
+
+        restarted = _holder(demo, tmp_path / "sessions.db")
+        await restarted.async_refresh("abc")
+        assert restarted["abc"][expiring._id] == 1
+        assert restarted["abc"][history._id] == []
+        assert holder["abc"][history._id] is lock
+
+    @pytest.mark.asyncio
+    async def test_store_keeps_the_most_recent_sessions(self, tmp_path):
+        demo, history, _ = self._demo()
+        holder = _holder(demo, tmp_path / "sessions.db")
+        holder.capacity = 2
+        for i in range(4):
+            holder[f"s{i}"][history._id] = [i]
+            await holder.async_save(f"s{i}")
+
+        await holder.async_delete_all_expired_state()
+
+        assert holder.store.version("s0") is None
+        assert holder.store.version("s1") is None
+        assert holder.store.version("s3") == 1
+
+    @pytest.mark.asyncio
+    async def test_values_that_are_only_read_are_not_saved(self, tmp_path):
+        demo, history, _ = self._demo()
+        holder = _holder(demo, tmp_path / "sessions.db")
+        holder["abc"][history._id] = ["hello"]
+        await holder.async_save("abc")
+        assert holder.store.version("abc") == 1
+
+        assert holder["abc"][history._id] == ["hello"]
+        await holder.async_save("abc")
+        assert holder.store.version("abc") == 1
+
+        holder["abc"][history._id].append("world")
+        await holder.async_save("abc")
+        assert holder.store.version("abc") == 2
+
+        # Values loaded from the store are not saved back either
+        restarted = _holder(demo, tmp_path / "sessions.db")
+        await restarted.async_refresh("abc")
+        assert restarted["abc"][history._id] == ["hello", "world"]
+        await restarted.async_save("abc")
+        assert restarted.store.version("abc") == 2
+
+    @pytest.mark.asyncio
+    async def test_store_is_trimmed_at_most_every_trim_interval(self, tmp_path):
+        holder = _holder(_demo(), tmp_path / "sessions.db")
+        trims = []
+        holder.store.trim = trims.append
+        await holder.async_delete_all_expired_state()
+        await holder.async_delete_all_expired_state()
+        assert len(trims) == 1
+        holder.trim_interval = 0
+        await holder.async_delete_all_expired_state()
+        assert len(trims) == 2
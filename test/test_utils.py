@@ -17,6 +17,7 @@ from hypothesis import strategies as st  # ty: ignore[unresolved-import]
 
 import gradio as gr
 from gradio import EventData, Request
+from gradio.caching import state_fingerprint
 from gradio.exceptions import Error
 from gradio.external_utils import format_ner_list
 from gradio.utils import (
@@ -29,6 +30,7 @@ from gradio.utils import (
     assert_configs_are_equivalent_besides_ids,
     check_function_inputs_match,
     colab_check,
+    deep_hash,
     delete_none,
     diff,
     download_if_url,
@@ -592,12 +594,54 @@ def test_get_extension_from_file_path_or_url(path_or_url, extension):
                 ["delete", ["data", 1], None],
             ],
         ),
+        (
+            [[1, 2, 3], [4, 5, 6]],
+            [[1], [4]],
+            [
+                ["delete", [0, 1], None],
+                ["delete", [0, 1], None],
+                ["delete", [1, 1], None],
+                ["delete", [1, 1], None],
+            ],
+        ),
+        (
+            [{"content": [{"text": "Hi"}]}, {"content": [{"text": "Hel"}]}],
+            [
+                {"content": [{"text": "Hi"}]},
+                {"content": [{"text": "Hello"}]},
+                {"content": []},
+            ],
+            [
+                ["append", [1, "content", 0, "text"], "lo"],
+                ["add", [2], {"content": []}],
+            ],
+        ),
+        ([1, "a", None], [1, "a", None], []),
+        (1, 1.0, [["replace", [], 1.0]]),
     ],
 )
 def test_diff(old, new, expected_diff):
     assert diff(old, new) == expected_diff
 
 
+def test_diff_skips_unchanged_items_of_streamed_list():
+    class Message(dict):
+        compared = 0
+
+        def __eq__(self, other):
+            Message.compared += 1
+            return super().__eq__(other)
+
+        __hash__ = None  # type: ignore
+
+    history = [Message(content=str(i)) for i in range(200)]
+    new_history = [Message(m) for m in history[:-1]] + [Message(content="199!")]
+    assert diff(history, new_history) == [["append", [199, "content"], "!"]]
+    # The unchanged part is compared once, and the last message once more
+    # before its contents are diffed
+    assert Message.compared <= 200 + 1
+
+
 class TestFunctionParams:
     def test_regular_function(self):
         def func(a: int, b: int = 10, c: str = "default", d=None):
@@ -797,6 +841,16 @@ def test_get_icon_path():
     assert get_icon_path("huggingface-logo.svg").endswith("huggingface-logo.svg")
 
 
+def test_deep_hash_is_a_deprecated_alias_of_state_fingerprint():
+    value = {"history": [1, 2], "array": np.zeros(4)}
+    with pytest.warns(UserWarning, match="deprecated"):
+        digest = deep_hash(value)
+    assert digest == state_fingerprint(value).hex()
+    value["array"][0] = 1
+    with pytest.warns(UserWarning):
+        assert deep_hash(value) != digest
+
+
 def test_error_payload():
     result = error_payload(None, False)
     assert result == {"error": None}